@@ -57,7 +57,7 @@ from Cerebrum.auth import all_auth_methods
 from Cerebrum.auth import dbal as auth_dbal
 from Cerebrum.modules.password_generator import generator as _pwgen
 from Cerebrum.utils import date_compat
-from Cerebrum.utils.username import suggest_usernames
+from Cerebrum.utils.username import UsernameSnapshot, suggest_usernames
 
 logger = logging.getLogger(__name__)
 
@@ -1328,7 +1328,7 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
 
         return suggest_usernames(fname, lname,
                                  maxlen=maxlen, suffix=suffix,
-                                 validate_func=self.is_valid_new_uname)
+                                 validate_many=self.get_valid_new_unames)
 
     def get_validate_domains(self):
         return [self.const.account_namespace]
@@ -1338,6 +1338,75 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
         domains = domains or self.get_validate_domains()
         return all(self.validate_new_uname(d, uname) for d in domains)
 
+    # Optional snapshot of taken names, see load_uname_snapshot()
+    uname_snapshot = None
+
+    def get_valid_new_unames(self, unames, domains=None):
+        """
+        Get the valid usernames from a list of usernames.
+
+        This is a batch version of :meth:`.is_valid_new_uname`, which uses
+        one query per domain.  If :attr:`.uname_snapshot` is set, it is used
+        instead of the database for the default domains.
+
+        :returns list: valid usernames, in the given order
+        """
+        unames = list(unames)
+        if domains is None and self.uname_snapshot is not None:
+            return self.uname_snapshot.filter_free(unames)
+        valid = set(unames)
+        for domain in (domains or self.get_validate_domains()):
+            if not valid:
+                break
+            valid = self.validate_new_unames(domain, valid)
+        return [uname for uname in unames if uname in valid]
+
+    def validate_new_unames(self, domain, unames):
+        """Get the usernames that are free in a given domain"""
+        unames = set(unames)
+        if not unames:
+            return unames
+        binds = {'domain': int(domain)}
+        # argument_to_sql() doesn't bind long sequences of strings
+        for n, uname in enumerate(unames):
+            binds['name{:d}'.format(n)] = uname
+        taken = set(
+            row['entity_name']
+            for row in self.query(
+                """
+                  SELECT entity_name
+                  FROM [:table schema=cerebrum name=entity_name]
+                  WHERE value_domain=:domain AND entity_name IN ({})
+                """.format(', '.join(':name{:d}'.format(n)
+                                     for n in range(len(unames)))),
+                binds))
+        return unames - taken
+
+    def load_uname_snapshot(self):
+        """
+        Get a snapshot of all taken names in the validate domains.
+
+        Batch jobs can assign the snapshot to :attr:`.uname_snapshot` to
+        avoid database lookups when suggesting usernames.  Any username
+        picked from suggestions must still be checked with
+        :meth:`.is_valid_new_uname` before it is used.
+
+        :rtype: Cerebrum.utils.username.UsernameSnapshot
+        """
+        snapshot = UsernameSnapshot()
+        for domain in self.get_validate_domains():
+            snapshot.update(
+                row['entity_name']
+                for row in self.query(
+                    """
+                      SELECT entity_name
+                      FROM [:table schema=cerebrum name=entity_name]
+                      WHERE value_domain=:domain
+                    """,
+                    {'domain': int(domain)},
+                    fetchall=False))
+        return snapshot
+
     def validate_new_uname(self, domain, uname):
         """Check that the requested username is free in a given domain"""
         try:
@@ -1350,6 +1419,20 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
         except Errors.NotFoundError:
             return True
 
+    def _search_names_prefilter(self, name_pattern, binds):
+        """Extra conditions for the name filter in search.
+
+        Mixins can override this to narrow down a name search, e.g. by using
+        a search index.  The conditions are added in addition to the regular
+        name condition.
+
+        @param name_pattern: The (lowercased) SQL LIKE pattern to search for.
+        @param binds: Binds for the conditions are added to this dict.
+
+        @return: A list of SQL conditions on en.entity_id.
+        """
+        return []
+
     def search(self,
                spread=None,
                name=None,
@@ -1357,7 +1440,9 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
                owner_type=None,
                expire_start='[:now]',
                expire_stop=None,
-               exclude_account_id=None):
+               exclude_account_id=None,
+               after=None,
+               limit=None):
         """Retrieves a list of Accounts filtered by the given criterias.
         If no criteria is given, all non-expired accounts are returned.
 
@@ -1393,6 +1478,14 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
         @param exclude_account_id: Filter out account(s) with given account_id.
         @type exclude_account_id: Integer, list, tuple, set
 
+        @param after: Only return accounts with an account_id greater than
+        this value. Used with limit to page through the result.
+        @type after: Integer
+
+        @param limit: Return at most this many accounts. If after or limit is
+        given, the result is ordered by account_id.
+        @type limit: Integer
+
         @return a list of tuples with the info (account_id,name,owner_id,
         owner_type,expire_date).
         """
@@ -1425,6 +1518,7 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
             name = prepare_string(name)
             where.append("LOWER(en.entity_name) LIKE :name")
             binds['name'] = name
+            where.extend(self._search_names_prefilter(name, binds))
 
         if owner_id is not None:
             where.append(argument_to_sql(owner_id, "ai.owner_id", binds, int))
@@ -1452,17 +1546,29 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
                                                   "ai.account_id",
                                                   binds,
                                                   int))
+
+        if after is not None:
+            where.append("ai.account_id>:after_account_id")
+            binds['after_account_id'] = int(after)
+
         where_str = ""
         if where:
             where_str = "WHERE " + " AND ".join(where)
 
+        order_str = ""
+        if after is not None or limit is not None:
+            order_str = "ORDER BY account_id"
+        if limit is not None:
+            order_str += " LIMIT :limit"
+            binds['limit'] = int(limit)
+
         return self.query("""
         SELECT DISTINCT ai.account_id AS account_id, en.entity_name AS name,
                         ai.owner_id AS owner_id, ai.owner_type AS owner_type,
                         ai.expire_date AS expire_date, ai.description AS
                         description,
                         ai.np_type AS np_type
-        FROM %s %s""" % (','.join(tables), where_str), binds)
+        FROM %s %s %s""" % (','.join(tables), where_str, order_str), binds)
 
     def __str__(self):
         if hasattr(self, 'account_name'):
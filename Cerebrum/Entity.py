@@ -1439,7 +1439,7 @@ class EntityQuarantine(Entity):
         if spreads:
             sel += """
             JOIN [:table schema=cerebrum name=entity_spread] es
-              ON es.entity_id = ei.entity_id AND """
+              ON es.entity_id = eq.entity_id AND """
             sel += argument_to_sql(spreads, "es.spread", binds, int)
         if conditions:
             where = " WHERE " + " AND ".join(conditions)
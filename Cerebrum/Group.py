@@ -483,6 +483,8 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
                creator_id=None,
                expired_only=False,
                fetchall=True,
+               after=None,
+               limit=None,
                ):
         """Search for groups satisfying various filters.
 
@@ -593,6 +595,18 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
           that have expired_date set and expired (relative to the call time).
           N.B. filter_expired and expired_only are mutually exclusive
 
+        :type after: int or None
+        :param after:
+          Only return groups with a group_id greater than this value.  Used
+          with L{limit} to page through the result (keyset pagination).
+
+        :type limit: int or None
+        :param limit:
+          Return at most this many groups.
+
+          If L{after} or L{limit} is given, the result is ordered by
+          group_id.
+
         :rtype: iterable (yielding rows with group information)
         :return:
           An iterable (sequence or a generator) that yields successive db-rows
@@ -797,11 +811,22 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
             where.append(
                 "(gi.expire_date IS NOT NULL AND gi.expire_date < " "[:now])")
 
+        #
+        # keyset pagination
+        if after is not None:
+            where.append("(gi.group_id > :after_group_id)")
+            binds["after_group_id"] = int(after)
+
         prepared = stmt.format(
             extra_tables=(', ' + ', '.join(extra_tables)
                           if extra_tables else ''),
             where='WHERE ' + ' AND '.join(where) if where else '',
         )
+        if after is not None or limit is not None:
+            prepared += " ORDER BY group_id"
+        if limit is not None:
+            prepared += " LIMIT :limit"
+            binds["limit"] = int(limit)
         return self.query(prepared, binds, fetchall=fetchall)
 
     def search_members(self, group_id=None, spread=None,
@@ -810,7 +835,9 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
                        member_spread=None,
                        member_filter_expired=True,
                        include_member_entity_name=False,
-                       group_type=None):
+                       group_type=None,
+                       after=None,
+                       limit=None):
         """Search for group *MEMBERS* satisfying certain criteria.
 
         This method is a complement of L{search}. While L{search} returns
@@ -895,6 +922,19 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
           namespaces to get the names from, otherwise it uses
           cereconf.ENTITY_TYPE_NAMESPACE.
 
+        :type after: tuple or None
+        :param after:
+          A (group_id, member_id) pair.  Only return memberships that sort
+          after this pair.  Used with L{limit} to page through the result
+          (keyset pagination).
+
+        :type limit: int or None
+        :param limit:
+          Return at most this many memberships.
+
+          If L{after} or L{limit} is given, the result is ordered by
+          (group_id, member_id).
+
         :rtype: generator (yielding db-rows with membership information)
         :return:
           A generator that yields successive group_member rows matching all of
@@ -1105,6 +1145,16 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
             where.append(
                 argument_to_sql(group_type, "grp.group_type", binds, int))
 
+        if after is not None:
+            after_group_id, after_member_id = after
+            where.append(
+                "((tmp1.group_id, tmp1.member_id) >"
+                " (:after_group_id, :after_member_id))")
+            binds.update({
+                'after_group_id': int(after_group_id),
+                'after_member_id': int(after_member_id),
+            })
+
         query_str = """
           SELECT DISTINCT {columns}
           FROM {tables}
@@ -1114,6 +1164,11 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
             tables=' '.join(tables),
             where=('WHERE ' + ' AND '.join(where)) if where else '',
         )
+        if after is not None or limit is not None:
+            query_str += " ORDER BY group_id, member_id"
+        if limit is not None:
+            query_str += " LIMIT :limit"
+            binds['limit'] = int(limit)
 
         return self.query(query_str, binds)
 
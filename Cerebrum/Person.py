@@ -1277,6 +1277,21 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
           %(efrom)s
           """ % locals(), {'spread': spread, 'idtype': idtype}, fetchall=False)
 
+    def _search_names_prefilter(self, name_pattern, binds, name_variant=None,
+                                source_system=None):
+        """Extra conditions for wildcard searches in search_person_names.
+
+        Mixins can override this to narrow down a name search, e.g. by using
+        a search index.  The conditions are added in addition to the regular
+        name condition.
+
+        @param name_pattern: The SQL LIKE pattern to search for.
+        @param binds: Binds for the conditions are added to this dict.
+
+        @return: A list of SQL conditions on pn.person_id.
+        """
+        return []
+
     def search_person_names(self, person_id=None, name_variant=None,
                             source_system=None, name=None, exact_match=True,
                             case_sensitive=True):
@@ -1341,6 +1356,11 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
             # Now, putting it all together
             where.append("(%s %s :name)" % (column_name, equality_func))
             binds["name"] = name_pattern
+            if not exact_match:
+                where.extend(self._search_names_prefilter(
+                    name_pattern, binds,
+                    name_variant=name_variant,
+                    source_system=source_system))
 
         where = " AND ".join(where) or ""
         if where:
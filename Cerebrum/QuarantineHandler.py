@@ -95,20 +95,40 @@ from __future__ import (
     unicode_literals,
 )
 
+import collections
+
 import six
 
 import cereconf
 from Cerebrum import Entity
 from Cerebrum.Utils import Factory
-from collections import defaultdict
 
 const = Factory.get("Constants")
 
 
+# The effective outcome of a set of quarantines:
+#
+# locked: if the entity should be locked (see QuarantineHandler.is_locked)
+# skip: if the entity should be omitted (see QuarantineHandler.should_skip)
+# shell: shell override, or None (see QuarantineHandler.get_shell)
+QuarantineDecision = collections.namedtuple('QuarantineDecision',
+                                            ('locked', 'skip', 'shell'))
+
+# Decision for an entity without any (matching) quarantines.
+NO_QUARANTINE = QuarantineDecision(False, False, None)
+
+
 class QuarantineHandler(object):
     qc2rules = {}
     _explicit_sort = False
 
+    # Memoized decisions:
+    # {(<sorted quarantine intvals>, <spread intvals>): QuarantineDecision}
+    #
+    # The decision only depends on the quarantine rules, the quarantine types
+    # and the spreads, so we can safely share results between all entities.
+    _decisions = {}
+
     def __init__(self, database, quarantines, spreads=None):
         """
         Constructs a QuarantineHandler.
@@ -127,38 +147,7 @@ class QuarantineHandler(object):
             the account to consider.
         """
         if len(self.qc2rules) == 0:
-            # Initial setup only done once.
-            #
-            # Converting strings to Constants and build:
-            #
-            # self.qc2rules = {'qc': {'spread_code': {settings} } }
-            used_sort_nums = []
-            for code, rules in list(cereconf.QUARANTINE_RULES.items()):
-                qc_rules = {}
-                self.qc2rules[int(const.Quarantine(code))] = qc_rules
-                if isinstance(rules, dict):
-                    rules = (rules,)
-                for r in rules:
-                    settings = r.copy()
-                    used_sort_nums.append(settings.get('sort_num', None))
-                    if 'spread' in settings:
-                        tmp_spreads = settings['spread']
-                        del(settings['spread'])
-                    else:
-                        tmp_spreads = ('*',)
-                    if isinstance(tmp_spreads, six.text_type):
-                        tmp_spreads = (tmp_spreads,)
-                    for c in tmp_spreads:
-                        if c != '*':
-                            c = int(const.Spread(c))
-                        qc_rules[c] = settings
-            # sort_num must be unique if used
-            orig_len = len(used_sort_nums)
-            used_sort_nums = set(used_sort_nums) - set((None,))
-            if len(used_sort_nums) != 0 and orig_len != len(used_sort_nums):
-                raise ValueError("sort_num in QUARANTINE_RULES illegal")
-            if used_sort_nums:
-                QuarantineHandler._explicit_sort = True
+            self._compile_rules()
         if quarantines is None:
             quarantines = []
         self.quarantines = quarantines
@@ -169,6 +158,44 @@ class QuarantineHandler(object):
         # for this spread last.
         self.spreads.append('*')
 
+    @classmethod
+    def _compile_rules(cls):
+        """
+        Initial setup only done once.
+
+        Converting strings to Constants and build:
+
+            cls.qc2rules = {'qc': {'spread_code': {settings} } }
+        """
+        used_sort_nums = []
+        for code, rules in list(cereconf.QUARANTINE_RULES.items()):
+            qc_rules = {}
+            cls.qc2rules[int(const.Quarantine(code))] = qc_rules
+            if isinstance(rules, dict):
+                rules = (rules,)
+            for r in rules:
+                settings = r.copy()
+                used_sort_nums.append(settings.get('sort_num', None))
+                if 'spread' in settings:
+                    tmp_spreads = settings['spread']
+                    del(settings['spread'])
+                else:
+                    tmp_spreads = ('*',)
+                if isinstance(tmp_spreads, six.text_type):
+                    tmp_spreads = (tmp_spreads,)
+                for c in tmp_spreads:
+                    if c != '*':
+                        c = int(const.Spread(c))
+                    qc_rules[c] = settings
+        # sort_num must be unique if used
+        orig_len = len(used_sort_nums)
+        used_sort_nums = set(used_sort_nums) - set((None,))
+        if len(used_sort_nums) != 0 and orig_len != len(used_sort_nums):
+            raise ValueError("sort_num in QUARANTINE_RULES illegal")
+        if used_sort_nums:
+            QuarantineHandler._explicit_sort = True
+        cls._decisions.clear()
+
     def _get_matches(self):
         ret = []
         for q in self.quarantines:
@@ -192,25 +219,45 @@ class QuarantineHandler(object):
             ret.sort(key=lambda x: x[1])
         return [s[0] for s in ret]
 
-    def get_shell(self):
+    def _evaluate(self):
+        """ Evaluate all matching rules. """
+        locked = skip = False
+        shell = None
         for m in self._get_matches():
-            shell = m.get('shell', None)
-            if shell is not None:
-                return shell
-        return None
+            if shell is None:
+                shell = m.get('shell', None)
+            skip = skip or bool(m.get('skip', False))
+            locked = locked or bool(m.get('lock', False))
+        return QuarantineDecision(locked, skip, shell)
+
+    def get_decision(self):
+        """
+        Get the effective outcome of the current quarantines.
+
+        The result is memoized on the (quarantine set, spread set), and shared
+        between all handlers.
+
+        :rtype: QuarantineDecision
+        """
+        if not self.quarantines:
+            return NO_QUARANTINE
+        key = (tuple(sorted(set(int(q) for q in self.quarantines))),
+               tuple(self.spreads))
+        try:
+            return self._decisions[key]
+        except KeyError:
+            decision = self._decisions[key] = self._evaluate()
+            return decision
+
+    def get_shell(self):
+        return self.get_decision().shell
 
     def should_skip(self):
-        for m in self._get_matches():
-            if m.get('skip', False):
-                return True
-        return False
+        return self.get_decision().skip
 
     def is_locked(self):
         """The account should be known, but the account locked"""
-        for m in self._get_matches():
-            if m.get('lock', False):
-                return True
-        return False
+        return self.get_decision().locked
 
     @staticmethod
     def check_entity_quarantines(db, entity_id, spreads=None):
@@ -224,19 +271,29 @@ class QuarantineHandler(object):
             spreads)
 
     @staticmethod
-    def get_locked_entities(db, entity_types=None, quarantine_types=None,
-                            only_active=True, only_disabled=False,
-                            entity_ids=None, ignore_quarantine_types=None):
-        """Utility method that the returns the entity-id of all locked entities.
+    def get_quarantine_decisions(db, entity_types=None, spreads=None,
+                                 rule_spreads=None, only_active=True,
+                                 only_disabled=False, entity_ids=None,
+                                 quarantine_types=None,
+                                 ignore_quarantine_types=None):
+        """Evaluate quarantines for all matching entities in one pass.
+
+        Entities without quarantines are omitted from the result, their
+        decision is always :data:`NO_QUARANTINE`.
 
         :param db: A database object
         :param entity_types: Entity types to filter on
-        :param quarantine_types: Quarantine types to filter on
-        :param only_active: Only return locked and active quarantines
-        :param only_disabled: Only return disabled quarantines
+        :param spreads: Only consider entities with one of these spreads
+        :param rule_spreads: Spreads to use when selecting quarantine rules
+        :param only_active: Only consider active quarantines
+        :param only_disabled: Only consider disabled quarantines
         :param entity_ids: Spesific entity-ids to check
-        :param ignore_quarantine_types: Quarantines to ignore"""
-        cache = defaultdict(list)
+        :param quarantine_types: Quarantines to consider
+        :param ignore_quarantine_types: Quarantines to ignore
+
+        :returns dict: entity_id -> QuarantineDecision
+        """
+        cache = collections.defaultdict(list)
         eq = Entity.EntityQuarantine(db)
         for row in eq.list_entity_quarantines(
                 entity_types=entity_types,
@@ -244,13 +301,39 @@ class QuarantineHandler(object):
                 only_active=only_active,
                 only_disabled=only_disabled,
                 entity_ids=entity_ids,
-                ignore_quarantine_types=ignore_quarantine_types):
-            cache[row['entity_id']].append(
-                row['quarantine_type'])
+                ignore_quarantine_types=ignore_quarantine_types,
+                spreads=spreads):
+            cache[row['entity_id']].append(int(row['quarantine_type']))
 
-        def is_locked(key):
-            return QuarantineHandler(db, cache.get(key)).is_locked()
-        return set(k for k in cache if is_locked(k))
+        qh = QuarantineHandler(db, None, spreads=rule_spreads)
+        decisions = {}
+        for entity_id, quarantines in cache.items():
+            qh.quarantines = quarantines
+            decisions[entity_id] = qh.get_decision()
+        return decisions
+
+    @staticmethod
+    def get_locked_entities(db, entity_types=None, quarantine_types=None,
+                            only_active=True, only_disabled=False,
+                            entity_ids=None, ignore_quarantine_types=None):
+        """Utility method that the returns the entity-id of all locked entities.
+
+        :param db: A database object
+        :param entity_types: Entity types to filter on
+        :param quarantine_types: Quarantine types to filter on
+        :param only_active: Only return locked and active quarantines
+        :param only_disabled: Only return disabled quarantines
+        :param entity_ids: Spesific entity-ids to check
+        :param ignore_quarantine_types: Quarantines to ignore"""
+        decisions = QuarantineHandler.get_quarantine_decisions(
+            db,
+            entity_types=entity_types,
+            quarantine_types=quarantine_types,
+            only_active=only_active,
+            only_disabled=only_disabled,
+            entity_ids=entity_ids,
+            ignore_quarantine_types=ignore_quarantine_types)
+        return set(k for k, d in decisions.items() if d.locked)
 
 
 def _test():
@@ -49,7 +49,10 @@ import json
 import os
 import types
 
-from Cerebrum.utils.module import load_source
+from Cerebrum.utils.module import lazy_import, load_source, module_exists
+
+# PyYaml is expensive to import, and is only needed for yaml configs
+yaml = lazy_import('yaml')
 
 # TODO: Implement registry using Cerebrum.utils.mappings
 
@@ -183,9 +186,7 @@ class JsonParser(_AbstractConfigParser):
         return json.dumps(data)
 
 
-try:
-    import yaml
-
+if module_exists('yaml'):
     @register_extension('yml', 'yaml')
     class YamlParser(_AbstractConfigParser):
         """ YAML Parser API.
@@ -206,8 +207,6 @@ try:
                 OrderedDict,
                 yaml.representer.SafeRepresenter.represent_dict)
             return yaml.dump(data)
-except ImportError:
-    pass
 
 
 # TODO: We probably don't want to *register* this module,
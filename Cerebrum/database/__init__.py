@@ -252,7 +252,8 @@ class Cursor(object):
 
     def __iter__(self):
         """Return iterator over the current query's results."""
-        return row_factory.iter_rows(self, self._row_fields)
+        return row_factory.iter_rows(self, self._row_fields,
+                                     row_type=self._db.row_type)
 
     def query(self, query, params=(), fetchall=True):
         """
@@ -284,10 +285,13 @@ class Cursor(object):
             # should we raise an exception here?
             return None
 
+        row_type = self._db.row_type
         if fetchall:
-            return row_factory.list_rows(self, self._row_fields)
+            return row_factory.list_rows(self, self._row_fields,
+                                         row_type=row_type)
         else:
-            return row_factory.iter_rows(self, self._row_fields)
+            return row_factory.iter_rows(self, self._row_fields,
+                                         row_type=row_type)
 
     def query_1(self, query, params=()):
         """
@@ -399,6 +403,10 @@ class Database(object):
     # A table of macros to use by the database dialect
     macro_table = macros.common_macros
 
+    # The row type to use for query results, see
+    # `Cerebrum.database.row_factory`.  None gives the default row type.
+    row_type = None
+
     encoding = (
         cereconf.CEREBRUM_DATABASE_CONNECT_DATA.get('client_encoding')
         or 'UTF-8'
@@ -43,15 +43,25 @@ specifically its row and iterator implementations
 py:class:`Cerebrum.extlib.records.RecordCollection`) has been chosen as
 replacements.
 
+A third option is the compact, immutable
+py:class:`Cerebrum.database.tuple_row.TupleRow`, which is considerably faster
+to create and smaller than the other row types.  This is a good fit for
+queries with large result sets.
+
 Configuration
 -------------
-The behaviour of this module changes with the environment variable
+The default behaviour of this module changes with the environment variable
 ``CEREBRUM_RECORDS``:
 
 - If set to ``CEREBRUM_RECORDS=0`` or unset, this module will use
   legacy py:mod:`Cerebrum.extlib.db_row` objects.
 - If set to ``CEREBRUM_RECORDS=1``, this module will use
   the new py:mod:`Cerebrum.extlib.records` objects.
+
+The row type can also be selected for each database connection, by setting
+``Database.row_type`` to one of ``ROW_TYPE_DB_ROW``, ``ROW_TYPE_RECORDS``, or
+``ROW_TYPE_TUPLE``.  With ``CEREBRUM_RECORDS=1``, db_row is only imported
+if ``ROW_TYPE_DB_ROW`` is selected.
 """
 from __future__ import (
     absolute_import,
@@ -62,21 +72,39 @@ from __future__ import (
 import os
 
 from Cerebrum.extlib import records
+from . import tuple_row
+
+ROW_TYPE_DB_ROW = 'db_row'
+ROW_TYPE_RECORDS = 'records'
+ROW_TYPE_TUPLE = 'tuple'
+
+# Number of rows to fetch at a time when iterating over tuple rows
+ITER_FETCH_SIZE = 1000
 
 
 # Cerebrum.extlib.records feature toggle.
 # If CEREBRUM_RECORDS is set, we change from db_row to records
 # TODO: Remove feature toggle when records is in use everywhere
 ENABLE_RECORDS = bool(int(os.environ.get('CEREBRUM_RECORDS') or 0))
+DEFAULT_ROW_TYPE = ROW_TYPE_RECORDS if ENABLE_RECORDS else ROW_TYPE_DB_ROW
+
+
+def _make_db_row_class(fields):
+    """ Make a db_row row class, importing db_row on demand. """
+    try:
+        # PY3: db_row is not importable
+        from Cerebrum.extlib import db_row
+    except ImportError:
+        raise ValueError('row type not available: ' + repr(ROW_TYPE_DB_ROW))
+    return db_row.make_row_class(fields)
 
 
 # ROW_TYPES for Database.pythonify_data
 # TODO: Does this work with records?!
 if ENABLE_RECORDS:
     ROW_TYPES = (records.Record,)
-
-    def make_row_class(*args, **kwargs):
-        raise NotImplementedError('db_row disabled')
+    # db_row may still be selected with Database.row_type
+    make_row_class = _make_db_row_class
 
 else:
     # PY3: db_row is not importable
@@ -85,6 +113,15 @@ else:
     ROW_TYPES = (db_row.abstract_row,)
 
 
+def get_row_type(row_type=None):
+    """ Validate a row type, or get the default row type. """
+    if row_type is None:
+        return DEFAULT_ROW_TYPE
+    if row_type not in (ROW_TYPE_DB_ROW, ROW_TYPE_RECORDS, ROW_TYPE_TUPLE):
+        raise ValueError('invalid row type: ' + repr(row_type))
+    return row_type
+
+
 class _DbRowIterator(object):
     """
     Legacy row iterator for db_row.
@@ -127,7 +164,7 @@ def _resultiter(cursor, size=None):
             yield result
 
 
-def iter_rows(cursor, fields):
+def iter_rows(cursor, fields, row_type=None):
     """ Iterate over cursor results.
 
     Return value for ``Database.query(..., fetchall=False)``.  This function
@@ -136,16 +173,23 @@ def iter_rows(cursor, fields):
 
     :type cursor: Cerebrum.database.Cursor
     :type fields: tuple
+    :param row_type: row type to use (default: DEFAULT_ROW_TYPE)
 
     :returns:
         Returns an iterator over cursor results.
 
-        The object type depends on module config, but is one of:
+        The object type depends on row type, and is one of:
 
         - py:class:`._DbRowIterator`
         - py:class:`Cerebrum.extlib.records.RecordCollection`
+        - a generator of py:class:`Cerebrum.database.tuple_row.TupleRow`
     """
-    if ENABLE_RECORDS:
+    row_type = get_row_type(row_type)
+    if row_type == ROW_TYPE_TUPLE:
+        row_class = tuple_row.make_row_class(fields)
+        data = _resultiter(cursor, size=ITER_FETCH_SIZE)
+        return (row_class(row) for row in data)
+    elif row_type == ROW_TYPE_RECORDS:
         data = _resultiter(cursor)
         row_gen = (records.Record(fields, row) for row in data)
         return records.RecordCollection(row_gen)
@@ -154,7 +198,7 @@ def iter_rows(cursor, fields):
         return _DbRowIterator(cursor, row_class)
 
 
-def list_rows(cursor, fields):
+def list_rows(cursor, fields, row_type=None):
     """ Return all cursor results.
 
     Return value for ``Database.query(..., fetchall=True)``.  This function
@@ -163,18 +207,24 @@ def list_rows(cursor, fields):
 
     :type cursor: Cerebrum.database.Cursor
     :type fields: tuple
+    :param row_type: row type to use (default: DEFAULT_ROW_TYPE)
 
     :rtype: list
     :returns:
         Returns a list of cursor results.
 
-        List item type depends on module config, and is one of:
+        List item type depends on row type, and is one of:
 
         - py:class:`Cerebrum.extlib.db_row.row`
         - py:class:`Cerebrum.extlib.records.Record`
+        - py:class:`Cerebrum.database.tuple_row.TupleRow`
     """
+    row_type = get_row_type(row_type)
     data = cursor.fetchall()
-    if ENABLE_RECORDS:
+    if row_type == ROW_TYPE_TUPLE:
+        row_class = tuple_row.make_row_class(fields)
+        return [row_class(row) for row in data]
+    elif row_type == ROW_TYPE_RECORDS:
         row_gen = (records.Record(fields, row) for row in data)
         return records.RecordCollection(row_gen).all()
     else:
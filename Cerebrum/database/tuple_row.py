@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Compact, tuple based database rows.
+
+A :class:`TupleRow` is a tuple subclass without any per-instance attributes,
+so a row is exactly as large as a tuple with the same values, and is created
+by the builtin tuple constructor.  Column names are stored in the row
+*class*, which is created once for each set of column names (see
+:func:`make_row_class`).
+
+Rows support the same read interface as :mod:`Cerebrum.extlib.db_row` rows:
+
+::
+
+    row_class = make_row_class(('entity_id', 'entity_name'))
+    row = row_class((1, 'foo'))
+    row['entity_name'] == row[1] == row.entity_name == 'foo'
+    dict(row) == {'entity_id': 1, 'entity_name': 'foo'}
+
+Unlike db_row rows, tuple rows are immutable.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import six
+
+from Cerebrum import Cache
+
+_tuple_getitem = tuple.__getitem__
+
+
+class TupleRow(tuple):
+    """ Abstract row class. """
+
+    __slots__ = ()
+
+    # column names
+    _fields = ()
+
+    # column name/index -> index, set by make_row_class()
+    _index = {}
+
+    def __getitem__(self, key):
+        try:
+            return _tuple_getitem(self, self._index[key])
+        except KeyError:
+            if isinstance(key, six.string_types):
+                raise
+            # index out of range
+            return _tuple_getitem(self, key)
+        except TypeError:
+            # unhashable key, e.g. a slice
+            return _tuple_getitem(self, key)
+
+    def __getattr__(self, attr):
+        # Deprecated, but still supported by db_row
+        try:
+            return _tuple_getitem(self, self._index[attr])
+        except KeyError:
+            raise AttributeError(attr)
+
+    if six.PY2:
+        def __getslice__(self, i, j):
+            return tuple(self)[i:j]
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{}={!r}'.format(k, v)
+                      for k, v in zip(self._fields, self)))
+
+    def keys(self):
+        """ Column names. """
+        return self._fields
+
+    def values(self):
+        """ Column values. """
+        return tuple(self)
+
+    def items(self):
+        """ (column name, column value) pairs. """
+        return list(zip(self._fields, self))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def has_key(self, key):
+        return key in self._fields
+
+    def dict(self):
+        return dict(zip(self._fields, self))
+
+    def copy(self):
+        return self
+
+
+_row_classes = Cache.Cache(mixins=[Cache.cache_mru, Cache.cache_slots],
+                           size=200)
+
+
+def make_row_class(fields):
+    """
+    Get a row class for a given set of column names.
+
+    Row classes are cached, so that queries that return the same columns
+    share a row class.
+
+    :param fields: column names, in order
+
+    :rtype: type
+    :returns: a TupleRow subclass
+    """
+    fields = tuple(fields)
+    try:
+        return _row_classes[fields]
+    except KeyError:
+        pass
+
+    index = {}
+    size = len(fields)
+    for pos, field in enumerate(fields):
+        # the first column wins if a name is repeated
+        index.setdefault(field, pos)
+        index[pos] = pos
+        index[pos - size] = pos
+
+    row_class = type(str('row'), (TupleRow,), {
+        '__slots__': (),
+        '_fields': fields,
+        '_index': index,
+    })
+    _row_classes[fields] = row_class
+    return row_class
@@ -303,6 +303,11 @@ SIMILARSIZE_CHECK_DISABLED = False
 # Default is to use the values from clients without modifications.
 SIMILARSIZE_LIMIT_MULTIPLIER = 1.0
 
+# Use the trigram index from Cerebrum.modules.name_search to speed up
+# wildcard name searches.  Requires the name_search mixins in CLASS_PERSON
+# and CLASS_ACCOUNT, and the mod_name_search.sql schema.
+NAME_SEARCH_TRIGRAM = False
+
 # What encoding the database data is encoded in. This must be set to be able to
 # decode the data to Unicode, which is needed in some exports. If the database
 # contains data in other encodings, an attempt of unicodifying it would raise
@@ -64,16 +64,47 @@ def _set_account_types(account, person, affiliations):
 
 
 class AccountPolicy(object):
-    def __init__(self, db):
+    def __init__(self, db, uname_snapshot=None):
+        """
+        :type uname_snapshot: Cerebrum.utils.username.UsernameSnapshot
+        :param uname_snapshot:
+            Taken usernames, for suggesting usernames without database
+            lookups in batch jobs (see
+            :meth:`Cerebrum.Account.Account.load_uname_snapshot`).
+        """
         self.db = db
         self.const = Factory.get('Constants')(db)
         self.account = Factory.get('Account')(db)
         self.posix_user = Factory.get('PosixUser')(db)
+        self.uname_snapshot = uname_snapshot
+        self.account.uname_snapshot = uname_snapshot
+        self.posix_user.uname_snapshot = uname_snapshot
         self.disk_quota = DiskQuota(db)
         self.disk_mapping = OUDiskMapping(db)
         self.ou_perspective = self.const.OUPerspective(
             cereconf.DEFAULT_OU_PERSPECTIVE)
 
+    def _suggest_uname(self, user, person):
+        try:
+            user_names = user.suggest_unames(person)
+        except NotFoundError:
+            raise InvalidAccountCreationArgument(
+                'Person %s missing first- or lastname',
+                person.entity_id
+            )
+        for uname in user_names:
+            if self.uname_snapshot is None:
+                return uname
+            # The snapshot may be outdated, so we need to check the
+            # database before using a suggestion.
+            if user.is_valid_new_uname(uname):
+                return uname
+            self.uname_snapshot.add(uname)
+        raise InvalidAccountCreationArgument(
+            'Could not generate user name for person %s',
+            person.entity_id
+        )
+
     def create_basic_account(self, creator_id, owner, uname, np_type=None):
         self.account.clear()
         if not self.account.is_valid_new_uname(uname):
@@ -231,20 +262,7 @@ class AccountPolicy(object):
         """
         user = self._get_user_obj(make_posix_user)
         if uname is None:
-            try:
-                user_names = user.suggest_unames(person)
-            except NotFoundError:
-                raise InvalidAccountCreationArgument(
-                    'Person %s missing first- or lastname',
-                    person.entity_id
-                )
-            try:
-                uname = user_names[0]
-            except IndexError:
-                raise InvalidAccountCreationArgument(
-                    'Could not generate user name for person %s',
-                    person.entity_id
-                )
+            uname = self._suggest_uname(user, person)
 
         self.account.clear()
         self.account.populate(uname,
@@ -254,6 +272,8 @@ class AccountPolicy(object):
                               creator_id,
                               expire_date)
         self.account.write_db()
+        if self.uname_snapshot is not None:
+            self.uname_snapshot.add(uname)
         user = self._update_account(person, affiliations,
                                     disks, expire_date,
                                     traits=traits, spreads=spreads,
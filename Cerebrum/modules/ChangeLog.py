@@ -25,7 +25,7 @@ from Cerebrum.Utils import argument_to_sql
 from Cerebrum.utils import json
 
 
-__version__ = "1.6"
+__version__ = "1.7"
 
 
 def _params_to_db(params, separators=(',', ':')):
@@ -87,6 +87,7 @@ from Cerebrum import Utils
 from Cerebrum.Disk import Host
 from Cerebrum.Entity import Entity
 from Cerebrum.Utils import prepare_string, argument_to_sql
+from Cerebrum.modules.email_snapshot import EmailSnapshot
 from Cerebrum.utils import transliterate
 from Cerebrum.utils.email import legacy_validate_lp, legacy_validate_domain
 
@@ -1085,9 +1086,9 @@ class EmailAddress(Entity_class):
                fetchall=False):
         """Search for EmailAddresse by given criterias.
 
-        @type local_part: str
+        @type local_part: str or sequence thereof
         @param local_part:
-            Filter the result by a given local part. Must match exactly.
+            Filter the result by the given local parts. Must match exactly.
 
         @type local_part_pattern: str
         @param local_part_pattern:
@@ -1124,8 +1125,15 @@ class EmailAddress(Entity_class):
         """
         conditions = []
         binds = locals()
-        if local_part is not None:
+        if isinstance(local_part, six.string_types):
             conditions.append('ea.local_part = :local_part')
+        elif local_part is not None:
+            # argument_to_sql() doesn't bind long sequences of strings
+            names = []
+            for n, value in enumerate(local_part):
+                binds['local_part%d' % n] = value
+                names.append(':local_part%d' % n)
+            conditions.append('ea.local_part IN (%s)' % ', '.join(names))
         if local_part_pattern is not None:
             local_part_pattern = local_part_pattern.lower()
             conditions.append('LOWER(ea.local_part) LIKE :local_part_pattern')
@@ -1459,10 +1467,16 @@ class EmailQuota(EmailTarget):
         SELECT target_id, quota_soft, quota_hard
         FROM [:table schema=cerebrum name=email_quota]""")
 
-    def get_quota_stats_by_server(self, server):
+    def get_quota_stats_by_server(self, server, snapshot=None):
         """Return statistics about the quota handed out to account
         targets.  If there are no targets on a server, the values will
-        be None."""
+        be None.
+
+        If an EmailSnapshot is given, the statistics are taken from the
+        snapshot.  This is a lot cheaper when getting statistics for many
+        servers."""
+        if snapshot is not None:
+            return snapshot.get_quota_stats_by_server(server)
         return self.query_1(
             """ SELECT SUM(eq.quota_hard) AS total_quota,
                        MIN(eq.quota_hard) AS min_quota,
@@ -2688,7 +2702,8 @@ class AccountEmailMixin(Account.Account):
                 ed.rewrite_special_domains(r['domain']))
 
     def getdict_uname2mailaddr(
-            self, filter_expired=True, primary_only=True, filter_deleted=True):
+            self, filter_expired=True, primary_only=True, filter_deleted=True,
+            snapshot=None):
         """Collect uname -> e-mail address mappings.
 
         This method collects e-mail address information for all users in
@@ -2707,6 +2722,11 @@ class AccountEmailMixin(Account.Account):
         @param filter_deleted:
           When True, do NOT collect information about deleted email accounts.
 
+        @type snapshot: Cerebrum.modules.email_snapshot.EmailSnapshot
+        @param snapshot:
+          An email snapshot to collect the information from.  If not given,
+          a new snapshot is loaded.
+
         @rtype: dict (of basestring to basestring/sequence of basestring)
         @return:
           A dict mapping user names (all/non-expired) to e-mail
@@ -2714,62 +2734,11 @@ class AccountEmailMixin(Account.Account):
           basestring. When primary_only is False, 'information' is a sequence
           (even when there is just one e-mail address for a user names)
         """
-        query_fmt = """
-            SELECT en.entity_name, ea.local_part, ed.domain
-            FROM [:table schema=cerebrum name=account_info] ai
-            JOIN [:table schema=cerebrum name=entity_name] en
-              ON en.entity_id = ai.account_id
-            JOIN [:table schema=cerebrum name=email_target] et
-              ON {target_join!s}
-              AND et.target_entity_id = ai.account_id
-            {extra_join!s}
-            JOIN [:table schema=cerebrum name=email_domain] ed
-              ON ed.domain_id = ea.domain_id
-            WHERE {where!s}
-            """
-
-        where = ["en.value_domain = :namespace", ]
-        binds = {'namespace': int(self.const.account_namespace)}
-
-        target_type = [self.const.email_target_account, ]
-        if not filter_deleted:
-            target_type.append(self.const.email_target_deleted)
-        target_join = argument_to_sql(
-            target_type, 'et.target_type', binds, int)
-
-        if primary_only:
-            extra_join = """
-                JOIN [:table schema=cerebrum name=email_primary_address] epa
-                  ON epa.target_id = et.target_id
-                JOIN [:table schema=cerebrum name=email_address] ea
-                  ON ea.address_id = epa.address_id
-            """
-        else:
-            extra_join = """
-                 JOIN [:table schema=cerebrum name=email_address] ea
-                   ON ea.target_id = et.target_id
-            """
-
-        if filter_expired:
-            where.append("(ai.expire_date IS NULL OR ai.expire_date > [:now])")
-
-        ret = {}
-        ed = EmailDomain(self._db)
-
-        for row in self.query(
-                query_fmt.format(
-                    target_join=target_join,
-                    extra_join=extra_join,
-                    where=" AND ".join(where)),
-                binds, fetchall=False):
-            uname = row['entity_name']
-            address = '@'.join((row['local_part'],
-                                ed.rewrite_special_domains(row['domain'])))
-            if primary_only:
-                ret[uname] = address
-            else:
-                ret.setdefault(uname, set()).add(address)
-        return ret
+        if snapshot is None:
+            snapshot = EmailSnapshot(self._db)
+        return snapshot.get_uname2mailaddr(filter_expired=filter_expired,
+                                           primary_only=primary_only,
+                                           filter_deleted=filter_deleted)
 
     def wash_email_local_part(self, local_part):
         """
@@ -37,6 +37,7 @@ from Cerebrum.Constants import _ChangeTypeCode, _get_code
 from Cerebrum.Entity import Entity
 from Cerebrum.Utils import NotSet
 from Cerebrum.modules.trait.constants import _EntityTraitCode
+from Cerebrum.modules.trait.snapshot import get_cache, invalidate_cache
 from Cerebrum.utils import text_compat
 from Cerebrum.utils.date_compat import get_datetime_naive
 
@@ -110,6 +111,8 @@ class EntityTrait(Entity):
                 self._db.log_change(self.entity_id, self.clconst.trait_add,
                                     None,
                                     change_params=params)
+        if self.__trait_updates:
+            invalidate_cache(self._db, self.entity_id)
         self.__trait_updates = {}
 
     def delete_trait(self, code):
@@ -145,6 +148,7 @@ class EntityTrait(Entity):
         self.execute(delete_stmt, binds)
         self._db.log_change(self.entity_id, self.clconst.trait_del, None,
                             change_params=params)
+        invalidate_cache(self._db, self.entity_id)
         del self.__traits[code]
 
     def delete(self):
@@ -180,12 +184,28 @@ class EntityTrait(Entity):
                                'strval': strval}
         return self.__trait_updates[code]
 
+    def __make_trait(self, code, value):
+        """Make a trait dict from a cached TraitValue."""
+        trait = dict(value._asdict())
+        trait.update({
+            'entity_id': self.entity_id,
+            'entity_type': int(self.entity_type),
+            'code': int(code),
+        })
+        return trait
+
     def get_traits(self):
         """Returns a dict of traits associated with the current entity
         keyed by the code constant.
 
         """
-        if not self.__traits:
+        cache = get_cache(self._db)
+        if not self.__traits and cache is not None and cache.codes is None:
+            for code, value in cache.get_entity_traits(
+                    self.entity_id).items():
+                self.__traits[_EntityTraitCode(code)] = (
+                    self.__make_trait(code, value))
+        elif not self.__traits:
             for row in self.query(
                     """
                     SELECT entity_id, entity_type, code,
@@ -203,10 +223,17 @@ class EntityTrait(Entity):
 
     def get_trait(self, trait):
         """Return the trait value (as a dict), or None."""
+        code = _EntityTraitCode(trait)
+        cache = get_cache(self._db)
+        if not self.__traits and cache is not None and cache.covers(code):
+            value = cache.get(code, self.entity_id)
+            if value is None:
+                return None
+            return self.__make_trait(code, value)
         traits = self.get_traits()
         if traits is None:
             return None
-        return traits.get(_EntityTraitCode(trait))
+        return traits.get(code)
 
     def list_traits(self, code=NotSet, target_id=NotSet, entity_id=NotSet,
                     date=NotSet, numval=NotSet, strval=NotSet,
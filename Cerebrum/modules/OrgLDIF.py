@@ -23,6 +23,7 @@ from __future__ import print_function
 
 import io
 import logging
+import multiprocessing
 import os
 import pickle
 import sys
@@ -32,10 +33,13 @@ import six
 
 import cereconf
 from Cerebrum import Entity, Errors
-from Cerebrum.Constants import _AuthoritativeSystemCode, _LanguageCode
+from Cerebrum.Constants import (_AuthoritativeSystemCode,
+                                _CerebrumCode,
+                                _LanguageCode)
 from Cerebrum.export.auth import AuthExporter
 from Cerebrum.Utils import Factory, make_timer
 from Cerebrum.QuarantineHandler import QuarantineHandler
+from Cerebrum.database import Cursor, Database
 from Cerebrum.modules.LDIFutils import (attr_unique,
                                         entry_string,
                                         get_ldap_config,
@@ -225,6 +229,8 @@ class OrgLDIF(object):
         self.aliases = bool(self.config.person.get('aliases'))
         self.ou2DN = {None: None}  # {ou_id:      DN or None(root)}
         self.used_DNs = {}            # {used DN:    True}
+        self.country_names = {}       # {country code: country name}
+        self.contact_mail = None      # {entity_id: [email addresses]}
         self.person_groups = {}            # {group name: {member ID: True}}
         self.system_lookup_order = [int(getattr(self.const, s))
                                     for s in cereconf.SYSTEM_LOOKUP_ORDER]
@@ -858,7 +864,8 @@ class OrgLDIF(object):
                     "to be different from None and LDAP_PERSON['dn']")
             self.alias_default_parent_dn = self.dummy_ou_dn or self.ou_dn
 
-    def generate_person(self, outfile, alias_outfile, use_mail_module):
+    def generate_person(self, outfile, alias_outfile, use_mail_module,
+                        processes=None):
         """
         Output person tree and aliases if cereconf.LDAP_PERSON['dn'] is set.
 
@@ -867,6 +874,10 @@ class OrgLDIF(object):
         If use_mail_module is set, persons' e-mail addresses are set to
         their primary users' e-mail addresses.  Otherwise, the addresses
         are taken from contact info registered for the individual persons.
+
+        If processes is set, person entries are built by that many worker
+        processes, see :meth:`.iter_person_entries_parallel`.  The output is
+        identical to the output without workers.
         """
         if not self.person_dn:
             return
@@ -879,25 +890,114 @@ class OrgLDIF(object):
         round_timer = make_timer(logger)
         rounds = 0
         exported = 0
-        for person_id, row in six.iteritems(self.person_cache):
+        if processes and processes > 1:
+            entries = self.iter_person_entries_parallel(processes)
+        else:
+            entries = self.iter_person_entries()
+        for person_id, dn, entry_text, alias_text in entries:
             if rounds % 10000 == 0 and rounds != 0:
                 round_timer("...processed %d rows..." % rounds)
             rounds += 1
-            dn, entry, alias_info = self.make_person_entry(row, person_id)
             if dn:
                 if dn in self.used_DNs:
                     logger.warn("Omitting person_id=%d, duplicate DN %s",
                                 person_id, repr(dn))
                 else:
                     self.used_DNs[dn] = True
-                    outfile.write(entry_string(dn, entry, False))
-                    if self.aliases and alias_info:
-                        self.write_person_alias(alias_outfile,
-                                                dn, entry, alias_info)
+                    outfile.write(entry_text)
+                    if alias_text:
+                        alias_outfile.write(alias_text)
                     exported += 1
         timer("...persons done, %d exported and %d omitted." %
               (exported, rounds - exported))
 
+    def make_person_output(self, person_id):
+        """
+        Build the LDIF text for a person.
+
+        :returns tuple:
+            (person_id, dn, entry text, alias text), where dn is None if the
+            person should not be output, and alias text is None if no alias
+            should be output.
+        """
+        row = self.person_cache[person_id]
+        dn, entry, alias_info = self.make_person_entry(row, person_id)
+        if not dn:
+            return person_id, None, None, None
+        alias_text = None
+        if self.aliases and alias_info:
+            alias_out = io.StringIO()
+            self.write_person_alias(alias_out, dn, entry, alias_info)
+            alias_text = alias_out.getvalue()
+        return person_id, dn, entry_string(dn, entry, False), alias_text
+
+    def iter_person_entries(self):
+        """ Build person output for all persons in person_cache. """
+        for person_id in self.person_cache:
+            yield self.make_person_output(person_id)
+
+    def prepare_person_workers(self):
+        """
+        Prepare caches for building person entries in worker processes.
+
+        Worker processes must not use the database, as they share the
+        database connections of the parent process.  This method fills
+        caches for everything that make_person_entry() would otherwise look
+        up in the database.  Subclasses that need the database to build
+        person entries must prefetch their data here, or can't use worker
+        processes.  Any database access in a worker process raises a
+        RuntimeError.
+        """
+        # constants are looked up in the database on first use
+        for code in self.const.fetch_constants(_CerebrumCode):
+            try:
+                int(code)
+            except Errors.NotFoundError:
+                pass
+
+        # quarantine decisions are memoized by the QuarantineHandler
+        for quarantines in (self.acc_quarantines, self.acc_locked_quarantines):
+            for qt in set(tuple(qt) for qt in quarantines.values() if qt):
+                QuarantineHandler(self.db, qt).get_decision()
+
+        # country names for addresses
+        for addrs in self.addr_info.values():
+            for addr in addrs.values():
+                if addr[4]:
+                    self.get_country_name(addr[4])
+
+        # contact info e-mail addresses
+        if not self.account_mail:
+            self.contact_mail = self.get_contacts(
+                contact_type=self.const.contact_email,
+                verify=verify_IA5String,
+                normalize=normalize_IA5String)
+
+    def iter_person_entries_parallel(self, processes, chunksize=500):
+        """
+        Build person output for all persons in person_cache in parallel.
+
+        The worker processes are forked after all person data is cached,
+        and share the caches with the parent process.  The persons are
+        partitioned into chunks of chunksize persons, and the results are
+        returned in the same order as from :meth:`.iter_person_entries`.
+        """
+        self.prepare_person_workers()
+        person_ids = list(self.person_cache)
+        chunks = [person_ids[i:i + chunksize]
+                  for i in range(0, len(person_ids), chunksize)]
+        logger.info("Processing %d persons in %d chunks with %d workers",
+                    len(person_ids), len(chunks), processes)
+        pool = multiprocessing.Pool(processes, _init_person_worker, (self,))
+        try:
+            for result in pool.imap(_make_person_chunk, chunks):
+                for item in result:
+                    yield item
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
     def list_persons(self):
         # Return a list or iterator of persons to consider for output.
         return self.account.list_accounts_by_type(
@@ -1073,11 +1173,14 @@ class OrgLDIF(object):
                 mail_source_id = person_id
             else:
                 mail_source_id = account_id
-            mail = self.get_contacts(
-                entity_id=mail_source_id,
-                contact_type=self.const.contact_email,
-                verify=verify_IA5String,
-                normalize=normalize_IA5String)
+            if self.contact_mail is None:
+                mail = self.get_contacts(
+                    entity_id=mail_source_id,
+                    contact_type=self.const.contact_email,
+                    verify=verify_IA5String,
+                    normalize=normalize_IA5String)
+            else:
+                mail = self.contact_mail.get(mail_source_id)
             if mail:
                 entry['mail'] = mail
 
@@ -1151,7 +1254,7 @@ class OrgLDIF(object):
         # Return a postal addres or street attribute value made from the input.
         # 'sep' should be '$' for postal addresses; usually ', ' for streets.
         if country:
-            country = self.const.Country(country).country
+            country = self.get_country_name(country)
         if p_o_box:
             p_o_box = "Pb. %s" % p_o_box
         address_text = (address_text or "").strip()
@@ -1165,6 +1268,15 @@ class OrgLDIF(object):
             val = postal_escape_re.sub(hex_escape_match, val)
         return val.replace("\n", sep)
 
+    def get_country_name(self, country):
+        # Return the name of a country code (cached).
+        try:
+            return self.country_names[country]
+        except KeyError:
+            name = self.country_names[country] = (
+                self.const.Country(country).country)
+            return name
+
     def make_entity_addresses(self, entity, lookup_order=(None,)):
         # Return [postal address, street address] for the given entity.
         result = []
@@ -1396,6 +1508,46 @@ class OrgLDIF(object):
         return selector[selector[2](person_id)]
 
 
+# The OrgLDIF object in person worker processes
+_person_worker_ldif = None
+
+
+def _deny_database_access(*args, **kwargs):
+    raise RuntimeError("Database access in an OrgLDIF worker process, "
+                       "missing prefetch in prepare_person_workers()?")
+
+
+def _iter_subclasses(cls):
+    yield cls
+    for subclass in cls.__subclasses__():
+        for c in _iter_subclasses(subclass):
+            yield c
+
+
+def _deny_database():
+    """ Make all database access in this process raise a RuntimeError. """
+    for base, names in ((Cursor, ('execute', 'executemany', 'ping')),
+                        (Database, ('commit', 'rollback', 'ping'))):
+        for cls in set(_iter_subclasses(base)):
+            for name in names:
+                if name in vars(cls):
+                    setattr(cls, name, _deny_database_access)
+
+
+def _init_person_worker(ldif):
+    global _person_worker_ldif
+    _person_worker_ldif = ldif
+    # The worker shares database connections with the parent process (and
+    # the other workers), so any use of them is an error.
+    _deny_database()
+
+
+def _make_person_chunk(person_ids):
+    """ Build person output for a chunk of persons in a worker process. """
+    return [_person_worker_ldif.make_person_output(person_id)
+            for person_id in person_ids]
+
+
 def _split_name(fullname=None, givenname=None, lastname=None):
     """Return (UTF-8 given name, UTF-8 last name)."""
 
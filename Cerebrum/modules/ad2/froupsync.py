@@ -540,11 +540,19 @@ class ConsentGroupSync(_FroupSync):
         'consent_groups' config setting.
 
         """
+        all_consents = set(
+            int(consent)
+            for consents in self.config['consent_groups'].values()
+            for consent in consents)
+        consent_map = self.pe.get_consent_map(
+            consent_code=all_consents,
+            entity_type=self.co.entity_person) if all_consents else {}
         for group, consents in six.iteritems(self.config['consent_groups']):
-            for row in self.pe.list_consents(
-                    consent_code=consents,
-                    entity_type=self.co.entity_person):
-                for name, enabled in self.pe2accs(row['entity_id']):
+            codes = set(int(consent) for consent in consents)
+            for person_id, person_consents in six.iteritems(consent_map):
+                if codes.isdisjoint(person_consents):
+                    continue
+                for name, enabled in self.pe2accs(person_id):
                     if enabled:
                         self.add_group_member(group, name)
         super(ConsentGroupSync, self).fetch_cerebrum_data()
@@ -116,6 +116,8 @@ def main(inargs=None):
         queues=config.queues,
         bindings=config.bindings,
         flags=ChannelSetup.Flags.ALL,
+        prefetch_count=config.prefetch_count,
+        prefetch_size=config.prefetch_size,
     )
     consume = ChannelListener(
         listeners={q.name: callback for q in config.queues},
@@ -39,6 +39,7 @@ from Cerebrum.config.secrets import Secret, get_secret_from_string
 from Cerebrum.config.settings import (
     Boolean,
     FilePath,
+    Integer,
     Iterable,
     Numeric,
     String,
@@ -216,6 +217,38 @@ class ConsumerConfig(Configuration):
         doc='A list of bindings',
     )
 
+    prefetch_count = ConfigDescriptor(
+        Integer,
+        minval=0,
+        default=None,
+        doc=('Max number of unacknowledged messages on the channel '
+             '(basic.qos, 0 for no limit, default: no qos)'),
+    )
+
+    prefetch_size = ConfigDescriptor(
+        Integer,
+        minval=0,
+        default=None,
+        doc=('Max size, in octets, of unacknowledged messages on the channel '
+             '(basic.qos, 0 for no limit - RabbitMQ only supports 0)'),
+    )
+
+    batch_size = ConfigDescriptor(
+        Integer,
+        minval=1,
+        default=None,
+        doc=('Handle messages in batches of up to this many messages '
+             '(batch handlers only, should not exceed prefetch_count)'),
+    )
+
+    batch_timeout = ConfigDescriptor(
+        Numeric,
+        minval=0,
+        default=1.0,
+        doc=('Max number of seconds to wait for a batch to fill up '
+             '(batch handlers only)'),
+    )
+
 
 class PublisherConfig(Configuration):
     """MQ publisher config."""
@@ -32,7 +32,9 @@ A minimal example to connect to a RabbitMQ server running default config:
         exchanges=conf.exchanges,
         queues=conf.queues,
         bindings=conf.bindings,
-        flags=ChannelSetup.Flags.ALL)
+        flags=ChannelSetup.Flags.ALL,
+        prefetch_count=conf.prefetch_count,
+        prefetch_size=conf.prefetch_size)
     listen = ChannelListeners(
         {q: demo_callback for q in conf.queues},
         conf.consumer_tag)
@@ -105,6 +107,25 @@ def declare_queue(channel, queue):
         callback=on_ok)
 
 
+def set_qos(channel, prefetch_count=0, prefetch_size=0):
+    """
+    Limit the number of unacknowledged messages on a channel.
+
+    :type channel: pika.channel.Channel
+    :param int prefetch_count: max number of messages (0 for no limit)
+    :param int prefetch_size: max number of octets (0 for no limit)
+    """
+
+    def on_ok(result):
+        logger.info('qos: prefetch_count=%r, prefetch_size=%r',
+                    prefetch_count, prefetch_size)
+
+    channel.basic_qos(
+        prefetch_size=prefetch_size,
+        prefetch_count=prefetch_count,
+        callback=on_ok)
+
+
 def bind_queue(channel, binding):
     """
     Assert that a given set of bindings exists.
@@ -147,26 +168,32 @@ class ChannelSetup(object):
 
         BIND
             Set up queue bindings.
+
+        QOS
+            Set prefetch limits (if any).
         """
         EXCHANGE = 1 << 0
         QUEUE = 1 << 1
         BIND = 1 << 2
+        QOS = 1 << 3
 
-        ALL = EXCHANGE | QUEUE | BIND
+        ALL = EXCHANGE | QUEUE | BIND | QOS
 
         @classmethod
         def to_string(cls, flags):
             """Format flags to human readable format"""
             return ' | '.join(
                 attr
-                for attr in ('EXCHANGE', 'QUEUE', 'BIND')
+                for attr in ('EXCHANGE', 'QUEUE', 'BIND', 'QOS')
                 if flags & getattr(cls, attr))
 
     def __init__(self,
                  exchanges=None,
                  queues=None,
                  bindings=None,
-                 flags=Flags.ALL):
+                 flags=Flags.ALL,
+                 prefetch_count=None,
+                 prefetch_size=None):
         """
         :type exchanges: list, set
         :param exchanges:
@@ -189,11 +216,24 @@ class ChannelSetup(object):
         :type flags: int
         :param flags:
             Which steps to perform during setup.
+
+        :type prefetch_count: int
+        :param prefetch_count:
+            Max number of unacknowledged messages to receive on the channel.
+            If neither *prefetch_count* nor *prefetch_size* is given, no qos
+            is set up, and the broker pushes messages as fast as it can.
+
+        :type prefetch_size: int
+        :param prefetch_size:
+            Max size (octets) of unacknowledged messages to receive on the
+            channel.
         """
         self.exchanges = exchanges or ()
         self.queues = queues or ()
         self.bindings = bindings or ()
         self.flags = flags
+        self.prefetch_count = prefetch_count
+        self.prefetch_size = prefetch_size
 
     @property
     def flags(self):
@@ -232,8 +272,15 @@ class ChannelSetup(object):
             for e in self.bindings:
                 bind_queue(channel, e)
 
-        # TODO: Should we add a step to set up qos/prefetch?
-        # channel.basic_qos(prefetch_count=1)
+        if flags & self.Flags.QOS:
+            if self.prefetch_count is None and self.prefetch_size is None:
+                logger.debug('setup: QOS (not configured)')
+            else:
+                logger.debug('setup: QOS (count=%r, size=%r)',
+                             self.prefetch_count, self.prefetch_size)
+                set_qos(channel,
+                        prefetch_count=self.prefetch_count or 0,
+                        prefetch_size=self.prefetch_size or 0)
 
 
 def _on_message_wrapper(callback):
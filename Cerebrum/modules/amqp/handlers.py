@@ -47,6 +47,7 @@ from __future__ import (
 import abc
 import collections
 import logging
+import sys
 
 import six
 
@@ -181,6 +182,161 @@ class AbstractConsumerHandler(collections.Callable):
         event.channel.basic_ack(delivery_tag=dt)
 
 
+@six.add_metaclass(abc.ABCMeta)
+class AbstractBatchConsumerHandler(collections.Callable):
+    """
+    A callback *handler* that handles messages in batches.
+
+    Deliveries are collected until *batch_size* events are waiting, or until
+    *batch_timeout* seconds have passed since the first event in the batch
+    arrived.  The batch is then passed to :meth:`.handle_batch`.
+
+    :meth:`.handle_batch`
+        Handle a list of events.  The default implementation calls
+        :meth:`.handle` for each event.  If an override raises an exception,
+        each event in the batch is re-tried individually with
+        :meth:`.handle`, so that a single bad message doesn't fail the entire
+        batch.
+
+    :meth:`.handle`
+        Handle a single event.
+
+    :meth:`.on_error`
+        Called for each event that fails.  The default implementation nacks
+        the message, and requeues it unless it has already been redelivered.
+
+    Successful events are acked in one go (``multiple=True``) if the handler
+    is the only consumer on its channel.  Otherwise, each event is acked
+    separately, so that we don't ack messages that belong to other consumers.
+
+    The batch size should not exceed the *prefetch_count* of the channel, as
+    the broker won't deliver more than *prefetch_count* unacked messages.
+    """
+
+    def __init__(self, batch_size=100, batch_timeout=1.0):
+        """
+        :param int batch_size: max number of events in a batch
+        :param float batch_timeout: max seconds to wait for a full batch
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.batch_timeout = batch_timeout
+        self._batch = []
+        self._timer = None
+
+    def __call__(self, channel, method, header, body):
+        event = Event(channel, method, header, body)
+
+        if self._batch and self._batch[0].channel is not channel:
+            # The channel has been re-opened.  Unacked messages from the old
+            # channel are returned to the queue by the broker.
+            logger.warning('dropping %d events from old channel=%r',
+                           len(self._batch), self._batch[0].channel)
+            self._clear()
+
+        self._batch.append(event)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = channel.connection.ioloop.call_later(
+                self.batch_timeout, self.flush)
+
+    def _clear(self):
+        batch = self._batch
+        self._batch = []
+        if self._timer is not None:
+            batch[0].channel.connection.ioloop.remove_timeout(self._timer)
+            self._timer = None
+        return batch
+
+    def flush(self):
+        """ Handle and settle all events in the current batch. """
+        if not self._batch:
+            return
+        batch = self._clear()
+        channel = batch[0].channel
+        logger.debug('handling batch of %d events on channel=%r',
+                     len(batch), channel)
+
+        try:
+            failed = list(self.handle_batch(batch) or ())
+        except Exception:
+            logger.warning('batch of %d events failed, retrying events '
+                           'one by one', len(batch), exc_info=True)
+            failed = list(self._handle_each(batch))
+
+        # settle failed events first - a multiple ack would include them
+        for event, error in failed:
+            logger.error('unable to handle event=%r on channel=%r',
+                         event, channel, exc_info=error)
+            self.on_error(event, error[1])
+
+        failed_tags = set(event.method.delivery_tag for event, _ in failed)
+        self.on_ok([event for event in batch
+                    if event.method.delivery_tag not in failed_tags])
+
+    def _handle_each(self, events):
+        for event in events:
+            try:
+                self.handle(event)
+            except Exception:
+                yield event, sys.exc_info()
+
+    def handle_batch(self, events):
+        """
+        Handle a batch of events.
+
+        Override this to e.g. handle all events in a single transaction.
+        If the override raises an exception, all events are re-tried with
+        :meth:`.handle`.
+
+        :param list events: a list of :class:`.Event` objects
+
+        :returns:
+            An iterable of (event, exc_info) tuples for events that failed.
+        """
+        return list(self._handle_each(events))
+
+    @abc.abstractmethod
+    def handle(self, event):
+        """ Handle a single event.  """
+        pass
+
+    def on_error(self, event, error):
+        """
+        Handle a failed event.
+
+        The message is requeued once, so that temporary errors can be
+        retried.  If it fails again, it is rejected (and dead-lettered, if
+        the queue has a dead letter exchange).
+        """
+        dt = event.method.delivery_tag
+        requeue = not event.method.redelivered
+        logger.debug('nack %s/%s (requeue=%r)',
+                     event.method.consumer_tag, dt, requeue)
+        event.channel.basic_nack(delivery_tag=dt, requeue=requeue)
+
+    def on_ok(self, events):
+        """
+        Ack completed events.
+
+        :param list events: completed events, in order of delivery
+        """
+        if not events:
+            return
+        channel = events[0].channel
+        if len(channel.consumer_tags) == 1:
+            # All unacked messages on this channel are in this batch, and all
+            # the failed ones have been nacked.
+            dt = max(event.method.delivery_tag for event in events)
+            logger.debug('confirm %d events up to %s', len(events), dt)
+            channel.basic_ack(delivery_tag=dt, multiple=True)
+        else:
+            for event in events:
+                dt = event.method.delivery_tag
+                logger.debug('confirm %s/%s', event.method.consumer_tag, dt)
+                channel.basic_ack(delivery_tag=dt)
+
+
 class _Demo(AbstractConsumerHandler):
     """ Demo handler. """
 
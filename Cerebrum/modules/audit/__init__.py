@@ -35,4 +35,4 @@ from __future__ import (
 )
 
 # database schema version (mod_auditlog)
-__version__ = "1.0"
+__version__ = "1.1"
@@ -221,6 +221,71 @@ def sql_insert(
     return binds['record_id']
 
 
+def sql_insert_many(db, records, batch_size=500):
+    """
+    Insert multiple audit records.
+
+    Records are inserted with one multi-row INSERT per *batch_size* records.
+    Records without a record_id gets one from audit_log_seq in the same
+    statement, in the order given.
+
+    :param records: AuditRecord objects
+    :param int batch_size: max number of records per statement
+
+    :returns int: number of inserted records
+    """
+    columns = ('record_id', 'change_type', 'timestamp', 'operator', 'entity',
+               'target', 'metadata', 'params')
+    count = 0
+    records = list(records)
+    for start in range(0, len(records), batch_size):
+        binds = {}
+        rows = []
+        for n, record in enumerate(records[start:start + batch_size]):
+            values = {
+                'change_type': int(record.change_type),
+                'operator': int(record.operator_id),
+                'entity': int(record.entity_id),
+            }
+            if record.record_id:
+                values['record_id'] = int(record.record_id)
+            if record.timestamp:
+                values['timestamp'] = record.timestamp
+            if record.target_id:
+                values['target'] = int(record.target_id)
+            if record.metadata:
+                values['metadata'] = json.dumps(record.metadata)
+            if record.params:
+                values['params'] = json.dumps(serialize_params(record.params))
+
+            row = []
+            for column in columns:
+                if column in values:
+                    name = '{}{:d}'.format(column, n)
+                    binds[name] = values[column]
+                    row.append(':' + name)
+                elif column == 'record_id':
+                    row.append(
+                        '[:sequence schema=cerebrum name=audit_log_seq '
+                        'op=next]')
+                elif column == 'timestamp':
+                    row.append('DEFAULT')
+                else:
+                    row.append('NULL')
+            rows.append('({})'.format(', '.join(row)))
+
+        db.execute(
+            """
+              INSERT INTO [:table schema=cerebrum name=audit_log]
+                ({columns})
+              VALUES
+                {rows}
+            """.format(columns=', '.join(columns), rows=',\n'.join(rows)),
+            binds)
+        count += len(rows)
+    return count
+
+
 def sql_delete(db, **kwargs):
     """
     Delete audit records.
@@ -277,6 +342,10 @@ class AuditLogAccessor(DatabaseAccessor):
             timestamp=record.timestamp,
             record_id=record.record_id)
 
+    def append_many(self, records):
+        """ Append multiple records, see :func:`.sql_insert_many`. """
+        return sql_insert_many(self._db, records)
+
     # def update(self, record):
     #     # TODO: assert DbAuditRecord instance?
     #     data = record.to_dict()
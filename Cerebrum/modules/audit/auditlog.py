@@ -34,8 +34,7 @@ import cereconf
 import Cerebrum.Errors
 from Cerebrum.ChangeLog import ChangeLog
 from Cerebrum.DatabaseAccessor import DatabaseAccessor
-from Cerebrum.Entity import Entity, EntityName
-from Cerebrum.Utils import Factory
+from Cerebrum.Utils import Factory, argument_to_sql
 from Cerebrum.modules.Email import EmailAddress, EmailDomain
 
 from .auditdb import AuditLogAccessor
@@ -64,6 +63,7 @@ class AuditLog(ChangeLog):
         self.change_by = change_by
         self.change_program = change_program
         self.records = []
+        self._record_builder = None
 
     @property
     def _audit_log_db(self):
@@ -81,6 +81,15 @@ class AuditLog(ChangeLog):
             self._default_op = account
         return self._default_op.entity_id
 
+    @property
+    def record_builder(self):
+        """ AuditRecordBuilder for the current transaction. """
+        # The builder caches entity types and names, and must be replaced
+        # after each commit/rollback
+        if getattr(self, '_record_builder', None) is None:
+            self._record_builder = AuditRecordBuilder(self._audit_log_db)
+        return self._record_builder
+
     def log_change(self,
                    subject_entity,
                    change_type_id,
@@ -110,8 +119,7 @@ class AuditLog(ChangeLog):
         elif not change_by:
             raise ValueError("No operator given, and no change_program set")
 
-        builder = AuditRecordBuilder(self._audit_log_db)
-        record = builder(
+        record = self.record_builder(
             subject_entity,
             change_type_id,
             destination_entity,
@@ -122,14 +130,16 @@ class AuditLog(ChangeLog):
 
     def write_log(self):
         super(AuditLog, self).write_log()
-        accessor = AuditLogAccessor(self._audit_log_db)
-        for record in self.records:
-            accessor.append(record)
+        if self.records:
+            accessor = AuditLogAccessor(self._audit_log_db)
+            accessor.append_many(self.records)
         self.records = []
+        self._record_builder = None
 
     def clear_log(self):
         super(AuditLog, self).clear_log()
         self.records = []
+        self._record_builder = None
 
 
 class _ChangeTypeCallbacks(object):
@@ -167,6 +177,8 @@ class AuditRecordBuilder(DatabaseAccessor):
 
     2. Modify `change_params` to be better suited for the audit log.
 
+    Entity types and names are cached for the lifetime of the builder.
+    :class:`.AuditLog` uses one builder per transaction.
     """
 
     @property
@@ -207,26 +219,91 @@ class AuditRecordBuilder(DatabaseAccessor):
         int(const)
         return const
 
+    # Change categories that may change the type or name of the subject
+    # entity.  Cached info on the subject is discarded for these changes.
+    volatile_categories = ('entity', 'entity_name')
+
+    @property
+    def _entity_cache(self):
+        # entity_id -> (entity type, entity name)
+        if not hasattr(self, '_entities'):
+            self._entities = {}
+        return self._entities
+
+    def clear_cache(self):
+        """ Forget all cached entity types and names. """
+        self._entity_cache.clear()
+
+    def invalidate(self, e_id):
+        """ Forget cached entity type and name for a given entity. """
+        if e_id is not None:
+            self._entity_cache.pop(int(e_id), None)
+
+    def _get_namespace(self, e_type):
+        """ Get the name value domain (int) for an entity type (str). """
+        if not hasattr(self, '_namespaces'):
+            self._namespaces = {}
+        if e_type not in self._namespaces:
+            namespace = ENTITY_TYPE_NAMESPACE.get(e_type)
+            if namespace is not None:
+                try:
+                    namespace = int(self.const.ValueDomain(namespace))
+                except Cerebrum.Errors.NotFoundError:
+                    namespace = None
+            self._namespaces[e_type] = namespace
+        return self._namespaces[e_type]
+
+    def resolve_entities(self, entity_ids):
+        """
+        Look up and cache entity types and names.
+
+        All given entities that are not already in the cache are fetched
+        using a single query.
+        """
+        cache = self._entity_cache
+        missing = set(int(e_id) for e_id in entity_ids
+                      if e_id is not None and int(e_id) not in cache)
+        if not missing:
+            return
+        for e_id in missing:
+            cache[e_id] = (None, None)
+
+        binds = {}
+        for row in self.query(
+                """
+                  SELECT ei.entity_id, ei.entity_type,
+                         en.value_domain, en.entity_name
+                  FROM [:table schema=cerebrum name=entity_info] ei
+                  LEFT JOIN [:table schema=cerebrum name=entity_name] en
+                    ON en.entity_id = ei.entity_id
+                  WHERE {}
+                """.format(
+                    argument_to_sql(missing, 'ei.entity_id', binds, int)),
+                binds):
+            e_id = int(row['entity_id'])
+            e_type = six.text_type(self.const.EntityType(row['entity_type']))
+            e_name = cache[e_id][1]
+            if (row['value_domain'] is not None and
+                    int(row['value_domain']) == self._get_namespace(e_type)):
+                e_name = row['entity_name']
+            cache[e_id] = (e_type, e_name)
+
+    def _get_entity(self, e_id):
+        if e_id is None:
+            return (None, None)
+        e_id = int(e_id)
+        if e_id not in self._entity_cache:
+            self.resolve_entities((e_id,))
+        return self._entity_cache[e_id]
+
     def _get_type(self, e_id):
-        entity = Entity(self._db)
-        try:
-            entity.find(e_id)
-            return six.text_type(self.const.EntityType(entity.entity_type))
-        except Cerebrum.Errors.NotFoundError:
-            return None
+        return self._get_entity(e_id)[0]
 
     def _get_name(self, e_id, e_type):
-        namespace = ENTITY_TYPE_NAMESPACE.get(six.text_type(e_type))
-        if namespace is None:
-            return None
-        else:
-            namespace = self.const.ValueDomain(namespace)
-        entity = EntityName(self._db)
-        try:
-            entity.find(e_id)
-            return entity.get_name(namespace)
-        except Cerebrum.Errors.NotFoundError:
+        e_type_cached, e_name = self._get_entity(e_id)
+        if e_type is None or six.text_type(e_type) != e_type_cached:
             return None
+        return e_name
 
     def build_meta(self, change_type, operator_id, entity_id,
                    target_id, change_program):
@@ -240,38 +317,18 @@ class AuditRecordBuilder(DatabaseAccessor):
         target_id
 
         That way we would be able to fetch cached info on the entities
-        involved, rather than looking it up for every change.
+        involved, rather than looking it up for every change.  Until then,
+        entity types and names are cached by the builder (see
+        :meth:`.resolve_entities`).
         """
-        co = self.const
-
-        def get_type(e_id):
-            entity = Entity(self._db)
-            try:
-                entity.find(e_id)
-                return six.text_type(co.EntityType(entity.entity_type))
-            except Cerebrum.Errors.NotFoundError:
-                return None
-
-        def get_name(e_id, e_type):
-            namespace = ENTITY_TYPE_NAMESPACE.get(six.text_type(e_type))
-            if namespace is None:
-                return None
-            else:
-                namespace = co.ValueDomain(namespace)
-            entity = EntityName(self._db)
-            try:
-                entity.find(e_id)
-                return entity.get_name(namespace)
-            except Cerebrum.Errors.NotFoundError:
-                return None
-
-        change = six.text_type(change_type)
+        self.resolve_entities((operator_id, entity_id, target_id))
         operator_type = self._get_type(operator_id)
         operator_name = self._get_name(operator_id, operator_type)
         entity_type = self._get_type(entity_id)
         entity_name = self._get_name(entity_id, entity_type)
         target_type = self._get_type(target_id)
         target_name = self._get_name(target_id, target_type)
+        change = six.text_type(change_type)
         if change_program is not None:
             change_program = six.text_type(change_program)
         return {
@@ -309,11 +366,17 @@ class AuditRecordBuilder(DatabaseAccessor):
                  change_program):
 
         change_type = self.get_change_type(change_type_id)
+        volatile = change_type.category in self.volatile_categories
+        if volatile:
+            self.invalidate(subject_entity)
         metadata = self.build_meta(change_type,
                                    change_by,
                                    subject_entity,
                                    destination_entity,
                                    change_program)
+        if volatile:
+            # the change may be logged before it is applied
+            self.invalidate(subject_entity)
         params = self.build_params(change_type,
                                    subject_entity,
                                    destination_entity,
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Change log pruning rules.
+
+The rules are configured in :mod:`Cerebrum.modules.default_dbcl_conf` (and
+an optional `dbcl_conf` module), and are used by ``contrib/db_clean.py``:
+
+age
+    Change log entries older than a given max age (per change type) are
+    removed.
+
+toggle
+    Only the last change log entry for a given *key* is kept.  The key is
+    made from a set of change log columns and change params, and is shared
+    by a set of change types (e.g. ``spread_add`` and ``spread_del``).
+
+Change types that are not a part of any toggler rule are ignored, as are
+entries newer than a minimum age.
+
+This module implements the rules in two ways:
+
+:func:`.find_removable_events`
+    Checks each change log entry in Python.  This requires reading the
+    entire change log.
+
+:class:`.SqlPruner`
+    Expresses the rules as SQL, and removes entries in batches.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import datetime
+import logging
+
+from Cerebrum.Utils import argument_to_sql
+from Cerebrum.utils import date_compat
+from Cerebrum.utils import json
+
+logger = logging.getLogger(__name__)
+
+RULE_AGE = 'age'
+RULE_TOGGLE = 'toggle'
+
+# change_log columns that can be used in a toggle key
+TOGGLE_COLUMNS = ('subject_entity', 'dest_entity', 'change_by')
+
+
+class PruneRules(object):
+    """ Parsed change log pruning rules. """
+
+    def __init__(self, trigger_map, max_ages, default_age, minimum_age,
+                 forever=-1):
+        """
+        :param dict trigger_map:
+            Maps change type (int) to a toggler dict, or None if the change
+            type shouldn't be toggled.  Toggler dicts must have an 'id', and
+            'columns' and optional 'change_params' to build a key from.
+        :param dict max_ages:
+            Maps change type (int) to max age in seconds.
+        :param int default_age:
+            Max age in seconds for change types not in max_ages.
+        :param int minimum_age:
+            Never remove entries newer than this (in seconds).
+        :param int forever:
+            Max age value for change types that should never expire.
+        """
+        self.trigger_map = trigger_map
+        self.max_ages = max_ages
+        self.default_age = default_age
+        self.minimum_age = minimum_age
+        self.forever = forever
+
+    @property
+    def change_types(self):
+        """ All change types that are considered. """
+        return sorted(self.trigger_map)
+
+    @property
+    def togglers(self):
+        """ Active togglers, sorted by id. """
+        seen = {}
+        for toggler in self.trigger_map.values():
+            if toggler is not None:
+                seen[toggler['id']] = toggler
+        return [seen[k] for k in sorted(seen)]
+
+    def get_max_age(self, change_type):
+        """ Get max age for a change type, or None if it never expires. """
+        max_age = self.max_ages.get(change_type, self.default_age)
+        if max_age == self.forever:
+            return None
+        return max_age
+
+    def get_toggle_key(self, event):
+        """ Get toggle key for a change log entry, or None if not toggled. """
+        toggler = self.trigger_map.get(int(event['change_type_id']))
+        if toggler is None:
+            return None
+        key = ["{:d}".format(toggler['id'])]
+        for column in toggler['columns']:
+            key.append("{:d}".format(event[column]))
+        if 'change_params' in toggler:
+            if event['change_params']:
+                data = json.loads(event['change_params'])
+            else:
+                data = {}
+            for c in toggler['change_params']:
+                key.append("{}".format(data.get(c)))
+        return "-".join(key)
+
+
+def find_removable_events(events, rules, now):
+    """
+    Find change log entries to remove.
+
+    :param events: change log entries, ordered by change_id
+    :param PruneRules rules: the rules to apply
+    :param datetime now: the reference time for entry age
+
+    :returns:
+        A generator that yields (rule, change_id, event) tuples, where *event*
+        is the entry that caused *change_id* to be removed.  An entry may be
+        removed by both rules.
+
+        Unknown change types are yielded as (None, None, event).
+    """
+    last_seen = {}
+    for e in events:
+        change_type = int(e['change_type_id'])
+
+        # Skip unknown change types
+        if change_type not in rules.trigger_map:
+            yield None, None, e
+            continue
+
+        # Keep all data newer than minimum_age
+        age = (now - date_compat.get_datetime_tz(e['tstamp'])).total_seconds()
+        if age < rules.minimum_age:
+            continue
+
+        max_age = rules.get_max_age(change_type)
+        if max_age is not None and age > max_age:
+            yield RULE_AGE, int(e['change_id']), e
+
+        # Determine a unique key for this event to check togglability
+        key = rules.get_toggle_key(e)
+        if key is None:
+            continue
+
+        # Has something been toggled?
+        if key in last_seen:
+            yield RULE_TOGGLE, last_seen[key], e
+        last_seen[key] = int(e['change_id'])
+
+
+class SqlPruner(object):
+    """
+    Apply change log pruning rules in the database.
+
+    The toggle rules are applied with a window function that numbers each
+    entry within its toggle key, newest first.  All but the newest entry are
+    removed.  The toggle key always includes all rows with the same value
+    in the first key column, so the change log is processed in pages of
+    values from this column.
+
+    The age rules are applied to one change type at a time, in pages of
+    change_id values.
+
+    A toggle page may contain more than *batch_size* toggled entries (e.g.
+    all memberships of a large group), but entries are always removed in
+    batches of at most *batch_size* entries.
+
+    Toggle rules are applied before age rules: removing toggled entries
+    doesn't change which entries are toggled, and removing aged entries
+    doesn't change which entries are aged.  The end result is the same as
+    :func:`.find_removable_events`.
+
+    Entries where the first toggle key column is NULL are never toggled.
+    """
+
+    def __init__(self, db, rules, now, batch_size=10000):
+        """
+        :param db: database connection
+        :param PruneRules rules: the rules to apply
+        :param datetime now: the reference time for entry age
+        :param int batch_size: number of entries to process in each batch
+        """
+        self.db = db
+        self.rules = rules
+        self.now = now
+        self.batch_size = int(batch_size)
+
+    def _cutoff(self, seconds):
+        return self.now - datetime.timedelta(seconds=seconds)
+
+    def _get_page_bound(self, column, types, last):
+        """ Get the upper value of *column* for the page after *last*. """
+        binds = {
+            'min_cutoff': self._cutoff(self.rules.minimum_age),
+            'offset': self.batch_size,
+        }
+        conds = [
+            argument_to_sql(types, 'change_type_id', binds, int),
+            'tstamp <= :min_cutoff',
+            '{} IS NOT NULL'.format(column),
+        ]
+        if last is not None:
+            conds.append('{} > :last'.format(column))
+            binds['last'] = last
+        rows = self.db.query(
+            """
+              SELECT {column} AS bound
+              FROM [:table schema=cerebrum name=change_log]
+              WHERE {where}
+              ORDER BY {column}
+              LIMIT 1 OFFSET :offset
+            """.format(column=column,
+                       where=' AND '.join('({})'.format(c) for c in conds)),
+            binds)
+        if rows:
+            return rows[0]['bound']
+        return None
+
+    def _iter_toggle_pages(self, column, types):
+        """ Get (low, high) bounds for toggle pages. """
+        if column is None:
+            yield None, None
+            return
+        last = None
+        while True:
+            bound = self._get_page_bound(column, types, last)
+            yield last, bound
+            if bound is None:
+                return
+            last = bound
+
+    def _find_toggled(self, toggler, low, high):
+        """ Find toggled change_ids within a page. """
+        binds = {'min_cutoff': self._cutoff(self.rules.minimum_age)}
+        conds = [
+            argument_to_sql(toggler['triggers'], 'change_type_id', binds,
+                            int),
+            'tstamp <= :min_cutoff',
+        ]
+        partition = []
+        for column in toggler['columns']:
+            if column not in TOGGLE_COLUMNS:
+                raise ValueError('Invalid toggle column: %r' % (column,))
+            partition.append(column)
+        for n, param in enumerate(toggler.get('change_params', ())):
+            partition.append(
+                "CAST(NULLIF(change_params, '') AS json) ->> :param{:d}"
+                .format(n))
+            binds['param{:d}'.format(n)] = param
+
+        if partition:
+            column = partition[0]
+            if low is not None:
+                conds.append('{} > :low'.format(column))
+                binds['low'] = low
+            if high is not None:
+                conds.append('{} <= :high'.format(column))
+                binds['high'] = high
+            conds.append('{} IS NOT NULL'.format(column))
+            partition_by = 'PARTITION BY ' + ', '.join(partition)
+        else:
+            partition_by = ''
+
+        return [
+            int(row['change_id'])
+            for row in self.db.query(
+                """
+                  SELECT change_id
+                  FROM (
+                    SELECT change_id,
+                           ROW_NUMBER() OVER (
+                             {partition_by} ORDER BY change_id DESC
+                           ) AS num
+                    FROM [:table schema=cerebrum name=change_log]
+                    WHERE {where}
+                  ) candidates
+                  WHERE num > 1
+                  ORDER BY change_id
+                """.format(
+                    partition_by=partition_by,
+                    where=' AND '.join('({})'.format(c) for c in conds)),
+                binds)
+        ]
+
+    def _find_aged(self, change_type, max_age, last):
+        """ Find the next page of aged change_ids. """
+        binds = {
+            'change_type': int(change_type),
+            'min_cutoff': self._cutoff(self.rules.minimum_age),
+            'age_cutoff': self._cutoff(max_age),
+            'last': last,
+            'limit': self.batch_size,
+        }
+        return [
+            int(row['change_id'])
+            for row in self.db.query(
+                """
+                  SELECT change_id
+                  FROM [:table schema=cerebrum name=change_log]
+                  WHERE change_type_id = :change_type
+                    AND tstamp <= :min_cutoff
+                    AND tstamp < :age_cutoff
+                    AND change_id > :last
+                  ORDER BY change_id
+                  LIMIT :limit
+                """,
+                binds)
+        ]
+
+    def _remove(self, change_ids, commit):
+        """ Remove change_ids, at most *batch_size* entries per statement. """
+        change_ids = list(change_ids)
+        for i in range(0, len(change_ids), self.batch_size):
+            binds = {}
+            chunk = change_ids[i:i + self.batch_size]
+            self.db.execute(
+                """
+                  DELETE FROM [:table schema=cerebrum name=change_log]
+                  WHERE {}
+                """.format(argument_to_sql(chunk, 'change_id', binds, int)),
+                binds)
+            if commit:
+                self.db.commit()
+
+    def _iter_toggled(self):
+        for toggler in self.rules.togglers:
+            columns = toggler['columns']
+            column = columns[0] if columns else None
+            if column is not None and column not in TOGGLE_COLUMNS:
+                raise ValueError('Invalid toggle column: %r' % (column,))
+            for low, high in self._iter_toggle_pages(column,
+                                                     toggler['triggers']):
+                change_ids = self._find_toggled(toggler, low, high)
+                if change_ids:
+                    yield (RULE_TOGGLE, toggler['id']), change_ids
+
+    def _iter_aged(self):
+        for change_type in self.rules.change_types:
+            max_age = self.rules.get_max_age(change_type)
+            if max_age is None:
+                continue
+            last = 0
+            while True:
+                change_ids = self._find_aged(change_type, max_age, last)
+                if not change_ids:
+                    break
+                yield (RULE_AGE, change_type), change_ids
+                last = change_ids[-1]
+
+    def run(self, remove=False, commit=False):
+        """
+        Apply the pruning rules.
+
+        :param bool remove:
+            Remove matching entries.  If False, matching entries are only
+            counted.
+        :param bool commit:
+            Commit after each removed batch of at most *batch_size* entries.
+
+        :returns dict:
+            Number of matching entries by rule.  Rules are either
+            (RULE_TOGGLE, <toggler id>) or (RULE_AGE, <change type>).  When
+            counting, an entry may match multiple rules.  When removing,
+            each entry is only counted for the first rule it matched.
+        """
+        stats = collections.OrderedDict()
+        for rule, change_ids in self._iter_toggled():
+            stats[rule] = stats.get(rule, 0) + len(change_ids)
+            if remove:
+                self._remove(change_ids, commit)
+        logger.debug('toggled: %d', sum(stats.values()))
+        for rule, change_ids in self._iter_aged():
+            stats[rule] = stats.get(rule, 0) + len(change_ids)
+            if remove:
+                self._remove(change_ids, commit)
+        return stats
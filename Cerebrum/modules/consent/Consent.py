@@ -49,6 +49,10 @@ Usage
 
 4. Use the `API`_.
 
+Exports that need to check consents for many entities should use
+:class:`.consent_export.ConsentCache`, which fetches all relevant consents in
+one query.
+
 
 API
 ====
@@ -259,6 +263,62 @@ def sql_select_consents(db,
     return db.query(query, args, fetchall=fetchall)
 
 
+def sql_select_consent_map(db,
+                           consent_code=None,
+                           consent_type=None,
+                           entity_id=None,
+                           entity_type=None,
+                           set_before=None,
+                           set_after=None):
+    """
+    Get consents for many entities in one pass.
+
+    :param set_before: only include consents set before this time
+    :param set_after: only include consents set after this time
+
+    See :func:`.sql_select_consents` for the other params.
+
+    :rtype: dict
+    :returns:
+        A mapping of entity_id -> consent_code -> (consent_type, set_at)
+    """
+    filters = []
+    args = {}
+    query = """
+      SELECT ec.entity_id, ec.consent_code, ecc.consent_type, ec.set_at
+      FROM [:table schema=cerebrum name=entity_consent] ec
+      INNER JOIN [:table schema=cerebrum name=entity_consent_code] ecc
+      ON ec.consent_code = ecc.code
+    """
+    for value, field in (
+            (consent_code, 'ec.consent_code'),
+            (consent_type, 'ecc.consent_type'),
+            (entity_id, 'ec.entity_id'),
+            (entity_type, 'ecc.entity_type')):
+        if value is not None:
+            filters.append(argument_to_sql(value, field, args, int))
+
+    if set_before and set_after and set_before < set_after:
+        raise ValueError("set_after: cannot be after set_before"
+                         " (%s < set_at < %s)" % (set_after, set_before))
+    if set_before is not None:
+        filters.append("ec.set_at < :set_before")
+        args['set_before'] = set_before
+    if set_after is not None:
+        filters.append("ec.set_at > :set_after")
+        args['set_after'] = set_after
+
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+
+    results = {}
+    for row in db.query(query, args, fetchall=False):
+        consents = results.setdefault(int(row['entity_id']), {})
+        consents[int(row['consent_code'])] = (int(row['consent_type']),
+                                              row['set_at'])
+    return results
+
+
 class EntityConsentMixin(Entity):
     """ Mixin for approve/deny propositions.  """
 
@@ -279,6 +339,14 @@ class EntityConsentMixin(Entity):
         """
         return sql_select_consents(self._db, **kwargs)
 
+    def get_consent_map(self, **kwargs):
+        """
+        Get consents for all entities, by entity_id and consent_code.
+
+        See :func:`.sql_select_consent_map` for more info.
+        """
+        return sql_select_consent_map(self._db, **kwargs)
+
     def get_consent_status(self, consent_code):
         """Returns a row for self and consent_code, or None.
 
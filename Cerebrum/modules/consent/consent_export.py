@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Consent export utils.
+
+This module implements a cache of entity consents for exports, so that
+exports can check the consents of each entity without a database lookup.
+
+Example usage:
+
+    # Cache all opt-in and opt-out consents for persons
+    consents = ConsentCache(db, entity_type=co.entity_person)
+    consents.update_all()
+
+    if consents.has_consent(person_id, co.consent_foo):
+        ...
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import logging
+
+from Cerebrum.Utils import make_timer
+from Cerebrum.export.base import EntityCache, EntityFetcher, MISSING
+
+from .Consent import sql_select_consent_map
+
+logger = logging.getLogger(__name__)
+
+
+class ConsentFetcher(EntityFetcher):
+    """
+    Fetch consents for entities.
+
+    Each entity object is a dict that maps consent_code to a
+    (consent_type, set_at) tuple.
+    """
+
+    def __init__(self, db, consent_code=None, consent_type=None,
+                 entity_type=None, set_before=None, set_after=None):
+        self._db = db
+        self._selects = {
+            'consent_code': consent_code,
+            'consent_type': consent_type,
+            'entity_type': entity_type,
+            'set_before': set_before,
+            'set_after': set_after,
+        }
+
+    def get_one(self, entity_id):
+        """ Fetch consents for a given entity. """
+        results = sql_select_consent_map(self._db, entity_id=int(entity_id),
+                                         **self._selects)
+        return results.get(int(entity_id), MISSING)
+
+    def get_all(self):
+        """ Fetch consents for all entities. """
+        return sql_select_consent_map(self._db, **self._selects)
+
+
+class ConsentCache(EntityCache):
+    """
+    A cache of entity consents.
+
+    The cache takes the same filters as
+    :func:`Cerebrum.modules.consent.Consent.sql_select_consent_map`.
+    """
+
+    def __init__(self, db, **kwargs):
+        super(ConsentCache, self).__init__(ConsentFetcher(db, **kwargs))
+
+    def update_all(self):
+        timer = make_timer(logger, 'Fetching consents ...')
+        super(ConsentCache, self).update_all()
+        timer('... done fetching consents for %d entities.' %
+              (len(self.found),))
+
+    def get_consents(self, entity_id):
+        """
+        Get consents for a given entity.
+
+        :rtype: dict
+        :returns: A mapping of consent_code -> (consent_type, set_at)
+        """
+        return self.get(int(entity_id), {})
+
+    def has_consent(self, entity_id, consent_code):
+        """ Check if a given entity has a given consent. """
+        return int(consent_code) in self.get_consents(entity_id)
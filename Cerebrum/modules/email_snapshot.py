@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Bulk, in-memory snapshot of the email topology.
+
+Exports that need email data for all users typically look up targets,
+addresses and domains for one account at a time, through the
+:mod:`Cerebrum.modules.Email` entity classes.  An :class:`EmailSnapshot`
+instead reads each of the email tables *once*, and keeps the rows as compact
+tuples indexed by id:
+
+- :attr:`EmailSnapshot.domains`: domain_id -> domain name
+- :attr:`EmailSnapshot.targets`: target_id -> :class:`EmailTargetInfo`
+- :attr:`EmailSnapshot.addresses`: address_id -> :class:`EmailAddressInfo`
+- :attr:`EmailSnapshot.primary`: target_id -> address_id
+- :attr:`EmailSnapshot.forwards`: target_id -> list of
+  :class:`EmailForwardInfo`
+- :attr:`EmailSnapshot.quotas`: target_id -> :class:`EmailQuotaInfo`
+- :attr:`EmailSnapshot.accounts`: account_id -> :class:`AccountInfo`
+
+Each table is loaded on first use, so a snapshot only costs the queries that
+are actually needed.  Derived maps (e.g. addresses by target, or targets by
+entity) are built from the loaded tables, also on first use.
+
+::
+
+    snapshot = EmailSnapshot(db)
+    for uname, address in snapshot.get_uname2mailaddr().items():
+        ...
+
+Note that the snapshot is not updated if the database changes.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import collections
+import logging
+
+import cereconf
+from Cerebrum.Utils import Factory
+from Cerebrum.utils.descriptors import lazy_property
+
+logger = logging.getLogger(__name__)
+
+
+EmailTargetInfo = collections.namedtuple(
+    'EmailTargetInfo',
+    ('target_type', 'entity_type', 'entity_id', 'alias_value', 'using_uid',
+     'server_id'))
+
+EmailAddressInfo = collections.namedtuple(
+    'EmailAddressInfo',
+    ('local_part', 'domain_id', 'target_id'))
+
+EmailForwardInfo = collections.namedtuple(
+    'EmailForwardInfo',
+    ('forward_to', 'enable'))
+
+EmailQuotaInfo = collections.namedtuple(
+    'EmailQuotaInfo',
+    ('quota_soft', 'quota_hard'))
+
+AccountInfo = collections.namedtuple(
+    'AccountInfo',
+    ('name', 'is_expired'))
+
+
+def _int_or_none(value):
+    return None if value is None else int(value)
+
+
+class EmailSnapshot(object):
+    """ Id-indexed email data, loaded with one query per table. """
+
+    def __init__(self, db):
+        self._db = db
+        self._rewrite_domain = cereconf.LDAP['rewrite_email_domain']
+        self._quota_stats = {}
+
+    @lazy_property
+    def const(self):
+        return Factory.get('Constants')(self._db)
+
+    def _query(self, stmt, binds=None):
+        return self._db.query(stmt, binds or {}, fetchall=False)
+
+    #
+    # Tables
+    #
+    @lazy_property
+    def domains(self):
+        """ domain_id -> domain name (rewritten, if special) """
+        domains = {}
+        for row in self._query(
+                """
+                  SELECT domain_id, domain
+                  FROM [:table schema=cerebrum name=email_domain]
+                """):
+            domain = row['domain']
+            domains[int(row['domain_id'])] = self._rewrite_domain.get(domain,
+                                                                      domain)
+        logger.debug('loaded %d email domains', len(domains))
+        return domains
+
+    @lazy_property
+    def targets(self):
+        """ target_id -> EmailTargetInfo """
+        targets = {}
+        for row in self._query(
+                """
+                  SELECT target_id, target_type, target_entity_type,
+                         target_entity_id, alias_value, using_uid, server_id
+                  FROM [:table schema=cerebrum name=email_target]
+                """):
+            targets[int(row['target_id'])] = EmailTargetInfo(
+                int(row['target_type']),
+                _int_or_none(row['target_entity_type']),
+                _int_or_none(row['target_entity_id']),
+                row['alias_value'],
+                _int_or_none(row['using_uid']),
+                _int_or_none(row['server_id']))
+        logger.debug('loaded %d email targets', len(targets))
+        return targets
+
+    @lazy_property
+    def addresses(self):
+        """ address_id -> EmailAddressInfo """
+        addresses = {}
+        for row in self._query(
+                """
+                  SELECT address_id, local_part, domain_id, target_id
+                  FROM [:table schema=cerebrum name=email_address]
+                """):
+            addresses[int(row['address_id'])] = EmailAddressInfo(
+                row['local_part'],
+                int(row['domain_id']),
+                int(row['target_id']))
+        logger.debug('loaded %d email addresses', len(addresses))
+        return addresses
+
+    @lazy_property
+    def primary(self):
+        """ target_id -> primary address_id """
+        primary = dict(
+            (int(row['target_id']), int(row['address_id']))
+            for row in self._query(
+                """
+                  SELECT target_id, address_id
+                  FROM [:table schema=cerebrum name=email_primary_address]
+                """))
+        logger.debug('loaded %d primary addresses', len(primary))
+        return primary
+
+    @lazy_property
+    def forwards(self):
+        """ target_id -> list of EmailForwardInfo """
+        forwards = {}
+        for row in self._query(
+                """
+                  SELECT target_id, forward_to, enable
+                  FROM [:table schema=cerebrum name=email_forward]
+                """):
+            forwards.setdefault(int(row['target_id']), []).append(
+                EmailForwardInfo(row['forward_to'], row['enable'] == 'T'))
+        logger.debug('loaded forwards for %d email targets', len(forwards))
+        return forwards
+
+    @lazy_property
+    def quotas(self):
+        """ target_id -> EmailQuotaInfo """
+        quotas = {}
+        for row in self._query(
+                """
+                  SELECT target_id, quota_soft, quota_hard
+                  FROM [:table schema=cerebrum name=email_quota]
+                """):
+            quotas[int(row['target_id'])] = EmailQuotaInfo(
+                _int_or_none(row['quota_soft']),
+                _int_or_none(row['quota_hard']))
+        logger.debug('loaded %d email quotas', len(quotas))
+        return quotas
+
+    @lazy_property
+    def accounts(self):
+        """ account_id -> AccountInfo """
+        accounts = {}
+        for row in self._query(
+                """
+                  SELECT ai.account_id, en.entity_name,
+                    (ai.expire_date IS NOT NULL AND
+                     ai.expire_date <= [:now]) AS is_expired
+                  FROM [:table schema=cerebrum name=account_info] ai
+                  JOIN [:table schema=cerebrum name=entity_name] en
+                    ON en.entity_id = ai.account_id
+                    AND en.value_domain = :namespace
+                """,
+                {'namespace': int(self.const.account_namespace)}):
+            accounts[int(row['account_id'])] = AccountInfo(
+                row['entity_name'],
+                bool(row['is_expired']))
+        logger.debug('loaded %d accounts', len(accounts))
+        return accounts
+
+    #
+    # Derived maps
+    #
+    @lazy_property
+    def target_addresses(self):
+        """ target_id -> list of address_ids """
+        result = {}
+        for address_id, address in self.addresses.items():
+            result.setdefault(address.target_id, []).append(address_id)
+        return result
+
+    @lazy_property
+    def domain_addresses(self):
+        """ domain_id -> list of address_ids """
+        result = {}
+        for address_id, address in self.addresses.items():
+            result.setdefault(address.domain_id, []).append(address_id)
+        return result
+
+    @lazy_property
+    def entity_targets(self):
+        """ target_entity_id -> list of target_ids """
+        result = {}
+        for target_id, target in self.targets.items():
+            if target.entity_id is not None:
+                result.setdefault(target.entity_id, []).append(target_id)
+        return result
+
+    #
+    # Lookups
+    #
+    def get_address(self, address_id):
+        """ Get a formatted email address. """
+        address = self.addresses[address_id]
+        return '@'.join((address.local_part,
+                         self.domains[address.domain_id]))
+
+    def get_primary_address(self, target_id):
+        """ Get the formatted primary address of a target, or None. """
+        address_id = self.primary.get(target_id)
+        if address_id is None:
+            return None
+        return self.get_address(address_id)
+
+    def get_target_addresses(self, target_id):
+        """ Get all formatted addresses of a target. """
+        return [self.get_address(address_id)
+                for address_id in self.target_addresses.get(target_id, ())]
+
+    def get_domain_addresses(self, domain_id):
+        """ Get all formatted addresses in a domain. """
+        return [self.get_address(address_id)
+                for address_id in self.domain_addresses.get(domain_id, ())]
+
+    def get_uname2mailaddr(self, filter_expired=True, primary_only=True,
+                           filter_deleted=True):
+        """
+        Collect uname -> e-mail address mappings.
+
+        Arguments and return value are the same as for
+        ``AccountEmailMixin.getdict_uname2mailaddr()``.
+        """
+        target_types = set((int(self.const.email_target_account),))
+        if not filter_deleted:
+            target_types.add(int(self.const.email_target_deleted))
+
+        result = {}
+        for target_id, target in self.targets.items():
+            if target.target_type not in target_types:
+                continue
+            account = self.accounts.get(target.entity_id)
+            if account is None:
+                continue
+            if filter_expired and account.is_expired:
+                continue
+            if primary_only:
+                address = self.get_primary_address(target_id)
+                if address is not None:
+                    result[account.name] = address
+            else:
+                addresses = self.get_target_addresses(target_id)
+                if addresses:
+                    result.setdefault(account.name, set()).update(addresses)
+        return result
+
+    def get_quota_stats(self, target_type=None):
+        """
+        Get quota statistics for each email server.
+
+        :param target_type: only count targets of this type (default: account)
+
+        :returns dict:
+            server_id -> dict with total_quota, min_quota, max_quota and
+            total_accounts
+        """
+        if target_type is None:
+            target_type = self.const.email_target_account
+        target_type = int(target_type)
+        if target_type in self._quota_stats:
+            return self._quota_stats[target_type]
+
+        stats = self._quota_stats[target_type] = {}
+        for target_id, quota in self.quotas.items():
+            target = self.targets.get(target_id)
+            if target is None or target.target_type != target_type:
+                continue
+            server = stats.setdefault(target.server_id, {
+                'total_quota': None,
+                'min_quota': None,
+                'max_quota': None,
+                'total_accounts': 0,
+            })
+            server['total_accounts'] += 1
+            hard = quota.quota_hard
+            if hard is None:
+                continue
+            server['total_quota'] = (server['total_quota'] or 0) + hard
+            server['min_quota'] = (hard if server['min_quota'] is None
+                                   else min(server['min_quota'], hard))
+            server['max_quota'] = (hard if server['max_quota'] is None
+                                   else max(server['max_quota'], hard))
+        return stats
+
+    def get_quota_stats_by_server(self, server, target_type=None):
+        """
+        Get quota statistics for an email server.
+
+        Values are None if there are no targets on the server, like
+        :meth:`Cerebrum.modules.Email.EmailQuota.get_quota_stats_by_server`.
+        """
+        return self.get_quota_stats(target_type).get(int(server), {
+            'total_quota': None,
+            'min_quota': None,
+            'max_quota': None,
+            'total_accounts': 0,
+        })
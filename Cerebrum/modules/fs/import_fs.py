@@ -28,9 +28,14 @@ from __future__ import (
 import json
 import logging
 from datetime import date, datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 from Cerebrum import Errors
+from Cerebrum.modules.fs.person_cache import (
+    FsPersonCache,
+    format_address,
+    touch_affiliations,
+)
 from Cerebrum.modules.no import fodselsnr
 from Cerebrum.modules.no.uio.AutoStud import StudentInfo
 from Cerebrum.Utils import Factory
@@ -42,12 +47,26 @@ import cereconf
 # Globals
 logger = logging.getLogger(__name__)
 
+# Stand-in for a Person object, for callbacks that only need the entity_id of
+# an unchanged person.
+_PersonRef = namedtuple('_PersonRef', ('entity_id',))
+
 
 class FsImporter(object):
     def __init__(self, gen_groups, include_delete, commit,
                  studieprogramfile, source, rules, adr_map,
                  rule_map=None, reg_fagomr=False,
-                 reservation_query=None):
+                 reservation_query=None, preload=False, commit_size=1):
+        """
+        :param bool preload:
+            Preload all person data, and skip persons that are unchanged (see
+            :mod:`Cerebrum.modules.fs.person_cache`).
+
+        :param int commit_size:
+            Commit (or rollback) after every *commit_size* persons.  Note that
+            :meth:`.flush` must be called after the last person has been
+            processed.
+        """
         # Variables passed to/from main
         self.db = Factory.get('Database')()
         self.db.cl_init(change_program='import_fs')
@@ -89,6 +108,17 @@ class FsImporter(object):
         self.commit = commit
         self.source = source
 
+        self.commit_size = max(1, int(commit_size or 1))
+        # person_info of persons processed since last commit/rollback
+        self._batch = []
+        # unchanged persons processed since last commit/rollback
+        self._unchanged_ids = []
+
+        self.person_cache = None
+        self._reservation_members = None
+        if preload:
+            self._init_person_cache()
+
         self.disregard_grace_for_affs = [
             int(self.co.human2constant(x))
             for x in cereconf.FS_EXCLUDE_AFFILIATIONS_FROM_GRACE]
@@ -115,6 +145,26 @@ class FsImporter(object):
             )
             self.group.write_db()
 
+    def _init_person_cache(self):
+        self.person_cache = FsPersonCache(
+            self.db,
+            self.co.system_fs,
+            id_types=(self.co.externalid_fodselsnr,
+                      self.co.externalid_studentnr),
+            name_variants=(self.co.name_first, self.co.name_last),
+            contact_type=self.co.contact_mobile_phone)
+        self.person_cache.load()
+        logger.info("Preloaded data for %d persons", len(self.person_cache))
+        if self.gen_groups:
+            self._load_reservation_members()
+
+    def _load_reservation_members(self):
+        self._reservation_members = set(
+            int(row['member_id'])
+            for row in self.group.search_members(
+                group_id=self.group.entity_id,
+                member_filter_expired=False))
+
     def _load_cere_aff(self):
         fs_aff = {}
         person = Factory.get("Person")(self.db)
@@ -186,7 +236,18 @@ class FsImporter(object):
             logger.warn('No birth date registered for studentnr %s',
                         pd['studentnr'])
 
-        person = self._get_person(fnr, pd['studentnr'])
+        if self.person_cache is None:
+            person = self._get_person(fnr, pd['studentnr'])
+        else:
+            person_id = self._find_person_id(fnr, pd['studentnr'])
+            if (person_id is not None and self.person_cache.is_unchanged(
+                    person_id, self._get_person_state(person_info, pd))):
+                self._process_unchanged(person_id, person_info, pd)
+                self._end_person(person_info)
+                return
+            person = Factory.get('Person')(self.db)
+            if person_id is not None:
+                person.find(person_id)
 
         if self._db_add_person(person, person_info, pd):
             # Perform following operations only if _db_add_person didn't fail
@@ -194,11 +255,144 @@ class FsImporter(object):
                 self._register_fagomrade(person, person_info)
             if self.gen_groups:
                 self._add_reservations(person_info, person)
+            if self.person_cache is not None:
+                self.person_cache.invalidate(person.entity_id)
+                self.person_cache.add_person_ids(
+                    person.entity_id,
+                    *self._get_lookup_ids(fnr, pd['studentnr']))
+            self._end_person(person_info)
+        elif self._batch:
+            # _db_add_person rolled back the rest of the batch as well
+            self._replay_batch()
+
+    def _end_person(self, person_info):
+        """ Commit or rollback after a successfully processed person. """
+        self._batch.append(person_info)
+        if len(self._batch) >= self.commit_size:
+            self.flush()
+
+    def flush(self):
+        """ Commit or rollback all pending persons. """
+        if self._unchanged_ids:
+            touch_affiliations(self.db, self.co.system_fs,
+                               self._unchanged_ids)
+        if self.commit:
+            self.db.commit()
+            if self.person_cache is not None:
+                self.person_cache.commit()
+        else:
+            self.db.rollback()
+            self._reset_pending()
+        self._batch = []
+        self._unchanged_ids = []
+
+    def _reset_pending(self):
+        if self.person_cache is not None:
+            self.person_cache.rollback()
+            if self._reservation_members is not None:
+                self._load_reservation_members()
+
+    def _replay_batch(self):
+        """ Re-process persons that were rolled back with a failed person. """
+        batch = self._batch
+        self._batch = []
+        self._unchanged_ids = []
+        self._reset_pending()
+        logger.info("Re-processing %d rolled back persons", len(batch))
+        commit_size = self.commit_size
+        self.commit_size = 1
+        try:
+            for person_info in batch:
+                self.process_person_callback(person_info)
+        finally:
+            self.commit_size = commit_size
 
-            if self.commit:
-                self.db.commit()
-            else:
-                self.db.rollback()
+    def _get_lookup_ids(self, fnr, studentnr):
+        fsids = [(self.co.externalid_fodselsnr, fnr)]
+        if studentnr is not None:
+            fsids.append((self.co.externalid_studentnr, studentnr))
+        return fsids
+
+    def _find_person_id(self, fnr, studentnr):
+        """ Find person_id from preloaded data, like :meth:`._get_person` """
+        try:
+            return self.person_cache.find_person_id(
+                *self._get_lookup_ids(fnr, studentnr))
+        except Errors.TooManyRowsError as e:
+            logger.error("Trying to find studentnr %r, "
+                         "getting several persons: %r",
+                         studentnr, e)
+            return None
+
+    def _get_person_state(self, person_info, pd):
+        """
+        Get the person data that :meth:`._db_add_person` would write.
+
+        See :mod:`Cerebrum.modules.fs.person_cache` for details.
+        """
+        external_ids = {int(self.co.externalid_fodselsnr): pd['fnr']}
+        if pd['studentnr'] is not None:
+            external_ids[int(self.co.externalid_studentnr)] = pd['studentnr']
+        if pd.get('personlopenr') is not None:
+            external_ids[int(self.co.externalid_fs_lopenr)] = (
+                pd['personlopenr'])
+
+        addresses = {}
+        for address_info, ad_const in zip(self._calc_address(person_info),
+                                          (self.co.address_post,
+                                           self.co.address_post_private,
+                                           self.co.address_street)):
+            if address_info is not None:
+                addresses[int(ad_const)] = format_address(address_info)
+
+        affiliations = {}
+        for ou, aff, aff_status in self._filter_affiliations(
+                list(pd['affiliations'])):
+            affiliations[(int(ou), int(aff))] = int(aff_status)
+
+        numbers = self._get_cellphones(person_info)
+        return {
+            'birth_date': get_date(pd['birth_date']),
+            'gender': int(pd['gender']),
+            'names': {
+                int(self.co.name_first): pd['fornavn'],
+                int(self.co.name_last): pd['etternavn'],
+            },
+            'external_ids': external_ids,
+            'addresses': addresses,
+            'affiliations': affiliations,
+            'cellphone': numbers.pop() if len(numbers) == 1 else None,
+        }
+
+    def _process_unchanged(self, person_id, person_info, pd):
+        """ Process a person where the person data is unchanged. """
+        logger.info("**** EQUAL ****")
+        self._unchanged_ids.append(person_id)
+        if self.include_delete:
+            for ou, aff, aff_status in pd['affiliations']:
+                key_a = "%s:%s:%s" % (person_id, ou, int(aff))
+                if key_a in self.old_aff:
+                    self.old_aff[key_a] = False
+        if self.reg_fagomr and (
+                'fagperson' in person_info
+                or person_id in self._fagfelt_owners):
+            person = Factory.get('Person')(self.db)
+            person.find(person_id)
+            self._register_fagomrade(person, person_info)
+        if self.gen_groups:
+            self._add_reservations(person_info, _PersonRef(person_id))
+
+    @property
+    def _fagfelt_owners(self):
+        try:
+            return self.__fagfelt_owners
+        except AttributeError:
+            person = Factory.get('Person')(self.db)
+            self.__fagfelt_owners = set(
+                int(row['entity_id'])
+                for row in person.list_traits(
+                    code=self.co.trait_fagomrade_fagfelt))
+            return self.__fagfelt_owners
 
     def _get_person(self, fnr, studentnr):
         fsids = [(self.co.externalid_fodselsnr, fnr)]
@@ -405,17 +599,7 @@ class FsImporter(object):
         # there is nothing we can do but to complain.
         fnr = "%06d%05d" % (int(person_info["fodselsdato"]),
                             int(person_info["personnr"]))
-        phone_selector = "telefonnr_mobil"
-        phone_country = "telefonlandnr_mobil"
-        phone_region = "telefonretnnr_mobil"
-        numbers = set()
-        for key in person_info:
-            for dct in person_info[key]:
-                if phone_selector in dct:
-                    phone = (dct.get(phone_region) or '') + dct[phone_selector]
-                    if dct.get(phone_country):
-                        phone = '+' + dct[phone_country] + phone
-                    numbers.add(phone.strip().replace(' ', ''))
+        numbers = self._get_cellphones(person_info)
 
         if len(numbers) < 1:
             return
@@ -440,6 +624,21 @@ class FsImporter(object):
             "Person %s has several cell phone numbers. Ignoring them all",
             fnr)
 
+    def _get_cellphones(self, person_info):
+        """ Get a set of all cell phone numbers from person_info. """
+        phone_selector = "telefonnr_mobil"
+        phone_country = "telefonlandnr_mobil"
+        phone_region = "telefonretnnr_mobil"
+        numbers = set()
+        for key in person_info:
+            for dct in person_info[key]:
+                if phone_selector in dct:
+                    phone = (dct.get(phone_region) or '') + dct[phone_selector]
+                    if dct.get(phone_country):
+                        phone = '+' + dct[phone_country] + phone
+                    numbers.add(phone.strip().replace(' ', ''))
+        return numbers
+
     def _filter_affiliations(self, affiliations):
         """The affiliation list with cols (ou, affiliation, status) may
         contain multiple status values for the same (ou, affiliation)
@@ -588,16 +787,25 @@ class FsImporter(object):
             # want to appear in the directory" answer.
             self._rem_res(new_person.entity_id)
 
+    def _has_res(self, entity_id):
+        if self._reservation_members is not None:
+            return int(entity_id) in self._reservation_members
+        return bool(self.group.has_member(entity_id))
+
     def _add_res(self, entity_id):
-        if not self.group.has_member(entity_id):
+        if not self._has_res(entity_id):
             self.group.add_member(entity_id)
+            if self._reservation_members is not None:
+                self._reservation_members.add(int(entity_id))
             logging.debug('Added member %r to group %r', entity_id, self.group)
             return True
         return False
 
     def _rem_res(self, entity_id):
-        if self.group.has_member(entity_id):
+        if self._has_res(entity_id):
             self.group.remove_member(entity_id)
+            if self._reservation_members is not None:
+                self._reservation_members.discard(int(entity_id))
             logging.debug('Removed member %r from group %r', entity_id,
                           self.group)
             return True
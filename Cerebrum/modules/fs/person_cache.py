@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Preloaded person data for the FS person import.
+
+The :class:`.FsPersonCache` loads all the person data that the FS import
+maintains (external ids, names, addresses, affiliations, mobile numbers) with
+a handful of queries.  This allows :class:`Cerebrum.modules.fs.import_fs.
+FsImporter` to:
+
+1. Look up persons by external id without a query per person.
+2. Detect persons where the import wouldn't change anything, and skip
+   populating and writing these persons.
+
+Person state is compared as a simple dict (see
+:meth:`.FsImporter._get_person_state`):
+::
+
+    {
+        'birth_date': <date or None>,
+        'gender': <int>,
+        'names': {<name variant>: <name>, ...},
+        'external_ids': {<id type>: <external id>, ...},
+        'addresses': {<address type>: <address tuple>, ...},
+        'affiliations': {(<ou id>, <affiliation>): <status>, ...},
+        'cellphone': <mobile number or None>,
+    }
+
+Any difference from the cached state means that the person needs to be
+processed the regular way.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import collections
+import logging
+
+from Cerebrum import Errors
+from Cerebrum.Utils import Factory, argument_to_sql
+from Cerebrum.utils.date_compat import get_date
+
+logger = logging.getLogger(__name__)
+
+
+def format_address(address):
+    """ Get a comparable address tuple from an address dict or db row. """
+    return tuple(address.get(k) for k in ('address_text', 'p_o_box',
+                                          'postal_number', 'city',
+                                          'country'))
+
+
+class FsPersonCache(object):
+    """ Preloaded FS person data. """
+
+    def __init__(self, db, source_system, id_types, name_variants,
+                 contact_type):
+        """
+        :param source_system: the source system to cache data from
+        :param id_types: external id types used for person lookup
+        :param name_variants: name variants maintained by the import
+        :param contact_type: contact type used for mobile phone numbers
+        """
+        self.db = db
+        self.source_system = int(source_system)
+        self.id_types = tuple(int(t) for t in id_types)
+        self.name_variants = tuple(int(v) for v in name_variants)
+        self.contact_type = int(contact_type)
+
+        # (id_type, external_id) -> set of person_id
+        self._id_index = collections.defaultdict(set)
+        # person_id -> state dict, see module doc
+        self._state = {}
+
+        # Pending changes that should be discarded on rollback
+        self._pending_ids = []
+
+    def __len__(self):
+        return len(self._state)
+
+    def _get_state(self, person_id):
+        try:
+            return self._state[person_id]
+        except KeyError:
+            state = self._state[person_id] = {
+                'birth_date': None,
+                'gender': None,
+                'names': {},
+                'external_ids': {},
+                'addresses': {},
+                'affiliations': {},
+                'cellphones': set(),
+            }
+            return state
+
+    def load(self):
+        """ Load all person data. """
+        pe = Factory.get('Person')(self.db)
+        co = Factory.get('Constants')(self.db)
+
+        # Lookup index - note that lookups are done regardless of source
+        # system, just like Entity.find_by_external_ids()
+        for row in pe.search_external_ids(id_type=self.id_types,
+                                          entity_type=co.entity_person,
+                                          fetchall=False):
+            key = (int(row['id_type']), row['external_id'])
+            self._id_index[key].add(int(row['entity_id']))
+        logger.debug("cached %d external ids", len(self._id_index))
+
+        for row in self.db.query(
+                """
+                  SELECT person_id, birth_date, gender
+                  FROM [:table schema=cerebrum name=person_info]
+                """, fetchall=False):
+            state = self._get_state(int(row['person_id']))
+            state['birth_date'] = get_date(row['birth_date'])
+            state['gender'] = int(row['gender'])
+        logger.debug("cached %d persons", len(self._state))
+
+        for row in pe.search_external_ids(source_system=self.source_system,
+                                          entity_type=co.entity_person,
+                                          fetchall=False):
+            state = self._get_state(int(row['entity_id']))
+            state['external_ids'][int(row['id_type'])] = row['external_id']
+
+        for row in pe.search_person_names(source_system=self.source_system,
+                                          name_variant=self.name_variants):
+            state = self._get_state(int(row['person_id']))
+            state['names'][int(row['name_variant'])] = row['name']
+
+        for row in pe.list_entity_addresses(entity_type=co.entity_person,
+                                            source_system=self.source_system):
+            state = self._get_state(int(row['entity_id']))
+            state['addresses'][int(row['address_type'])] = (
+                format_address(row))
+
+        for row in pe.list_affiliations(source_system=self.source_system):
+            state = self._get_state(int(row['person_id']))
+            key = (int(row['ou_id']), int(row['affiliation']))
+            state['affiliations'][key] = int(row['status'])
+
+        for row in pe.list_contact_info(source_system=self.source_system,
+                                        contact_type=self.contact_type,
+                                        entity_type=co.entity_person):
+            state = self._get_state(int(row['entity_id']))
+            state['cellphones'].add(row['contact_value'])
+
+    def find_person_id(self, *ids):
+        """
+        Find a person by external ids.
+
+        This mimics :meth:`Cerebrum.Entity.EntityExternalId.
+        find_by_external_ids`.
+
+        :param ids: (id_type, external_id) pairs
+
+        :returns: the matching person_id, or None if no person matches
+        :raises Errors.TooManyRowsError: if multiple persons matches
+        """
+        person_ids = set()
+        for id_type, external_id in ids:
+            person_ids.update(self._id_index.get((int(id_type), external_id),
+                                                 ()))
+        if len(person_ids) > 1:
+            raise Errors.TooManyRowsError(
+                "Multiple persons matches %r: %r" % (ids, person_ids))
+        if person_ids:
+            return person_ids.pop()
+        return None
+
+    def add_person_ids(self, person_id, *ids):
+        """
+        Add (id_type, external_id) pairs for a person written by the import.
+
+        The new ids are kept as pending until :meth:`.commit`.
+        """
+        for id_type, external_id in ids:
+            key = (int(id_type), external_id)
+            if int(person_id) in self._id_index[key]:
+                continue
+            self._id_index[key].add(int(person_id))
+            self._pending_ids.append((key, int(person_id)))
+
+    def is_unchanged(self, person_id, new_state):
+        """
+        Check if writing *new_state* to *person_id* would change anything.
+
+        :param int person_id: an existing person
+        :param dict new_state: the state that the import would write
+        """
+        try:
+            state = self._state[int(person_id)]
+        except KeyError:
+            return False
+
+        if any(value is None for value in new_state['names'].values()):
+            # let the regular path deal with missing names
+            return False
+        if (state['birth_date'] != new_state['birth_date']
+                or state['gender'] != int(new_state['gender'])
+                or state['names'] != new_state['names']
+                or state['addresses'] != new_state['addresses']
+                or state['affiliations'] != new_state['affiliations']):
+            return False
+        for id_type, value in new_state['external_ids'].items():
+            if state['external_ids'].get(id_type) != value:
+                return False
+        cellphone = new_state['cellphone']
+        if cellphone and cellphone not in state['cellphones']:
+            return False
+        return True
+
+    def invalidate(self, person_id):
+        """ Forget cached state for a person that has been updated. """
+        self._state.pop(int(person_id), None)
+
+    def commit(self):
+        """ Accept pending changes. """
+        self._pending_ids = []
+
+    def rollback(self):
+        """ Discard pending changes. """
+        for key, person_id in self._pending_ids:
+            self._id_index[key].discard(person_id)
+        self._pending_ids = []
+
+
+def touch_affiliations(db, source_system, person_ids):
+    """
+    Update last_date for all active affiliations from a source system.
+
+    This is what :meth:`Cerebrum.Person.Person.write_db` does for affiliations
+    that are re-populated without changes, for a whole batch of persons.
+    """
+    if not person_ids:
+        return
+    binds = {'source': int(source_system)}
+    db.execute(
+        """
+          UPDATE [:table schema=cerebrum name=person_affiliation_source]
+          SET last_date=[:now]
+          WHERE source_system=:source
+            AND deleted_date IS NULL
+            AND {}
+        """.format(argument_to_sql(person_ids, 'person_id', binds, int)),
+        binds)
@@ -38,6 +38,17 @@ To get a client:
     # most convenient: from file
     filename = 'greg-config.yml'
     client = get_client(filename)
+
+Listings are fetched one page ahead of the consumer, and multiple persons can
+be fetched concurrently:
+
+::
+
+    for greg_id, person in client.get_persons(greg_ids):
+        ...
+
+If the client is given a *cache_dir*, GET responses are cached on disk, and
+revalidated using their ETag/Last-Modified headers.
 """
 from __future__ import (
     absolute_import,
@@ -54,8 +65,9 @@ from six.moves.urllib.parse import parse_qsl, urlsplit
 from Cerebrum.config import loader
 from Cerebrum.config.configuration import Configuration, ConfigDescriptor
 from Cerebrum.config.secrets import Secret, get_secret_from_string
-from Cerebrum.config.settings import String
+from Cerebrum.config.settings import Integer, String
 from Cerebrum.utils import http as http_utils
+from Cerebrum.utils import http_fetch
 from Cerebrum.utils import reprutils
 
 logger = logging.getLogger(__name__)
@@ -106,18 +118,27 @@ class GregClient(object):
         'Accept': 'application/json',
     }
 
-    def __init__(self, url, headers=None, use_sessions=True):
+    # number of pages to fetch ahead of the consumer in listings
+    prefetch_pages = 2
+
+    def __init__(self, url, headers=None, use_sessions=True, workers=4,
+                 cache_dir=None):
         """
         :param str url: API URL
         :param dict headers: Headers to apply to all requests
         :param bool use_sessions: Keep HTTP connections alive (default True)
+        :param int workers: Number of concurrent requests (default 4)
+        :param str cache_dir: Cache GET responses in this directory
         """
         self.urls = GregEndpoints(url)
         self.headers = http_utils.merge_headers(self.default_headers, headers)
+        self.workers = int(workers)
         if use_sessions:
-            self._session = requests.Session()
+            self._session = http_fetch.get_session(self.workers + 1)
         else:
             self._session = requests
+        self.cache = http_fetch.HttpCache(cache_dir) if cache_dir else None
+        self._prefetched = {}
 
     def __repr__(self):
         return ('<{cls.__name__} {obj.urls.baseurl}>').format(cls=type(self),
@@ -145,6 +166,12 @@ class GregClient(object):
         """ Send an HTTP request to the API.  """
         headers = http_utils.merge_headers(self.headers, headers)
         params = {} if params is None else params
+        if self.cache and method_name.upper() == 'GET':
+            return self.cache.request(self._session,
+                                      url,
+                                      headers=headers,
+                                      params=params,
+                                      **kwargs)
         return self._session.request(method_name,
                                      url,
                                      headers=headers,
@@ -161,29 +188,32 @@ class GregClient(object):
             return response.json()
         response.raise_for_status()
 
-    def _list_objects(self, url, params):
-        """ fetch all available objects at the given greg url """
-        response = self._call('GET', url, headers=self.headers, params=params)
-
-        while response:
+    def _list_pages(self, url, params):
+        """ fetch all pages of objects at the given greg url """
+        while True:
+            response = self._call('GET', url, headers=self.headers,
+                                  params=params)
             response.raise_for_status()
             data = response.json()
-            results = data.pop('results')
+            yield data.pop('results')
+
             next_page = data.pop('next', None)
+            if not next_page:
+                break
+            next_q = urlsplit(next_page).query
+            params = dict(parse_qsl(next_q))
+            logger.debug('next: %r, params: %r', next_page, params)
 
+    def _list_objects(self, url, params):
+        """ fetch all available objects at the given greg url """
+        pages = self._list_pages(url, params)
+        if self.workers:
+            # fetch the next page(s) while the current page is processed
+            pages = http_fetch.prefetch_iter(pages, size=self.prefetch_pages)
+        for results in pages:
             for obj in results:
                 yield obj
 
-            if next_page:
-                next_q = urlsplit(next_page).query
-                params = dict(parse_qsl(next_q))
-                logger.debug('next: %r, params: %r',
-                             next_page, params)
-                response = self._call('GET', url, headers=self.headers,
-                                      params=params)
-            else:
-                response = None
-
     def get_health(self):
         """ get health status """
         url = self.urls.health
@@ -201,8 +231,47 @@ class GregClient(object):
 
     def get_person(self, greg_id):
         """ get person by id """
+        if greg_id in self._prefetched:
+            return self._prefetched.pop(greg_id)
         return self._get_object(self.urls.get_person(greg_id))
 
+    def get_persons(self, greg_ids):
+        """
+        get multiple persons by id, using concurrent requests
+
+        :returns generator: (greg_id, person) pairs, in order of greg_ids
+        """
+        def fetch(greg_id):
+            return greg_id, self._get_object(self.urls.get_person(greg_id))
+
+        return http_fetch.iter_concurrent(fetch, greg_ids,
+                                          workers=self.workers)
+
+    def prefetch_persons(self, greg_ids):
+        """
+        fetch persons concurrently, for use by subsequent get_person calls
+
+        Any previously prefetched, but unused, persons are discarded.
+        Persons that can't be fetched are ignored, and will be fetched again
+        by get_person.
+        """
+        def fetch(greg_id):
+            try:
+                return greg_id, self._get_object(
+                    self.urls.get_person(greg_id))
+            except Exception as e:
+                logger.warning('unable to prefetch greg_id=%s: %s',
+                               greg_id, e)
+                return greg_id, None
+
+        self._prefetched = {
+            greg_id: person
+            for greg_id, person in http_fetch.iter_concurrent(
+                fetch, greg_ids, workers=self.workers)
+            if person is not None
+        }
+        return len(self._prefetched)
+
     def list_orgunits(self):
         """ list orgunits """
         url = self.urls.orgunits
@@ -247,6 +316,13 @@ class GregClientConfig(Configuration):
     auth_header
         API auth header to place the auth secret in.  Defaults to
         X-Gravitee-Api-Key.
+
+    workers
+        Max number of concurrent requests.  Defaults to 4.
+
+    cache_dir
+        Cache GET responses in this directory, and revalidate them with
+        conditional requests.  Defaults to no cache.
     """
     url = ConfigDescriptor(
         String,
@@ -265,6 +341,19 @@ class GregClientConfig(Configuration):
         doc='Auth token header value',
     )
 
+    workers = ConfigDescriptor(
+        Integer,
+        minval=0,
+        default=4,
+        doc='Max number of concurrent requests',
+    )
+
+    cache_dir = ConfigDescriptor(
+        String,
+        default=None,
+        doc='Directory for caching API responses',
+    )
+
 
 def get_client(config):
     """
@@ -292,6 +381,8 @@ def get_client(config):
         'headers': {
             api_key_header: api_key_value,
         },
+        'workers': config.workers,
+        'cache_dir': config.cache_dir,
     }
 
     return GregClient(**kwargs)
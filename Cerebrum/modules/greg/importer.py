@@ -93,17 +93,21 @@ class GregImporter(object):
 
     mapper = GregMapper()
 
-    def __init__(self, db, client):
+    def __init__(self, db, client, sync_cache=None):
         self.db = db
         self.const = co = Factory.get('Constants')(db)
         self.datasource = GregDatasource(client)
+        self.sync_cache = sync_cache
 
         source_system = co.system_greg
-        self._sync_affs = AffiliationSync(db, source_system)
-        self._sync_cinfo = ContactInfoSync(db, source_system)
-        self._sync_ids = ExternalIdSync(db, source_system)
+        self._sync_affs = AffiliationSync(db, source_system,
+                                          cache=sync_cache)
+        self._sync_cinfo = ContactInfoSync(db, source_system,
+                                           cache=sync_cache)
+        self._sync_ids = ExternalIdSync(db, source_system, cache=sync_cache)
         self._sync_name = PersonNameSync(db, source_system, (co.name_first,
-                                                             co.name_last))
+                                                             co.name_last),
+                                         cache=sync_cache)
 
     def _sync_consent_groups(self, person_obj, consents):
         """
@@ -138,6 +142,68 @@ class GregImporter(object):
             raise ValueError('invalid person: no external_ids')
         return search(self.db, criterias, required=False)
 
+    def get_person_id_map(self):
+        """
+        Get all persons that can be matched directly by their greg id.
+
+        Greg ids that are shared by multiple persons are left out, and left
+        for :meth:`.get_person` to deal with.
+
+        :returns dict: greg id -> person id
+        """
+        pe = Factory.get('Person')(self.db)
+        person_ids = {}
+        ambiguous = set()
+        for row in pe.search_external_ids(
+                id_type=self.const.externalid_greg_pid,
+                entity_type=self.const.entity_person,
+                fetchall=False):
+            greg_id = row['external_id']
+            person_id = int(row['entity_id'])
+            if person_ids.setdefault(greg_id, person_id) != person_id:
+                ambiguous.add(greg_id)
+        for greg_id in ambiguous:
+            del person_ids[greg_id]
+        return person_ids
+
+    def find_person_ids(self, greg_ids, person_id_map=None):
+        """
+        Find persons by greg id.
+
+        This is a bulk lookup of persons that can be matched directly by
+        their greg id, for use with :meth:`.prefetch`.  Persons that are
+        matched by other external ids are not included.
+
+        :param greg_ids: greg ids to look up
+        :param dict person_id_map:
+            A mapping from :meth:`.get_person_id_map`, for re-use in multiple
+            lookups.  A new mapping is fetched if not given.
+
+        :returns dict: greg id -> person id
+        """
+        if person_id_map is None:
+            person_id_map = self.get_person_id_map()
+        return dict((greg_id, person_id_map[greg_id])
+                    for greg_id in set(greg_ids)
+                    if greg_id in person_id_map)
+
+    def prefetch(self, person_ids):
+        """
+        Prefetch current person values for a batch of persons.
+
+        Only useful if the import was given a *sync_cache*, and the same
+        cache is used for updating these persons.
+
+        :type person_ids: sequence of int
+        """
+        if self.sync_cache is None:
+            raise RuntimeError('prefetch requires a sync_cache')
+        self.sync_cache.prefetch((self._sync_affs,
+                                  self._sync_cinfo,
+                                  self._sync_ids,
+                                  self._sync_name),
+                                 person_ids)
+
     def get_ou(self, orgunit_ids):
         """ Find matching ou from a Greg orgunit dict. """
         search = OuMatcher()
@@ -46,14 +46,46 @@ class GregImportTasks(queue_handler.QueueHandler):
     manual_sub = 'manual'
     max_attempts = 20
 
-    def __init__(self, client, import_class):
+    def __init__(self, client, import_class, sync_cache=None):
         self._client = client
         self._import_class = import_class
+        self._sync_cache = sync_cache
+        # greg id -> person id, for all prefetch() calls
+        self._person_id_map = None
+
+    def _get_importer(self, db):
+        if self._sync_cache is None:
+            return self._import_class(db, client=self._client)
+        return self._import_class(db, client=self._client,
+                                  sync_cache=self._sync_cache)
+
+    def prefetch(self, db, greg_ids):
+        """
+        Prefetch current values for persons with the given greg ids.
+
+        Any previously prefetched values are discarded.  Requires a
+        *sync_cache*.
+
+        Greg ids are mapped to persons with a lookup that is fetched on the
+        first call, and re-used in later calls.  Persons that are created or
+        changed after that are simply not prefetched, and get their values
+        looked up during the import.
+        """
+        if self._sync_cache is None:
+            raise RuntimeError('prefetch requires a sync_cache')
+        self._sync_cache.clear()
+        importer = self._get_importer(db)
+        if self._person_id_map is None:
+            self._person_id_map = importer.get_person_id_map()
+        person_ids = importer.find_person_ids(greg_ids, self._person_id_map)
+        importer.prefetch(person_ids.values())
+        logger.info('prefetched values for %d of %d persons',
+                    len(person_ids), len(greg_ids))
 
     def _callback(self, db, task):
         greg_id = task.key
         logger.info('Updating greg_id=%s', greg_id)
-        importer = self._import_class(db, client=self._client)
+        importer = self._get_importer(db)
         importer.handle_reference(greg_id)
         logger.info('Updated greg_id=%s', greg_id)
 
@@ -52,17 +52,42 @@ class EmployeeImportBase(AbstractImport):
     KEEP_ID_TYPES = ('NO_BIRTHNO', 'PASSNR')
 
     def __init__(self, *args, **kwargs):
+        sync_cache = kwargs.pop('sync_cache', None)
         super(EmployeeImportBase, self).__init__(*args, **kwargs)
 
-        self._sync_affs = AffiliationSync(self.db, self.source_system)
-        self._sync_cinfo = ContactInfoSync(self.db, self.source_system)
-        self._sync_ids = ExternalIdSync(self.db, self.source_system)
+        self.sync_cache = sync_cache
+        self._sync_affs = AffiliationSync(self.db, self.source_system,
+                                          cache=sync_cache)
+        self._sync_cinfo = ContactInfoSync(self.db, self.source_system,
+                                           cache=sync_cache)
+        self._sync_ids = ExternalIdSync(self.db, self.source_system,
+                                        cache=sync_cache)
         self._sync_name = PersonNameSync(self.db, self.source_system,
                                          (self.const.name_first,
-                                          self.const.name_last))
+                                          self.const.name_last),
+                                         cache=sync_cache)
         self._sync_titles = NameLanguageSync(self.db,
                                              (self.const.work_title,
-                                              self.const.personal_title))
+                                              self.const.personal_title),
+                                             cache=sync_cache)
+
+    def prefetch(self, person_ids):
+        """
+        Prefetch current person values for a batch of persons.
+
+        Only useful if the import was given a *sync_cache*, and the same
+        cache is used for updating these persons.
+
+        :type person_ids: sequence of int
+        """
+        if self.sync_cache is None:
+            raise RuntimeError('prefetch requires a sync_cache')
+        self.sync_cache.prefetch((self._sync_affs,
+                                  self._sync_cinfo,
+                                  self._sync_ids,
+                                  self._sync_name,
+                                  self._sync_titles),
+                                 person_ids)
 
     @property
     def const(self):
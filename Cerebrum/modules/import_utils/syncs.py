@@ -22,6 +22,20 @@ Common utils for updating entity info from a given source system.
 
 This module generally consists of classes that implements affect + populate
 logic for all data types (including those that are missing this)
+
+Each sync fetches the current values for one entity at a time.  When syncing
+a batch of entities, the current values can be prefetched using a
+:class:`SyncCache`:
+::
+
+    cache = SyncCache()
+    sync_ids = ExternalIdSync(db, 'SAP', cache=cache)
+    sync_names = PersonNameSync(db, 'SAP', cache=cache)
+
+    cache.prefetch((sync_ids, sync_names), person_ids)
+    for person, values in ...:
+        sync_ids(person, values['ids'])
+        sync_names(person, values['names'])
 """
 from __future__ import (
     absolute_import,
@@ -35,6 +49,7 @@ import logging
 import six
 
 from Cerebrum import Constants
+from Cerebrum import Entity
 from Cerebrum import Errors
 from Cerebrum.Utils import Factory
 
@@ -71,6 +86,61 @@ def pretty_const_pairs(value):
                         for a, b in value))
 
 
+class SyncCache(object):
+    """
+    Prefetched current values for a batch of entities.
+
+    Prefetched values are fetched with one query (per chunk of entities) for
+    each sync, and are only used once: after a sync has been applied to an
+    entity, any later sync of that entity fetches its values from the
+    database.
+    """
+
+    def __init__(self, chunk_size=500):
+        """
+        :param int chunk_size: max number of entities in each query
+        """
+        self.chunk_size = chunk_size
+        self._values = {}
+
+    def __len__(self):
+        return sum(len(values) for values in self._values.values())
+
+    def prefetch(self, syncs, entity_ids):
+        """
+        Fetch current values for a batch of entities.
+
+        :param syncs: syncs to prefetch values for
+        :param entity_ids: entities to prefetch values for
+        """
+        entity_ids = sorted(set(int(e) for e in entity_ids))
+        for sync in syncs:
+            values = self._values.setdefault(sync.cache_key, {})
+            for offset in range(0, len(entity_ids), self.chunk_size):
+                chunk = entity_ids[offset:offset + self.chunk_size]
+                for entity_id in chunk:
+                    values[entity_id] = []
+                for entity_id, value in sync.fetch_current_many(chunk):
+                    values[int(entity_id)].append(value)
+            logger.debug('prefetched %s values for %d entities',
+                         sync.name, len(entity_ids))
+
+    def pop(self, sync, entity_id):
+        """
+        Get and remove prefetched values for an entity.
+
+        :returns list: current values, or None if not prefetched
+        """
+        values = self._values.get(sync.cache_key)
+        if not values:
+            return None
+        return values.pop(int(entity_id), None)
+
+    def clear(self):
+        """ Remove all prefetched values. """
+        self._values.clear()
+
+
 class _BaseSync(six.with_metaclass(abc.ABCMeta)):
     """ Abstract sync class.
 
@@ -78,20 +148,53 @@ class _BaseSync(six.with_metaclass(abc.ABCMeta)):
 
     - set a <subclass>.name
     - __call__(entity, values) -> update entity to values
+
+    Subclasses that support prefetching also needs to implement:
+
+    - fetch_current(entity) -> get current values for an entity
+    - fetch_current_many(entity_ids) -> get (entity_id, value) pairs
     """
 
     # Human readable name of this sync, for log messages and errors
     name = None
 
-    def __init__(self, db):
+    def __init__(self, db, cache=None):
         if not type(self).name:
             raise NotImplementedError('abstract sync (no name)')
         self.db = db
         self.const = Factory.get('Constants')(db)
+        self.cache = cache
 
     def __repr__(self):
         return '<{name}>'.format(name=type(self).__name__)
 
+    @property
+    def cache_key(self):
+        """ Identifies values from this sync in a SyncCache. """
+        return (type(self).__name__,)
+
+    def fetch_current(self, entity):
+        """ Fetch all current values for an entity. """
+        raise NotImplementedError('%s does not fetch values' % repr(self))
+
+    def fetch_current_many(self, entity_ids):
+        """
+        Fetch all current values for multiple entities.
+
+        :param entity_ids: a sequence of entity ids
+        :returns: an iterable of (entity-id, value) pairs, where value is
+                  one of the values from `fetch_current()`
+        """
+        raise NotImplementedError('%s does not prefetch values' % repr(self))
+
+    def get_current(self, entity):
+        """ Get current values for an entity, prefetched if available. """
+        if self.cache is not None:
+            values = self.cache.pop(self, entity.entity_id)
+            if values is not None:
+                return values
+        return self.fetch_current(entity)
+
     @abc.abstractmethod
     def __call__(self, entity, source_values):
         pass
@@ -100,8 +203,8 @@ class _BaseSync(six.with_metaclass(abc.ABCMeta)):
 class _SourceSystemSync(_BaseSync):
     """ Abstract sync with source_system. """
 
-    def __init__(self, db, source_system):
-        super(_SourceSystemSync, self).__init__(db)
+    def __init__(self, db, source_system, cache=None):
+        super(_SourceSystemSync, self).__init__(db, cache=cache)
         co = self.const
         self.source_system = self.const.get_constant(co.AuthoritativeSystem,
                                                      source_system)
@@ -111,6 +214,10 @@ class _SourceSystemSync(_BaseSync):
             name=type(self).__name__,
             source=six.text_type(self.source_system))
 
+    @property
+    def cache_key(self):
+        return (type(self).__name__, int(self.source_system))
+
 
 class _KeyValueSync(_SourceSystemSync):
     """ Abstract sync of key/value tuples.
@@ -123,14 +230,17 @@ class _KeyValueSync(_SourceSystemSync):
     - set a <subclass>.name and a <subclass>.type_cls
     - fetch_current() -> get (current key, current value) pairs from entity
     - apply_changes() -> update database with entity changes
+
+    Subclasses should also implement fetch_current_many(), for use with a
+    SyncCache.
     """
     # A constant type (or attribute to fetch from Factory.get('Constants'))
     type_cls = None
 
-    def __init__(self, db, source_system, affect_types=None):
+    def __init__(self, db, source_system, affect_types=None, cache=None):
         if not type(self).type_cls:
             raise NotImplementedError('abstract sync (no type_cls)')
-        super(_KeyValueSync, self).__init__(db, source_system)
+        super(_KeyValueSync, self).__init__(db, source_system, cache=cache)
         if affect_types:
             self.affect_types = tuple(self.get_type(t) for t in affect_types)
         else:
@@ -196,7 +306,7 @@ class _KeyValueSync(_SourceSystemSync):
                                     pretty_const(self.affect_types)))
 
         curr_pairs = set((self.get_type(k), v)
-                         for k, v in self.fetch_current(entity)
+                         for k, v in self.get_current(entity)
                          if self.affect_types is None
                          or k in self.affect_types)
         curr_types = set(t[0] for t in curr_pairs)
@@ -233,6 +343,12 @@ class PersonNameSync(_KeyValueSync):
         for row in entity.get_names(source_system=self.source_system):
             yield (row['name_variant'], row['name'])
 
+    def fetch_current_many(self, entity_ids):
+        pe = Factory.get('Person')(self.db)
+        for row in pe.search_person_names(person_id=entity_ids,
+                                          source_system=self.source_system):
+            yield row['person_id'], (row['name_variant'], row['name'])
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -254,6 +370,13 @@ class ExternalIdSync(_KeyValueSync):
         for row in entity.get_external_id(source_system=self.source_system):
             yield (row['id_type'], row['external_id'])
 
+    def fetch_current_many(self, entity_ids):
+        eid = Entity.EntityExternalId(self.db)
+        for row in eid.search_external_ids(source_system=self.source_system,
+                                           entity_id=entity_ids,
+                                           fetchall=False):
+            yield row['entity_id'], (row['id_type'], row['external_id'])
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -279,6 +402,13 @@ class ContactInfoSync(_KeyValueSync):
         for row in entity.get_contact_info(source=self.source_system):
             yield (row['contact_type'], row['contact_value'])
 
+    def fetch_current_many(self, entity_ids):
+        eci = Entity.EntityContactInfo(self.db)
+        for row in eci.list_contact_info(entity_id=entity_ids,
+                                         source_system=self.source_system):
+            yield row['entity_id'], (row['contact_type'],
+                                     row['contact_value'])
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -301,6 +431,23 @@ class AffiliationSync(_SourceSystemSync):
 
     name = 'affiliation'
 
+    def _get_aff(self, row):
+        return (row['ou_id'],
+                self.const.PersonAffiliation(row['affiliation']),
+                self.const.PersonAffStatus(row['status']))
+
+    def fetch_current(self, person_obj):
+        for row in person_obj.list_affiliations(
+                person_id=int(person_obj.entity_id),
+                source_system=self.source_system):
+            yield self._get_aff(row)
+
+    def fetch_current_many(self, entity_ids):
+        pe = Factory.get('Person')(self.db)
+        for row in pe.list_affiliations(person_id=list(entity_ids),
+                                        source_system=self.source_system):
+            yield row['person_id'], self._get_aff(row)
+
     def __call__(self, person_obj, aff_tuples):
         """
         Update affiliations for a given person.
@@ -335,14 +482,7 @@ class AffiliationSync(_SourceSystemSync):
         logger.debug('%s(%d, <%s>)', repr(self), person_id,
                      pretty_const(tuple(t[2] for t in new_affiliations)))
 
-        curr_affiliations = set()
-        for row in person_obj.list_affiliations(
-                person_id=person_id,
-                source_system=self.source_system):
-            ou_id = row['ou_id']
-            aff = self.const.PersonAffiliation(row['affiliation'])
-            status = self.const.PersonAffStatus(row['status'])
-            curr_affiliations.add((ou_id, aff, status))
+        curr_affiliations = set(self.get_current(person_obj))
 
         to_add = new_affiliations - curr_affiliations
         to_update = new_affiliations & curr_affiliations
@@ -411,6 +551,13 @@ class AddressSync(_KeyValueSync):
             addr_t = self.__normalize_addr(dict(row))
             yield (row['address_type'], addr_t)
 
+    def fetch_current_many(self, entity_ids):
+        ea = Entity.EntityAddress(self.db)
+        for row in ea.list_entity_addresses(entity_id=entity_ids,
+                                            source_system=self.source_system):
+            addr_t = self.__normalize_addr(dict(row))
+            yield row['entity_id'], (row['address_type'], addr_t)
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -441,11 +588,12 @@ class NameLanguageSync(_BaseSync):
 
     name = 'localized name'
 
-    def __init__(self, db, affect_types=None):
+    def __init__(self, db, affect_types=None, cache=None):
         """
         :param affect_types: A sequence of _EntityNameCode types to affect.
+        :param cache: A SyncCache with prefetched values.
         """
-        super(NameLanguageSync, self).__init__(db)
+        super(NameLanguageSync, self).__init__(db, cache=cache)
         if affect_types:
             self.affect_types = tuple(self.get_type(t) for t in affect_types)
         else:
@@ -462,6 +610,13 @@ class NameLanguageSync(_BaseSync):
                 entity_id=int(entity.entity_id)):
             yield (row['name_variant'], row['name_language'], row['name'])
 
+    def fetch_current_many(self, entity_ids):
+        enl = Entity.EntityNameWithLanguage(self.db)
+        for row in enl.search_name_with_language(entity_id=entity_ids):
+            yield row['entity_id'], (row['name_variant'],
+                                     row['name_language'],
+                                     row['name'])
+
     def __call__(self, entity, triplets):
         """ Sync localized name triplets.
 
@@ -496,7 +651,7 @@ class NameLanguageSync(_BaseSync):
                                     pretty_const(self.affect_types)))
 
         curr_pairs = set((self.get_type(key), self.get_subtype(subkey), value)
-                         for key, subkey, value in self.fetch_current(entity)
+                         for key, subkey, value in self.get_current(entity)
                          if self.affect_types is None
                          or key in self.affect_types)
         curr_types = set(t[:2] for t in curr_pairs)
@@ -103,7 +103,7 @@ class AllJobs(Jobs):
         pre=["import_lt", "import_fs", "process_students"],
         call=None,
         when=When(time=[Time(min=[10], hour=[1])]),
-        post=["backup", "rotate_logs"],
+        post=["backup", "rotate_logs", "partition_logs"],
     )
 
     backup = Action(
@@ -120,6 +120,13 @@ class AllJobs(Jobs):
         ),
         max_freq=to_seconds(hours=23),
     )
+    partition_logs = Action(
+        call=System(
+            os.path.join(sbin, "partition_logs.py"),
+            params=["--keep-months", "24", "--commit"],
+        ),
+        max_freq=to_seconds(hours=23),
+    )
 
     # exports
 
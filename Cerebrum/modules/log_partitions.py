@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Monthly partitions for the change_log and audit_log tables.
+
+The log tables are created as regular tables by ``design/mod_changelog.sql``
+and ``design/mod_auditlog.sql``.  Large installations can optionally convert
+them to range partitioned tables (PostgreSQL 11 or newer), with one partition
+per month:
+::
+
+    change_log            (partitioned by tstamp)
+      change_log_p202401  ['2024-01-01', '2024-02-01')
+      change_log_p202402  ['2024-02-01', '2024-03-01')
+      ...
+      change_log_default  (anything else)
+
+The benefits are:
+
+- Retention can drop whole months with :func:`.drop_partitions`, instead of
+  deleting (and vacuuming) millions of rows.
+- Searches on a time range only need to look at the relevant partitions.
+
+Partitions must be created before they are needed - :func:`.ensure_partitions`
+should run regularly (e.g. daily from job_runner, see
+``contrib/partition_logs.py``).  Rows outside of all monthly partitions ends
+up in the default partition, and a monthly partition can't be created while
+the default partition has rows for that month.
+
+Note that the primary key of a partitioned table must include the partition
+column, i.e. ``(change_id, tstamp)`` and ``(record_id, timestamp)``.  A table
+can therefore not be partitioned if other tables have foreign keys to it (e.g.
+``pending_change_log`` from ``mod_virthome``).
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import datetime
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+class LogTable(collections.namedtuple(
+        'LogTable',
+        ('name', 'column', 'primary_key', 'indexes', 'references'))):
+    """
+    Partitioning layout for a log table.
+
+    name
+        Table name
+    column
+        Timestamp column to partition by
+    primary_key
+        (constraint name, columns) - must include *column*
+    indexes
+        Sequence of (index name, columns)
+    references
+        Sequence of (column, ref table, ref column) foreign keys
+    """
+    __slots__ = ()
+
+CHANGE_LOG = LogTable(
+    name='change_log',
+    column='tstamp',
+    primary_key=('change_id_pk', ('change_id', 'tstamp')),
+    indexes=(
+        ('change_log_change_by_idx', ('change_by',)),
+        ('change_log_subject_idx', ('subject_entity',)),
+        ('change_log_subject_tstamp_idx', ('subject_entity', 'tstamp')),
+        ('change_log_type_tstamp_idx', ('change_type_id', 'tstamp')),
+    ),
+    references=(
+        ('change_type_id', 'change_type', 'change_type_id'),
+        ('change_by', 'entity_info', 'entity_id'),
+    ),
+)
+
+AUDIT_LOG = LogTable(
+    name='audit_log',
+    column='timestamp',
+    primary_key=('audit_log_record_idx', ('record_id', 'timestamp')),
+    indexes=(
+        ('audit_log_operator_idx', ('operator',)),
+        ('audit_log_entity_idx', ('entity',)),
+        ('audit_log_target_idx', ('target',)),
+        ('audit_log_entity_timestamp_idx', ('entity', 'timestamp')),
+        ('audit_log_type_timestamp_idx', ('change_type', 'timestamp')),
+    ),
+    references=(
+        ('change_type', 'change_type', 'change_type_id'),
+    ),
+)
+
+LOG_TABLES = collections.OrderedDict(
+    (t.name, t) for t in (CHANGE_LOG, AUDIT_LOG))
+
+
+#
+# Month helpers
+#
+
+
+def get_month(value):
+    """ Get the first day of the month for a date or datetime. """
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """ Add (or subtract) a number of months to a month. """
+    index = month.year * 12 + month.month - 1 + int(count)
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(start, end):
+    """ Iterate over months from *start* up to and including *end*. """
+    month = get_month(start)
+    end = get_month(end)
+    while month <= end:
+        yield month
+        month = add_months(month, 1)
+
+
+def get_partition_name(table, month):
+    """ Get the name of the partition for a given month. """
+    return '{}_p{:04d}{:02d}'.format(table, month.year, month.month)
+
+
+def get_default_partition_name(table):
+    """ Get the name of the default partition. """
+    return '{}_default'.format(table)
+
+
+def parse_partition_name(table, name):
+    """
+    Get the month of a partition.
+
+    :returns date: the month, or None if *name* isn't a monthly partition.
+    """
+    match = re.match(r'^{}_p(\d{{4}})(\d{{2}})$'.format(re.escape(table)),
+                     name)
+    if not match:
+        return None
+    return datetime.date(int(match.group(1)), int(match.group(2)), 1)
+
+
+#
+# Database helpers
+#
+
+
+def is_partitioned(db, table):
+    """ Check if *table* is a partitioned table. """
+    return bool(db.query(
+        """
+          SELECT 1
+          FROM pg_catalog.pg_partitioned_table pt
+          JOIN pg_catalog.pg_class c
+            ON c.oid = pt.partrelid
+          WHERE c.relname = :name
+            AND pg_catalog.pg_table_is_visible(c.oid)
+        """,
+        {'name': table}))
+
+
+def list_partitions(db, table):
+    """
+    Get monthly partitions of a table.
+
+    :returns dict: month -> partition name
+    """
+    partitions = {}
+    for row in db.query(
+            """
+              SELECT child.relname AS name
+              FROM pg_catalog.pg_inherits i
+              JOIN pg_catalog.pg_class parent
+                ON parent.oid = i.inhparent
+              JOIN pg_catalog.pg_class child
+                ON child.oid = i.inhrelid
+              WHERE parent.relname = :name
+                AND pg_catalog.pg_table_is_visible(parent.oid)
+            """,
+            {'name': table}):
+        month = parse_partition_name(table, row['name'])
+        if month is not None:
+            partitions[month] = row['name']
+    return partitions
+
+
+def list_referencing_constraints(db, table):
+    """ Get (table, constraint) foreign keys that references *table*. """
+    return [
+        (row['table_name'], row['constraint_name'])
+        for row in db.query(
+            """
+              SELECT src.relname AS table_name,
+                     con.conname AS constraint_name
+              FROM pg_catalog.pg_constraint con
+              JOIN pg_catalog.pg_class dst
+                ON dst.oid = con.confrelid
+              JOIN pg_catalog.pg_class src
+                ON src.oid = con.conrelid
+              WHERE con.contype = 'f'
+                AND dst.relname = :name
+                AND pg_catalog.pg_table_is_visible(dst.oid)
+            """,
+            {'name': table})
+    ]
+
+
+def _list_indexes(db, table):
+    return [
+        row['name']
+        for row in db.query(
+            """
+              SELECT i.relname AS name
+              FROM pg_catalog.pg_index x
+              JOIN pg_catalog.pg_class t
+                ON t.oid = x.indrelid
+              JOIN pg_catalog.pg_class i
+                ON i.oid = x.indexrelid
+              WHERE t.relname = :name
+                AND pg_catalog.pg_table_is_visible(t.oid)
+            """,
+            {'name': table})
+    ]
+
+
+def _list_grants(db, table):
+    return [
+        (row['grantee'], row['privilege_type'])
+        for row in db.query(
+            """
+              SELECT grantee, privilege_type
+              FROM information_schema.role_table_grants
+              WHERE table_name = :name
+                AND grantee <> current_user
+            """,
+            {'name': table})
+    ]
+
+
+def create_partition(db, table, month):
+    """
+    Create the partition for a given month, if it doesn't exist.
+
+    :param LogTable table: the partitioned table
+    :param date month: the month to create a partition for
+
+    :returns str: the partition name
+    """
+    month = get_month(month)
+    name = get_partition_name(table.name, month)
+    # partition bounds can't be bind params - these are date objects
+    db.execute(
+        """
+          CREATE TABLE IF NOT EXISTS {partition}
+          PARTITION OF {table}
+          FOR VALUES FROM ('{start}') TO ('{end}')
+        """.format(
+            partition=name,
+            table=table.name,
+            start=month.isoformat(),
+            end=add_months(month, 1).isoformat()))
+    return name
+
+
+def ensure_partitions(db, table, months_ahead, today=None):
+    """
+    Make sure that partitions exists for the current and upcoming months.
+
+    :param LogTable table: the partitioned table
+    :param int months_ahead: number of future months to create
+    :param date today: reference date (default: today)
+
+    :returns list: names of new partitions
+    """
+    today = today or datetime.date.today()
+    existing = list_partitions(db, table.name)
+    created = []
+    for month in iter_months(today, add_months(today, months_ahead)):
+        if month in existing:
+            continue
+        created.append(create_partition(db, table, month))
+        logger.info('created partition %s', created[-1])
+    return created
+
+
+def drop_partitions(db, table, keep_months, today=None):
+    """
+    Detach and drop whole months of log entries.
+
+    Partitions are only dropped if all their rows are older than
+    *keep_months* months before the start of the current month.  The default
+    partition is never dropped.
+
+    :param LogTable table: the partitioned table
+    :param int keep_months: number of past months to keep
+    :param date today: reference date (default: today)
+
+    :returns list: names of dropped partitions
+    """
+    if int(keep_months) < 0:
+        raise ValueError('invalid keep_months: %r' % (keep_months,))
+    today = today or datetime.date.today()
+    cutoff = add_months(get_month(today), -int(keep_months))
+    dropped = []
+    for month, name in sorted(list_partitions(db, table.name).items()):
+        if add_months(month, 1) > cutoff:
+            continue
+        db.execute('ALTER TABLE {} DETACH PARTITION {}'.format(table.name,
+                                                                name))
+        db.execute('DROP TABLE {}'.format(name))
+        logger.info('dropped partition %s', name)
+        dropped.append(name)
+    return dropped
+
+
+def partition_table(db, table, months_ahead, today=None):
+    """
+    Convert a regular log table to a partitioned table.
+
+    The table is renamed, a partitioned replacement is created with
+    partitions for all months with data, and all rows are copied to the new
+    table.  All of this happens in the current transaction, and the log table
+    is locked until commit.
+
+    :param LogTable table: the table to convert
+    :param int months_ahead: number of future months to create
+    :param date today: reference date (default: today)
+
+    :raises ValueError:
+        If the table is already partitioned, or is referenced by other
+        tables.
+    """
+    today = today or datetime.date.today()
+    if is_partitioned(db, table.name):
+        raise ValueError('table %s is already partitioned' % (table.name,))
+    references = list_referencing_constraints(db, table.name)
+    if references:
+        raise ValueError(
+            'table %s is referenced by %s' % (
+                table.name,
+                ', '.join('%s (%s)' % ref for ref in references)))
+
+    old = '{}_unpartitioned'.format(table.name)
+    grants = _list_grants(db, table.name)
+    db.execute('ALTER TABLE {} RENAME TO {}'.format(table.name, old))
+    for index in _list_indexes(db, old):
+        # index names are schema wide, and will be re-used
+        db.execute('ALTER INDEX {0} RENAME TO {0}_old'.format(index))
+
+    db.execute(
+        """
+          CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)
+          PARTITION BY RANGE ({column})
+        """.format(table=table.name, old=old, column=table.column))
+    pk_name, pk_columns = table.primary_key
+    db.execute(
+        'ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY ({})'.format(
+            table.name, pk_name, ', '.join(pk_columns)))
+    for column, ref_table, ref_column in table.references:
+        db.execute(
+            'ALTER TABLE {} ADD FOREIGN KEY ({}) REFERENCES {}({})'.format(
+                table.name, column, ref_table, ref_column))
+    for index, columns in table.indexes:
+        db.execute('CREATE INDEX {} ON {}({})'.format(
+            index, table.name, ', '.join(columns)))
+    for grantee, privilege in grants:
+        db.execute('GRANT {} ON {} TO {}'.format(privilege, table.name,
+                                                 grantee))
+
+    first = db.query_1(
+        'SELECT MIN({}) FROM {}'.format(table.column, old)) or today
+    for month in iter_months(min(get_month(first), get_month(today)),
+                             add_months(today, months_ahead)):
+        create_partition(db, table, month)
+    db.execute(
+        'CREATE TABLE {} PARTITION OF {} DEFAULT'.format(
+            get_default_partition_name(table.name), table.name))
+
+    db.execute('INSERT INTO {} SELECT * FROM {}'.format(table.name, old))
+    db.execute('DROP TABLE {}'.format(old))
+    logger.info('partitioned table %s', table.name)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Trigram indexed name search.
+
+Wildcard name searches (``LIKE '%foo%'``) on person_name and entity_name
+can't use the regular btree indexes, and end up as sequential scans.  This
+module keeps a normalized (transliterated and lowercased) copy of names in
+the name_search table, with a pg_trgm GIN index.
+
+Setup
+-----
+1. Install the pg_trgm extension and the ``mod_name_search.sql`` schema.
+
+2. Add the mixins to keep the name_search table up to date:
+
+   - ``Cerebrum.modules.name_search.mixins/PersonNameSearchMixin`` to
+     ``cereconf.CLASS_PERSON``
+   - ``Cerebrum.modules.name_search.mixins/AccountNameSearchMixin`` to
+     ``cereconf.CLASS_ACCOUNT``
+
+3. Populate the name_search table from existing names:
+
+   ::
+
+       contrib/build_name_search.py --commit
+
+4. Set ``cereconf.NAME_SEARCH_TRIGRAM = True`` to use the index in
+   :meth:`Cerebrum.Person.Person.search_person_names` and
+   :meth:`Cerebrum.Account.Account.search`.
+
+Ranked, fuzzy searches are available through
+:func:`.name_search_db.search_names`.
+
+Only cached person names (``system_cached``) and account names
+(``account_namespace``) are indexed.
+"""
+
+# database schema version (mod_name_search)
+__version__ = "1.0"
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Entity mixins for mod_name_search maintenance.
+
+The mixins keep the name_search table up to date, and use it in wildcard
+name searches if ``cereconf.NAME_SEARCH_TRIGRAM`` is set.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import logging
+
+import cereconf
+
+from Cerebrum.Account import Account
+from Cerebrum.Person import Person
+
+from . import name_search_db
+
+logger = logging.getLogger(__name__)
+
+
+def _is_enabled():
+    return bool(getattr(cereconf, 'NAME_SEARCH_TRIGRAM', False))
+
+
+class PersonNameSearchMixin(Person):
+    """ Mixin for mod_name_search maintenance of cached person names. """
+
+    def __is_cached(self, source_system):
+        return int(source_system) == int(self.const.system_cached)
+
+    def _set_name(self, source_system, variant, name):
+        super(PersonNameSearchMixin, self)._set_name(source_system, variant,
+                                                     name)
+        if self.__is_cached(source_system):
+            name_search_db.set_name(self._db, self.entity_id, 'person_name',
+                                    variant, name)
+
+    def _update_name(self, source_system, variant, name):
+        super(PersonNameSearchMixin, self)._update_name(source_system,
+                                                        variant, name)
+        if self.__is_cached(source_system):
+            name_search_db.set_name(self._db, self.entity_id, 'person_name',
+                                    variant, name)
+
+    def _delete_name(self, source, variant):
+        super(PersonNameSearchMixin, self)._delete_name(source, variant)
+        if self.__is_cached(source):
+            name_search_db.set_name(self._db, self.entity_id, 'person_name',
+                                    variant, None)
+
+    def _search_names_prefilter(self, name_pattern, binds, name_variant=None,
+                                source_system=None):
+        conds = super(PersonNameSearchMixin, self)._search_names_prefilter(
+            name_pattern, binds,
+            name_variant=name_variant,
+            source_system=source_system)
+        # Only cached names are indexed
+        if (_is_enabled()
+                and source_system is not None
+                and not isinstance(source_system, (list, set, tuple))
+                and self.__is_cached(source_system)):
+            conds.extend(name_search_db.get_prefilter(
+                'pn.person_id', 'person_name', name_pattern, binds,
+                name_code=name_variant))
+        return conds
+
+
+class AccountNameSearchMixin(Account):
+    """ Mixin for mod_name_search maintenance of account names. """
+
+    def __is_namespace(self, domain):
+        return int(domain) == int(self.const.account_namespace)
+
+    def add_entity_name(self, domain, name):
+        super(AccountNameSearchMixin, self).add_entity_name(domain, name)
+        if self.__is_namespace(domain):
+            name_search_db.set_name(self._db, self.entity_id, 'entity_name',
+                                    domain, name)
+
+    def update_entity_name(self, domain, name):
+        super(AccountNameSearchMixin, self).update_entity_name(domain, name)
+        if self.__is_namespace(domain):
+            name_search_db.set_name(self._db, self.entity_id, 'entity_name',
+                                    domain, name)
+
+    def delete_entity_name(self, domain):
+        super(AccountNameSearchMixin, self).delete_entity_name(domain)
+        if self.__is_namespace(domain):
+            name_search_db.set_name(self._db, self.entity_id, 'entity_name',
+                                    domain, None)
+
+    def _search_names_prefilter(self, name_pattern, binds):
+        conds = super(AccountNameSearchMixin, self)._search_names_prefilter(
+            name_pattern, binds)
+        if _is_enabled():
+            conds.extend(name_search_db.get_prefilter(
+                'en.entity_id', 'entity_name', name_pattern, binds,
+                name_code=self.const.account_namespace))
+        return conds
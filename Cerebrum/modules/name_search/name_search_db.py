@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Functions to access/modify the name_search table.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import logging
+import re
+
+import six
+
+from Cerebrum.Utils import argument_to_sql
+from Cerebrum.utils import transliterate
+
+logger = logging.getLogger(__name__)
+
+# Tables with names in the name_search table
+NAME_TABLES = ('person_name', 'entity_name')
+
+# Shortest search string that can use the trigram index
+MIN_SEARCH_LENGTH = 3
+
+# Default number of results from search_names()
+DEFAULT_LIMIT = 50
+
+_whitespace = re.compile(r'\s+', re.UNICODE)
+
+
+def normalize_name(name):
+    """
+    Normalize a name for the name_search table.
+
+    Names are transliterated to ascii, lowercased, and whitespace is
+    collapsed, e.g. ``'Ærlig  Østby'`` -> ``'aerlig ostby'``.
+    """
+    value = transliterate.to_ascii(six.text_type(name))
+    return _whitespace.sub(' ', value.lower()).strip()
+
+
+def normalize_pattern(pattern):
+    """
+    Normalize an SQL LIKE pattern.
+
+    :param pattern: a LIKE pattern, with ``%`` as wildcard
+
+    :returns:
+        A pattern to match against normalized names, or ``None`` if the
+        pattern can't be normalized or is too short to use the index.  The
+        pattern may match more names than the original pattern, but never
+        fewer.
+    """
+    if '_' in pattern or '\\' in pattern:
+        # single char wildcards don't survive the transliteration
+        return None
+    # Normalized names are stripped, and transliteration may add whitespace
+    # (e.g. after CJK characters).  Stripping each part only loosens the
+    # pattern, so that it still matches a superset of the original pattern.
+    parts = [_whitespace.sub(' ', transliterate.to_ascii(part).lower()).strip()
+             for part in pattern.split('%')]
+    if max(len(part) for part in parts) < MIN_SEARCH_LENGTH:
+        return None
+    return '%'.join(parts)
+
+
+def get_prefilter(column, name_table, pattern, binds, name_code=None):
+    """
+    Get SQL conditions that narrow down a name search using the index.
+
+    The conditions only limit the search to entities that *may* match the
+    pattern, and must be combined with the actual name condition.
+
+    :param column: the entity_id column to filter
+    :param name_table: the name table to search
+    :param pattern: an SQL LIKE pattern
+    :param binds: binds for the conditions are added to this dict
+    :param name_code: name variant(s) or value domain(s) to search
+
+    :rtype: list
+    :returns: a list with zero or one conditions
+    """
+    norm_pattern = normalize_pattern(pattern)
+    if norm_pattern is None:
+        return []
+    conds = [
+        'ns.name_table = :name_search_table',
+        'ns.name_norm LIKE :name_search_pattern',
+    ]
+    binds.update({
+        'name_search_table': name_table,
+        'name_search_pattern': norm_pattern,
+    })
+    if name_code is not None:
+        conds.append(argument_to_sql(name_code, 'ns.name_code', binds, int))
+    return [
+        """
+        {column} IN (
+          SELECT ns.entity_id
+          FROM [:table schema=cerebrum name=name_search] ns
+          WHERE {where}
+        )
+        """.format(column=column, where=' AND '.join(conds))
+    ]
+
+
+def set_name(db, entity_id, name_table, name_code, name):
+    """
+    Set or clear a normalized name.
+
+    :param name: the name to normalize, or None to remove the name
+    """
+    if name_table not in NAME_TABLES:
+        raise ValueError('invalid name_table: %r' % (name_table,))
+    binds = {
+        'entity_id': int(entity_id),
+        'name_table': name_table,
+        'name_code': int(name_code),
+    }
+    db.execute(
+        """
+          DELETE FROM [:table schema=cerebrum name=name_search]
+          WHERE entity_id = :entity_id AND
+                name_table = :name_table AND
+                name_code = :name_code
+        """,
+        binds)
+    if name is None:
+        return
+    binds['name_norm'] = normalize_name(name)
+    db.execute(
+        """
+          INSERT INTO [:table schema=cerebrum name=name_search]
+            (entity_id, name_table, name_code, name_norm)
+          VALUES
+            (:entity_id, :name_table, :name_code, :name_norm)
+        """,
+        binds)
+
+
+def delete_names(db, entity_id, name_table=None):
+    """ Remove all normalized names for an entity. """
+    binds = {'entity_id': int(entity_id)}
+    conds = ['entity_id = :entity_id']
+    if name_table is not None:
+        conds.append('name_table = :name_table')
+        binds['name_table'] = name_table
+    db.execute(
+        """
+          DELETE FROM [:table schema=cerebrum name=name_search]
+          WHERE {}
+        """.format(' AND '.join(conds)),
+        binds)
+
+
+def search_names(db, name, name_table=None, name_code=None, fuzzy=False,
+                 threshold=None, limit=DEFAULT_LIMIT):
+    """
+    Search for names, ranked by similarity.
+
+    :param name:
+        The name to search for.  Without *fuzzy*, this is a substring search,
+        and ``*`` can be used as a wildcard.
+    :param name_table: only search names from this table
+    :param name_code: only search these name variant(s)/value domain(s)
+    :param bool fuzzy:
+        Search for similar names (pg_trgm similarity) rather than substrings.
+    :param float threshold:
+        Similarity threshold for fuzzy searches (default: the
+        pg_trgm.similarity_threshold setting, normally 0.3).
+    :param int limit: max number of results, or None for all results
+
+    :returns:
+        rows with entity_id, name_table, name_code, name_norm, and score,
+        with the most similar names first.
+    """
+    term = normalize_name(name.replace('*', ' '))
+    if len(term) < MIN_SEARCH_LENGTH:
+        raise ValueError('search string must be at least %d characters'
+                         % (MIN_SEARCH_LENGTH,))
+    binds = {'term': term}
+    conds = []
+    if fuzzy:
+        if threshold is not None:
+            db.query_1(
+                "SELECT set_config('pg_trgm.similarity_threshold', "
+                ":threshold, TRUE)",
+                {'threshold': six.text_type(float(threshold))})
+        # pg_trgm similarity operator, escaped for the pyformat paramstyle
+        conds.append('ns.name_norm %% :term')
+    else:
+        pattern = normalize_pattern(
+            '%' + name.replace('*', '%').strip('%') + '%')
+        if pattern is None:
+            raise ValueError('invalid search string: %r' % (name,))
+        conds.append('ns.name_norm LIKE :pattern')
+        binds['pattern'] = pattern
+    if name_table is not None:
+        conds.append(argument_to_sql(name_table, 'ns.name_table', binds))
+    if name_code is not None:
+        conds.append(argument_to_sql(name_code, 'ns.name_code', binds, int))
+
+    stmt = """
+      SELECT ns.entity_id, ns.name_table, ns.name_code, ns.name_norm,
+             similarity(ns.name_norm, :term) AS score
+      FROM [:table schema=cerebrum name=name_search] ns
+      WHERE {where}
+      ORDER BY score DESC, ns.entity_id
+    """.format(where=' AND '.join(conds))
+    if limit is not None:
+        stmt += ' LIMIT :limit'
+        binds['limit'] = int(limit)
+    return db.query(stmt, binds)
+
+
+def _iter_source_names(db, name_table, source_system, value_domain):
+    if name_table == 'person_name':
+        stmt = """
+          SELECT person_id AS entity_id, name_variant AS name_code, name
+          FROM [:table schema=cerebrum name=person_name]
+          WHERE source_system = :source_system
+        """
+        binds = {'source_system': int(source_system)}
+    else:
+        stmt = """
+          SELECT entity_id, value_domain AS name_code, entity_name AS name
+          FROM [:table schema=cerebrum name=entity_name]
+          WHERE value_domain = :value_domain
+        """
+        binds = {'value_domain': int(value_domain)}
+    return db.query(stmt, binds, fetchall=False)
+
+
+def rebuild(db, source_system, value_domain, name_tables=NAME_TABLES,
+            chunk_size=1000):
+    """
+    Re-populate the name_search table.
+
+    :param source_system: the source system of indexed person names
+    :param value_domain:
+        the value domain of indexed entity names (i.e. the account
+        namespace, as maintained by the AccountNameSearchMixin)
+    :param name_tables: the name tables to re-index
+
+    :returns dict: name table -> number of indexed names
+    """
+    counts = {}
+    insert_stmt = """
+      INSERT INTO [:table schema=cerebrum name=name_search]
+        (entity_id, name_table, name_code, name_norm)
+      VALUES
+        (:entity_id, :name_table, :name_code, :name_norm)
+    """
+    for name_table in name_tables:
+        if name_table not in NAME_TABLES:
+            raise ValueError('invalid name_table: %r' % (name_table,))
+        db.execute(
+            """
+              DELETE FROM [:table schema=cerebrum name=name_search]
+              WHERE name_table = :name_table
+            """,
+            {'name_table': name_table})
+        # Read all names before inserting, so that we don't keep a
+        # server side cursor open while writing
+        rows = [
+            {
+                'entity_id': int(row['entity_id']),
+                'name_table': name_table,
+                'name_code': int(row['name_code']),
+                'name_norm': normalize_name(row['name']),
+            }
+            for row in _iter_source_names(db, name_table, source_system,
+                                          value_domain)
+            if row['name'] is not None
+        ]
+        for i in range(0, len(rows), chunk_size):
+            db.executemany(insert_stmt, rows[i:i + chunk_size])
+        logger.info('indexed %d names from %s', len(rows), name_table)
+        counts[name_table] = len(rows)
+    return counts
@@ -302,6 +302,26 @@ class NorEduOrgLdifMixin(OrgLDIF):
                 dn)
         return dn
 
+    def _get_aff_strings(self, aff, status):
+        """ Get (cached) affiliation and status strings. """
+        if aff in self.aff_cache:
+            aff_str = self.aff_cache[aff]
+        else:
+            aff_str = str(self.const.PersonAffiliation(aff))
+            self.aff_cache[aff] = aff_str
+        if status in self.status_cache:
+            status_str = self.status_cache[status]
+        else:
+            status_str = str(self.const.PersonAffStatus(status).str)
+            self.status_cache[status] = status_str
+        return aff_str, status_str
+
+    def prepare_person_workers(self):
+        super(NorEduOrgLdifMixin, self).prepare_person_workers()
+        for p_affs in self.affiliations.values():
+            for aff, status, ou in p_affs:
+                self._get_aff_strings(aff, status)
+
     def make_edu_person_primary_aff(self, p_id):
         """
         Ad hoc solution for eduPersonPrimaryAffiliation.
@@ -342,17 +362,7 @@ class NorEduOrgLdifMixin(OrgLDIF):
         pri_ou = None
         pri_edu_aff = None
         for aff, status, ou in self.affiliations[p_id]:
-            # populate the caches
-            if aff in self.aff_cache:
-                aff_str = self.aff_cache[aff]
-            else:
-                aff_str = str(self.const.PersonAffiliation(aff))
-                self.aff_cache[aff] = aff_str
-            if status in self.status_cache:
-                status_str = self.status_cache[status]
-            else:
-                status_str = str(self.const.PersonAffStatus(status).str)
-                self.status_cache[status] = status_str
+            aff_str, status_str = self._get_aff_strings(aff, status)
             # if a trait is set to override the general rule, we return that.
             if p_id in self.primary_aff_traits:
                 if (aff_str, status_str, ou) == self.primary_aff_traits[p_id]:
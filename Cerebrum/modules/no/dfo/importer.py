@@ -53,14 +53,15 @@ class DfoEmployeeImport(EmployeeImportBase):
     datasource_cls = EmployeeDatasource
     mapper_cls = EmployeeMapper
 
-    def __init__(self, db, config):
+    def __init__(self, db, config, sync_cache=None):
         client_config = get_configurable_module(config.client)
         client = get_client(client_config)
         datasource = self.datasource_cls(client)
         mapper = self.mapper_cls()
         co = Factory.get('Constants')(db)
         super(DfoEmployeeImport, self).__init__(db, datasource, mapper,
-                                                co.system_dfo_sap)
+                                                co.system_dfo_sap,
+                                                sync_cache=sync_cache)
 
 
 class DfoAssignmentImport(object):
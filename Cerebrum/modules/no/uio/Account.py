@@ -477,6 +477,24 @@ class AccountUiOMixin(Account.Account):
                 return False
         return self.__super.validate_new_uname(domain, uname)
 
+    def validate_new_unames(self, domain, unames):
+        """Get the usernames that are legal and free"""
+        unames = self.__super.validate_new_unames(domain, unames)
+        if domain == self.const.account_namespace and unames:
+            ea = Email.EmailAddress(self._db)
+            unames -= set(row['local_part']
+                          for row in ea.search(local_part=list(unames),
+                                               filter_expired=False))
+        return unames
+
+    def load_uname_snapshot(self):
+        """Get a snapshot of taken names, including email local parts"""
+        snapshot = self.__super.load_uname_snapshot()
+        ea = Email.EmailAddress(self._db)
+        snapshot.update(row['local_part']
+                        for row in ea.search(filter_expired=False))
+        return snapshot
+
     # exchange-relatert-jazz
     # For Exchange mailboxes the use of GECOS is void and should be
     # dropped. After Exchange migration is completed, this override
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import heapq
 import re
 
 from six import python_2_unicode_compatible
@@ -29,9 +30,6 @@ class DiskSorters(object):
             disk_idx = 0
         return (disk_prefix, disk_idx)
 
-    def _resort_disk_count(self):
-        self._disk_count_order.sort(key=self._disk_sort_by_count_key)
-
     def post_filter_search_res(self, order, orderby, max=999999):
         """Do not allow results with more than max users on disk.  Try
         to avoid using disks with 0 users when ordering by count."""
@@ -48,6 +46,130 @@ class DiskSorters(object):
                 return cd
 
 
+class DiskQueue(object):
+    """
+    Priority queues for picking a disk from a set of disks.
+
+    Gives the same disk as :meth:`DiskSorters.post_filter_search_res` on a
+    disk list that is kept sorted, but lookups and count changes are
+    O(log n) rather than a re-sort of the entire disk list.
+
+    name
+        Disks are ordered by path.  Only disks with room for more users are
+        kept in the queue.
+
+    count
+        Disks are ordered by user count.  Ties are ordered as if the disk list
+        was stable sorted by count before each lookup: a disk with an
+        increased count is placed before the disks that already had that
+        count, and a disk with a decreased count is placed after them.
+
+    Count changes must be reported with :meth:`notify`.  Outdated heap
+    entries are discarded when they reach the top of the heap.
+    """
+
+    def __init__(self, disks, name_key, max):
+        """
+        :param dict disks: CerebrumDisk objects by disk_id
+        :param callable name_key: sort key for a disk_id in name order
+        :param int max: disks must have less than max users
+        """
+        self._disks = disks
+        self.max = max
+
+        self._name_entry = dict(
+            (disk_id, (name_key(disk_id), pos, disk_id))
+            for pos, disk_id in enumerate(disks))
+        self._name_heap = [self._name_entry[disk_id]
+                           for disk_id in disks
+                           if disks[disk_id].count < max]
+        heapq.heapify(self._name_heap)
+        self._in_name_heap = set(e[-1] for e in self._name_heap)
+
+        # Current (count, rank) for each disk.  Disks that change count are
+        # given a new rank below (_low) or above (_high) all ranks in use.
+        self._count_key = {}
+        self._zero_heap = []
+        self._count_heap = []
+        self._dirty = set()
+        self._low = -1
+        self._high = len(disks)
+        for rank, disk_id in enumerate(disks):
+            self._set_count_key(disk_id, (disks[disk_id].count, rank))
+
+    def notify(self, disk_id):
+        """Register a changed user count for a disk."""
+        self._dirty.add(disk_id)
+        if (disk_id not in self._in_name_heap
+                and self._disks[disk_id].count < self.max):
+            heapq.heappush(self._name_heap, self._name_entry[disk_id])
+            self._in_name_heap.add(disk_id)
+
+    def _set_count_key(self, disk_id, key):
+        self._count_key[disk_id] = key
+        heap = self._zero_heap if key[0] == 0 else self._count_heap
+        heapq.heappush(heap, key + (disk_id,))
+
+    def _update_count_order(self):
+        up, down = [], []
+        for disk_id in self._dirty:
+            old_key = self._count_key[disk_id]
+            count = self._disks[disk_id].count
+            if count > old_key[0]:
+                up.append((old_key, disk_id))
+            elif count < old_key[0]:
+                down.append((old_key, disk_id))
+        self._dirty.clear()
+
+        # Keep the previous relative order of disks that move to the same
+        # count.
+        for old_key, disk_id in sorted(up, reverse=True):
+            self._set_count_key(disk_id,
+                                (self._disks[disk_id].count, self._low))
+            self._low -= 1
+        for old_key, disk_id in sorted(down):
+            self._set_count_key(disk_id,
+                                (self._disks[disk_id].count, self._high))
+            self._high += 1
+
+        if (len(self._zero_heap) + len(self._count_heap)
+                > 2 * len(self._disks) + 32):
+            self._zero_heap = []
+            self._count_heap = []
+            for disk_id, key in self._count_key.items():
+                (self._zero_heap if key[0] == 0
+                 else self._count_heap).append(key + (disk_id,))
+            heapq.heapify(self._zero_heap)
+            heapq.heapify(self._count_heap)
+
+    def _peek_count(self, heap):
+        while heap:
+            count, rank, disk_id = heap[0]
+            if self._count_key[disk_id] == (count, rank):
+                return self._disks[disk_id]
+            heapq.heappop(heap)
+        return None
+
+    def get_by_name(self):
+        """Get the first disk in name order with room for more users."""
+        while self._name_heap:
+            disk_id = self._name_heap[0][-1]
+            if self._disks[disk_id].count < self.max:
+                return self._disks[disk_id]
+            heapq.heappop(self._name_heap)
+            self._in_name_heap.discard(disk_id)
+        return None
+
+    def get_by_count(self):
+        """Get the disk with the fewest users, preferring non-empty disks."""
+        self._update_count_order()
+        for heap in (self._count_heap, self._zero_heap):
+            cd = self._peek_count(heap)
+            if cd is not None and cd.count < self.max:
+                return cd
+        return None
+
+
 @python_2_unicode_compatible
 class DiskDef(DiskSorters):
 
@@ -69,10 +191,10 @@ class DiskDef(DiskSorters):
         self.disk_kvote = disk_kvote
         self.auto = auto
         self._disks = self._find_cerebrum_disks()
-        self._disk_name_order = list(self._disks)
-        self._disk_name_order.sort(key=self._disk_sort_by_name_key)
-        self._disk_count_order = list(self._disks)
-        self._resort_disk_count()
+        self._queue = DiskQueue(self._disks, self._disk_sort_by_name_key,
+                                self.max)
+        for cd in self._disks.values():
+            cd.add_listener(self._queue)
 
     def __str__(self):
         return ("DiskDef(prefix={}, path={}, spreads={}, max={}, disk_kvote="
@@ -98,11 +220,9 @@ class DiskDef(DiskSorters):
             # we ignore max_on_disk when path is explisitly set
             return list(self._disks.values())[0]
         if _orderby == 'name':
-            order = self._disk_name_order
+            return self._queue.get_by_name()
         elif _orderby == 'count':
-            self._resort_disk_count()
-            order = self._disk_count_order
-        return self.post_filter_search_res(order, _orderby, max=self.max)
+            return self._queue.get_by_count()
 
 
 class DiskPool(DiskSorters):
@@ -121,10 +241,6 @@ class DiskPool(DiskSorters):
     def post_process(self):
         """Call once you have finished calling add_disk_def"""
         self._disks = self._find_cerebrum_disks()
-        self._disk_name_order = list(self._disks)
-        self._disk_name_order.sort(key=self._disk_sort_by_name_key)
-        self._disk_count_order = list(self._disks)
-        self._resort_disk_count()
 
     def _find_cerebrum_disks(self):
         ret = {}
@@ -158,8 +274,7 @@ class DiskPool(DiskSorters):
         if self.orderby == 'name':
             tmp.sort(key=self._disk_sort_by_name_key)
         else:
-            self._resort_disk_count()
-            tmp.sort(self._disk_sort_by_count_key)
+            tmp.sort(key=self._disk_sort_by_count_key)
         return self.post_filter_search_res(tmp, self.orderby)
 
     def __repr__(self):
@@ -174,9 +289,16 @@ class CerebrumDisk(object):
         self.disk_id = disk_id
         self.path = path
         self.count = count
+        self._listeners = []
+
+    def add_listener(self, queue):
+        """Notify a DiskQueue when the user count changes."""
+        self._listeners.append(queue)
 
     def alter_count(self, n):
         self.count += n
+        for queue in self._listeners:
+            queue.notify(self.disk_id)
 
     def get_disk_def(self):
         pass
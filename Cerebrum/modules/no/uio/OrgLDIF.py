@@ -211,17 +211,7 @@ class UioOrgLdif(NorEduSmsAuthnMixin,
         ret = []
         pri_aff_str, pri_status_str = pri_aff
         for aff, status, ou in self.affiliations[p_id]:
-            # populate the caches
-            if aff in self.aff_cache:
-                aff_str = self.aff_cache[aff]
-            else:
-                aff_str = str(self.const.PersonAffiliation(aff))
-                self.aff_cache[aff] = aff_str
-            if status in self.status_cache:
-                status_str = self.status_cache[status]
-            else:
-                status_str = str(self.const.PersonAffStatus(status).str)
-                self.status_cache[status] = status_str
+            aff_str, status_str = self._get_aff_strings(aff, status)
             p = 'secondary'
             if (aff_str == pri_aff_str and
                     status_str == pri_status_str and ou == pri_ou):
@@ -269,12 +259,7 @@ class UioOrgLdif(NorEduSmsAuthnMixin,
         #   - Quarantine types to exempt from uioFeideHiddenPerson
         #   - Feide locking mechanism (or at the very least the name of the
         #     objectClass)
-        feide_lock_exempt = set((
-            int(self.const.quarantine_autopassord),
-        ))
-        relevant_quarantines = [
-            q for q in self.acc_locked_quarantines.get(account_id) or ()
-            if q not in feide_lock_exempt]
+        relevant_quarantines = self._get_feide_lock_quarantines(account_id)
         if QuarantineHandler(self.db, relevant_quarantines).is_locked():
             entry['objectClass'].append('uioFeideHiddenPerson')
             logger.debug('uioFeideHiddenPerson for account_id=%r',
@@ -282,6 +267,22 @@ class UioOrgLdif(NorEduSmsAuthnMixin,
 
         return dn, entry, alias_info
 
+    def _get_feide_lock_quarantines(self, account_id):
+        """ Get quarantines that should lock an account from Feide. """
+        feide_lock_exempt = set((
+            int(self.const.quarantine_autopassord),
+        ))
+        return [
+            q for q in self.acc_locked_quarantines.get(account_id) or ()
+            if q not in feide_lock_exempt]
+
+    def prepare_person_workers(self):
+        super(UioOrgLdif, self).prepare_person_workers()
+        for account_id in self.acc_locked_quarantines:
+            QuarantineHandler(
+                self.db,
+                self._get_feide_lock_quarantines(account_id)).get_decision()
+
     def _calculate_edu_ous(self, p_ou, s_ous):
         return s_ous
 
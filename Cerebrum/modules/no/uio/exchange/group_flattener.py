@@ -19,156 +19,267 @@
 # along with Cerebrum; if not, write to the Free Software Foundation,
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 
-"""Group expansion functions for Exchange."""
+"""Group expansion functions for Exchange.
 
-from __future__ import unicode_literals
+The flattening is done with a few set queries, rather than by instantiating
+entity objects for every member:
 
-from six import text_type
+- the recursive member closure of one or more groups (one query)
+- primary accounts of person members, by account_type priority (one query)
+- exchange spreads of the candidate groups and accounts (one query)
 
-from Cerebrum.Utils import Factory
-from Cerebrum import Errors
+Candidates are returned as (entity_id, entity_name) tuples.
+"""
 
-from functools import partial
+from __future__ import unicode_literals
 
+import cereconf
 
-def destination_criterion(db, group_spread):
-    return partial(for_exchange, db, group_spread=group_spread)
+from Cerebrum.Utils import Factory, argument_to_sql
+from Cerebrum import Errors
 
 
-def member_criterion(db, account_spread):
-    return partial(for_exchange, db, account_spread=account_spread)
+def get_entity(db, entity_id):
+    """Get an instantiated object from entity id."""
+    entity = Factory.get('Entity')(db)
+    try:
+        return entity.get_subclassed_object(id=entity_id)
+    except (Errors.NotFoundError, TypeError, ValueError):
+        return None
 
 
-def remove_operations(db, co, member, dest, group_spread, account_spread):
-    """Generate a map of removal operations."""
+def _get_namespaces(co):
+    """Map entity types to name namespaces (ENTITY_TYPE_NAMESPACE)."""
+    return dict(
+        (int(co.EntityType(e_type)), int(co.ValueDomain(domain)))
+        for e_type, domain in cereconf.ENTITY_TYPE_NAMESPACE.items())
 
-    # Search downwards, locate candidates for removal
-    if member.entity_type == co.entity_person:
-        primary_account = get_primary_account(member)
-        to_rem = ([(primary_account.entity_id,
-                    primary_account.account_name)] if
-                  primary_account else [])
-    elif member.entity_type == co.entity_account:
-        to_rem = [(member.entity_id, member.account_name)]
-    elif member.entity_type == co.entity_group:
-        to_rem = get_children(db, member)
 
-        to_rem = criteria_sieve(to_rem, member_criterion(db, account_spread))
-    else:
-        return {}
-
-    # Search updwards, locate group-candidates to remove members from
-    destination_groups = dict(map(lambda (gid, gname):
-                                  ((gid, gname), get_children(
-                                      db, get_entity(db, gid)),),
-                              get_destination_groups(dest, group_spread)))
+def get_primary_accounts(db, co, person_ids):
+    """Collect primary accounts for persons.
 
-    destination_groups = dict(map(lambda x: (x, destination_groups[x]),
-                                  criteria_sieve(destination_groups.keys(),
-                                                 destination_criterion(
-                                                     db, group_spread))))
+    The primary account is the non-expired account with the lowest
+    account_type priority, as in ``Person.get_primary_account()``.
 
-    # Calculate if members should be removed from group-candidates or not
-    if destination_groups:
-        return dict(map(lambda (k, v): (k, filter(lambda e: e not in v,
-                                                  to_rem)),
-                        destination_groups.items()))
-    else:
-        {}
+    :returns dict: person_id -> (account_id, account_name)
+    """
+    if not person_ids:
+        return {}
+    binds = {'namespace': int(co.account_namespace)}
+    primary = {}
+    for row in db.query(
+            """
+              SELECT at.person_id, at.account_id, en.entity_name
+              FROM [:table schema=cerebrum name=account_type] at
+              JOIN [:table schema=cerebrum name=account_info] ai
+                ON ai.account_id = at.account_id
+                AND (ai.expire_date IS NULL OR ai.expire_date > [:now])
+              LEFT JOIN [:table schema=cerebrum name=entity_name] en
+                ON en.entity_id = at.account_id
+                AND en.value_domain = :namespace
+              WHERE {persons}
+              ORDER BY at.person_id, at.priority
+            """.format(persons=argument_to_sql(person_ids, 'at.person_id',
+                                               binds, int)),
+            binds, fetchall=False):
+        person_id = int(row['person_id'])
+        if person_id not in primary:
+            primary[person_id] = (int(row['account_id']),
+                                  row['entity_name'])
+    return primary
+
+
+def get_members_by_group(db, co, group_ids):
+    """Collect the flattened, non-expired members of groups.
+
+    Persons are converted to their primary accounts, and members without a
+    name are left out.
+
+    :returns dict:
+        group_id -> set of (entity_id, entity_name, entity_type) tuples
+    """
+    result = dict((int(group_id), set()) for group_id in group_ids)
+    if not result:
+        return result
+
+    binds = {'group_type': int(co.entity_group)}
+    whens = []
+    for i, (e_type, namespace) in enumerate(
+            sorted(_get_namespaces(co).items())):
+        binds['e_type{:d}'.format(i)] = e_type
+        binds['namespace{:d}'.format(i)] = namespace
+        whens.append('WHEN :e_type{0:d} THEN :namespace{0:d}'.format(i))
+
+    persons = set()
+    for row in db.query(
+            """
+              WITH RECURSIVE closure(root_id, group_id) AS (
+                SELECT gi.group_id, gi.group_id
+                FROM [:table schema=cerebrum name=group_info] gi
+                WHERE {groups}
+                UNION
+                SELECT c.root_id, gm.member_id
+                FROM closure c
+                JOIN [:table schema=cerebrum name=group_member] gm
+                  ON gm.group_id = c.group_id
+                  AND gm.member_type = :group_type
+              )
+              SELECT DISTINCT c.root_id, gm.member_id, gm.member_type,
+                              en.entity_name
+              FROM closure c
+              JOIN [:table schema=cerebrum name=group_member] gm
+                ON gm.group_id = c.group_id
+              LEFT JOIN [:table schema=cerebrum name=account_info] ai
+                ON ai.account_id = gm.member_id
+              LEFT JOIN [:table schema=cerebrum name=group_info] gi
+                ON gi.group_id = gm.member_id
+              LEFT JOIN [:table schema=cerebrum name=entity_name] en
+                ON en.entity_id = gm.member_id
+                AND en.value_domain = CASE gm.member_type {whens} END
+              WHERE
+                (ai.expire_date IS NULL OR ai.expire_date > [:now]) AND
+                (gi.expire_date IS NULL OR gi.expire_date > [:now])
+            """.format(
+                groups=argument_to_sql(group_ids, 'gi.group_id', binds, int),
+                whens=' '.join(whens)),
+            binds, fetchall=False):
+        root_id = int(row['root_id'])
+        member_id = int(row['member_id'])
+        member_type = int(row['member_type'])
+        if member_type == co.entity_person:
+            persons.add((root_id, member_id))
+        elif row['entity_name']:
+            result[root_id].add((member_id, row['entity_name'], member_type))
+
+    primary = get_primary_accounts(db, co,
+                                   set(person_id for _, person_id in persons))
+    for root_id, person_id in persons:
+        account_id, account_name = primary.get(person_id, (None, None))
+        if account_name:
+            result[root_id].add((account_id, account_name,
+                                 int(co.entity_account)))
+    return result
 
 
-def add_operations(db, co, member, dest, group_spread, account_spread):
-    """Generate a map of add operations."""
-    if dest:
-        destination_groups = get_destination_groups(dest, group_spread)
-    else:
-        destination_groups = []
-    if member.entity_type == co.entity_group:
-        to_add = get_children(db, member)
+def get_children(db, ent):
+    """Collect children of groups.
 
-    elif member.entity_type == co.entity_person:
-        primary_account = get_primary_account(member)
-        to_add = ([(primary_account.entity_id,
-                    primary_account.account_name)] if
-                  primary_account else [])
-    elif member.entity_type == co.entity_account:
-        to_add = [(member.entity_id, member.account_name)]
-    else:
-        to_add = []
-    return (criteria_sieve(destination_groups,
-                           destination_criterion(db, group_spread)),
-            criteria_sieve(to_add,
-                           member_criterion(db, account_spread)))
+    Converts persons to primary accounts."""
+    return set(
+        (entity_id, entity_name)
+        for entity_id, entity_name, _ in get_members_by_group(
+            db, ent.const, [ent.entity_id])[int(ent.entity_id)])
 
 
 def get_destination_groups(gr, group_spread=None):
     """Collect parent groups."""
-    return (map(lambda x: (x['group_id'], x['name']),
-                gr.search(member_id=gr.entity_id,
-                          indirect_members=True,
-                          spread=group_spread)) +
+    return ([(row['group_id'], row['name'])
+             for row in gr.search(member_id=gr.entity_id,
+                                  indirect_members=True,
+                                  spread=group_spread)] +
             [(gr.entity_id, gr.group_name)])
 
 
-def get_children(db, ent):
-    """Collect children of groups.
+def for_exchange(db, co, candidates, group_spread=None, account_spread=None):
+    """Select candidates for exchange.
+
+    Groups must have the group spread, accounts must have the account spread,
+    and other entity types are never selected.
+
+    :param candidates: (entity_id, entity_name, entity_type) tuples
+
+    :returns list: (entity_id, entity_name) tuples
+    """
+    wanted = {}
+    if group_spread is not None:
+        wanted[int(co.entity_group)] = int(group_spread)
+    if account_spread is not None:
+        wanted[int(co.entity_account)] = int(account_spread)
+    candidates = [c for c in candidates if int(c[2]) in wanted]
+    if not candidates:
+        return []
+
+    binds = {}
+    has_spread = set(
+        (int(row['entity_id']), int(row['spread']))
+        for row in db.query(
+            """
+              SELECT entity_id, spread
+              FROM [:table schema=cerebrum name=entity_spread]
+              WHERE {entities} AND {spreads}
+            """.format(
+                entities=argument_to_sql(set(c[0] for c in candidates),
+                                         'entity_id', binds, int),
+                spreads=argument_to_sql(set(wanted.values()), 'spread',
+                                        binds, int)),
+            binds, fetchall=False))
+    return [(entity_id, entity_name)
+            for entity_id, entity_name, entity_type in candidates
+            if (int(entity_id), wanted[int(entity_type)]) in has_spread]
+
+
+def _get_candidates(db, co, member):
+    """Get (entity_id, entity_name, entity_type) tuples for a member."""
+    if member.entity_type == co.entity_group:
+        return get_members_by_group(db, co,
+                                    [member.entity_id])[int(member.entity_id)]
+    elif member.entity_type == co.entity_person:
+        primary = get_primary_accounts(db, co, [member.entity_id])
+        account_id, account_name = primary.get(int(member.entity_id),
+                                               (None, None))
+        if account_name:
+            return [(account_id, account_name, int(co.entity_account))]
+        return []
+    elif member.entity_type == co.entity_account:
+        return [(member.entity_id, member.account_name,
+                 int(co.entity_account))]
+    return []
 
-    Converts persons to primary accounts."""
-    def convert(x):
-        if x['member_type'] == ent.const.entity_person:
-            primary_account = get_primary_account(get_entity(db,
-                                                             x['member_id']))
-            if primary_account:
-                return (primary_account.entity_id,
-                        primary_account.account_name)
-            else:
-                return (None, None)
-        else:
-            return (x['member_id'], get_entity_name(db, x['member_id']))
-    return set(filter(lambda (x, y): x and y,
-                      map(lambda x: convert(x),
-                          ent.search_members(group_id=ent.entity_id,
-                                             indirect_members=True))))
-
-
-def get_primary_account(person):
-    """Collect a persons primary account object."""
-    return get_entity(person._db, person.get_primary_account())
 
+def remove_operations(db, co, member, dest, group_spread, account_spread):
+    """Generate a map of removal operations."""
 
-def get_entity(db, entity_id):
-    """Get an instantiated object from entity id."""
-    entity = Factory.get('Entity')(db)
-    try:
-        return entity.get_subclassed_object(id=entity_id)
-    except (Errors.NotFoundError, TypeError, ValueError):
-        return None
+    # Search downwards, locate candidates for removal
+    if member.entity_type == co.entity_group:
+        to_rem = for_exchange(db, co, _get_candidates(db, co, member),
+                              account_spread=account_spread)
+    elif member.entity_type in (co.entity_person, co.entity_account):
+        to_rem = [(entity_id, entity_name)
+                  for entity_id, entity_name, _
+                  in _get_candidates(db, co, member)]
+    else:
+        return {}
 
+    # Search upwards, locate group-candidates to remove members from
+    destination_groups = for_exchange(
+        db, co,
+        [(gid, gname, int(co.entity_group))
+         for gid, gname in get_destination_groups(dest, group_spread)],
+        group_spread=group_spread)
+    if not destination_groups:
+        return {}
 
-def get_entity_name(db, entity_id):
-    """Fetch the entity name associated with an id."""
-    try:
-        ent = get_entity(db, entity_id)
-        from cereconf import ENTITY_TYPE_NAMESPACE
-        namespace = ent.const.ValueDomain(
-            ENTITY_TYPE_NAMESPACE.get(
-                text_type(ent.const.EntityType(ent.entity_type)), None))
-        return ent.get_name(namespace)
-    except (AttributeError, TypeError, Errors.NotFoundError):
-        return None
+    # Calculate if members should be removed from group-candidates or not
+    remaining = get_members_by_group(db, co,
+                                     [gid for gid, _ in destination_groups])
+    removals = {}
+    for gid, gname in destination_groups:
+        keep = set(entity_id for entity_id, _, _ in remaining[int(gid)])
+        removals[(gid, gname)] = [(entity_id, entity_name)
+                                  for entity_id, entity_name in to_rem
+                                  if entity_id not in keep]
+    return removals
 
 
-def for_exchange(db, x, group_spread=None, account_spread=None):
-    """Selector-function for exchange."""
-    e = get_entity(db, x[0])
-    if e.entity_type == e.const.entity_group:
-        return e.has_spread(group_spread)
-    elif e.entity_type == e.const.entity_account:
-        return e.has_spread(account_spread)
+def add_operations(db, co, member, dest, group_spread, account_spread):
+    """Generate a map of add operations."""
+    if dest:
+        destination_groups = [
+            (gid, gname, int(co.entity_group))
+            for gid, gname in get_destination_groups(dest, group_spread)]
     else:
-        return False
-
-
-def criteria_sieve(l, criteria):
-    """Filter l with criteria."""
-    return filter(lambda x: criteria(x), l)
+        destination_groups = []
+    return (for_exchange(db, co, destination_groups,
+                         group_spread=group_spread),
+            for_exchange(db, co, _get_candidates(db, co, member),
+                         account_spread=account_spread))
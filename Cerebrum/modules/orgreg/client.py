@@ -31,6 +31,9 @@ Use py:func:`.get_client` to get a client object from config:
     # or
     client = get_client('my-config-file.yml')
 
+If the client is given a *cache_dir*, GET responses are cached on disk, and
+revalidated using their ETag/Last-Modified headers.  Multiple org units can be
+fetched concurrently with py:meth:`.OrgregClient.get_org_units`.
 """
 from __future__ import (
     absolute_import,
@@ -46,8 +49,9 @@ import six
 from Cerebrum.config import loader
 from Cerebrum.config.configuration import Configuration, ConfigDescriptor
 from Cerebrum.config.secrets import Secret, get_secret_from_string
-from Cerebrum.config.settings import String
+from Cerebrum.config.settings import Integer, String
 from Cerebrum.utils import http as http_utils
+from Cerebrum.utils import http_fetch
 
 logger = logging.getLogger(__name__)
 
@@ -92,18 +96,23 @@ class OrgregClient(object):
         'Accept': 'application/json',
     }
 
-    def __init__(self, url, headers=None, use_sessions=True):
+    def __init__(self, url, headers=None, use_sessions=True, workers=4,
+                 cache_dir=None):
         """
         :param str url: baseurl to the Orgreg API
         :param dict headers: Headers to apply to all requests
         :param bool use_sessions: Keep HTTP connections alive (default True)
+        :param int workers: Number of concurrent requests (default 4)
+        :param str cache_dir: Cache GET responses in this directory
         """
         self.urls = OrgregEndpoints(url)
         self.headers = http_utils.merge_headers(self.default_headers, headers)
+        self.workers = int(workers)
         if use_sessions:
-            self._session = requests.Session()
+            self._session = http_fetch.get_session(self.workers + 1)
         else:
             self._session = requests
+        self.cache = http_fetch.HttpCache(cache_dir) if cache_dir else None
 
     def __repr__(self):
         return ('<{cls.__name__} {obj.urls.baseurl}>').format(cls=type(self),
@@ -131,6 +140,12 @@ class OrgregClient(object):
         """ Send an HTTP request to the API.  """
         headers = http_utils.merge_headers(self.headers, headers)
         params = {} if params is None else params
+        if self.cache and method_name.upper() == 'GET':
+            return self.cache.request(self._session,
+                                      url,
+                                      headers=headers,
+                                      params=params,
+                                      **kwargs)
         return self._session.request(method_name,
                                      url,
                                      headers=headers,
@@ -161,6 +176,19 @@ class OrgregClient(object):
         response.raise_for_status()
         return response.json()
 
+    def get_org_units(self, orgreg_ids):
+        """
+        Look up multiple org units by id, using concurrent requests.
+
+        :returns generator:
+            (orgreg_id, org unit) pairs, in the order of orgreg_ids
+        """
+        def fetch(orgreg_id):
+            return orgreg_id, self.get_org_unit(orgreg_id)
+
+        return http_fetch.iter_concurrent(fetch, orgreg_ids,
+                                          workers=self.workers)
+
 
 class OrgregClientConfig(Configuration):
     """ Orgreg API client config. """
@@ -176,6 +204,19 @@ class OrgregClientConfig(Configuration):
         doc='Auth token for the Orgreg API',
     )
 
+    workers = ConfigDescriptor(
+        Integer,
+        minval=0,
+        default=4,
+        doc='Max number of concurrent requests',
+    )
+
+    cache_dir = ConfigDescriptor(
+        String,
+        default=None,
+        doc='Directory for caching API responses',
+    )
+
 
 def get_client(config):
     """
@@ -203,6 +244,8 @@ def get_client(config):
         'headers': {
             api_key_header: api_key_value,
         },
+        'workers': config.workers,
+        'cache_dir': config.cache_dir,
     }
 
     return OrgregClient(**kwargs)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 #
-# Copyright 2021-2022 University of Oslo, Norway
+# Copyright 2021-2024 University of Oslo, Norway
 #
 # This file is part of Cerebrum.
 #
@@ -42,6 +42,10 @@ otp_type
 otp_payload
     the target payload
 
+secret_hash
+    a salted hash of the secret that the otp_payload was prepared from.  Used
+    to skip unchanged secrets in bulk updates, as JWE payloads are randomized.
+
 updated_at
     insert/update time for this entry.
 
@@ -132,4 +136,4 @@ in parallel.  In which case, we should add support for:
 """
 
 # Database module version (see makedb.py)
-__version__ = '1.0'
+__version__ = '1.1'
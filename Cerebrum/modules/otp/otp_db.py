@@ -43,7 +43,8 @@ from .constants import OtpChangeTypeConstants
 DEFAULT_ORDER = ('person_id', 'otp_type', 'updated_at')
 
 # default fields and field order in query results
-DEFAULT_FIELDS = ('person_id', 'otp_type', 'otp_payload', 'updated_at')
+DEFAULT_FIELDS = ('person_id', 'otp_type', 'otp_payload', 'secret_hash',
+                  'updated_at')
 
 
 logger = logging.getLogger(__name__)
@@ -226,13 +227,15 @@ def sql_get(db, person_id, otp_type):
     return rows[0]
 
 
-def _sql_insert(db, person_id, otp_type, otp_payload):
+def _sql_insert(db, person_id, otp_type, otp_payload, secret_hash=None):
     """ Insert a new personal otp secret. """
     binds = {
         'person_id': int(person_id),
         'otp_type': six.text_type(otp_type),
         'otp_payload': six.text_type(otp_payload),
     }
+    if secret_hash is not None:
+        binds['secret_hash'] = six.text_type(secret_hash)
 
     stmt = """
       INSERT INTO [:table schema=cerebrum name=person_otp_secret]
@@ -257,7 +260,8 @@ def _sql_insert(db, person_id, otp_type, otp_payload):
     return row
 
 
-def _sql_update(db, person_id, otp_type, otp_payload):
+def _sql_update(db, person_id, otp_type, otp_payload=None,
+                secret_hash=None):
     """ Update an existing personal otp secret. """
     binds = {
         'person_id': int(person_id),
@@ -267,6 +271,10 @@ def _sql_update(db, person_id, otp_type, otp_payload):
     update = {}
     if otp_payload is not None:
         update['otp_payload'] = six.text_type(otp_payload)
+        # a new payload always replaces the hash of the previous secret
+        update['secret_hash'] = secret_hash
+    if secret_hash is not None:
+        update['secret_hash'] = six.text_type(secret_hash)
 
     if not update:
         raise TypeError('nothing to update')
@@ -296,7 +304,7 @@ def _sql_update(db, person_id, otp_type, otp_payload):
     return row
 
 
-def sql_set(db, person_id, otp_type, otp_payload):
+def sql_set(db, person_id, otp_type, otp_payload, secret_hash=None):
     """
     Add or update a personal otp secret.
 
@@ -304,6 +312,9 @@ def sql_set(db, person_id, otp_type, otp_payload):
     :param person_id: entity_id of an existing person
     :param otp_type: otp_type to set
     :param otp_payload: secret to set
+    :param secret_hash:
+        hash of the secret that the otp_payload was prepared from (see
+        py:func:`Cerebrum.modules.otp.otp_utils.hash_secret`)
     """
 
     try:
@@ -317,6 +328,8 @@ def sql_set(db, person_id, otp_type, otp_payload):
 
     if otp_payload != prev.get('otp_payload'):
         values['otp_payload'] = otp_payload
+    if secret_hash is not None and secret_hash != prev.get('secret_hash'):
+        values['secret_hash'] = secret_hash
 
     if prev:
         if values:
@@ -30,6 +30,9 @@ It implements two LDAP export mixins:
 
 These mixins must be present in CLASS_ORGLDIF/CLASS_POSIXLDIF to include OTP
 data in their respective LDAP exports.
+
+The mixins use a py:class:`OtpPayloadCache`, which fetches all relevant otp
+payloads in a single query before the export starts.
 """
 from __future__ import (
     absolute_import,
@@ -140,12 +143,68 @@ class OtpCache(EntityCache):
                           (person_id, ))
 
 
+class OtpPayloadCache(object):
+    """
+    A bulk loaded cache of otp payloads.
+
+    Unlike py:class:`OtpCache`, this cache never looks up individual persons.
+    All payloads of the given otp types are fetched in one query, and are
+    stored as one compact person_id -> payload mapping per otp type.
+
+    Example usage:
+
+        otp_cache = OtpPayloadCache(db, ('type-foo', 'type-bar'))
+        otp_cache.update_all()
+
+        # Get otp_payload value for person_id=3
+        secret = otp_cache.get_payload(3, 'type-foo')
+    """
+
+    def __init__(self, db, otp_types):
+        """
+        :param otp_types: named otp secrets to get
+        """
+        if isinstance(otp_types, six.string_types):
+            otp_types = (otp_types,)
+        self.otp_types = tuple(otp_types)
+        self._db = db
+        self._payloads = dict((otp_type, {}) for otp_type in self.otp_types)
+
+    def __len__(self):
+        return sum(len(payloads) for payloads in self._payloads.values())
+
+    def update_all(self):
+        """ Fetch all payloads of the relevant otp types. """
+        payloads = dict((otp_type, {}) for otp_type in self.otp_types)
+        for row in sql_search(self._db, otp_type=self.otp_types,
+                              fetchall=False):
+            payloads[row['otp_type']][int(row['person_id'])] = (
+                row['otp_payload'])
+        self._payloads = payloads
+
+    def get_payload(self, person_id, otp_type=None):
+        """
+        Get otp payload for a given person.
+
+        :param person_id: The person to look up
+        :param otp_type: The otp type to get (default: the first otp type)
+
+        :raises LookupError: if the person has no otp payload of this type
+        """
+        otp_type = self.otp_types[0] if otp_type is None else otp_type
+        try:
+            return self._payloads[otp_type][int(person_id)]
+        except KeyError:
+            raise LookupError('No otp value for person_id=%r' %
+                              (person_id, ))
+
+
 def _get_cache(db, otp_type, ldap_attr=''):
     logger.info('Getting otp data with otp_type=%s (%s)', otp_type, ldap_attr)
-    cache = OtpCache(db, otp_type)
+    cache = OtpPayloadCache(db, (otp_type,))
     timer = make_timer(logger, 'Fetching otp data ...')
     cache.update_all()
-    timer('... done fetching otp data.')
+    timer('... done fetching otp data (%d payloads).' % (len(cache),))
     return cache
 
 
@@ -188,6 +247,11 @@ class NorEduOtpMixin(NorEduOrgLdifMixin):
         )
         return attr_unique([value], normalize=normalize_string)
 
+    def prepare_person_workers(self):
+        super(NorEduOtpMixin, self).prepare_person_workers()
+        # otp data is fetched on first use - workers can't use the database
+        self.feide_otp_cache
+
     def update_person_entry(self, entry, row, person_id):
         super(NorEduOtpMixin, self).update_person_entry(entry, row, person_id)
 
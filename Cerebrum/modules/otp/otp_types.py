@@ -48,6 +48,18 @@ The value should be a tuple of OtpType classes, e.g.:
     )
 
 This value is used when fetching the default policy with py:func:`.get_policy`.
+
+
+Bulk updates
+------------
+Preparing a JWE payload is CPU-bound.  py:meth:`.OtpPolicy.prepare_many`
+prepares payloads for many secrets, optionally in a pool of worker
+processes.
+
+JWE payloads are randomized, and differ each time a secret is encrypted.  A
+salted hash of the secret is therefore stored with each payload, and
+py:meth:`.PersonOtpUpdater.update_many` uses it to skip secrets that are
+already set.
 """
 from __future__ import (
     absolute_import,
@@ -55,6 +67,8 @@ from __future__ import (
     print_function,
     unicode_literals,
 )
+import logging
+import multiprocessing
 
 import cereconf
 from Cerebrum.utils.funcwrap import deprecate
@@ -63,6 +77,8 @@ from . import otp_db
 from . import otp_utils
 from .jwe_utils import get_jwk, jwe_encrypt
 
+logger = logging.getLogger(__name__)
+
 
 @deprecate('use Cerebrum.modules.otp.otp_utils.generate_secret')
 def generate_secret(*args, **kwargs):
@@ -164,6 +180,49 @@ class OtpPolicy(object):
         for otp_type, cb in self._otp_config.items():
             yield otp_type, cb(secret)
 
+    def prepare_many(self, items, processes=None, chunksize=100):
+        """
+        Prepare otp payloads for many secrets.
+
+        :param items: sequence of (otp_type, secret) pairs
+        :param int processes:
+            Number of worker processes to prepare payloads with.  Payloads are
+            prepared in this process if not set.
+        :param int chunksize: number of items to send to a worker at a time
+
+        :rtype: list
+        :returns: an otp_payload for each item, in the same order
+        """
+        items = list(items)
+        logger.debug('preparing %d otp payloads', len(items))
+        if processes and processes > 1 and len(items) > chunksize:
+            pool = multiprocessing.Pool(processes, _init_policy_worker,
+                                        (self._otp_config,))
+            try:
+                prepared = pool.map(_prepare_payload, items, chunksize)
+                pool.close()
+            finally:
+                pool.terminate()
+                pool.join()
+            return prepared
+        return [self._otp_config[otp_type](secret)
+                for otp_type, secret in items]
+
+
+# The otp_type -> callback mapping in policy worker processes
+_worker_config = None
+
+
+def _init_policy_worker(otp_config):
+    global _worker_config
+    _worker_config = otp_config
+
+
+def _prepare_payload(item):
+    """ Prepare a single payload in a worker process. """
+    otp_type, secret = item
+    return _worker_config[otp_type](secret)
+
 
 class PersonOtpUpdater(object):
     """
@@ -200,10 +259,66 @@ class PersonOtpUpdater(object):
     def update(self, person_id, secret):
         """ Set a new otp secret for a given person.  """
         for otp_type, otp_payload in self._policy(secret):
-            otp_db.sql_set(self._db, int(person_id), otp_type, otp_payload)
+            otp_db.sql_set(self._db, int(person_id), otp_type, otp_payload,
+                           secret_hash=otp_utils.hash_secret(secret))
 
         self.clear_obsolete(person_id)
 
+    def update_many(self, secrets, processes=None, force=False):
+        """
+        Set new otp secrets for many persons.
+
+        Payloads are only prepared and written if the stored secret hash
+        doesn't match the new secret.  Secrets that are already set are
+        skipped.
+
+        :param dict secrets: person_id -> secret
+        :param int processes: see py:meth:`OtpPolicy.prepare_many`
+        :param bool force:
+            prepare and write all payloads, e.g. after replacing the key of
+            an otp_type
+
+        :rtype: int
+        :returns: number of updated payloads
+        """
+        secrets = dict((int(person_id), secret)
+                       for person_id, secret in secrets.items())
+        person_ids = sorted(secrets)
+
+        # (person_id, otp_type) -> secret_hash
+        current = {}
+        for i in range(0, len(person_ids), 1000):
+            for row in otp_db.sql_search(self._db,
+                                         person_id=person_ids[i:i + 1000]):
+                key = (int(row['person_id']), row['otp_type'])
+                current[key] = row['secret_hash']
+
+        # (person_id, otp_type, secret) to prepare and write
+        todo = []
+        for person_id in person_ids:
+            secret = secrets[person_id]
+            for otp_type in self._policy.otp_types:
+                key = (person_id, otp_type)
+                if (not force and key in current and
+                        otp_utils.check_secret_hash(current[key], secret)):
+                    continue
+                todo.append((person_id, otp_type, secret))
+        logger.info('updating %d otp payloads for %d persons',
+                    len(todo), len(person_ids))
+
+        payloads = self._policy.prepare_many(
+            ((otp_type, secret) for _, otp_type, secret in todo),
+            processes=processes)
+        for (person_id, otp_type, secret), otp_payload in zip(todo, payloads):
+            otp_db.sql_set(self._db, person_id, otp_type, otp_payload,
+                           secret_hash=otp_utils.hash_secret(secret))
+
+        should_exist = set(self._policy.otp_types)
+        for person_id, otp_type in current:
+            if otp_type not in should_exist:
+                otp_db.sql_clear(self._db, person_id, otp_type)
+        return len(todo)
+
 
 def get_policy():
     """ Get the default OtpPolicy. """
@@ -27,6 +27,9 @@ from __future__ import (
     unicode_literals,
 )
 import base64
+import binascii
+import hashlib
+import hmac
 import os
 
 from passlib.totp import TOTP
@@ -44,6 +47,9 @@ from Cerebrum.utils import text_compat
 # specified very well...
 DEFAULT_SECRET_SIZE = 10
 
+# Salt size for secret hashes, in bytes
+SECRET_HASH_SALT_SIZE = 16
+
 # Default label for otp uri
 DEFAULT_LABEL = 'University of Oslo'
 
@@ -83,3 +89,44 @@ def format_otp_uri(secret, label=DEFAULT_LABEL, issuer=DEFAULT_ISSUER):
     otp_obj = TOTP(key=secret, format='base32', new=False,
                    label=label, issuer=issuer)
     return otp_obj.to_uri()
+
+
+def hash_secret(secret, salt=None):
+    """ Get a salted hash of a shared otp secret.
+
+    The hash is stored with otp payloads, so that we can tell if a payload was
+    prepared from a given secret without decrypting the payload.
+
+    :param secret: shared secret to hash
+    :param salt: hex-encoded salt (default: generate a new random salt)
+
+    :returns: a hash string, <algorithm>$<salt>$<digest>
+    """
+    if salt is None:
+        salt = text_compat.to_text(
+            binascii.hexlify(os.urandom(SECRET_HASH_SALT_SIZE)))
+    digest = hashlib.sha256(binascii.unhexlify(text_compat.to_bytes(salt)) +
+                            text_compat.to_bytes(secret)).hexdigest()
+    return '$'.join(('sha256', salt, text_compat.to_text(digest)))
+
+
+def check_secret_hash(secret_hash, secret):
+    """ Check if a secret hash from py:func:`.hash_secret` matches a secret.
+
+    :returns bool: True if the hash matches the given secret
+    """
+    if not secret_hash:
+        return False
+    try:
+        algorithm, salt, _ = secret_hash.split('$')
+    except ValueError:
+        return False
+    if algorithm != 'sha256':
+        return False
+    try:
+        expect = hash_secret(secret, salt=salt)
+    except (binascii.Error, TypeError, ValueError):
+        # invalid salt
+        return False
+    return hmac.compare_digest(text_compat.to_bytes(expect),
+                               text_compat.to_bytes(secret_hash))
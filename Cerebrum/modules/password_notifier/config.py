@@ -117,6 +117,22 @@ class PasswordNotifierConfig(Configuration):
         doc='A list of reminder delay values',
     )
 
+    delivery_workers = ConfigDescriptor(
+        Integer,
+        default=4,
+        minval=0,
+        doc=('Number of threads for sending notifications '
+             '(0: send from the main thread)'),
+    )
+
+    commit_batch_size = ConfigDescriptor(
+        Integer,
+        default=500,
+        minval=0,
+        doc=('Commit changes after this number of changed accounts '
+             '(0: commit when done)'),
+    )
+
     class_notifier_values = ConfigDescriptor(
         Iterable,
         template=String(),
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Deliver notifications in worker threads.
+
+The password notifier renders messages in the main thread (where all the
+database lookups happen), and hands them to a :class:`DeliveryPool`.  Each
+worker thread has its own *transport* (e.g. an SMTP connection) that is
+re-used for all messages delivered by that worker.
+
+Delivery results are collected by the main thread with
+:meth:`DeliveryPool.completed`, so that any database updates happen in the
+main thread as well.
+
+::
+
+    def deliver(message, transport):
+        return transport.send_message(message)
+
+    with DeliveryPool(SMTPSession, deliver, workers=4) as pool:
+        for key, message in messages:
+            pool.submit(key, message)
+            for key, ok in pool.completed():
+                ...
+    for key, ok in pool.completed():
+        ...
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import collections
+import logging
+import threading
+
+from six.moves import queue
+
+logger = logging.getLogger(__name__)
+
+
+def close_transport(transport):
+    """ Close a transport, if it can be closed. """
+    close = getattr(transport, 'close', None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception:
+        logger.warning('unable to close transport %r', transport,
+                       exc_info=True)
+
+
+class DeliveryPool(object):
+    """
+    A bounded pool of delivery workers.
+
+    :meth:`submit` blocks if *queue_size* messages are waiting to be
+    delivered, so that rendering doesn't get too far ahead of delivery.
+
+    With ``workers=0``, messages are delivered immediately by
+    :meth:`submit`, in the calling thread.
+    """
+
+    def __init__(self, get_transport, deliver, workers=4, queue_size=None):
+        """
+        :param callable get_transport:
+            Creates a new transport.  Called once for each worker.  If the
+            transport has a `close()` method, it is called when the worker
+            exits.
+        :param callable deliver:
+            Delivers a message, ``deliver(message, transport)``.  Should
+            return True if the message was delivered.
+        :param int workers:
+            Number of worker threads.
+        :param int queue_size:
+            Max number of messages waiting for delivery (default: four per
+            worker).
+        """
+        self.get_transport = get_transport
+        self.deliver = deliver
+        self.workers = int(workers)
+        if queue_size is None:
+            queue_size = 4 * self.workers
+        self._tasks = queue.Queue(maxsize=max(1, queue_size))
+        self._results = queue.Queue()
+        self._threads = []
+        self._transport = None
+        self._done = collections.deque()
+        self.pending = 0
+        self.closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        """ Start the worker threads. """
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(
+                target=self._work,
+                name='delivery-{:d}'.format(len(self._threads) + 1))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _deliver(self, message, transport):
+        try:
+            return bool(self.deliver(message, transport))
+        except Exception:
+            logger.exception('unable to deliver message %r', message)
+            return False
+
+    def _work(self):
+        try:
+            transport = self.get_transport()
+        except Exception:
+            # deliver() will most likely fail, but we still need to report
+            # each message as undelivered
+            logger.exception('unable to get transport')
+            transport = None
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    break
+                key, message = task
+                self._results.put((key, self._deliver(message, transport)))
+        finally:
+            close_transport(transport)
+
+    def submit(self, key, message):
+        """
+        Queue a message for delivery.
+
+        :param key: an identifier for the delivery result
+        :param message: message to pass on to `deliver`
+        """
+        if self.closed:
+            raise RuntimeError('delivery pool is closed')
+        self.pending += 1
+        if self.workers:
+            self._tasks.put((key, message))
+            return
+        if self._transport is None:
+            self._transport = self.get_transport()
+        self._done.append((key, self._deliver(message, self._transport)))
+
+    def completed(self):
+        """
+        Get delivery results that are ready.
+
+        :returns list: (key, delivered) tuples
+        """
+        while True:
+            try:
+                self._done.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        done = list(self._done)
+        self._done.clear()
+        self.pending -= len(done)
+        return done
+
+    def wait(self):
+        """
+        Wait for all submitted messages to be delivered.
+
+        :returns list: (key, delivered) tuples
+        """
+        done = self.completed()
+        while self.pending > 0:
+            done.append(self._results.get())
+            self.pending -= 1
+        return done
+
+    def close(self):
+        """ Deliver all queued messages and stop the workers. """
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._transport is not None:
+            close_transport(self._transport)
+            self._transport = None
@@ -44,6 +44,12 @@ module:
    trait has not already been set to 2. The trait's numval gets incremented.
 
 A trait is used for excepting specific users from being processed.
+
+Traits, addresses and other data for the candidate accounts are fetched up
+front (see :class:`NotifierCache`).  Notifications are rendered in the main
+thread, and delivered by a pool of worker threads (see
+:mod:`.delivery`).  Trait updates are made as deliveries complete, and
+committed in batches.
 """
 from __future__ import (
     absolute_import,
@@ -52,6 +58,7 @@ from __future__ import (
     unicode_literals,
 )
 
+import collections
 import contextlib
 import datetime
 import email
@@ -63,6 +70,7 @@ import smtplib
 import textwrap
 from functools import partial
 
+import requests
 import six
 
 import cereconf
@@ -71,10 +79,14 @@ from Cerebrum import Errors
 from Cerebrum import Utils
 from Cerebrum.QuarantineHandler import QuarantineHandler
 from Cerebrum.modules.password_notifier.config import load_config
+from Cerebrum.modules.password_notifier.delivery import (
+    DeliveryPool,
+    close_transport,
+)
 from Cerebrum.modules.pwcheck.history import PasswordHistory
 from Cerebrum.utils import date as date_utils
 from Cerebrum.utils import date_compat
-from Cerebrum.utils.email import sendmail
+from Cerebrum.utils.email import SMTPSession, make_message, sendmail
 from Cerebrum.utils.module import resolve
 from Cerebrum.utils.sms import SMSSender
 
@@ -129,6 +141,56 @@ def local_date(date, language_code=None):
         return datestr
 
 
+def _chunks(values, size=1000):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class NotifierCache(object):
+    """
+    Prefetched data for password notifier candidates.
+
+    The data is fetched with a few queries for all candidates, rather than
+    with multiple lookups for each account.  An account is removed from the
+    cache when it is changed.
+    """
+
+    def __init__(self, account_ids=()):
+        self.account_ids = set(int(a) for a in account_ids)
+        # owner_id of each account
+        self.owners = {}
+        # account_id -> trait code -> trait row
+        self.traits = {}
+        # account_id -> primary email address, if loaded
+        self.primary_addrs = None
+        # entity_id -> contact info rows, for accounts and their owners
+        self.contact_info = {}
+        # person_id -> affiliation rows
+        self.affiliations = {}
+
+    def __contains__(self, account_id):
+        return account_id in self.account_ids
+
+    def discard(self, account_id):
+        self.account_ids.discard(account_id)
+
+
+def _has_default_primary_mailaddress(account_cls):
+    """
+    Check if an account class uses the primary address lookup from the Email
+    module.
+
+    Primary addresses can only be prefetched from the email tables if
+    ``get_primary_mailaddress()`` isn't overridden by some other mixin.
+    """
+    for cls in account_cls.__mro__:
+        if 'get_primary_mailaddress' in vars(cls):
+            from Cerebrum.modules.Email import AccountEmailMixin
+            return cls is AccountEmailMixin
+    return False
+
+
 def _get_notifier_classes(class_notifier):
     """ Get PasswordNotifier base classes. """
     bases = []
@@ -172,6 +234,9 @@ class PasswordNotifier(object):
         self.splattee_id = account.entity_id
         self.constants = Utils.Factory.get('Constants')(db)
         self.splatted_users = []
+        self.cache = NotifierCache()
+        self._pending_accounts = {}
+        self._num_changed = 0
 
     @property
     def today(self):
@@ -274,6 +339,113 @@ class PasswordNotifier(object):
         return set([x['entity_id'] for x in account.list_traits(
             code=self.constants.EntityTrait(self.config.trait))])
 
+    def prefetch(self, account_ids):
+        """
+        Fetch data for a set of candidate accounts.
+
+        Lookups for these accounts will use the fetched data until they are
+        removed from :attr:`.cache`.
+        """
+        cache = NotifierCache(account_ids)
+        account = Utils.Factory.get("Account")(self.db)
+        person = Utils.Factory.get("Person")(self.db)
+
+        for row in account.search(expire_start=None):
+            if int(row['account_id']) in cache:
+                cache.owners[int(row['account_id'])] = int(row['owner_id'])
+        owner_ids = set(cache.owners.values())
+
+        trait_codes = set(
+            int(self.constants.EntityTrait(trait))
+            for trait in (self.config.trait,
+                          self.config.except_trait,
+                          self.config.follow_trait))
+        for row in account.list_traits(code=tuple(trait_codes)):
+            if int(row['entity_id']) in cache:
+                cache.traits.setdefault(
+                    int(row['entity_id']), {})[int(row['code'])] = row
+
+        if _has_default_primary_mailaddress(type(account)):
+            from Cerebrum.modules.Email import EmailDomain, EmailTarget
+            ed = EmailDomain(self.db)
+            cache.primary_addrs = {}
+            ambiguous = set()
+            et = EmailTarget(self.db)
+            for row in et.list_email_target_primary_addresses():
+                account_id = row['target_entity_id']
+                if account_id not in cache:
+                    continue
+                if account_id in cache.primary_addrs:
+                    ambiguous.add(account_id)
+                cache.primary_addrs[account_id] = (
+                    row['local_part'] + '@' +
+                    ed.rewrite_special_domains(row['domain']))
+            # Let get_primary_mailaddress() deal with these
+            cache.account_ids.difference_update(ambiguous)
+
+        entity_ids = cache.account_ids | owner_ids
+        for chunk in _chunks(entity_ids):
+            for row in account.list_contact_info(entity_id=chunk):
+                cache.contact_info.setdefault(
+                    int(row['entity_id']), []).append(row)
+            cache.contact_info.update(
+                (entity_id, [])
+                for entity_id in chunk
+                if entity_id not in cache.contact_info)
+
+        for chunk in _chunks(owner_ids):
+            for row in person.list_affiliations(person_id=chunk):
+                cache.affiliations.setdefault(
+                    int(row['person_id']), []).append(row)
+            cache.affiliations.update(
+                (person_id, [])
+                for person_id in chunk
+                if person_id not in cache.affiliations)
+
+        logger.info('Fetched data for %d accounts', len(cache.account_ids))
+        self.cache = cache
+
+    def _get_trait(self, account, trait):
+        """ Get a trait for an account, preferably from the cache. """
+        code = self.constants.EntityTrait(trait)
+        if account.entity_id not in self.cache:
+            return account.get_trait(code)
+        return self.cache.traits.get(account.entity_id, {}).get(int(code))
+
+    def _list_contact_info(self, entity_id, contact_type=None):
+        """ Get contact info rows for an entity, preferably from the cache. """
+        if entity_id not in self.cache.contact_info:
+            account = Utils.Factory.get("Account")(self.db)
+            return account.list_contact_info(entity_id=entity_id,
+                                             contact_type=contact_type)
+        return [row for row in self.cache.contact_info[entity_id]
+                if contact_type is None
+                or row['contact_type'] == int(contact_type)]
+
+    def _get_owner_affiliations(self, account):
+        """
+        Get affiliations for the owner of an account.
+
+        :raises NotFoundError: if the owner is not a person.
+        """
+        if (account.entity_id in self.cache
+                and account.owner_id in self.cache.affiliations):
+            return self.cache.affiliations[account.owner_id]
+        person = Utils.Factory.get("Person")(self.db)
+        person.find(account.owner_id)
+        return person.get_affiliations()
+
+    def _commit_batch(self):
+        """ Register a changed account, and commit changes in batches. """
+        if self.dryrun:
+            return
+        self._num_changed += 1
+        batch_size = self.config.commit_batch_size
+        if batch_size and self._num_changed % batch_size == 0:
+            logger.info('Committing changes (%d accounts)',
+                        self._num_changed)
+            self.db.commit()
+
     def remove_trait(self, account):
         """
         Removes pw trait, if any, and logs it.
@@ -291,8 +463,7 @@ class PasswordNotifier(object):
         Returns the number of previous notifications
         """
         try:
-            traits = account.get_trait(
-                self.constants.EntityTrait(self.config.trait))
+            traits = self._get_trait(account, self.config.trait)
             return int(traits['numval'])
         except (Errors.NotFoundError, TypeError):
             return 0
@@ -365,8 +536,7 @@ class PasswordNotifier(object):
             Returns the time for the previous notification, or None if the
             account has not been notified.
         """
-        trait = account.get_trait(
-            self.constants.EntityTrait(self.config.trait))
+        trait = self._get_trait(account, self.config.trait)
         if trait is None:
             return None
         return date_compat.get_datetime_naive(trait['date'])
@@ -399,9 +569,7 @@ class PasswordNotifier(object):
         # We want to start with the smallest 'max_password_age'
         aff_mappings = sorted(self.config.affiliation_mappings,
                               key=lambda k: k['max_password_age'])
-        person = Utils.Factory.get("Person")(self.db)
-        person.find(account.owner_id)
-        affiliations = person.get_affiliations()
+        affiliations = self._get_owner_affiliations(account)
         for aff_mapping in aff_mappings:
             try:
                 person_aff_code_str = self.constants.human2constant(
@@ -473,6 +641,61 @@ class PasswordNotifier(object):
         else:
             return False
 
+    def get_delivery_pool(self):
+        """ Get a pool for delivering notifications. """
+        workers = 0 if self.dryrun else self.config.delivery_workers
+        return DeliveryPool(self.get_transport, self.deliver_notification,
+                            workers=workers)
+
+    def _queue_notification(self, pool, account, kind, stats):
+        """
+        Render a notification, and queue it for delivery.
+
+        :returns bool:
+            True if the account object is kept until the notification is
+            delivered.
+        """
+        message = self.get_notification(account)
+        if message is None or isinstance(message, bool):
+            self._notification_done(account, kind, bool(message), stats)
+            return False
+        self._pending_accounts[account.entity_id] = account
+        stats['pending_' + kind] += 1
+        pool.submit((kind, account.entity_id), message)
+        return True
+
+    def _handle_delivered(self, results, stats):
+        for (kind, account_id), delivered in results:
+            stats['pending_' + kind] -= 1
+            account = self._pending_accounts.pop(account_id)
+            self._notification_done(account, kind, delivered, stats)
+
+    def _notification_done(self, account, kind, delivered, stats):
+        """ Update an account after a notification attempt. """
+        if kind == 'first':
+            if delivered:
+                if not self.dryrun:
+                    self.inc_num_notifications(account)
+                else:
+                    logger.info("First notify %s", account.account_name)
+                stats['mailed'] += 1
+            else:
+                self.rec_fail_notification(account)
+                logger.error("User %s not modified", account.account_name)
+        elif delivered:
+            if not self.dryrun:
+                self.inc_num_notifications(account)
+            else:
+                logger.info(
+                    "Remind %d for %s",
+                    self.get_num_notifications(account),
+                    account.account_name)
+            stats['reminded'] += 1
+        else:
+            logger.error("User %s not modified", account.account_name)
+        self.cache.discard(account.entity_id)
+        self._commit_batch()
+
     def process_accounts(self):
         logger.info("process_accounts started")
         if self.dryrun:
@@ -481,10 +704,11 @@ class PasswordNotifier(object):
         old_ids = self.get_old_account_ids()
         all_ids = self.get_notified_ids().union(old_ids)
         logger.debug("Found %d users with old passwords", len(old_ids))
+        self.prefetch(all_ids)
 
         # variables for statistics
-        num_mailed = num_splatted = num_previously_warned = num_reminded = 0
-        num_skipped_new_notifications = num_excepted = num_lifted = 0
+        stats = collections.Counter()
+        max_new = self.config.max_new_notifications
 
         account = Utils.Factory.get("Account")(self.db)
         if self.config.change_log_account:
@@ -494,70 +718,70 @@ class PasswordNotifier(object):
             cl_acc = None
         self.db.cl_init(change_by=cl_acc,
                         change_program=self.config.change_log_program)
-        for account_id in all_ids:
-            account.clear()
-            account.find(account_id)
-            reason = self.except_user(account)
-            if reason:
-                num_excepted += 1
-                logger.info("Skipping %s -- %s", account.account_name, reason)
-                continue
-            if account_id not in old_ids:
-                # Has new password, but may have notify trait
-                num_lifted += 1
-                if not self.dryrun:
-                    self.remove_trait(account)
-                else:
-                    logger.info("Removing trait for %s", account.account_name)
-                continue
-
-            # now, I know the password should be old,
-            if self.get_deadline(account) <= self.today:
-                # Deadline given in notification is passed, splat.
-                if not self.dryrun:
-                    num_splatted += 1 if self.splat_user(account) else 0
-                else:
-                    logger.info("Splat user %s", account.account_name)
-                    num_splatted += 1
-            elif self.get_num_notifications(account) == 0:
-                # Should we limit the number of new notifications?
-                if (self.config.max_new_notifications and
-                        num_mailed >= self.config.max_new_notifications):
-                    logger.info(
-                        "Skipping %s -- Maximum number of new notifications "
-                        "reached", account.account_name)
-                    num_skipped_new_notifications += 1
+        with self.get_delivery_pool() as pool:
+            for account_id in all_ids:
+                self._handle_delivered(pool.completed(), stats)
+                account.clear()
+                account.find(account_id)
+                reason = self.except_user(account)
+                if reason:
+                    stats['excepted'] += 1
+                    logger.info("Skipping %s -- %s",
+                                account.account_name, reason)
+                    continue
+                if account_id not in old_ids:
+                    # Has new password, but may have notify trait
+                    stats['lifted'] += 1
+                    if not self.dryrun:
+                        self.remove_trait(account)
+                        self._commit_batch()
+                    else:
+                        logger.info("Removing trait for %s",
+                                    account.account_name)
                     continue
 
-                # No previously notification/warning sent. Send first-mail
-                if self.notify(account):
+                # now, I know the password should be old,
+                if self.get_deadline(account) <= self.today:
+                    # Deadline given in notification is passed, splat.
                     if not self.dryrun:
-                        self.inc_num_notifications(account)
+                        if self.splat_user(account):
+                            stats['splatted'] += 1
+                            self._commit_batch()
                     else:
-                        logger.info("First notify %s", account.account_name)
-                    num_mailed += 1
+                        logger.info("Splat user %s", account.account_name)
+                        stats['splatted'] += 1
+                    continue
+
+                if self.get_num_notifications(account) == 0:
+                    # Should we limit the number of new notifications?
+                    if (max_new and
+                            stats['mailed'] + stats['pending_first']
+                            >= max_new):
+                        # Pending notifications may fail
+                        self._handle_delivered(pool.wait(), stats)
+                    if max_new and stats['mailed'] >= max_new:
+                        logger.info(
+                            "Skipping %s -- Maximum number of new "
+                            "notifications reached", account.account_name)
+                        stats['skipped_new_notifications'] += 1
+                        continue
+                    # No previously notification/warning sent. Send
+                    # first-mail
+                    kind = 'first'
                 else:
-                    self.rec_fail_notification(account)
-                    logger.error("User %s not modified", account.account_name)
-            else:
-                num_previously_warned += 1
-                if self.remind_ok(account):
-                    if self.notify(account):
-                        if not self.dryrun:
-                            self.inc_num_notifications(account)
-                        else:
-                            logger.info(
-                                "Remind %d for %s",
-                                self.get_num_notifications(account),
-                                account.account_name)
-                        num_reminded += 1
-                    else:
-                        logger.error("User %s not modified",
-                                     account.account_name)
+                    stats['previously_warned'] += 1
+                    if not self.remind_ok(account):
+                        continue
+                    kind = 'remind'
+
+                if self._queue_notification(pool, account, kind, stats):
+                    account = Utils.Factory.get("Account")(self.db)
+        self._handle_delivered(pool.completed(), stats)
 
         skipped_warnings = (
-            "({} skipped, limit reached)".format(num_skipped_new_notifications)
-            if num_skipped_new_notifications
+            "({} skipped, limit reached)".format(
+                stats['skipped_new_notifications'])
+            if stats['skipped_new_notifications']
             else '')
 
         stats = textwrap.dedent(
@@ -572,12 +796,12 @@ class PasswordNotifier(object):
             """
         ).format(
             len(old_ids),
-            num_excepted,
-            num_splatted,
-            num_mailed, skipped_warnings,
-            num_reminded,
-            num_previously_warned,
-            num_lifted,
+            stats['excepted'],
+            stats['splatted'],
+            stats['mailed'], skipped_warnings,
+            stats['reminded'],
+            stats['previously_warned'],
+            stats['lifted'],
         ).lstrip()
 
         if self.dryrun:
@@ -603,8 +827,7 @@ class PasswordNotifier(object):
         This could be overridden in a subclass to match different
         criteria.
         """
-        trait = account.get_trait(
-            self.constants.EntityTrait(self.config.except_trait))
+        trait = self._get_trait(account, self.config.except_trait)
         if trait:
             return "User is excepted by trait"
         return False
@@ -620,13 +843,18 @@ class PasswordNotifier(object):
             can be found.
         """
         # Look for a primary email address
-        try:
-            primary = account.get_primary_mailaddress()
+        if (account.entity_id in self.cache
+                and self.cache.primary_addrs is not None):
+            primary = self.cache.primary_addrs.get(account.entity_id)
+        else:
+            try:
+                primary = account.get_primary_mailaddress()
+            except Errors.NotFoundError:
+                primary = None
+        if primary:
             logger.debug("Found primary email address for '%s'",
                          account.account_name)
             return primary
-        except Errors.NotFoundError:
-            pass
 
         # We try pulling out the contact type constant for e-mail via
         # ContactInfo, and use that as a forward address. If there is
@@ -635,12 +863,12 @@ class PasswordNotifier(object):
         #
         # IndexError is raised both if the e-mail ContactInfo is not
         # defined and if no e-mail address was found for the entity.
-        get_entity_email = partial(account.list_contact_info,
+        get_entity_email = partial(self._list_contact_info,
                                    contact_type=self.constants.contact_email)
         try:
             # Look for forward addresses registered on the account:
             account_addr = get_entity_email(
-                entity_id=account.entity_id)[0]['contact_value']
+                account.entity_id)[0]['contact_value']
             logger.debug("Found email address for '%s' in contact info",
                          account.account_name)
             return account_addr
@@ -650,7 +878,7 @@ class PasswordNotifier(object):
         # Next, look for forward addresses registered on the owner:
         try:
             owner_addr = get_entity_email(
-                entity_id=account.owner_id)[0]['contact_value']
+                account.owner_id)[0]['contact_value']
             logger.debug("Found email address for '%s' in contact info",
                          account.account_name)
             return owner_addr
@@ -660,8 +888,8 @@ class PasswordNotifier(object):
         logger.warn("No email-address for %s" % account.account_name)
         return None
 
-    def notify(self, account):
-        """Placeholder for sending notifications to a user.
+    def get_notification(self, account):
+        """Placeholder for rendering a notification to a user.
 
         This function does not implement notification. Appropriate classes
         should be mixed in for notifications to be sent.
@@ -669,11 +897,47 @@ class PasswordNotifier(object):
         :param Cerebrum.Account account:
             The account object to notify.
 
+        :return:
+            A message for :meth:`.deliver_notification`, or a bool if there
+            is nothing to deliver (i.e. whether the notification succeeded).
+        """
+        return True
+
+    def get_transport(self):
+        """ Get a transport for :meth:`.deliver_notification`. """
+        return None
+
+    def deliver_notification(self, message, transport):
+        """Deliver a rendered notification.
+
+        This is called from worker threads, and must not use the database.
+
+        :param message: a message from :meth:`.get_notification`
+        :param transport: a transport from :meth:`.get_transport`
+
         :return bool:
             Returns whether the notification could be sent or not.
         """
         return True
 
+    def notify(self, account):
+        """Send a notification to a user.
+
+        :param Cerebrum.Account account:
+            The account object to notify.
+
+        :return bool:
+            Returns whether the notification could be sent or not.
+        """
+        message = self.get_notification(account)
+        if message is None or isinstance(message, bool):
+            return bool(message)
+        transport = self.get_transport()
+        try:
+            return bool(self.deliver_notification(message, transport))
+        finally:
+            close_transport(transport)
+
     @classmethod
     def get_notifier(cls, config=None):
         """ Factories a notifier class object.
@@ -727,7 +991,7 @@ class EmailPasswordNotifier(PasswordNotifier):
                 'Body': msg.get_payload(),
             })
 
-    def notify(self, account):
+    def get_notification(self, account):
 
         def mail_user(account, mail_type, deadline, first_time=None):
             mail_type = min(mail_type, len(self.mail_info)-1)
@@ -754,12 +1018,9 @@ class EmailPasswordNotifier(PasswordNotifier):
                 if first_time:
                     tag = '${FIRST_TIME_%s}' % lang.upper()
                     body = body.replace(tag, local_date(first_time, lang))
-            return _send_mail(
-                mail_to=to_email,
-                mail_from=self.mail_info[mail_type]['From'],
-                subject=subject,
-                body=body,
-                debug_enabled=self.dryrun)
+            mail_from = self.mail_info[mail_type]['From']
+            msg, to_addrs = make_message(to_email, mail_from, subject, body)
+            return (msg, mail_from, to_addrs)
 
         deadline = self.get_deadline(account)
         logger.info(
@@ -779,6 +1040,20 @@ class EmailPasswordNotifier(PasswordNotifier):
                 deadline=deadline,
                 first_time=self.get_notification_time(account))
 
+    def get_transport(self):
+        return SMTPSession()
+
+    def deliver_notification(self, message, transport):
+        msg, mail_from, to_addrs = message
+        if self.dryrun:
+            logger.debug("Sending mail to %s. Subject: %s",
+                         msg['To'], msg['Subject'])
+            return True
+        return _deliver_mail(
+            partial(transport.send_message, msg,
+                    from_addr=mail_from, to_addrs=to_addrs),
+            msg['To'])
+
 
 class SMSPasswordNotifier(PasswordNotifier):
     """ Send password notifications by SMS. """
@@ -803,8 +1078,7 @@ class SMSPasswordNotifier(PasswordNotifier):
         :returns datetime.date:
             Returns the deadline datetime.
         """
-        trait = account.get_trait(
-            self.constants.EntityTrait(self.config.follow_trait))
+        trait = self._get_trait(account, self.config.follow_trait)
         grace_delta = datetime.timedelta(days=self.config.grace_period)
 
         d = trait['date'] if trait else None
@@ -828,6 +1102,21 @@ class SMSPasswordNotifier(PasswordNotifier):
                 return True
         return False
 
+    def _notification_done(self, account, kind, delivered, stats):
+        if delivered:
+            if not self.dryrun:
+                self.inc_num_notifications(account)
+            else:
+                logger.info(
+                    "Remind %d for %s",
+                    self.get_num_notifications(account),
+                    account.account_name)
+            stats['smsed'] += 1
+        else:
+            logger.info("User %s not notified", account.account_name)
+        self.cache.discard(account.entity_id)
+        self._commit_batch()
+
     def process_accounts(self):
         logger.info("process_accounts started")
         if self.dryrun:
@@ -836,11 +1125,10 @@ class SMSPasswordNotifier(PasswordNotifier):
         old_ids = self.get_old_account_ids()
         all_ids = self.get_notified_ids().union(old_ids)
         logger.debug("Found %d users with old passwords", len(old_ids))
+        self.prefetch(all_ids)
 
         # variables for statistics
-        num_excepted = 0
-        num_smsed = 0
-        num_lifted = 0
+        stats = collections.Counter()
 
         account = Utils.Factory.get("Account")(self.db)
         if self.config.change_log_account:
@@ -850,34 +1138,32 @@ class SMSPasswordNotifier(PasswordNotifier):
             cl_acc = None
         self.db.cl_init(change_by=cl_acc,
                         change_program=self.config.change_log_program)
-        for account_id in all_ids:
-            account.clear()
-            account.find(account_id)
-            reason = self.except_user(account)
-            if reason:
-                num_excepted += 1
-                logger.info("Skipping %s -- %s", account.account_name, reason)
-                continue
-            if account_id not in old_ids:
-                # Has new password, but may have notify trait
-                num_lifted += 1
-                if not self.dryrun:
-                    self.remove_trait(account)
-                else:
-                    logger.info("Removing trait for %s", account.account_name)
-                continue
-            if self.remind_ok(account):
-                if self.notify(account):
+        with self.get_delivery_pool() as pool:
+            for account_id in all_ids:
+                self._handle_delivered(pool.completed(), stats)
+                account.clear()
+                account.find(account_id)
+                reason = self.except_user(account)
+                if reason:
+                    stats['excepted'] += 1
+                    logger.info("Skipping %s -- %s",
+                                account.account_name, reason)
+                    continue
+                if account_id not in old_ids:
+                    # Has new password, but may have notify trait
+                    stats['lifted'] += 1
                     if not self.dryrun:
-                        self.inc_num_notifications(account)
+                        self.remove_trait(account)
+                        self._commit_batch()
                     else:
-                        logger.info(
-                            "Remind %d for %s",
-                            self.get_num_notifications(account),
-                            account.account_name)
-                    num_smsed += 1
-                else:
-                    logger.info("User %s not notified", account.account_name)
+                        logger.info("Removing trait for %s",
+                                    account.account_name)
+                    continue
+                if (self.remind_ok(account) and
+                        self._queue_notification(pool, account, 'sms',
+                                                 stats)):
+                    account = Utils.Factory.get("Account")(self.db)
+        self._handle_delivered(pool.completed(), stats)
 
         stats = textwrap.dedent(
             """
@@ -888,9 +1174,9 @@ class SMSPasswordNotifier(PasswordNotifier):
             """
         ).format(
             len(old_ids),
-            num_excepted,
-            num_smsed,
-            num_lifted,
+            stats['excepted'],
+            stats['smsed'],
+            stats['lifted'],
         ).lstrip()
 
         if self.dryrun:
@@ -910,55 +1196,27 @@ class SMSPasswordNotifier(PasswordNotifier):
             logger.info('Committing changes')
             self.db.commit()
 
-    def notify(self, account):
-        def sms(account, days_until_splat):
-            if not account.owner_type == self.constants.entity_person:
-                return False
-            self.person.clear()
-            self.person.find(account.owner_id)
-            if cereconf.SMS_NUMBER_SELECTOR_PRIVATE:
-                sms_numbers = cereconf.SMS_NUMBER_SELECTOR_PRIVATE
-            else:
-                sms_numbers = cereconf.SMS_NUMBER_SELECTOR
-            try:
-                spec = [(self.constants.human2constant(s),
-                         self.constants.human2constant(t))
-                        for s, t in sms_numbers]
-                mobile = self.person.sort_contact_info(
-                    spec, self.person.get_contact_info())
-                person_in_systems = [int(af['source_system']) for af in
-                                     self.person.list_affiliations(
-                                         person_id=self.person.entity_id)]
-                mobile = filter(
-                    lambda x: x['source_system'] in person_in_systems,
-                    mobile)[0]['contact_value']
-            except IndexError:
-                logger.info(
-                    'No applicable phone number for {}'.format(
-                        account.account_name))
-                return False
+    def _get_mobile(self, account):
+        """ Get a mobile number for the owner of an account, or None. """
+        if cereconf.SMS_NUMBER_SELECTOR_PRIVATE:
+            sms_numbers = cereconf.SMS_NUMBER_SELECTOR_PRIVATE
+        else:
+            sms_numbers = cereconf.SMS_NUMBER_SELECTOR
+        spec = [(self.constants.human2constant(s),
+                 self.constants.human2constant(t))
+                for s, t in sms_numbers]
+        affiliations = self._get_owner_affiliations(account)
+        mobile = self.person.sort_contact_info(
+            spec, self._list_contact_info(account.owner_id))
+        person_in_systems = [int(af['source_system'])
+                             for af in affiliations]
+        mobile = [x for x in mobile
+                  if x['source_system'] in person_in_systems]
+        if mobile:
+            return mobile[0]['contact_value']
+        return None
 
-            # Send SMS
-            if getattr(cereconf, 'SMS_DISABLE', False):
-                logger.info(
-                    'SMS disabled in cereconf, would have '
-                    'sent password SMS to {}'.format(mobile))
-                return True
-            if self.dryrun:
-                logger.info(
-                    'Running in drymode. '
-                    'Would have sent password SMS to {mobile}'.format(
-                        mobile=mobile))
-                return True
-            sms = SMSSender()
-            if sms(mobile, self.template.format(
-                    account_name=account.account_name,
-                    days_until_splat=days_until_splat)):
-                return True
-            else:
-                logger.info(
-                    'Unable to send message to {}.'.format(mobile))
-                return False
+    def get_notification(self, account):
         deadline = self.get_deadline(account)
         logger.info(
             "Notifying %s by SMS, number=%d, deadline=%s",
@@ -966,24 +1224,46 @@ class SMSPasswordNotifier(PasswordNotifier):
             self.get_num_notifications(account) + 1,
             human_date(deadline))
         days_until_splat = (deadline - self.today).days
-        return sms(account=account, days_until_splat=days_until_splat)
 
+        if not account.owner_type == self.constants.entity_person:
+            return False
+        mobile = self._get_mobile(account)
+        if not mobile:
+            logger.info(
+                'No applicable phone number for {}'.format(
+                    account.account_name))
+            return False
+
+        if getattr(cereconf, 'SMS_DISABLE', False):
+            logger.info(
+                'SMS disabled in cereconf, would have '
+                'sent password SMS to {}'.format(mobile))
+            return True
+        if self.dryrun:
+            logger.info(
+                'Running in drymode. '
+                'Would have sent password SMS to {mobile}'.format(
+                    mobile=mobile))
+            return True
+        return (mobile, self.template.format(
+            account_name=account.account_name,
+            days_until_splat=days_until_splat))
+
+    def get_transport(self):
+        return SMSSender(session=requests.Session())
+
+    def deliver_notification(self, message, transport):
+        mobile, text = message
+        if transport(mobile, text):
+            return True
+        logger.info('Unable to send message to {}.'.format(mobile))
+        return False
 
-def _send_mail(mail_to, mail_from, subject, body,
-               mail_cc=None, debug_enabled=False):
-    if debug_enabled:
-        logger.debug("Sending mail to %s. Subject: %s", mail_to, subject)
-        # logger.debug("Body: %s" % body)
-        return True
 
+def _deliver_mail(send, mail_to):
+    """ Send mail with *send*, and log any errors. """
     try:
-        sendmail(
-            toaddr=mail_to,
-            fromaddr=mail_from,
-            subject=subject,
-            body=body,
-            cc=mail_cc,
-            debug=debug_enabled)
+        send()
     except smtplib.SMTPRecipientsRefused as e:
         failed_recipients = e.recipients
         for mail, condition in six.iteritems(failed_recipients):
@@ -994,3 +1274,21 @@ def _send_mail(mail_to, mail_from, subject, body,
         logger.error("Error when notifying %s: %s" % (mail_to, e))
         return False
     return True
+
+
+def _send_mail(mail_to, mail_from, subject, body,
+               mail_cc=None, debug_enabled=False):
+    if debug_enabled:
+        logger.debug("Sending mail to %s. Subject: %s", mail_to, subject)
+        # logger.debug("Body: %s" % body)
+        return True
+
+    return _deliver_mail(
+        partial(sendmail,
+                toaddr=mail_to,
+                fromaddr=mail_from,
+                subject=subject,
+                body=body,
+                cc=mail_cc,
+                debug=debug_enabled),
+        mail_to)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Trait snapshots for bulk lookups.
+
+A :class:`TraitSnapshot` loads all traits with a given set of codes (or all
+traits) with a single query, and keeps them as compact per-code dicts:
+
+::
+
+    snapshot = TraitSnapshot(db, codes=(co.trait_foo, co.trait_bar))
+    for account_id in account_ids:
+        value = snapshot.get(co.trait_foo, account_id)
+        if value and value.numval > 3:
+            ...
+
+Snapshot as a read-through cache
+--------------------------------
+A snapshot can be attached to a database connection with
+:func:`trait_cache`.  While attached, :meth:`EntityTrait.get_trait` and
+:meth:`EntityTrait.get_traits` are served from the snapshot, and the trait
+write paths in :class:`Cerebrum.modules.EntityTrait.EntityTrait` and
+:mod:`Cerebrum.modules.trait.trait_db` mark the changed entities as stale:
+
+::
+
+    with trait_cache(db, codes=(co.trait_foo,)):
+        for account_id in account_ids:
+            ac.clear()
+            ac.find(account_id)
+            ac.get_trait(co.trait_foo)
+
+Traits for stale entities are always read from the database, which means
+that changes made in the current transaction are always visible, even after
+a rollback.  Changes from other transactions are *not* visible, so the cache
+should only be used for the duration of a single job or transaction.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import contextlib
+import logging
+
+from Cerebrum.Utils import argument_to_sql
+from Cerebrum.utils.date_compat import get_datetime_naive
+
+logger = logging.getLogger(__name__)
+
+# Trait values, without entity_id, entity_type, and code
+TraitValue = collections.namedtuple(
+    'TraitValue',
+    ('target_id', 'date', 'numval', 'strval'))
+
+
+class TraitSnapshot(object):
+    """ Traits for a set of trait codes. """
+
+    def __init__(self, db, codes=None):
+        """
+        :param db: database connection
+        :param codes:
+            trait codes to include in the snapshot (default: all codes)
+        """
+        self._db = db
+        if codes is None:
+            self.codes = None
+        else:
+            self.codes = frozenset(int(code) for code in codes)
+        # code -> entity_id -> TraitValue
+        self._traits = None
+        # entities with changes after the snapshot was taken
+        self._stale = set()
+
+    def __repr__(self):
+        return '<{} codes={}>'.format(
+            type(self).__name__,
+            'all' if self.codes is None else sorted(self.codes))
+
+    def _select(self, entity_id=None):
+        conds = []
+        binds = {}
+        if self.codes is not None:
+            conds.append(argument_to_sql(tuple(self.codes), 'code', binds,
+                                         int))
+        if entity_id is not None:
+            conds.append(argument_to_sql(entity_id, 'entity_id', binds, int))
+        stmt = """
+          SELECT entity_id, code, target_id, date, numval, strval
+          FROM [:table schema=cerebrum name=entity_trait]
+          {where}
+        """.format(where=('WHERE ' + ' AND '.join(conds)) if conds else '')
+        return stmt, binds
+
+    @staticmethod
+    def _value(row):
+        return TraitValue(row['target_id'], get_datetime_naive(row['date']),
+                          row['numval'], row['strval'])
+
+    def load(self):
+        """ (Re-)load the snapshot. """
+        traits = dict((code, {}) for code in (self.codes or ()))
+        if self.codes is not None and not self.codes:
+            # no codes - nothing to fetch
+            self._traits = traits
+            self._stale = set()
+            return
+
+        stmt, binds = self._select()
+        count = 0
+        for row in self._db.query(stmt, binds, fetchall=False):
+            code = row['code']
+            try:
+                by_entity = traits[code]
+            except KeyError:
+                by_entity = traits[code] = {}
+            by_entity[row['entity_id']] = self._value(row)
+            count += 1
+        logger.debug('%r: loaded %d traits', self, count)
+        self._traits = traits
+        self._stale = set()
+
+    @property
+    def traits(self):
+        """ code -> entity_id -> TraitValue, loaded on first access. """
+        if self._traits is None:
+            self.load()
+        return self._traits
+
+    def covers(self, code):
+        """ Check if a trait code is included in this snapshot. """
+        return self.codes is None or int(code) in self.codes
+
+    def invalidate(self, entity_id=None):
+        """
+        Mark an entity as stale.
+
+        Traits for stale entities are read from the database on every
+        lookup.  If no entity is given, the entire snapshot is dropped, and
+        will be reloaded on next access.
+        """
+        if entity_id is None:
+            self._traits = None
+            self._stale = set()
+        else:
+            self._stale.add(int(entity_id))
+
+    def _read_entity(self, entity_id):
+        stmt, binds = self._select(entity_id=int(entity_id))
+        return dict((row['code'], self._value(row))
+                    for row in self._db.query(stmt, binds))
+
+    def get(self, code, entity_id, default=None):
+        """
+        Get a trait value.
+
+        :param code: trait code
+        :param int entity_id: entity to get trait for
+
+        :rtype: TraitValue
+        :returns: the trait value, or `default` if the trait isn't set
+        """
+        code = int(code)
+        if not self.covers(code):
+            raise KeyError('trait code not in snapshot: %r' % (code,))
+        entity_id = int(entity_id)
+        if entity_id in self._stale:
+            return self._read_entity(entity_id).get(code, default)
+        return self.traits.get(code, {}).get(entity_id, default)
+
+    def get_entity_traits(self, entity_id):
+        """
+        Get all traits in the snapshot for a given entity.
+
+        :returns dict: code (int) -> TraitValue
+        """
+        entity_id = int(entity_id)
+        if entity_id in self._stale:
+            return self._read_entity(entity_id)
+        result = {}
+        for code, by_entity in self.traits.items():
+            if entity_id in by_entity:
+                result[code] = by_entity[entity_id]
+        return result
+
+    def by_code(self, code):
+        """
+        Get all values for a given trait code.
+
+        Stale entities are re-read from the database.
+
+        :returns dict: entity_id -> TraitValue
+        """
+        code = int(code)
+        if not self.covers(code):
+            raise KeyError('trait code not in snapshot: %r' % (code,))
+        result = dict(self.traits.get(code, {}))
+        for entity_id in self._stale:
+            value = self._read_entity(entity_id).get(code)
+            if value is None:
+                result.pop(entity_id, None)
+            else:
+                result[entity_id] = value
+        return result
+
+
+# Name of the database connection attribute that holds the active cache
+_CACHE_ATTR = '_trait_snapshot_cache'
+
+
+def get_cache(db):
+    """ Get the trait cache for a database connection, if any. """
+    return getattr(db, _CACHE_ATTR, None)
+
+
+def invalidate_cache(db, entity_id=None):
+    """ Mark an entity as stale in the trait cache, if there is one. """
+    cache = get_cache(db)
+    if cache is not None:
+        cache.invalidate(entity_id)
+
+
+@contextlib.contextmanager
+def trait_cache(db, codes=None):
+    """
+    Attach a TraitSnapshot to a database connection as a read-through cache.
+
+    :param db: database connection
+    :param codes: trait codes to cache (default: all codes)
+
+    :returns: a context manager that gives the snapshot
+    """
+    if get_cache(db) is not None:
+        raise RuntimeError('trait cache already enabled for %r' % (db,))
+    snapshot = TraitSnapshot(db, codes=codes)
+    setattr(db, _CACHE_ATTR, snapshot)
+    try:
+        yield snapshot
+    finally:
+        delattr(db, _CACHE_ATTR)
@@ -33,6 +33,7 @@ import Cerebrum.Errors
 from Cerebrum.Utils import NotSet, argument_to_sql
 from Cerebrum.database import query_utils
 from .constants import CLConstants as TraitChange
+from .snapshot import invalidate_cache
 
 
 # Task ordering in query results
@@ -316,6 +317,7 @@ def delete_traits(db, **selects):
     for row in deleted_rows:
         logger.info('removed trait code=%r from entity_id=%r',
                     row['code'], row['entity_id'])
+        invalidate_cache(db, row['entity_id'])
         db.log_change(
             subject_entity=row['entity_id'],
             change_type_id=TraitChange.trait_del,
@@ -351,6 +353,7 @@ def _insert(db, entity_id, entity_type, code,
     row = db.query_1(stmt, binds)
     logger.info('added trait code=%r on entity_id=%r',
                 row['code'], row['entity_id'])
+    invalidate_cache(db, row['entity_id'])
     db.log_change(row['entity_id'], TraitChange.trait_add,
                   row['target_id'], change_params=_get_change_params(row))
     return row
@@ -387,6 +390,7 @@ def _update(db, entity_id, entity_type, code,
     row = db.query_1(stmt, binds)
     logger.info('updated trait code=%r on entity_id=%r',
                 row['code'], row['entity_id'])
+    invalidate_cache(db, row['entity_id'])
     db.log_change(row['entity_id'], TraitChange.trait_mod,
                   row['target_id'], change_params=_get_change_params(row))
     return row
@@ -33,6 +33,34 @@ from Cerebrum.export.auth import AuthExporter
 from Cerebrum.modules.LDIFutils import ldapconf
 
 
+def collect_memberships(memberships, group_dns, user_dns):
+    """
+    Collect group members and user memberships from one membership stream.
+
+    Both the group -> members and the user -> groups mappings are built in a
+    single pass over the memberships, in stream order.
+
+    :param memberships: iterable of (group_id, account_id) pairs
+    :param dict group_dns: group_id -> DN for all exported groups
+    :param dict user_dns: account_id -> DN for all exported users
+
+    :rtype: tuple
+    :return:
+        A dict that maps group_id to a tuple of member DNs, and a dict that
+        maps account_id to a list of group DNs.  The DN strings are shared
+        with (not copied from) the given DN dicts.
+    """
+    group_members = {}
+    member_of = {}
+    for group_id, account_id in memberships:
+        if group_id not in group_dns or account_id not in user_dns:
+            continue
+        group_members.setdefault(group_id, []).append(user_dns[account_id])
+        member_of.setdefault(account_id, []).append(group_dns[group_id])
+    return (dict((k, tuple(v)) for k, v in group_members.items()),
+            member_of)
+
+
 class LDIFHelper(object):
     """ Utility class for common functionality in LDIF exports. """
 
@@ -45,14 +73,15 @@ class LDIFHelper(object):
         self.const = Factory.get("Constants")(self.db)
         self.logger = logger
 
-        # groups must be populated before users, since the latter relies on the
-        # former due to data precaching.
+        # groups and users must be populated before memberships, since the
+        # latter relies on the former due to data precaching.
         auth_attr = ldapconf('USER', 'auth_attr', {})
         self.user_password = AuthExporter.make_exporter(
             self.db,
             auth_attr['userPassword'])
         self.groups = self._load_groups()
         self.users = self._load_users()
+        self.group_members = self._load_memberships()
 
     def _uname2dn(self, uname):
         return ",".join(("uid=" + uname, ldapconf("USER", "dn")))
@@ -95,13 +124,13 @@ class LDIFHelper(object):
         for spread in spreads:
             for row in account.search(spread=spread):
                 users[row["account_id"]] = {
+                    "dn": self._uname2dn(row["name"]),
                     "uname": row["name"],
                     "np_type": row["np_type"],
                 }
 
         users = self._get_contact_info(users)
         users = self._get_password_info(users)
-        users = self._get_membership_info(users)
         return users
 
     def _get_contact_info(self, users):
@@ -161,57 +190,50 @@ class LDIFHelper(object):
                 continue
         return users
 
-    def _get_membership_info(self, users):
-        """Collect group memberships information."""
-        group = Factory.get("Group")(self.db)
-        self.logger.debug("Collecting user membership information")
-
-        # crap. this is going to be VERY expensive...
-        for row in group.search_members(member_type=self.const.entity_account):
-            group_id = row["group_id"]
-            if group_id not in self.groups:
-                continue
+    def _load_memberships(self):
+        """
+        Collect group memberships for exported groups and users.
 
-            account_id = row["member_id"]
-            if account_id not in users:
-                continue
+        All account memberships are fetched in one query.  Group members are
+        returned, and users are updated with their uioMemberOf values.
 
-            gname = self._gname2dn(self.groups[group_id]["name"])
-            users[account_id].setdefault("uioMemberOf", list()).append(gname)
-        return users
+        :rtype: dict (int -> tuple of DNs)
+        :return: A dict mapping group_id to member DNs.
+        """
+        group = Factory.get("Group")(self.db)
+        self.logger.debug("Collecting group membership information")
+        group_dns = dict((group_id, self._gname2dn(gi["name"]))
+                         for group_id, gi in self.groups.items())
+        user_dns = dict((account_id, self.users[account_id]["dn"])
+                        for account_id in self.users)
+        group_members, member_of = collect_memberships(
+            ((row["group_id"], row["member_id"])
+             for row in group.search_members(
+                 member_type=self.const.entity_account)),
+            group_dns,
+            user_dns)
+        for account_id, group_dn_list in member_of.items():
+            self.users[account_id]["uioMemberOf"] = group_dn_list
+        self.logger.debug("Found %d memberships in %d groups",
+                          sum(len(m) for m in group_members.values()),
+                          len(group_members))
+        return group_members
 
     def yield_groups(self):
         """Generate group dicts with all LDAP-relevant information."""
-        group = Factory.get("Group")(self.db)
         for group_id in self.groups:
+            members = self.group_members.get(group_id)
+            if not members:
+                continue
             gi = self.groups[group_id]
             group_name = gi["name"]
-            entry = {
+            yield {
                 "dn": (self._gname2dn(group_name),),
                 "cn": (group_name,),
                 "objectClass": ldapconf("GROUP", "objectClass"),
                 "description": (gi["description"],),
+                "member": members,
             }
-            entry.update(self._get_member_info(group_id, group))
-            if not entry.get("member"):
-                continue
-            yield entry
-
-    def _get_member_info(self, group_id, group):
-        """ Retrieve all members of a group.
-        We need to respect LDAP-spreads for users and groups alike.
-
-        @rtype: dict (str -> sequence of DNs)
-        @return:
-          A dict with one entry, 'member' -> sequence of members in the
-          respective group.
-        """
-        members = tuple(self._uname2dn(self.users[x["member_id"]]["uname"])
-                        for x in group.search_members(group_id=group_id)
-                        if x["member_id"] in self.users)
-        if members:
-            return {"member": members}
-        return {}
 
     def yield_users(self):
         """ Yield all users qualified for export to LDAP. """
@@ -224,7 +246,7 @@ class LDIFHelper(object):
         for user_id in self.users:
             attrs = self.users[user_id]
             entry = {
-                "dn": (self._uname2dn(attrs["uname"]),),
+                "dn": (attrs["dn"],),
                 "uid": (attrs["uname"],),
                 "eduPersonPrincipalName": (attrs["uname"],),
                 "mail": (attrs["mail"],),
@@ -194,6 +194,11 @@ class BaseVirtHomeAccount(Account, EntityTrait):
         return super(BaseVirtHomeAccount, self).validate_new_uname(domain,
                                                                    uname)
 
+    def validate_new_unames(self, domain, unames):
+        """Get the usernames that are legal and free"""
+        return set(uname for uname in unames
+                   if self.validate_new_uname(domain, uname))
+
     def uname_is_available(self, uname, domain=None):
         """
         Checks that a username can be used.
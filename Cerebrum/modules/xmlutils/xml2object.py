@@ -44,9 +44,18 @@ TODO:
 """
 from __future__ import unicode_literals
 
+import collections
 import copy
+import multiprocessing
+import sys
 import time
-from xml.etree.cElementTree import parse, iterparse, ElementTree
+from xml.etree.cElementTree import (
+    ElementTree,
+    fromstring,
+    iterparse,
+    parse,
+    tostring,
+)
 
 import six
 from mx.DateTime import Date, DateTimeDelta
@@ -634,10 +643,19 @@ class AbstractDataGetter(object):
 class XMLDataGetter(AbstractDataGetter):
     """This class provides abstractions to operate on XML files."""
 
-    def __init__(self, filename, logger, fetchall=True):
+    def __init__(self, filename, logger, fetchall=True, processes=None):
+        """
+        :param filename: XML file to read
+        :param logger: logger for the XML converters
+        :param bool fetchall: load the entire XML file into memory
+        :param int processes:
+            Convert XML elements in this many worker processes.  Only used
+            when the file is parsed iteratively (fetchall=False).
+        """
         self._filename = filename
         self._data_source = None
         self._encoding = get_xml_file_encoding(filename)
+        self._processes = processes
 
         super(XMLDataGetter, self).__init__(logger, fetchall)
 
@@ -652,6 +670,12 @@ class XMLDataGetter(AbstractDataGetter):
             it = self._data_source.iter(element)
         else:
             it = XMLEntityIterator(self._filename, element)
+            if self._processes:
+                # The converter is only used in the worker processes, and
+                # gets an empty iterator to avoid sharing the parser.
+                converter = klass(iter(()), self.logger, self._encoding,
+                                  **kwargs)
+                return ParallelEntity2Object(it, converter, self._processes)
 
         return klass(iter(it), self.logger, self._encoding, **kwargs)
 
@@ -703,46 +727,51 @@ class XMLEntity2Object(object):
         This method would consume subsequent XML elements/subtrees until a
         suitable object can be constructed or we run out of XML elements. In
         the latter case StopIteration is thrown (as per iterator protocol).
-
-        IVR 2007-12-25 TBD: releasing the memory occupied by subtrees is quite
-        helpful, but very ugly in this code. This should be implemented more
-        elegantly.
         """
-
-        import sys
         while 1:
-            try:
-                # Fetch the next XML subtree...
-                element = self._xmliter.next()
-                # ... and dispatch to subclass to create an object
-                obj = self.next_object(element)
-
-                # free the memory in the ElementTree framework.
-                element.clear()
-
-                # IVR 2007-12-28 TBD: Do we want some generic 'no object
-                # created' error message here? The problem with such a message
-                # is that it is difficult to ignore a separate generic error
-                # line in the logs. Typically, when obj is None,
-                # next_element() would have made (or at least, it should have)
-                # some sort of error message which explains far better what
-                # went wrong, thus making a generic message here somewhat
-                # moot.
-                if obj is not None:
-                    return obj
-            except StopIteration:
-                raise
-            except Exception:
-                # If *any* sort of exception occurs, log this, and continue
-                # with the parsing. We cannot afford one defective entry to
-                # break down the entire data import run.
-                if self.logger:
-                    self.logger.warn(
-                        "%s occurred while processing XML element %s. "
-                        "Skipping it.",
-                        Utils.format_exception_context(*sys.exc_info()),
-                        element.tag)
-                element.clear()
+            # Fetch the next XML subtree, and convert it
+            obj = self.convert(next(self._xmliter))
+
+            # IVR 2007-12-28 TBD: Do we want some generic 'no object
+            # created' error message here? The problem with such a message
+            # is that it is difficult to ignore a separate generic error
+            # line in the logs. Typically, when obj is None,
+            # next_element() would have made (or at least, it should have)
+            # some sort of error message which explains far better what
+            # went wrong, thus making a generic message here somewhat
+            # moot.
+            if obj is not None:
+                return obj
+
+    def __next__(self):
+        return self.next()
+
+    def convert(self, element):
+        """Convert a single XML element to an object.
+
+        The object construction is dispatched to subclasses (via
+        next_object). The element is cleared once it has been converted.
+
+        @return:
+          An object constructed from element, or None if no object could be
+          constructed.
+        """
+        try:
+            return self.next_object(element)
+        except Exception:
+            # If *any* sort of exception occurs, log this, and continue
+            # with the parsing. We cannot afford one defective entry to
+            # break down the entire data import run.
+            if self.logger:
+                self.logger.warn(
+                    "%s occurred while processing XML element %s. "
+                    "Skipping it.",
+                    Utils.format_exception_context(*sys.exc_info()),
+                    element.tag)
+            return None
+        finally:
+            # free the memory in the ElementTree framework.
+            element.clear()
 
     @staticmethod
     def exception_wrapper(functor, exc_list=None, return_on_exc=None):
@@ -835,6 +864,11 @@ class XMLEntityIterator(object):
     dealing with people, OUs and the like, we need look at ('end',<ElementTree
     'something'>) only, where 'something' represents the entity we are
     interested in. In a sense, this class iterates over XML subtrees.
+
+    Memory use is independent of the file size: every completed element that
+    is not part of a returned subtree is dropped from the tree as soon as it
+    has been parsed, and each returned subtree is dropped on the following
+    call to next().
     """
 
     def __init__(self, filename, element):
@@ -842,8 +876,25 @@ class XMLEntityIterator(object):
         self.it = iter(iterparse(filename, (str("start"), str("end"))))
         self.element_name = element
 
-        # Keep track of the root element (to prevent element caching)
-        junk, self._root = self.it.next()
+        # Open (started, but not ended) elements, outermost first.
+        junk, root = next(self.it)
+        self._open = [root]
+        # How many of the open elements are self.element_name elements
+        self._matching = int(root.tag == self.element_name)
+        # The last element returned, and the element it is attached to
+        self._returned = None
+
+    def _release(self, parent, element):
+        """Clear a completed element and remove it from its parent."""
+        element.clear()
+        if parent is not None:
+            # iterparse reads ahead, so siblings of a completed element may
+            # already be attached to parent.  These are few, as completed
+            # elements are removed right away.
+            try:
+                parent.remove(element)
+            except ValueError:
+                pass
 
     def next(self):
         """Return next specified element, ignoring all else.
@@ -854,21 +905,129 @@ class XMLEntityIterator(object):
         DataAddress/DataPerson/and so forth, and return a suitable
         Data*-object.
         """
-
-        # Each time next is called, we drop whatever is dangling under root.
-        # It might be problematic if there is *a lot* of elements between two
-        # consecutive self.element_name elements, as all of them are kept in
-        # memory (it's like that by design).
-        self._root.clear()
+        if self._returned is not None:
+            # Each time next is called, we drop the previously returned
+            # element.  Elements nested in another returned element must be
+            # kept until their outer element is returned.
+            self._release(*self._returned)
+            self._returned = None
 
         for event, element in self.it:
-            if event == "end" and element.tag == self.element_name:
+            if event == "start":
+                self._open.append(element)
+                if element.tag == self.element_name:
+                    self._matching += 1
+                continue
+
+            self._open.pop()
+            parent = self._open[-1] if self._open else None
+            if element.tag == self.element_name:
+                self._matching -= 1
+                if not self._matching:
+                    self._returned = (parent, element)
                 return element
-
-            # See the explanation above.
-            self._root.clear()
+            if not self._matching:
+                # Not part of anything we return, drop it right away
+                self._release(parent, element)
 
         raise StopIteration
 
+    def __next__(self):
+        return self.next()
+
+    def __iter__(self):
+        return self
+
+
+#
+# Parallel conversion of XML elements
+#
+# Converting XML subtrees to Data*-objects is usually far more expensive than
+# parsing the XML.  ParallelEntity2Object moves the conversion to a pool of
+# worker processes.  The converter is handed to the workers when the pool is
+# forked, and each element is passed to the workers as serialized XML.
+#
+
+_worker_converter = None
+
+
+def _init_worker(converter):
+    global _worker_converter
+    _worker_converter = converter
+
+
+def _convert_chunk(chunk):
+    """Convert a list of serialized XML elements in a worker process."""
+    result = []
+    for data in chunk:
+        obj = _worker_converter.convert(fromstring(data))
+        if obj is not None:
+            result.append(obj)
+    return result
+
+
+class ParallelEntity2Object(object):
+    """Convert XML elements to Data*-objects in worker processes.
+
+    This is a drop-in replacement for an XMLEntity2Object iterator.  Objects
+    are returned in document order.  Only a bounded number of elements are
+    kept in flight at any given time, so memory use is still independent of
+    the file size.
+    """
+
+    def __init__(self, xmliter, converter, processes,
+                 chunksize=100, max_pending=None):
+        """
+        :param xmliter: iterator over XML elements (e.g. XMLEntityIterator)
+        :param converter: an XMLEntity2Object to do the conversion with
+        :param int processes: number of worker processes
+        :param int chunksize: number of elements to send to a worker at once
+        :param int max_pending: max number of chunks in flight (default is
+                                twice the number of processes)
+        """
+        self._xmliter = iter(xmliter)
+        self._converter = converter
+        self.processes = int(processes)
+        self.chunksize = int(chunksize)
+        self.max_pending = int(max_pending or 2 * self.processes)
+        self._objects = None
+
+    def _iter_chunks(self):
+        chunk = []
+        for element in self._xmliter:
+            chunk.append(tostring(element))
+            element.clear()
+            if len(chunk) >= self.chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _iter_objects(self):
+        pool = multiprocessing.Pool(self.processes, _init_worker,
+                                    (self._converter,))
+        try:
+            pending = collections.deque()
+            for chunk in self._iter_chunks():
+                pending.append(pool.apply_async(_convert_chunk, (chunk,)))
+                if len(pending) >= self.max_pending:
+                    for obj in pending.popleft().get():
+                        yield obj
+            while pending:
+                for obj in pending.popleft().get():
+                    yield obj
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def next(self):
+        if self._objects is None:
+            self._objects = self._iter_objects()
+        return next(self._objects)
+
+    def __next__(self):
+        return self.next()
+
     def __iter__(self):
         return self
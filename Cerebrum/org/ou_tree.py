@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Indexed, in-memory org trees.
+
+This module implements an in-memory index of a single org tree (ou
+perspective).  The index is built from the *ou_structure* parent mapping, and
+numbers all nodes in pre-order (nested set numbering).  This gives us:
+
+- O(1) ancestor/descendant tests (:meth:`.OuTree.is_ancestor`)
+- O(depth) paths to the root (:meth:`.OuTree.get_path`)
+- O(k) descendant listing (:meth:`.OuTree.get_descendants`)
+
+Typical usage:
+::
+
+    tree = load_ou_tree(db, perspective)
+    if tree.is_ancestor(faculty_id, ou_id):
+        ...
+
+The parent mapping can optionally be cached to disk.  The cache is keyed on
+the last *ou_set_parent*/*ou_unset_parent* change in the change log, and is
+considered stale as soon as a newer org tree change exists.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import io
+import json
+import logging
+import os
+
+import six
+
+from Cerebrum.Constants import CLConstants
+from Cerebrum.utils.atomicfile import AtomicFileWriter
+from . import perspective_db
+
+logger = logging.getLogger(__name__)
+
+
+class OuTree(object):
+    """
+    An immutable, indexed org tree.
+
+    Each node is given a pre-order index and a subtree size.  A node *a* is an
+    ancestor of *b* iff ``pre[a] < pre[b] < pre[a] + size[a]``, and all
+    descendants of *a* are found in the pre-order listing right after *a*.
+    """
+
+    def __init__(self, perspective, parent_map):
+        """
+        :param int perspective: the perspective (org tree) this tree represents
+        :param dict parent_map: mapping of ou_id -> parent ou_id (or None)
+        """
+        self.perspective = int(perspective)
+        self._parent = {}
+        self._children = {}
+        for ou_id, parent_id in parent_map.items():
+            ou_id = int(ou_id)
+            parent_id = None if parent_id is None else int(parent_id)
+            self._parent[ou_id] = parent_id
+            self._children.setdefault(ou_id, [])
+            if parent_id is not None:
+                self._children.setdefault(parent_id, []).append(ou_id)
+        for children in self._children.values():
+            children.sort()
+
+        self._roots = tuple(sorted(ou_id for ou_id, parent_id
+                                   in self._parent.items()
+                                   if parent_id is None))
+        self._order = []
+        self._index = {}
+        self._size = {}
+        self._depth = {}
+        self._build_index()
+
+        orphans = set(self._parent) - set(self._index)
+        if orphans:
+            # nodes that are part of a cycle, or point to a parent that isn't
+            # in the tree.
+            logger.warning("ignoring %d org units with no path to a root in "
+                           "perspective=%r: %r", len(orphans),
+                           self.perspective, sorted(orphans))
+            for ou_id in orphans:
+                del self._parent[ou_id]
+                self._children.pop(ou_id, None)
+
+    def _build_index(self):
+        # iterative dfs - org trees can be deep enough to hit the recursion
+        # limit
+        for root in self._roots:
+            stack = [(root, 0, False)]
+            while stack:
+                ou_id, depth, is_done = stack.pop()
+                if is_done:
+                    self._size[ou_id] = len(self._order) - self._index[ou_id]
+                    continue
+                self._index[ou_id] = len(self._order)
+                self._depth[ou_id] = depth
+                self._order.append(ou_id)
+                stack.append((ou_id, depth, True))
+                for child_id in reversed(self._children.get(ou_id, ())):
+                    stack.append((child_id, depth + 1, False))
+
+    def __repr__(self):
+        return '<{} perspective={} nodes={}>'.format(
+            type(self).__name__, self.perspective, len(self))
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, ou_id):
+        return ou_id in self._index
+
+    def __iter__(self):
+        """ Iterate over all ou_ids in pre-order. """
+        return iter(self._order)
+
+    def _check(self, ou_id):
+        if ou_id not in self._index:
+            raise LookupError('No ou_id=%r in perspective=%r' %
+                              (ou_id, self.perspective))
+
+    @property
+    def roots(self):
+        """ All root org units (ou_id) in this tree. """
+        return self._roots
+
+    def get_parent(self, ou_id):
+        """ Get parent ou_id of *ou_id*, or None if *ou_id* is a root. """
+        self._check(ou_id)
+        return self._parent[ou_id]
+
+    def get_children(self, ou_id):
+        """ Get a sorted tuple of immediate children of *ou_id*. """
+        self._check(ou_id)
+        return tuple(self._children[ou_id])
+
+    def get_depth(self, ou_id):
+        """ Get number of hops from *ou_id* to its root. """
+        self._check(ou_id)
+        return self._depth[ou_id]
+
+    def get_path(self, ou_id):
+        """
+        Get path from *ou_id* to its root.
+
+        :returns tuple: (ou_id, parent_id, grandparent_id, ..., root_id)
+        """
+        self._check(ou_id)
+        path = [ou_id]
+        parent_id = self._parent[ou_id]
+        while parent_id is not None:
+            path.append(parent_id)
+            parent_id = self._parent[parent_id]
+        return tuple(path)
+
+    def get_ancestors(self, ou_id):
+        """ Get all ancestors of *ou_id*, nearest first. """
+        return self.get_path(ou_id)[1:]
+
+    def get_root(self, ou_id):
+        """ Get the root of the tree that *ou_id* belongs to. """
+        return self.get_path(ou_id)[-1]
+
+    def is_ancestor(self, ancestor_id, ou_id, include_self=False):
+        """
+        Check if *ancestor_id* is an ancestor of *ou_id*.
+
+        :param bool include_self:
+            Consider an org unit to be its own ancestor.
+        """
+        try:
+            start = self._index[ancestor_id]
+            pos = self._index[ou_id]
+        except KeyError:
+            return False
+        if include_self and start == pos:
+            return True
+        return start < pos < start + self._size[ancestor_id]
+
+    def is_descendant(self, ou_id, ancestor_id, include_self=False):
+        """ Check if *ou_id* is a descendant of *ancestor_id*. """
+        return self.is_ancestor(ancestor_id, ou_id, include_self=include_self)
+
+    def get_descendants(self, ou_id, include_self=False):
+        """
+        Get all descendants of *ou_id* in pre-order.
+
+        :param bool include_self:
+            Include *ou_id* as the first item.
+
+        :returns tuple: descendant ou_ids
+        """
+        self._check(ou_id)
+        start = self._index[ou_id]
+        end = start + self._size[ou_id]
+        if not include_self:
+            start += 1
+        return tuple(self._order[start:end])
+
+    def get_parent_map(self):
+        """ Get a copy of the ou_id -> parent_id mapping of this tree. """
+        return dict(self._parent)
+
+
+#
+# Loading and caching
+#
+
+
+def _get_tree_change_id(db):
+    """
+    Get the id of the last org tree change in the change log.
+
+    :returns int:
+        The change_id, or None if no change log is available (or no org tree
+        change exists).
+    """
+    if not hasattr(db, 'get_log_events'):
+        return None
+    types = (CLConstants.ou_set_parent, CLConstants.ou_unset_parent)
+    rows = list(db.get_log_events(types=types, return_last_only=True))
+    if not rows:
+        return None
+    return int(rows[0]['change_id'])
+
+
+def _read_cache(filename, perspective, change_id):
+    """ Read a cached parent map, if it exists and is up to date. """
+    if not filename or change_id is None or not os.path.exists(filename):
+        return None
+    try:
+        with io.open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, ValueError) as e:
+        logger.warning("unable to read ou tree cache %r: %s", filename, e)
+        return None
+    if (data.get('perspective') != perspective
+            or data.get('change_id') != change_id):
+        logger.info("ou tree cache %r is stale", filename)
+        return None
+    return dict((ou_id, parent_id) for ou_id, parent_id in data['parents'])
+
+
+def _write_cache(filename, perspective, change_id, parent_map):
+    """ Write a parent map to the cache. """
+    data = {
+        'perspective': perspective,
+        'change_id': change_id,
+        'parents': sorted(parent_map.items()),
+    }
+    with AtomicFileWriter(filename, mode='w', encoding='utf-8') as f:
+        f.write(six.text_type(json.dumps(data)))
+    logger.debug("wrote ou tree cache %r (change_id=%r)", filename, change_id)
+
+
+def load_ou_tree(db, perspective, cache_file=None):
+    """
+    Load an indexed org tree.
+
+    :param db:
+    :param perspective: the perspective (org tree) to load
+    :param str cache_file:
+        An optional file to cache the org tree in.  The cache is only used if
+        the database has a change log, and is invalidated by org tree changes
+        (*ou_set_parent* and *ou_unset_parent*).
+
+    :rtype: OuTree
+    """
+    perspective = int(perspective)
+    change_id = _get_tree_change_id(db) if cache_file else None
+
+    parent_map = _read_cache(cache_file, perspective, change_id)
+    if parent_map is None:
+        parent_map = perspective_db.get_parent_map(db, perspective)
+        if cache_file and change_id is not None:
+            _write_cache(cache_file, perspective, change_id, parent_map)
+    else:
+        logger.debug("using ou tree cache %r (change_id=%r)",
+                     cache_file, change_id)
+    return OuTree(perspective, parent_map)
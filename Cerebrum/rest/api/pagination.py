@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Keyset pagination and streaming of large lists.
+
+List endpoints with pagination accepts two optional query parameters:
+
+limit
+    Max number of items to return.
+
+cursor
+    An opaque token that continues the listing after the last item of a
+    previous response.
+
+If there are more items, the response includes a *Link* header with the url
+of the next page (``rel="next"``).
+
+The cursor encodes the sort key of the last item on a page.  It is passed on
+as the *after* argument to the ``search()`` method of the endpoint, along
+with *limit*, so that each page is a cheap, indexed query -- regardless of
+how far into the listing a client is.
+
+Export-style endpoints can use :func:`iter_pages` and :func:`stream_json` to
+send a complete listing as a chunked json response, without keeping the
+entire result in memory.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import base64
+import binascii
+
+import six
+from flask import Response, json, request, stream_with_context, url_for
+from flask_restx import marshal
+
+from Cerebrum.rest.api import validator
+from Cerebrum.utils import reprutils
+
+# Max number of items in a single page
+MAX_LIMIT = 10000
+
+# Number of rows to fetch for each query when streaming a listing
+CHUNK_SIZE = 1000
+
+
+def encode_cursor(key):
+    """
+    Encode a sort key as a cursor.
+
+    :param tuple key: the sort key of the last item on a page
+    :rtype: str
+    """
+    data = json.dumps([int(value) for value in key], separators=(',', ':'))
+    token = base64.urlsafe_b64encode(data.encode('ascii')).decode('ascii')
+    return token.rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor.
+
+    :param str token: a cursor from :func:`encode_cursor`
+    :rtype: tuple
+    :raises ValueError: if the cursor is invalid
+    """
+    try:
+        token = six.text_type(token).strip()
+        padded = token + '=' * (-len(token) % 4)
+        data = base64.urlsafe_b64decode(padded.encode('ascii'))
+        key = json.loads(data.decode('ascii'))
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+    if (not isinstance(key, list) or not key or
+            not all(isinstance(value, six.integer_types) and
+                    not isinstance(value, bool)
+                    for value in key)):
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+
+class Cursor(reprutils.ReprEvalMixin):
+    """
+    Cursor argument transform and validation.
+
+    >>> cursor = Cursor(size=2)
+    >>> cursor(encode_cursor((3, 14)))
+    (3, 14)
+    """
+    repr_module = False
+    repr_kwargs = ("size",)
+
+    def __init__(self, size=1):
+        """
+        :param int size: number of values in the sort key
+        """
+        self.size = size
+
+    def __call__(self, value):
+        key = decode_cursor(value)
+        if len(key) != self.size:
+            raise ValueError('Invalid cursor')
+        return key
+
+
+def add_arguments(parser, size=1, max_limit=MAX_LIMIT):
+    """
+    Add pagination arguments to a request parser.
+
+    :param parser: a flask_restx request parser
+    :param int size: number of values in the sort key of the endpoint
+    :param int max_limit: max page size
+    """
+    parser.add_argument(
+        'limit',
+        type=validator.Integer(min_val=1, max_val=max_limit),
+        help='Max number of items to return.',
+    )
+    parser.add_argument(
+        'cursor',
+        type=Cursor(size=size),
+        help='Continue after the last item of a previous page.  '
+             'Use the link from the *Link* header of the previous response.',
+    )
+    return parser
+
+
+def paginate(rows, limit, get_key):
+    """
+    Get a page from a search result.
+
+    The search result should be fetched with ``limit=limit + 1``, so that we
+    can tell if there are more items.
+
+    :param rows: the search result
+    :param int limit: page size, or None if the result is not paginated
+    :param callable get_key: get the sort key from a row
+
+    :returns tuple: a list of rows, and a cursor for the next page (or None)
+    """
+    rows = list(rows)
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(get_key(rows[-1]))
+
+
+def get_link_headers(cursor):
+    """
+    Get response headers with a link to the next page.
+
+    :param str cursor: cursor for the next page, or None if this is the last
+    :rtype: dict
+    """
+    if not cursor:
+        return {}
+    params = request.args.to_dict(flat=False)
+    params.update(request.view_args or {})
+    params['cursor'] = cursor
+    url = url_for(request.endpoint, _external=True, **params)
+    return {'Link': '<{}>; rel="next"'.format(url)}
+
+
+def iter_pages(search, get_key, chunk_size=CHUNK_SIZE):
+    """
+    Iterate over a complete search result, one page at a time.
+
+    :param callable search:
+        A function that takes *after* and *limit* arguments, e.g. a
+        ``functools.partial`` of a ``search()`` method.
+    :param callable get_key: get the sort key from a row
+    :param int chunk_size: number of rows to fetch in each query
+
+    :returns generator: rows from each page
+    """
+    after = None
+    while True:
+        rows = list(search(after=after, limit=chunk_size))
+        for row in rows:
+            yield row
+        if len(rows) < chunk_size:
+            return
+        after = get_key(rows[-1])
+
+
+def stream_json(items, model, envelope, chunk_size=100):
+    """
+    Create a chunked json response.
+
+    The response body is equivalent to what ``marshal_with(model,
+    as_list=True, envelope=envelope)`` would give, but items are marshalled
+    and sent as they are produced.
+
+    :param items: iterable with items to marshal
+    :param model: the model to marshal items with
+    :param str envelope: name of the list in the response object
+    :param int chunk_size: number of items to send in each chunk
+
+    :rtype: flask.Response
+    """
+    def generate():
+        yield '{' + json.dumps(envelope) + ': ['
+        chunk = []
+        sep = ''
+        for item in items:
+            chunk.append(sep + json.dumps(marshal(item, model)))
+            sep = ', '
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield ']}\n'
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/json')
@@ -35,7 +35,7 @@ import six
 from flask import make_response
 from flask_restx import Namespace, Resource, abort
 
-from Cerebrum.rest.api import db, auth, fields, utils, validator
+from Cerebrum.rest.api import db, auth, fields, pagination, utils, validator
 from Cerebrum.rest.api.v1 import group
 from Cerebrum.rest.api.v1 import models
 from Cerebrum.rest.api.v1 import emailaddress
@@ -592,6 +592,7 @@ class AccountListResource(Resource):
         type=validator.String(),
         help='Filter by expiration end date.',
     )
+    pagination.add_arguments(account_search_filter)
 
     @api.marshal_with(AccountList)
     @api.doc(expect=[account_search_filter])
@@ -599,6 +600,8 @@ class AccountListResource(Resource):
     def get(self):
         """List accounts."""
         args = self.account_search_filter.parse_args()
+        limit = args.pop('limit')
+        cursor = args.pop('cursor')
         filters = {
             key: value
             for (key, value) in args.items()
@@ -614,10 +617,17 @@ class AccountListResource(Resource):
                       message='Unknown entity type for owner_type={}'.format(
                           filters['owner_type']))
 
+        if limit is not None:
+            filters['limit'] = limit + 1
+        if cursor is not None:
+            filters['after'] = cursor[0]
+
         ac = Factory.get('Account')(db.connection)
 
+        rows, cursor = pagination.paginate(ac.search(**filters), limit,
+                                           lambda row: (row['account_id'],))
         accounts = list()
-        for row in ac.search(**filters):
+        for row in rows:
             account = dict(row)
             account.update({
                 'id': account['name'],
@@ -627,7 +637,8 @@ class AccountListResource(Resource):
                 },
             })
             accounts.append(account)
-        return {'accounts': accounts}
+        return ({'accounts': accounts}, 200,
+                pagination.get_link_headers(cursor))
 
 
 #
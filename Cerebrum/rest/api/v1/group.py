@@ -29,6 +29,8 @@ from __future__ import (
     unicode_literals,
 )
 
+import functools
+
 import six
 from flask_restx import Namespace, Resource, abort
 from flask_restx import fields as base_fields
@@ -36,6 +38,7 @@ from werkzeug.exceptions import NotFound
 
 from Cerebrum.rest.api import db, auth, utils
 from Cerebrum.rest.api import fields as crb_fields
+from Cerebrum.rest.api import pagination
 from Cerebrum.rest.api import validator
 from Cerebrum import Errors
 from Cerebrum.group.GroupRoles import GroupRoles
@@ -446,31 +449,77 @@ GroupMember = api.model('GroupMember', {
 })
 
 
+def _get_member_key(row):
+    return (row['group_id'], row['member_id'])
+
+
+def _get_member_filters(args):
+    """ Get search_members filters from group member list args. """
+    filters = {key: value for (key, value) in args.items() if
+               value is not None}
+
+    if 'member_type' in filters:
+        try:
+            member_type = db.const.EntityType(filters['member_type'])
+            filters['member_type'] = int(member_type)
+        except Errors.NotFoundError:
+            abort(404, message='Unknown entity type for type={}'.format(
+                filters['member_type']))
+
+    if 'member_spread' in filters:
+        try:
+            member_spread = db.const.Spread(filters['member_spread'])
+            filters['member_spread'] = int(member_spread)
+        except Errors.NotFoundError:
+            abort(404, message='Unknown context for context={}'.format(
+                filters['member_spread']))
+
+    filters['include_member_entity_name'] = True
+    return filters
+
+
+def _format_member(row):
+    member = dict(row)
+    member.update({
+        'id': row['member_id'],
+        'name': row['member_name'],
+        'href': utils.href_from_entity_type(
+            entity_type=row['member_type'],
+            entity_id=row['member_id'],
+            entity_name=row['member_name']),
+    })
+    return member
+
+
+member_filter = api.parser()
+member_filter.add_argument(
+    'type',
+    type=validator.String(),
+    dest='member_type',
+    help='Filter by entity type.',
+)
+member_filter.add_argument(
+    'context',
+    type=validator.String(),
+    dest='member_spread',
+    help='Filter by context. Accepts * and ? as wildcards.',
+)
+member_filter.add_argument(
+    'filter_expired',
+    type=bool,
+    dest='member_filter_expired',
+    help='If false, include members that are expired.',
+)
+
+
 @api.route('/<string:name>/members/', endpoint='group-members-list')
 class GroupMemberListResource(Resource):
     """Resource for list of members of groups."""
 
     # GET /<group>/members/
     #
-    group_member_filter = api.parser()
-    group_member_filter.add_argument(
-        'type',
-        type=validator.String(),
-        dest='member_type',
-        help='Filter by entity type.',
-    )
-    group_member_filter.add_argument(
-        'context',
-        type=validator.String(),
-        dest='member_spread',
-        help='Filter by context. Accepts * and ? as wildcards.',
-    )
-    group_member_filter.add_argument(
-        'filter_expired',
-        type=bool,
-        dest='member_filter_expired',
-        help='If false, include members that are expired.',
-    )
+    group_member_filter = pagination.add_arguments(member_filter.copy(),
+                                                   size=2)
 
     @auth.require()
     @api.marshal_with(GroupMember, as_list=True, envelope='members')
@@ -479,43 +528,21 @@ class GroupMemberListResource(Resource):
     def get(self, name):
         """List members of a group."""
         args = self.group_member_filter.parse_args()
-        filters = {key: value for (key, value) in args.items() if
-                   value is not None}
-
-        if 'member_type' in filters:
-            try:
-                member_type = db.const.EntityType(filters['member_type'])
-                filters['member_type'] = int(member_type)
-            except Errors.NotFoundError:
-                abort(404, message='Unknown entity type for type={}'.format(
-                    filters['member_type']))
-
-        if 'member_spread' in filters:
-            try:
-                member_spread = db.const.Spread(filters['member_spread'])
-                filters['member_spread'] = int(member_spread)
-            except Errors.NotFoundError:
-                abort(404, message='Unknown context for context={}'.format(
-                    filters['member_spread']))
+        limit = args.pop('limit')
+        after = args.pop('cursor')
+        filters = _get_member_filters(args)
 
         gr = find_group(name)
-
         filters['group_id'] = gr.entity_id
-        filters['include_member_entity_name'] = True
-
-        members = list()
-        for row in gr.search_members(**filters):
-            member = dict(row)
-            member.update({
-                'id': row['member_id'],
-                'name': row['member_name'],
-                'href': utils.href_from_entity_type(
-                    entity_type=row['member_type'],
-                    entity_id=row['member_id'],
-                    entity_name=row['member_name']),
-            })
-            members.append(member)
-        return members
+        if limit is not None:
+            filters['limit'] = limit + 1
+        if after is not None:
+            filters['after'] = after
+
+        rows, cursor = pagination.paginate(gr.search_members(**filters),
+                                           limit, _get_member_key)
+        members = [_format_member(row) for row in rows]
+        return members, 200, pagination.get_link_headers(cursor)
 
     # PUT /<group>/members
     #
@@ -555,6 +582,38 @@ class GroupMemberListResource(Resource):
             group.add_member(member.entity_id)
 
 
+@api.route('/<string:name>/members/export',
+           endpoint='group-members-export')
+class GroupMemberExportResource(Resource):
+    """Resource for exporting all members of a group."""
+
+    # GET /<group>/members/export
+    #
+    @auth.require()
+    @api.response(200, 'Member list, as a chunked response', GroupMember)
+    @api.doc(expect=[member_filter])
+    @api.doc(params={'name': 'group name'})
+    def get(self, name):
+        """Export all members of a group.
+
+        Gives the same result as listing the members without pagination,
+        but the list is fetched and sent in chunks.  Use this for groups
+        with a large number of members.
+        """
+        filters = _get_member_filters(member_filter.parse_args())
+
+        gr = find_group(name)
+        filters['group_id'] = gr.entity_id
+
+        rows = pagination.iter_pages(
+            functools.partial(gr.search_members, **filters),
+            _get_member_key)
+        return pagination.stream_json(
+            (_format_member(row) for row in rows),
+            GroupMember,
+            'members')
+
+
 @api.route('/<string:name>/members/<int:member_id>',
            endpoint='group-members')
 @api.doc(params={'name': 'group name', 'member_id': 'member id'})
@@ -743,12 +802,16 @@ class GroupListResource(Resource):
         help='Filter by creator entity ID.',
     )
 
+    pagination.add_arguments(group_search_filter)
+
     @auth.require()
     @api.marshal_with(GroupListItem, as_list=True, envelope='groups')
     @api.doc(expect=[group_search_filter])
     def get(self):
         """List groups."""
         args = self.group_search_filter.parse_args()
+        limit = args.pop('limit')
+        cursor = args.pop('cursor')
         filters = {key: value for (key, value) in args.items() if
                    value is not None}
 
@@ -760,14 +823,21 @@ class GroupListResource(Resource):
                 abort(404, message='Unknown context={}'.format(
                     filters['spread']))
 
+        if limit is not None:
+            filters['limit'] = limit + 1
+        if cursor is not None:
+            filters['after'] = cursor[0]
+
         gr = Factory.get('Group')(db.connection)
 
+        rows, cursor = pagination.paginate(gr.search(**filters), limit,
+                                           lambda row: (row['group_id'],))
         groups = list()
-        for row in gr.search(**filters):
+        for row in rows:
             group = dict(row)
             group.update({
                 'id': group['name'],
                 'name': group['name'],
             })
             groups.append(group)
-        return groups
+        return groups, 200, pagination.get_link_headers(cursor)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark measurements and baselines.
+
+A benchmark runs a callable a given number of rounds, and records the run
+time and the number of database queries (see
+:class:`Cerebrum.testutils.querycount.QueryCounter`) of each round.
+
+Measurements can be stored as a JSON *baseline*, and later measurements can
+be compared with the baseline to detect regressions:
+
+::
+
+    result = measure(export_users, args=(db,), db=db, name='export')
+    save_baseline('baseline.json', [result])
+    ...
+    baseline = load_baseline('baseline.json')
+    for problem in compare(result, baseline['export']):
+        print(problem)
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import io
+import json
+import time
+
+import six
+
+from Cerebrum.testutils.querycount import QueryCounter
+
+
+BASELINE_VERSION = 1
+
+Measurement = collections.namedtuple(
+    'Measurement',
+    ('name', 'rounds', 'min', 'mean', 'max', 'queries'))
+
+
+def measure(func, args=(), kwargs=None, rounds=3, db=None, name=None,
+            timer=time.time, counter_cls=QueryCounter):
+    """
+    Run and measure a callable.
+
+    :param func: the callable to measure
+    :param args: positional arguments for func
+    :param kwargs: keyword arguments for func
+    :param int rounds: number of times to run func
+    :param db: only count queries from this database connection
+    :param name: a name for the measurement (default: name of func)
+
+    :returns tuple:
+        Returns a tuple with the measurement, and the return value from the
+        last round.
+
+        Times are given in seconds.  The query count is the highest number of
+        queries in a single round.
+    """
+    if rounds < 1:
+        raise ValueError('rounds must be a positive number')
+    kwargs = kwargs or {}
+    times = []
+    queries = 0
+    result = None
+    for _ in range(rounds):
+        with counter_cls(db) as counter:
+            start = timer()
+            result = func(*args, **kwargs)
+            times.append(timer() - start)
+        queries = max(queries, counter.count)
+    return Measurement(
+        name=name or getattr(func, '__name__', repr(func)),
+        rounds=rounds,
+        min=min(times),
+        mean=sum(times) / len(times),
+        max=max(times),
+        queries=queries,
+    ), result
+
+
+def compare(current, baseline, tolerance=0.25):
+    """
+    Compare a measurement with its baseline.
+
+    :type current: Measurement
+    :type baseline: Measurement
+    :param float tolerance:
+        allowed relative increase in (minimum) run time
+
+    :returns list: a description of each regression
+    """
+    problems = []
+    if current.queries > baseline.queries:
+        problems.append('%s: %d queries, baseline is %d queries'
+                        % (current.name, current.queries, baseline.queries))
+    limit = baseline.min * (1 + tolerance)
+    if current.min > limit:
+        problems.append('%s: %.3fs, baseline is %.3fs (limit %.3fs)'
+                        % (current.name, current.min, baseline.min, limit))
+    return problems
+
+
+def save_baseline(filename, measurements, metadata=None):
+    """
+    Write measurements to a JSON baseline file.
+
+    :param measurements: Measurement tuples to store
+    :param dict metadata: info about the run (e.g. dataset size)
+    """
+    data = {
+        'version': BASELINE_VERSION,
+        'metadata': dict(metadata or {}),
+        'benchmarks': dict(
+            (m.name, dict((f, getattr(m, f)) for f in Measurement._fields
+                          if f != 'name'))
+            for m in measurements),
+    }
+    # json.dumps gives a bytestring in PY2
+    text = six.text_type(json.dumps(data, indent=2, sort_keys=True,
+                                    separators=(',', ': ')))
+    with io.open(filename, mode='w', encoding='utf-8') as f:
+        f.write(text)
+        f.write('\n')
+
+
+def load_baseline(filename):
+    """
+    Read measurements from a JSON baseline file.
+
+    :returns dict: name -> Measurement
+    """
+    with io.open(filename, mode='r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != BASELINE_VERSION:
+        raise ValueError('unsupported baseline version in %s: %r'
+                         % (filename, data.get('version')))
+    return dict(
+        (name, Measurement(name=name, **values))
+        for name, values in data['benchmarks'].items())
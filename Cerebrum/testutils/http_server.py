@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+A fake HTTP API server for testing API clients offline.
+
+The server runs in a background thread on localhost, and serves json
+documents registered with :meth:`FakeHttpServer.add_json`:
+::
+
+    @pytest.fixture
+    def server():
+        with FakeHttpServer(delay=0.01) as server:
+            yield server
+
+
+    def test_get(server):
+        server.add_json('/v1/foo', {'id': 1}, etag='"1"')
+        response = requests.get(server.url + '/v1/foo')
+        assert response.json() == {'id': 1}
+        assert server.count('/v1/foo') == 1
+
+Documents with an *etag* or *last_modified* value support conditional
+requests (*304 Not Modified*).
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import collections
+import contextlib
+import json
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+def _get_route(path, query=None):
+    if not query:
+        return path
+    return path + '?' + urlencode(sorted(dict(query).items()))
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        fake = self.server.fake
+        parts = urlsplit(self.path)
+        route = _get_route(parts.path, parse_qsl(parts.query))
+        with fake.track():
+            if fake.delay:
+                time.sleep(fake.delay)
+            doc = fake.documents.get(route)
+            if doc is None:
+                fake.status[route].append(404)
+                self._respond(404, b'', fake.headers)
+                return
+
+            headers = dict(fake.headers)
+            if doc['etag']:
+                headers['ETag'] = doc['etag']
+            if doc['last_modified']:
+                headers['Last-Modified'] = doc['last_modified']
+
+            if ((doc['etag'] and
+                 self.headers.get('If-None-Match') == doc['etag']) or
+                    (doc['last_modified'] and
+                     self.headers.get('If-Modified-Since') ==
+                     doc['last_modified'])):
+                fake.status[route].append(304)
+                self._respond(304, b'', headers)
+                return
+
+            fake.status[route].append(200)
+            headers['Content-Type'] = 'application/json'
+            self._respond(200, doc['body'], headers)
+
+    def _respond(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class FakeHttpServer(object):
+    """ A threaded HTTP server with json documents. """
+
+    def __init__(self, delay=0, headers=None):
+        """
+        :param float delay: seconds to wait before each response
+        :param dict headers: extra headers to include in each response
+        """
+        self.delay = delay
+        self.headers = dict(headers or ())
+        self.documents = {}
+        self.status = collections.defaultdict(list)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{:d}'.format(host, port)
+
+    def start(self):
+        self._server = _ThreadingServer(('127.0.0.1', 0), _RequestHandler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def add_json(self, path, data, query=None, etag=None, last_modified=None):
+        """
+        Add or replace a json document.
+
+        :param str path: url path to the document
+        :param dict query: query params to match
+        :param str etag: entity tag for the document
+        :param str last_modified: last modified date for the document
+        """
+        body = json.dumps(data).encode('utf-8')
+        self.documents[_get_route(path, query)] = {
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+
+    def count(self, path, query=None, status=None):
+        """ Get number of requests for a document. """
+        results = self.status[_get_route(path, query)]
+        if status is None:
+            return len(results)
+        return results.count(status)
+
+    @contextlib.contextmanager
+    def track(self):
+        """ Context for tracking concurrent requests. """
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
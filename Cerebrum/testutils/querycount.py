@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Count database queries.
+
+The :class:`QueryCounter` patches :meth:`Cerebrum.database.Cursor.execute`,
+and records every statement that is executed while the counter is active.
+This is typically used to detect *N+1* query patterns, i.e. code that does
+one query for each item in a result:
+
+::
+
+    with QueryCounter(db) as counter:
+        do_something(db)
+    assert counter.count < 10
+
+Note that :meth:`Cerebrum.database.Cursor.executemany` executes each set of
+parameters as a separate statement, and counts as one query per row.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import functools
+
+
+def _get_cursor_class():
+    from Cerebrum.database import Cursor
+    return Cursor
+
+
+class QueryCounter(object):
+    """
+    Context that records executed database statements.
+
+    :param db:
+        Only count statements executed by this database connection (default:
+        count statements from all connections).
+
+    :param cursor_cls:
+        The cursor class to patch (default: :class:`Cerebrum.database.Cursor`)
+    """
+
+    def __init__(self, db=None, cursor_cls=None):
+        self.db = db
+        self.cursor_cls = cursor_cls or _get_cursor_class()
+        self.statements = []
+        self._active = False
+        self._original = None
+
+    def _is_counted(self, cursor):
+        if self.db is None:
+            return True
+        # A Database object forwards to its default cursor, which refers back
+        # to the Database object.
+        return getattr(cursor, '_db', None) is self.db
+
+    def start(self):
+        if self._active:
+            raise RuntimeError('counter already started')
+        # the class attribute, so that it can be restored as-is
+        self._original = vars(self.cursor_cls).get('execute')
+        execute = self.cursor_cls.execute
+        counter = self
+
+        @functools.wraps(execute)
+        def counted_execute(cursor, operation, *args, **kwargs):
+            if counter._is_counted(cursor):
+                counter.statements.append(operation)
+            return execute(cursor, operation, *args, **kwargs)
+
+        self.cursor_cls.execute = counted_execute
+        self._active = True
+
+    def stop(self):
+        if not self._active:
+            return
+        if self._original is None:
+            # execute was inherited
+            del self.cursor_cls.execute
+        else:
+            self.cursor_cls.execute = self._original
+        self._original = None
+        self._active = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def count(self):
+        """ Number of executed statements. """
+        return len(self.statements)
+
+    def reset(self):
+        """ Forget all recorded statements. """
+        self.statements = []
+
+    def most_common(self, n=None):
+        """
+        Get the most frequently executed statements.
+
+        :returns list: (statement, count) tuples
+        """
+        return collections.Counter(self.statements).most_common(n)
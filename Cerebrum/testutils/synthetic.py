@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Synthetic datasets for benchmarks.
+
+The :class:`DatasetGenerator` populates a database with a deterministic (for
+a given *seed*, *scale* and Python version) set of:
+
+- an OU tree (with stedkode, if the OU class supports it)
+- persons, with names and an affiliation to an OU
+- accounts, owned by the persons, with traits, spreads and email targets
+- groups, nested in a number of levels, with account and person members
+
+Rows are inserted directly into the database tables, without going through
+the entity classes.  This is a lot faster, and avoids any side effects from
+mixins (e.g. change log entries, or default spreads), but the generated
+entities are only as valid as the tables require them to be.
+
+New codes (spreads, a trait, an affiliation, ...) are inserted for the
+dataset.  This uses the database connection of the code classes (i.e.
+``_CerebrumCode.sql``), which must be the same connection/transaction as the
+one given to the generator.
+
+::
+
+    dataset = DatasetGenerator(db, scale=2, seed=1).generate()
+    print(len(dataset.accounts))
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+import logging
+import random
+
+import cereconf
+from Cerebrum import Constants
+from Cerebrum.Utils import Factory
+from Cerebrum.modules.trait.constants import _EntityTraitCode
+
+logger = logging.getLogger(__name__)
+
+# Dataset size at scale=1
+BASE_COUNTS = {
+    'ous': 20,
+    'persons': 500,
+    'groups': 100,
+}
+
+# Max number of OUs, as limited by our stedkode numbering
+MAX_OUS = 100000
+
+# Name parts for person names
+FIRST_NAMES = (
+    'Anne', 'Bjørn', 'Erik', 'Hanne', 'Ingrid', 'Jon', 'Kari', 'Knut',
+    'Lars', 'Liv', 'Marit', 'Nils', 'Ola', 'Per', 'Sigrid', 'Siri',
+    'Solveig', 'Ståle', 'Tor', 'Åse',
+)
+LAST_NAMES = (
+    'Andersen', 'Berg', 'Dahl', 'Eriksen', 'Haugen', 'Hansen', 'Johansen',
+    'Karlsen', 'Larsen', 'Lie', 'Nilsen', 'Nordmann', 'Olsen', 'Pedersen',
+    'Sæther', 'Solberg', 'Strøm', 'Moen', 'Ødegård', 'Aasen',
+)
+
+
+def _insert(db, table, rows):
+    """ Insert dict-rows into a table. """
+    if not rows:
+        return
+    cols = sorted(rows[0])
+    db.executemany(
+        """
+          INSERT INTO [:table schema=cerebrum name={table}]
+            ({cols})
+          VALUES
+            ({binds})
+        """.format(table=table,
+                   cols=', '.join(cols),
+                   binds=', '.join(':' + c for c in cols)),
+        rows)
+
+
+class Dataset(object):
+    """ Ids and codes of a generated dataset. """
+
+    def __init__(self, prefix, scale, seed):
+        self.prefix = prefix
+        self.scale = scale
+        self.seed = seed
+
+        # codes
+        self.perspective = None
+        self.source_system = None
+        self.affiliation = None
+        self.aff_status = None
+        self.account_spread = None
+        self.group_spread = None
+        self.account_trait = None
+        self.email_domain_id = None
+
+        # entities
+        self.root_ou = None
+        self.ous = []
+        self.ou_parent = {}
+        self.persons = []
+        self.person_ou = {}
+        self.person_name = {}
+        self.accounts = []
+        self.account_owner = {}
+        self.account_name = {}
+        self.groups = []
+        self.group_name = {}
+        self.group_levels = []
+        self.email_targets = {}
+
+    def __repr__(self):
+        return ('<Dataset prefix={0.prefix} scale={0.scale} seed={0.seed}'
+                ' ous={1} persons={2} accounts={3} groups={4}>').format(
+                    self, len(self.ous), len(self.persons),
+                    len(self.accounts), len(self.groups))
+
+    @property
+    def counts(self):
+        return {
+            'ous': len(self.ous),
+            'persons': len(self.persons),
+            'accounts': len(self.accounts),
+            'groups': len(self.groups),
+            'email_targets': len(self.email_targets),
+        }
+
+
+class DatasetGenerator(object):
+    """ Populates a database with a synthetic dataset. """
+
+    def __init__(self, db, scale=1, seed=0, prefix='bench', group_depth=3,
+                 email=True):
+        """
+        :param db: database connection to populate
+        :param scale: multiplier for the number of entities in BASE_COUNTS
+        :param seed: seed for generating random values
+        :param prefix: prefix for names and code strings
+        :param group_depth: number of levels of nested groups
+        :param email: generate email domain, targets and addresses
+        """
+        if scale <= 0:
+            raise ValueError('scale must be a positive number')
+        self.db = db
+        self.scale = scale
+        self.seed = seed
+        self.prefix = prefix
+        self.group_depth = max(1, int(group_depth))
+        self.const = Factory.get('Constants')(db)
+        self.email = email and hasattr(self.const, 'email_target_account')
+        self.rng = random.Random(seed)
+        self.creator_id = None
+
+    def _count(self, name):
+        return max(1, int(round(BASE_COUNTS[name] * self.scale)))
+
+    def _new_ids(self, n):
+        return [int(row['entity_id']) for row in self.db.query(
+            """
+              SELECT [:sequence schema=cerebrum name=entity_id_seq op=next]
+                AS entity_id
+              FROM generate_series(1, :n)
+            """,
+            {'n': n})]
+
+    def _create_entities(self, entity_type, n):
+        ids = self._new_ids(n)
+        _insert(self.db, 'entity_info',
+                [{'entity_id': i, 'entity_type': int(entity_type)}
+                 for i in ids])
+        return ids
+
+    def _get_creator(self):
+        return int(self.db.query_1(
+            """
+              SELECT entity_id
+              FROM [:table schema=cerebrum name=entity_name]
+              WHERE value_domain = :namespace AND entity_name = :name
+            """,
+            {'namespace': int(self.const.account_namespace),
+             'name': cereconf.INITIAL_ACCOUNTNAME}))
+
+    def generate(self):
+        """
+        Generate and insert a dataset.
+
+        :rtype: Dataset
+        """
+        dataset = Dataset(self.prefix, self.scale, self.seed)
+        self.creator_id = self._get_creator()
+        self.make_codes(dataset)
+        self.make_ous(dataset)
+        self.make_persons(dataset)
+        self.make_accounts(dataset)
+        self.make_groups(dataset)
+        if self.email:
+            self.make_email(dataset)
+        logger.info('generated %r', dataset)
+        return dataset
+
+    def make_codes(self, dataset):
+        co = self.const
+        name = self.prefix
+
+        def create(code):
+            code.insert()
+            return code
+
+        dataset.perspective = create(Constants._OUPerspectiveCode(
+            name, description='synthetic perspective'))
+        dataset.source_system = create(Constants._AuthoritativeSystemCode(
+            name.upper(), description='synthetic source system'))
+        dataset.affiliation = create(Constants._PersonAffiliationCode(
+            name.upper(), description='synthetic affiliation'))
+        dataset.aff_status = create(Constants._PersonAffStatusCode(
+            dataset.affiliation, name, description='synthetic aff status'))
+        dataset.account_spread = create(Constants._SpreadCode(
+            name + '@account', co.entity_account,
+            description='synthetic account spread'))
+        dataset.group_spread = create(Constants._SpreadCode(
+            name + '@group', co.entity_group,
+            description='synthetic group spread'))
+        dataset.account_trait = create(_EntityTraitCode(
+            name + '-trait', co.entity_account,
+            description='synthetic account trait'))
+
+    def make_ous(self, dataset):
+        n = self._count('ous')
+        if n > MAX_OUS:
+            raise ValueError('too many ous: %d (max %d)' % (n, MAX_OUS))
+        ou_ids = self._create_entities(self.const.entity_ou, n)
+        _insert(self.db, 'ou_info', [{'ou_id': i} for i in ou_ids])
+
+        # every ou is a child of a (random) ou created before it
+        dataset.root_ou = ou_ids[0]
+        dataset.ou_parent[ou_ids[0]] = None
+        for pos, ou_id in enumerate(ou_ids[1:], 1):
+            dataset.ou_parent[ou_id] = ou_ids[self.rng.randrange(pos)]
+        dataset.ous = ou_ids
+
+        _insert(self.db, 'ou_structure', [
+            {'ou_id': ou_id,
+             'perspective': int(dataset.perspective),
+             'parent_id': dataset.ou_parent[ou_id]}
+            for ou_id in ou_ids])
+
+        if hasattr(Factory.get('OU'), 'find_stedkode'):
+            institusjon = cereconf.DEFAULT_INSTITUSJONSNR or 0
+            _insert(self.db, 'stedkode', [
+                {'ou_id': ou_id,
+                 'landkode': 0,
+                 'institusjon': institusjon,
+                 'fakultet': 90 + pos // 10000,
+                 'institutt': pos // 100 % 100,
+                 'avdeling': pos % 100}
+                for pos, ou_id in enumerate(ou_ids)])
+
+    def make_persons(self, dataset):
+        co = self.const
+        person_ids = self._create_entities(co.entity_person,
+                                           self._count('persons'))
+        first_birth = datetime.date(1950, 1, 1)
+        _insert(self.db, 'person_info', [
+            {'person_id': person_id,
+             'gender': int(co.gender_unknown),
+             'birth_date': first_birth + datetime.timedelta(
+                 days=self.rng.randrange(50 * 365))}
+            for person_id in person_ids])
+
+        for person_id in person_ids:
+            dataset.person_ou[person_id] = self.rng.choice(dataset.ous)
+        affs = [
+            {'person_id': person_id,
+             'ou_id': dataset.person_ou[person_id],
+             'affiliation': int(dataset.affiliation)}
+            for person_id in person_ids]
+        _insert(self.db, 'person_affiliation', affs)
+        for aff in affs:
+            aff.update({
+                'source_system': int(dataset.source_system),
+                'status': int(dataset.aff_status),
+                'precedence': 1,
+            })
+        _insert(self.db, 'person_affiliation_source', affs)
+
+        names = []
+        variants = (co.name_first, co.name_last, co.name_full)
+        for person_id in person_ids:
+            first = self.rng.choice(FIRST_NAMES)
+            last = self.rng.choice(LAST_NAMES)
+            if self.rng.random() < 0.2:
+                last = last + '-' + self.rng.choice(LAST_NAMES)
+            full = first + ' ' + last
+            dataset.person_name[person_id] = full
+            for source in (dataset.source_system, co.system_cached):
+                for variant, name in zip(variants, (first, last, full)):
+                    names.append({
+                        'person_id': person_id,
+                        'name_variant': int(variant),
+                        'source_system': int(source),
+                        'name': name,
+                    })
+        _insert(self.db, 'person_name', names)
+        dataset.persons = person_ids
+
+    def make_accounts(self, dataset):
+        co = self.const
+        # every person gets an account, and some get a second one
+        owners = list(dataset.persons)
+        owners.extend(p for p in dataset.persons if self.rng.random() < 0.1)
+        account_ids = self._create_entities(co.entity_account, len(owners))
+
+        priority = {}
+        info, names, types, spreads, traits = [], [], [], [], []
+        for pos, (account_id, owner_id) in enumerate(zip(account_ids,
+                                                         owners)):
+            name = '{}{:06d}'.format(self.prefix, pos)
+            dataset.account_owner[account_id] = owner_id
+            dataset.account_name[account_id] = name
+            priority[owner_id] = priority.get(owner_id, 0) + 1
+            info.append({
+                'account_id': account_id,
+                'owner_type': int(co.entity_person),
+                'owner_id': owner_id,
+                'creator_id': self.creator_id,
+            })
+            names.append({
+                'entity_id': account_id,
+                'value_domain': int(co.account_namespace),
+                'entity_name': name,
+            })
+            types.append({
+                'person_id': owner_id,
+                'ou_id': dataset.person_ou[owner_id],
+                'affiliation': int(dataset.affiliation),
+                'account_id': account_id,
+                'priority': priority[owner_id],
+            })
+            if self.rng.random() < 0.8:
+                spreads.append({
+                    'entity_id': account_id,
+                    'entity_type': int(co.entity_account),
+                    'spread': int(dataset.account_spread),
+                })
+            if self.rng.random() < 0.5:
+                traits.append({
+                    'entity_id': account_id,
+                    'entity_type': int(co.entity_account),
+                    'code': int(dataset.account_trait),
+                    'numval': self.rng.randrange(1000),
+                    'strval': name,
+                })
+
+        _insert(self.db, 'account_info', info)
+        _insert(self.db, 'entity_name', names)
+        _insert(self.db, 'account_type', types)
+        _insert(self.db, 'entity_spread', spreads)
+        _insert(self.db, 'entity_trait', traits)
+        dataset.accounts = account_ids
+
+    def make_groups(self, dataset):
+        co = self.const
+        group_ids = self._create_entities(co.entity_group,
+                                          self._count('groups'))
+        _insert(self.db, 'group_info', [
+            {'group_id': group_id,
+             'group_type': int(co.group_type_manual),
+             'visibility': int(co.group_visibility_all),
+             'creator_id': self.creator_id,
+             'description': 'synthetic group'}
+            for group_id in group_ids])
+        names = []
+        for pos, group_id in enumerate(group_ids):
+            name = '{}-group-{:05d}'.format(self.prefix, pos)
+            dataset.group_name[group_id] = name
+            names.append({
+                'entity_id': group_id,
+                'value_domain': int(co.group_namespace),
+                'entity_name': name,
+            })
+        _insert(self.db, 'entity_name', names)
+        _insert(self.db, 'entity_spread', [
+            {'entity_id': group_id,
+             'entity_type': int(co.entity_group),
+             'spread': int(dataset.group_spread)}
+            for group_id in group_ids
+            if self.rng.random() < 0.5])
+
+        # Split groups in levels, where each group has members from the next
+        # level.  The first level has the fewest groups.
+        depth = min(self.group_depth, len(group_ids))
+        weights = [2 ** level for level in range(depth)]
+        levels = []
+        start = 0
+        for level, weight in enumerate(weights):
+            if level == depth - 1:
+                end = len(group_ids)
+            else:
+                end = start + max(1, len(group_ids) * weight // sum(weights))
+            levels.append(group_ids[start:end])
+            start = end
+        dataset.group_levels = levels
+
+        members = []
+        for level, groups in enumerate(levels):
+            subgroups = levels[level + 1] if level + 1 < len(levels) else ()
+            for group_id in groups:
+                for member_id in self.rng.sample(subgroups,
+                                                 min(3, len(subgroups))):
+                    members.append((group_id, co.entity_group, member_id))
+                for member_id in self.rng.sample(
+                        dataset.accounts,
+                        min(self.rng.randint(5, 30), len(dataset.accounts))):
+                    members.append((group_id, co.entity_account, member_id))
+                if self.rng.random() < 0.2:
+                    members.append((group_id, co.entity_person,
+                                    self.rng.choice(dataset.persons)))
+        _insert(self.db, 'group_member', [
+            {'group_id': group_id,
+             'member_type': int(member_type),
+             'member_id': member_id}
+            for group_id, member_type, member_id in members])
+        dataset.groups = group_ids
+
+    def make_email(self, dataset):
+        co = self.const
+        domain_id = self._create_entities(co.entity_email_domain, 1)[0]
+        _insert(self.db, 'email_domain', [{
+            'domain_id': domain_id,
+            'domain': '{}.example.org'.format(self.prefix),
+            'description': 'synthetic domain',
+        }])
+        dataset.email_domain_id = domain_id
+
+        account_ids = [a for a in dataset.accounts if self.rng.random() < 0.9]
+        target_ids = self._create_entities(co.entity_email_target,
+                                           len(account_ids))
+        address_ids = self._create_entities(co.entity_email_address,
+                                            len(account_ids))
+        targets, addresses, primary = [], [], []
+        for account_id, target_id, address_id in zip(account_ids, target_ids,
+                                                      address_ids):
+            dataset.email_targets[account_id] = target_id
+            targets.append({
+                'target_id': target_id,
+                'target_type': int(co.email_target_account),
+                'target_entity_type': int(co.entity_account),
+                'target_entity_id': account_id,
+            })
+            addresses.append({
+                'address_id': address_id,
+                'local_part': dataset.account_name[account_id].lower(),
+                'domain_id': domain_id,
+                'target_id': target_id,
+            })
+            primary.append({
+                'target_id': target_id,
+                'address_id': address_id,
+            })
+        _insert(self.db, 'email_target', targets)
+        _insert(self.db, 'email_address', addresses)
+        _insert(self.db, 'email_primary_address', primary)
@@ -38,7 +38,8 @@ TODO
 ----
 Separate formatting and sending
     We should split our functions (``sendmail``, ``mail_template``) into
-    preparing messages and sending messages.  Rough suggestion:
+    preparing messages and sending messages (``make_message`` and
+    ``SMTPSession`` is a start).  Rough suggestion:
 
     1. Define a PreparedMessage class to wrap a MIMEBase message object,
        along with *SMTP.sendmail* arguments.
@@ -199,12 +200,17 @@ def render_message(message):
     return raw_msg
 
 
-def sendmail(toaddr, fromaddr, subject, body, cc=None,
-             charset='utf-8', debug=False):
-    """ Build and send an email message.
+def make_message(toaddr, fromaddr, subject, body, cc=None,
+                 charset='utf-8'):
+    """ Build a simple text message.
 
-    If debug is set, message won't be sent, and the encoded message will be
-    returned.
+    :param str toaddr: comma separated recipient addresses
+    :param str fromaddr: sender address
+    :param str cc: comma separated cc addresses
+
+    :returns tuple:
+        A tuple with the message object, and a list of recipients for
+        *SMTP.sendmail*.
     """
     msg = MIMEText(body, _charset=charset)
     msg['Subject'] = Header(subject.strip(), charset)
@@ -217,6 +223,18 @@ def sendmail(toaddr, fromaddr, subject, body, cc=None,
     if cc:
         toaddr.extend([addr.strip() for addr in cc.split(',')])
         msg['Cc'] = cc.strip()
+    return msg, toaddr
+
+
+def sendmail(toaddr, fromaddr, subject, body, cc=None,
+             charset='utf-8', debug=False):
+    """ Build and send an email message.
+
+    If debug is set, message won't be sent, and the encoded message will be
+    returned.
+    """
+    msg, toaddr = make_message(toaddr, fromaddr, subject, body, cc=cc,
+                               charset=charset)
 
     # TODO: This makes no sense -- return the result of _send_message!
     if _is_disabled(debug):
@@ -353,6 +371,63 @@ def send_message(message,
     return result
 
 
+class SMTPSession(object):
+    """ A reusable SMTP connection.
+
+    The connection is opened when the first message is sent, and re-opened if
+    the server has closed it.  Use :meth:`close` (or a with-statement) when
+    done.
+    """
+
+    def __init__(self, host=None, port=0, timeout=None):
+        self.host = host or cereconf.SMTP_HOST
+        self.port = port
+        self.timeout = timeout
+        self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _connect(self):
+        if self.timeout is None:
+            return smtplib.SMTP(self.host, self.port)
+        return smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+    def send_message(self, message,
+                     from_addr=None, to_addrs=None,
+                     mail_options=None, rcpt_options=None):
+        """ Send an email message, see :func:`send_message`. """
+        if _is_disabled(False):
+            return {}
+        kwargs = {
+            'from_addr': from_addr,
+            'to_addrs': to_addrs,
+            'mail_options': mail_options,
+            'rcpt_options': rcpt_options,
+        }
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            return _send_message(self._smtp, message, **kwargs)
+        except smtplib.SMTPServerDisconnected:
+            logger.debug("smtp connection to %s closed, reconnecting",
+                         self.host)
+            self._smtp = self._connect()
+            return _send_message(self._smtp, message, **kwargs)
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, IOError):
+            self._smtp.close()
+        self._smtp = None
+
+
 def _send_message(smtp_obj, msg,
                   from_addr=None, to_addrs=None,
                   mail_options=None, rcpt_options=None):
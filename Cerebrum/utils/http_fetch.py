@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Utilities for harvesting data from HTTP APIs.
+
+:func:`get_session`
+    A :class:`requests.Session` with a connection pool that is large enough
+    to be shared by a number of worker threads.
+
+:class:`HttpCache`
+    An on-disk cache of GET responses.  Cached responses are revalidated
+    using their *ETag* or *Last-Modified* header, so that unchanged objects
+    are not transferred again (*304 Not Modified*).
+
+:func:`iter_concurrent`
+    Apply a function (e.g. fetch an object) to a sequence of items in a
+    bounded pool of worker threads.
+
+:func:`prefetch_iter`
+    Consume an iterator (e.g. a paged listing) in a background thread, ahead
+    of the consumer.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import base64
+import collections
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+
+import requests
+import six
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from six.moves import queue
+from six.moves.urllib.parse import urlencode
+
+from Cerebrum.utils.atomicfile import AtomicFileWriter
+
+logger = logging.getLogger(__name__)
+
+
+def get_session(pool_size=10):
+    """
+    Get a requests session for use by multiple threads.
+
+    :param int pool_size:
+        Max number of connections to keep alive for each host.  This should
+        be at least the number of threads that use the session.
+    """
+    pool_size = max(1, int(pool_size))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _get_cache_key(url, params):
+    if params:
+        url = url + '?' + urlencode(sorted(
+            (six.text_type(k).encode('utf-8'),
+             six.text_type(v).encode('utf-8'))
+            for k, v in dict(params).items()))
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class HttpCache(object):
+    """
+    On-disk cache of validated GET responses.
+
+    Only successful responses with an *ETag* or *Last-Modified* header are
+    cached.  Each entry is a json file, named by a hash of the url and query
+    parameters.  Entries are written atomically, so that a cache directory
+    can be shared by multiple threads and processes.
+    """
+
+    # headers that describes the transfer, rather than the content
+    skip_headers = ('connection', 'content-encoding', 'content-length',
+                    'keep-alive', 'transfer-encoding')
+
+    def __init__(self, directory):
+        """
+        :param str directory: where to store cached responses
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def __repr__(self):
+        return '<{cls.__name__} {obj.directory}>'.format(cls=type(self),
+                                                         obj=self)
+
+    def _count(self, what):
+        with self._lock:
+            self.stats[what] += 1
+
+    def _get_filename(self, url, params):
+        key = _get_cache_key(url, params)
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def load(self, url, params=None):
+        """
+        Get a cached entry.
+
+        :returns dict: the cache entry, or None if not cached
+        """
+        filename = self._get_filename(url, params)
+        try:
+            with io.open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            logger.warning('ignoring invalid cache entry %s', filename)
+            return None
+
+    def store(self, url, params, response):
+        """
+        Cache a response, if it can be revalidated.
+
+        :returns bool: True if the response was cached
+        """
+        if response.status_code != 200:
+            return False
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': dict(
+                (k, v) for k, v in response.headers.items()
+                if k.lower() not in self.skip_headers),
+            'content': base64.b64encode(response.content).decode('ascii'),
+        }
+        filename = self._get_filename(url, params)
+        dirname = os.path.dirname(filename)
+        try:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+        except OSError:
+            # another thread or process may have created it
+            if not os.path.isdir(dirname):
+                raise
+        with AtomicFileWriter(filename, mode='w', encoding='utf-8',
+                              replace_equal=True) as f:
+            f.write(six.text_type(json.dumps(entry, sort_keys=True)))
+        return True
+
+    def get_validators(self, entry):
+        """ Get conditional request headers for a cache entry. """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_response(self, entry, not_modified):
+        """
+        Build a response from a cache entry.
+
+        :param dict entry: the cache entry
+        :param not_modified: the 304 response that validated the entry
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = base64.b64decode(entry['content'])
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.connection = not_modified.connection
+        return response
+
+    def request(self, session, url, headers=None, params=None, **kwargs):
+        """
+        Send a GET request, revalidating any cached response.
+
+        :param session: a requests session (or the requests module)
+        :returns requests.Response:
+            The response.  If the server responded with *304 Not Modified*,
+            the cached response is returned.
+        """
+        headers = dict(headers or ())
+        entry = self.load(url, params)
+        if entry:
+            headers.update(self.get_validators(entry))
+        response = session.request('GET', url, headers=headers, params=params,
+                                   **kwargs)
+        if entry and response.status_code == 304:
+            self._count('hit')
+            return self.get_response(entry, response)
+        self._count('miss')
+        if self.store(url, params, response):
+            self._count('store')
+        return response
+
+
+def iter_concurrent(func, items, workers=4, prefetch=None):
+    """
+    Call ``func(item)`` for each item, using a pool of worker threads.
+
+    Results are yielded in the same order as *items*.  Any exception from
+    *func* is raised when its result is reached.
+
+    :param callable func: function to apply to each item
+    :param items: iterable with items
+    :param int workers:
+        Number of worker threads.  If 0, each item is processed in the
+        calling thread, when its result is needed.
+    :param int prefetch:
+        Max number of results to compute ahead of the consumer (default: two
+        per worker).
+    """
+    if workers < 1:
+        for item in items:
+            yield func(item)
+        return
+
+    # Imported here, as the multiprocessing module sets up some global
+    # state on import.
+    from multiprocessing.pool import ThreadPool
+
+    prefetch = max(1, prefetch or 2 * workers)
+    items = iter(items)
+    pending = collections.deque()
+    pool = ThreadPool(workers)
+    try:
+        for item in itertools.islice(items, prefetch):
+            pending.append(pool.apply_async(func, (item,)))
+        while pending:
+            result = pending.popleft()
+            for item in itertools.islice(items, 1):
+                pending.append(pool.apply_async(func, (item,)))
+            yield result.get()
+    finally:
+        pool.terminate()
+
+
+_DONE = object()
+
+
+def prefetch_iter(iterable, size=1):
+    """
+    Consume an iterable in a background thread.
+
+    The background thread starts immediately, and is kept at most *size*
+    items ahead of the consumer.  Any exception from the iterable is raised
+    in the consumer when reached.
+
+    :param iterable: an iterable to consume, e.g. a generator that fetches
+        pages from an API.
+    :param int size: number of items to buffer
+    :returns generator: items from *iterable*
+    """
+    buffer = queue.Queue(maxsize=max(1, size))
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                buffer.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except Exception:
+            put((False, sys.exc_info()))
+        else:
+            put((True, _DONE))
+
+    thread = threading.Thread(target=produce, name='prefetch')
+    thread.daemon = True
+    thread.start()
+
+    def consume():
+        try:
+            while True:
+                ok, value = buffer.get()
+                if not ok:
+                    six.reraise(*value)
+                if value is _DONE:
+                    return
+                yield value
+        finally:
+            stop.set()
+
+    return consume()
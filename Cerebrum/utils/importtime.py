@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Import time profiling.
+
+The :class:`ImportProfiler` records how long it takes to import each module,
+both in total (*cumulative*, including any modules it imports) and by itself
+(*self*).  This is similar to ``python -X importtime``, which is not
+available in Python 2.
+
+Example
+-------
+Profile the imports needed for a given Factory component:
+
+::
+
+    python -m Cerebrum.utils.importtime --factory Account
+
+Profile a module import, and show the 20 most expensive modules:
+
+::
+
+    python -m Cerebrum.utils.importtime -n 20 Cerebrum.modules.Email
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+import sys
+import time
+
+from six.moves import builtins
+
+
+ImportTime = collections.namedtuple(
+    'ImportTime',
+    ('name', 'cumulative', 'self', 'depth'))
+
+
+class ImportProfiler(object):
+    """
+    Context that records the import time of new modules.
+
+    Only modules that are imported for the first time (i.e. are not in
+    ``sys.modules`` already) are recorded.
+
+    ::
+
+        with ImportProfiler() as profiler:
+            import foo
+        for item in profiler.results:
+            print(item.name, item.cumulative)
+    """
+
+    def __init__(self, timer=time.time):
+        self.timer = timer
+        self.results = []
+        self._stack = []
+        self._import = None
+
+    def _profiled_import(self, name, *args, **kwargs):
+        # Relative and from-imports resolve to the real module name inside
+        # the import machinery -- we look for new modules after the import
+        # instead.
+        before = set(sys.modules)
+        # time spent in nested imports is added to the current frame
+        self._stack.append(0.0)
+        start = self.timer()
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            elapsed = self.timer() - start
+            nested = self._stack.pop()
+            new = sorted(m for m in set(sys.modules) - before
+                         if sys.modules[m] is not None)
+            if new:
+                self.results.append(ImportTime(
+                    name=_get_name(name, new),
+                    cumulative=elapsed,
+                    self=max(elapsed - nested, 0.0),
+                    depth=len(self._stack)))
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+    def start(self):
+        if self._import is not None:
+            raise RuntimeError('profiler already started')
+        self._import = builtins.__import__
+        builtins.__import__ = self._profiled_import
+
+    def stop(self):
+        if self._import is None:
+            return
+        builtins.__import__ = self._import
+        self._import = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def total(self):
+        """ Total time spent in top level imports. """
+        return sum(r.cumulative for r in self.results if r.depth == 0)
+
+
+def _get_name(name, new_modules):
+    """ Pick the module name to report for an import statement. """
+    if name in new_modules:
+        return name
+    # e.g. a relative import, or 'import foo.bar' where only 'foo.bar' is new
+    for module in sorted(new_modules, key=len):
+        if module.endswith('.' + name) or module.startswith(name + '.'):
+            return module
+    return sorted(new_modules, key=len)[0]
+
+
+def format_report(results, limit=None, sort='cumulative'):
+    """
+    Format import times as a table.
+
+    :param results: ImportTime tuples (see :attr:`ImportProfiler.results`)
+    :param int limit: only include the *limit* most expensive imports
+    :param str sort: sort by 'cumulative' or 'self' time
+
+    :rtype: str
+    """
+    if sort not in ('cumulative', 'self'):
+        raise ValueError('invalid sort: ' + repr(sort))
+    items = sorted(results, key=lambda r: getattr(r, sort), reverse=True)
+    if limit:
+        items = items[:limit]
+    lines = ['{:>10s} {:>10s}  {}'.format('self [us]', 'cumul [us]',
+                                          'module')]
+    for item in items:
+        lines.append('{:10d} {:10d}  {}{}'.format(
+            int(item.self * 1e6),
+            int(item.cumulative * 1e6),
+            '  ' * item.depth,
+            item.name))
+    return '\n'.join(lines)
+
+
+def _main(inargs=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Report the import time of each module',
+    )
+    parser.add_argument(
+        'modules',
+        nargs='*',
+        metavar='<module>',
+        help='modules to import',
+    )
+    parser.add_argument(
+        '--factory',
+        dest='components',
+        action='append',
+        default=[],
+        metavar='<component>',
+        help='build a Factory component (e.g. Account), may be repeated',
+    )
+    parser.add_argument(
+        '-n', '--limit',
+        type=int,
+        default=None,
+        help='only show the %(metavar)s most expensive modules',
+        metavar='<n>',
+    )
+    parser.add_argument(
+        '-s', '--sort',
+        choices=('cumulative', 'self'),
+        default='cumulative',
+        help='sort by cumulative or self time (default: %(default)s)',
+    )
+    args = parser.parse_args(inargs)
+    if not (args.modules or args.components):
+        parser.error('no modules or components given')
+
+    with ImportProfiler() as profiler:
+        for module in args.modules:
+            __import__(module)
+        if args.components:
+            from Cerebrum.Utils import Factory
+            for component in args.components:
+                Factory.get(component)
+
+    print(format_report(profiler.results, limit=args.limit, sort=args.sort))
+    print('')
+    print('{:d} modules, {:.3f}s'.format(len(profiler.results),
+                                         profiler.total))
+
+
+if __name__ == '__main__':
+    _main()
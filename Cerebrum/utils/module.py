@@ -31,6 +31,7 @@ import functools
 import inspect
 import re
 import sys
+import types
 
 if sys.version_info >= (3, 3):
     # PY3: importlib.machinery.SourceFileLoader introduced in 3.3
@@ -67,6 +68,84 @@ def import_item(module_name, item_name=None):
         return module
 
 
+def module_exists(module_name):
+    """ Check if a module can be imported, without importing it.
+
+    Note that the parent packages of a sub-module may need to be imported to
+    find the sub-module.
+
+    :param str module_name: A module name, e.g. 'foo' or 'foo.bar'.
+
+    :rtype: bool
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name] is not None
+    try:
+        if sys.version_info >= (3, 4):
+            import importlib.util
+            return importlib.util.find_spec(module_name) is not None
+        else:
+            import pkgutil
+            return pkgutil.find_loader(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """ A module that isn't imported until one of its attributes is used.
+
+    This can be used to defer expensive module imports until they are
+    actually needed:
+
+        yaml = LazyModule('yaml')
+
+        def load(data):
+            # yaml is imported here
+            return yaml.safe_load(data)
+    """
+
+    def __init__(self, module_name):
+        super(LazyModule, self).__init__(text_compat.to_str(module_name))
+        self.__dict__['_LazyModule__module'] = None
+
+    def _load(self):
+        module = self.__dict__['_LazyModule__module']
+        if module is None:
+            module = import_item(self.__name__)
+            self.__dict__['_LazyModule__module'] = module
+        return module
+
+    @property
+    def is_loaded(self):
+        """ If the actual module has been imported. """
+        return self.__dict__['_LazyModule__module'] is not None
+
+    def __getattr__(self, attr):
+        # Only called for attributes that are not set on the proxy
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        return '<{} {!r} ({})>'.format(
+            type(self).__name__,
+            self.__name__,
+            'loaded' if self.is_loaded else 'not loaded')
+
+
+def lazy_import(module_name):
+    """ Get a module that is imported on first attribute access.
+
+    :param str module_name: The module to import.
+
+    :rtype: LazyModule
+    """
+    if sys.modules.get(module_name) is not None:
+        return sys.modules[module_name]
+    return LazyModule(module_name)
+
+
 # Regex for `parse`
 #
 # NOTE: We include the pattern flags in the expression here, so that we're
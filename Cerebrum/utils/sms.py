@@ -92,13 +92,24 @@ class SMSSender():
     """
 
     def __init__(self, logger=None, url=None, user=None, system=None,
-                 timeout=None):
+                 timeout=None, session=None):
+        """
+        :param session:
+            An optional :class:`requests.Session` to re-use connections to
+            the SMS gateway when sending multiple messages.
+        """
         if logger is not None:
             warnings.warn("passing logger is deprecated", DeprecationWarning)
         self._url = url or cereconf.SMS_URL
         self._system = system or cereconf.SMS_SYSTEM
         self._user = user or cereconf.SMS_USER
         self._timeout = timeout or 10.0
+        self._session = session
+
+    def close(self):
+        """ Close the session, if any. """
+        if self._session is not None:
+            self._session.close()
 
     def _validate_response(self, response):
         """
@@ -200,7 +211,7 @@ class SMSSender():
                      phone_to, self._user, self._system)
 
         try:
-            response = requests.post(
+            response = (self._session or requests).post(
                 self._url, data=data, timeout=self._timeout)
         except requests.exceptions.RequestException as e:
             logger.warning('SMS gateway error: %s', e)
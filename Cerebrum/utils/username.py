@@ -29,63 +29,24 @@ from __future__ import (
     print_function,
     unicode_literals,
 )
+import collections
 import re
 
 from Cerebrum.utils import transliterate
 
 
-def suggest_usernames(fname, lname, maxlen=8,
-                      suffix="", prefix="", validate_func=None):
+def _iter_candidate_groups(fname, lname, maxlen, suffix, prefix):
     """
-    Returns a tuple with 15 username suggestions based
-    on the person's first and last name.
-
-    :param str fname:
-        first name (and any middle names)
-
-    :param str lname:
-        last name
-
-    :param int maxlen:
-        maximum length of a username (default: 8)
-
-    :param str suffix:
-        str to append to every generated username (default: '')
-
-    :param str prefix:
-        string to add to every generated username (default: '')
+    Generate username candidates.
 
-    :param validate_func:
-        callable object to use for username validation
+    Candidates are generated in groups, and each group belongs to a section
+    (a naming rule).  Once enough usernames have been found, the remaining
+    groups of the current section are skipped -- see
+    :func:`.suggest_usernames`.
 
-        validate_func takes 1 argument (username)
-        (default: None - no validation will be performed)
+    :returns generator:
+        Yields (section, candidates) tuples.
     """
-    goal = 15  # We may return more than this
-    maxlen -= len(suffix)
-    maxlen -= len(prefix)
-    assert maxlen > 0, "maxlen - prefix - suffix = no characters left"
-    if validate_func is not None:
-        assert callable(validate_func)
-    potuname = ()
-
-    lastname = transliterate.for_posix(lname)
-    if lastname == "":
-        raise ValueError(
-            "Must supply last name, got '%r', '%r'" % (fname, lname))
-
-    fname = transliterate.for_posix(fname)
-    lname = lastname
-
-    if fname == "":
-        # This is a person with no first name.  We "fool" the
-        # algorithm below by switching the names around.  This
-        # will always lead to suggesting names with numerals added
-        # to the end since there are only 8 possible usernames for
-        # a name of length 8 or more.  (assuming maxlen=8)
-        fname = lname
-        lname = ""
-
     # We ignore hyphens in the last name, but extract the
     # initials from the first name(s).
     lname = lname.replace('-', '').replace(' ', '')
@@ -121,17 +82,11 @@ def suggest_usernames(fname, lname, maxlen=8,
     if len(firstinit) > 1:
         llen = min(len(lname), maxlen - len(firstinit))
         for j in range(llen, 0, -1):
-            un = prefix + firstinit + lname[0:j] + suffix
-            if validate_func is None or validate_func(un):
-                potuname += (un, )
-
+            group = [prefix + firstinit + lname[0:j] + suffix]
             if initial and len(firstinit) + 1 + j <= maxlen:
-                un = prefix + firstinit + initial + lname[0:j] + suffix
-                if validate_func is None or validate_func(un):
-                    potuname += (un, )
-
-            if len(potuname) >= goal:
-                break
+                group.append(
+                    prefix + firstinit + initial + lname[0:j] + suffix)
+            yield 'initials', group
 
     # Now try different substrings from first and last name.
     #
@@ -150,19 +105,14 @@ def suggest_usernames(fname, lname, maxlen=8,
     flen = min(len(fname), maxlen - 1)
     for i in range(flen, 0, -1):
         llim = min(len(lname), maxlen - i)
+        group = []
         for j in range(1, llim + 1):
-            if initial:
-                # Is there room for an initial?
-                if j < llim:
-                    un = prefix + \
-                        fname[0:i] + initial + lname[0:j] + suffix
-                    if validate_func is None or validate_func(un):
-                        potuname += (un, )
-            un = prefix + fname[0:i] + lname[0:j] + suffix
-            if validate_func is None or validate_func(un):
-                potuname += (un, )
-        if len(potuname) >= goal:
-            break
+            # Is there room for an initial?
+            if initial and j < llim:
+                group.append(
+                    prefix + fname[0:i] + initial + lname[0:j] + suffix)
+            group.append(prefix + fname[0:i] + lname[0:j] + suffix)
+        yield 'substrings', group
 
     # Try prefixes of the first name with nothing added.  This is
     # the only rule which generates usernames for persons with no
@@ -172,19 +122,159 @@ def suggest_usernames(fname, lname, maxlen=8,
 
     flen = min(len(fname), maxlen)
     for i in range(flen, 1, -1):
-        un = prefix + fname[0:i] + suffix
-        if validate_func is None or validate_func(un):
-            potuname += (un, )
-        if len(potuname) >= goal:
-            break
+        yield 'fname', [prefix + fname[0:i] + suffix]
 
     # Absolutely last ditch effort:  geirov1, geirov2 etc.
-    i = 1
     prefix = (fname + lname)[:maxlen - 2]
+    for i in range(1, 100):
+        yield 'numbered', [prefix + str(i) + suffix]
+
 
-    while len(potuname) < goal and i < 100:
-        un = prefix + str(i) + suffix
-        i += 1
-        if validate_func is None or validate_func(un):
-            potuname += (un, )
+def suggest_usernames(fname, lname, maxlen=8,
+                      suffix="", prefix="", validate_func=None,
+                      validate_many=None, batch_size=50):
+    """
+    Returns a tuple with 15 username suggestions based
+    on the person's first and last name.
+
+    :param str fname:
+        first name (and any middle names)
+
+    :param str lname:
+        last name
+
+    :param int maxlen:
+        maximum length of a username (default: 8)
+
+    :param str suffix:
+        str to append to every generated username (default: '')
+
+    :param str prefix:
+        string to add to every generated username (default: '')
+
+    :param validate_func:
+        callable object to use for username validation
+
+        validate_func takes 1 argument (username)
+        (default: None - no validation will be performed)
+
+    :param validate_many:
+        callable object to use for validating multiple usernames at once
+
+        validate_many takes 1 argument (a list of usernames), and returns the
+        valid usernames.  Candidates are validated in batches of up to
+        *batch_size* usernames.  Overrides validate_func.
+
+    :param int batch_size:
+        max number of candidates to give validate_many (default: 50)
+    """
+    goal = 15  # We may return more than this
+    maxlen -= len(suffix)
+    maxlen -= len(prefix)
+    assert maxlen > 0, "maxlen - prefix - suffix = no characters left"
+    if validate_many is not None:
+        assert callable(validate_many)
+    elif validate_func is not None:
+        assert callable(validate_func)
+        # validate lazily, one name at a time
+        batch_size = 1
+
+        def validate_many(unames):
+            return [un for un in unames if validate_func(un)]
+    else:
+        def validate_many(unames):
+            return unames
+
+    lastname = transliterate.for_posix(lname)
+    if lastname == "":
+        raise ValueError(
+            "Must supply last name, got '%r', '%r'" % (fname, lname))
+
+    fname = transliterate.for_posix(fname)
+    lname = lastname
+
+    if fname == "":
+        # This is a person with no first name.  We "fool" the
+        # algorithm below by switching the names around.  This
+        # will always lead to suggesting names with numerals added
+        # to the end since there are only 8 possible usernames for
+        # a name of length 8 or more.  (assuming maxlen=8)
+        fname = lname
+        lname = ""
+
+    groups = _iter_candidate_groups(fname, lname, maxlen, suffix, prefix)
+    pending = collections.deque()
+    valid = {}
+
+    def validate(group):
+        unchecked = [un for un in group if un not in valid]
+        if not unchecked:
+            return
+        # look ahead, and validate candidates from upcoming groups as well
+        for _, upcoming in pending:
+            unchecked.extend(upcoming)
+        while len(unchecked) < batch_size:
+            try:
+                pending.append(next(groups))
+            except StopIteration:
+                break
+            unchecked.extend(pending[-1][1])
+        unchecked = [un for un in collections.OrderedDict.fromkeys(unchecked)
+                     if un not in valid]
+        ok = set(validate_many(unchecked))
+        for un in unchecked:
+            valid[un] = un in ok
+
+    potuname = ()
+    finished = None
+    while True:
+        if pending:
+            section, group = pending.popleft()
+        else:
+            try:
+                section, group = next(groups)
+            except StopIteration:
+                break
+        if section == finished:
+            # skip the rest of this section
+            continue
+        if section == 'numbered' and len(potuname) >= goal:
+            break
+        validate(group)
+        potuname += tuple(un for un in group if valid[un])
+        if len(potuname) >= goal:
+            finished = section
     return potuname
+
+
+class UsernameSnapshot(object):
+    """
+    In-process snapshot of taken usernames.
+
+    Batch jobs that suggest usernames for many persons can load all taken
+    names once, and validate candidates in memory rather than in the
+    database.  The snapshot is stale as soon as it is loaded, so a name
+    picked from it must still be checked when the account is written.
+    Names written by the batch job itself should be added to the snapshot.
+    """
+
+    def __init__(self, names=()):
+        self._names = set(names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def add(self, name):
+        """ Mark a name as taken. """
+        self._names.add(name)
+
+    def update(self, names):
+        """ Mark multiple names as taken. """
+        self._names.update(names)
+
+    def filter_free(self, names):
+        """ Get the names that are not taken, in the given order. """
+        return [name for name in names if name not in self._names]
@@ -165,6 +165,8 @@ def get_consumer(config):
         queues=config.queues,
         bindings=config.bindings,
         flags=ChannelSetup.Flags.ALL,
+        prefetch_count=config.prefetch_count,
+        prefetch_size=config.prefetch_size,
     )
 
     consumers = ChannelListeners(consumer_tag_prefix=config.consumer_tag)
@@ -34,7 +34,9 @@ to transform a message into an iterable of tasks:
 
 2. For each :py:attr:`.TaskHandlerConfig.tasks`, we set up a
    callback, which calls :py:method:`.TaskHandler.handle` with a
-   :py:class:`Cerebrum.modules.amqp.handler.`Event` object.
+   :py:class:`Cerebrum.modules.amqp.handler.`Event` object.  If a
+   *batch_size* is configured, a :py:class:`.BatchTaskHandler` collects
+   events, and handles each batch in a single transaction.
 
 3. This will in turn call the configured ``get_tasks(db, event)`` function from
    the config, which should return an iterable of zero or more
@@ -58,7 +60,10 @@ from Cerebrum.modules.amqp.consumer import (
     ChannelListeners,
     Manager
 )
-from Cerebrum.modules.amqp.handlers import AbstractConsumerHandler
+from Cerebrum.modules.amqp.handlers import (
+    AbstractBatchConsumerHandler,
+    AbstractConsumerHandler,
+)
 from Cerebrum.modules.tasks.config import TaskListMixin
 from Cerebrum.modules.tasks.task_models import merge_tasks
 from Cerebrum.modules.tasks.task_queue import TaskQueue
@@ -84,6 +89,11 @@ class TaskHandlerConfig(ConsumerConfig, TaskListMixin):
 
         consumer_tag: "crb-consume-tasks"
 
+        # optional: limit unacked messages, and push tasks in batches
+        prefetch_count: 100
+        batch_size: 50
+        batch_timeout: 1.0
+
         exchanges:
           - name: "from-system-foo"
             durable: true
@@ -111,6 +121,27 @@ class TaskHandlerConfig(ConsumerConfig, TaskListMixin):
         return config
 
 
+def push_tasks(db, tasks):
+    """ Add or update tasks in the task queue. """
+    queue = TaskQueue(db)
+    for task in tasks:
+        old_task = queue.get_task(task.queue, task.sub, task.key)
+        if old_task:
+            task = merge_tasks(task, old_task)
+
+        result = queue.push_task(task)
+        if result and old_task:
+            # task already exists, but we updated some params (e.g.
+            # reset attempts, shorten the nbf delay)
+            logger.info('updated task %s', repr(result))
+        elif result:
+            logger.info('added task %s', repr(result))
+        else:
+            # nothing got changed - this should only happen if a task
+            # already exists with the same params
+            logger.info('ignored task %s (already exists)', repr(task))
+
+
 class TaskHandler(AbstractConsumerHandler):
     """ ConsumerHandler for translating messages to tasks.  """
 
@@ -134,23 +165,7 @@ class TaskHandler(AbstractConsumerHandler):
         logger.info('got event=%r on channel=%r', event, event.channel)
 
         with db_context(self.get_db(), self.dryrun) as db:
-            queue = TaskQueue(db)
-            for task in (self.get_tasks(event) or ()):
-                old_task = queue.get_task(task.queue, task.sub, task.key)
-                if old_task:
-                    task = merge_tasks(task, old_task)
-
-                result = queue.push_task(task)
-                if result and old_task:
-                    # task already exists, but we updated some params (e.g.
-                    # reset attempts, shorten the nbf delay)
-                    logger.info('updated task %s', repr(result))
-                elif result:
-                    logger.info('added task %s', repr(result))
-                else:
-                    # nothing got changed - this should only happen if a task
-                    # already exists with the same params
-                    logger.info('ignored task %s (already exists)', repr(task))
+            push_tasks(db, self.get_tasks(event) or ())
 
     def on_error(self, event, error):
         # TODO: We should also implement better error handling here.
@@ -162,6 +177,38 @@ class TaskHandler(AbstractConsumerHandler):
         event.channel.basic_nack(delivery_tag=dt)
 
 
+class BatchTaskHandler(AbstractBatchConsumerHandler):
+    """
+    ConsumerHandler for translating batches of messages to tasks.
+
+    All tasks from a batch of messages are pushed in a single transaction.  If
+    that fails, each message is retried in its own transaction.
+    """
+
+    def __init__(self, task_callback, db_callback, dryrun, **kwargs):
+        """
+        See :class:`.TaskHandler` for arguments.  Any additional keyword
+        arguments are passed on to AbstractBatchConsumerHandler.
+        """
+        super(BatchTaskHandler, self).__init__(**kwargs)
+        self.get_tasks = task_callback
+        self.get_db = db_callback
+        self.dryrun = dryrun
+
+    def handle_batch(self, events):
+        logger.info('got %d events on channel=%r',
+                    len(events), events[0].channel)
+        with db_context(self.get_db(), self.dryrun) as db:
+            for event in events:
+                push_tasks(db, self.get_tasks(event) or ())
+        return ()
+
+    def handle(self, event):
+        logger.info('got event=%r on channel=%r', event, event.channel)
+        with db_context(self.get_db(), self.dryrun) as db:
+            push_tasks(db, self.get_tasks(event) or ())
+
+
 def set_pika_loglevel(level=logging.INFO, force=False):
     pika_logger = logging.getLogger('pika')
     if force or pika_logger.level == logging.NOTSET:
@@ -178,17 +225,28 @@ def get_consumer(config, dryrun):
     setup = ChannelSetup(exchanges=config.exchanges,
                          queues=config.queues,
                          bindings=config.bindings,
-                         flags=ChannelSetup.Flags.ALL)
+                         flags=ChannelSetup.Flags.ALL,
+                         prefetch_count=config.prefetch_count,
+                         prefetch_size=config.prefetch_size)
 
     # channel consumers
     consumers = ChannelListeners(consumer_tag_prefix=config.consumer_tag)
 
     for task in config.tasks:
-        on_message = TaskHandler(
-            task_callback=task.get_tasks,
-            db_callback=Factory.get('Database'),
-            dryrun=dryrun,
-        )
+        if config.batch_size:
+            on_message = BatchTaskHandler(
+                task_callback=task.get_tasks,
+                db_callback=Factory.get('Database'),
+                dryrun=dryrun,
+                batch_size=config.batch_size,
+                batch_timeout=config.batch_timeout,
+            )
+        else:
+            on_message = TaskHandler(
+                task_callback=task.get_tasks,
+                db_callback=Factory.get('Database'),
+                dryrun=dryrun,
+            )
         # each task source is a queue name to listen to
         consumers.set_listener(task.source, on_message)
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Re-populate the name_search table from person_name and entity_name.
+
+Only cached person names and account names are indexed.
+
+See :mod:`Cerebrum.modules.name_search` for details.  This should be run
+once after installing mod_name_search, and can be re-run at any time to
+repair the index.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import logging
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum.Utils import Factory
+from Cerebrum.modules.name_search import name_search_db
+from Cerebrum.utils.argutils import add_commit_args
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-t', '--table',
+        dest='tables',
+        action='append',
+        choices=name_search_db.NAME_TABLES,
+        help='Name table to index (default: all tables)',
+    )
+    add_commit_args(parser)
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    Cerebrum.logutils.autoconf('cronjob', args)
+
+    logger.info('Start %s', parser.prog)
+    db = Factory.get('Database')()
+    co = Factory.get('Constants')(db)
+
+    counts = name_search_db.rebuild(
+        db, co.system_cached, co.account_namespace,
+        name_tables=tuple(args.tables or name_search_db.NAME_TABLES))
+    for name_table in sorted(counts):
+        logger.info('%s: %d names', name_table, counts[name_table])
+
+    if args.commit:
+        logger.info('Committing changes')
+        db.commit()
+    else:
+        logger.info('Rolling back changes')
+        db.rollback()
+    logger.info('Done %s', parser.prog)
+
+
+if __name__ == '__main__':
+    main()
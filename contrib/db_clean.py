@@ -25,6 +25,7 @@ This is script can be used to:
 
 - Remove records of a given type if older than a given limit
 - Clean up successive records
+  (either by checking each record, or with set-based queries)
 - Remove passwords from change_params
 
 Default configuration lives in :mod:`Cerebrum.modules.default_dbcl_conf`.
@@ -49,12 +50,12 @@ except ImportError:
     dbcl_conf = None
 
 import Cerebrum.logutils
+from Cerebrum.modules import changelog_prune
 from Cerebrum.modules import default_dbcl_conf
 from Cerebrum.Utils import Factory
 from Cerebrum.utils import json
 from Cerebrum.utils.argutils import add_commit_args
 from Cerebrum.utils import date as date_utils
-from Cerebrum.utils import date_compat
 
 logger = logging.getLogger(__name__)
 
@@ -140,73 +141,46 @@ class CleanChangeLog(object):
             'password' if is_pwd else e['change_params'],
         )
 
+    def get_rules(self):
+        return changelog_prune.PruneRules(
+            trigger_map=self.trigger_map,
+            max_ages=self.max_ages,
+            default_age=self.default_age,
+            minimum_age=self.minimum_age,
+            forever=self.forever)
+
     def process_log(self):
         start = date_utils.now()
-        last_seen = {}
+        rules = self.get_rules()
         unknown_type = {}
-        processed = aged = toggled = 0
+        removed = aged = toggled = 0
 
         logger.info("Fetching change log...")
         # Use a separate cursor for fetching
         db2 = get_db()
 
-        for e in db2.get_log_events():
-            processed += 1
-            if (processed % 100000) == 0:
-                logger.debug('processed = %s', processed)
-            change_type = int(e['change_type_id'])
-
-            # Skip unknown change types
-            if change_type not in self.trigger_map:
+        for rule, change_id, e in changelog_prune.find_removable_events(
+                db2.get_log_events(), rules, start):
+            if rule is None:
+                # Skip unknown change types
+                change_type = int(e['change_type_id'])
                 unknown_type.setdefault(change_type, 0)
                 unknown_type[change_type] += 1
-                continue
-
-            # Keep all data newer than minimum_age
-            age = (start -
-                   date_compat.get_datetime_tz(e['tstamp'])).total_seconds()
-            if age < self.minimum_age:
-                continue
-
-            # logger.debug('Changelog entry: {!r}'.format(
-            #     self.format_for_logging(e)))
-
-            max_age = self.max_ages.get(change_type, self.default_age)
-            if max_age != self.forever and age > max_age:
+            elif rule == changelog_prune.RULE_AGE:
                 logger.info("Removed due to age: %s",
                             repr(self.format_for_logging(e)))
                 aged += 1
-                if self.commit:
-                    self.db.remove_log_event(e['change_id'])
-
-            # Determine a unique key for this event to check togglability
-            toggler = self.trigger_map[change_type]
-            if toggler is None:
-                continue
-            key = ["{:d}".format(toggler['id'])]
-            for column in toggler['columns']:
-                key.append("{:d}".format(e[column]))
-            if 'change_params' in toggler:
-                if e['change_params']:
-                    data = json.loads(e['change_params'])
-                else:
-                    data = {}
-                for c in toggler['change_params']:
-                    key.append("{}".format(data.get(c)))
-            key = "-".join(key)
-
-            # Has something been toggled?
-            if key in last_seen:
+            else:
                 logger.info("Removed toggle %s, %s toggled by %s",
-                            repr(key), repr(last_seen[key]),
+                            repr(rules.get_toggle_key(e)),
+                            repr(change_id),
                             repr(self.format_for_logging(e)))
                 toggled += 1
-                if self.commit:
-                    self.db.remove_log_event(last_seen[key])
-            last_seen[key] = int(e['change_id'])
-
-            if self.commit and (processed % 1000) == 0:
-                self.db.commit()
+            if change_id is not None and self.commit:
+                self.db.remove_log_event(change_id)
+                removed += 1
+                if (removed % 1000) == 0:
+                    self.db.commit()
 
         for change_type, num in unknown_type.items():
             logger.warn("Unknown change type id:%s (%s) for %s entries",
@@ -216,11 +190,37 @@ class CleanChangeLog(object):
 
         maybe_commit(self)
 
-        logger.info("Entries processed: %s", processed)
         logger.info("Entries removed due to age: %s", aged)
         logger.info("Entries removed due to being toggled: %s", toggled)
         logger.info("Spent %s", date_utils.now() - start)
 
+    def prune_log(self, batch_size):
+        """ Remove changelog entries using set-based queries. """
+        start = date_utils.now()
+        pruner = changelog_prune.SqlPruner(self.db, self.get_rules(), start,
+                                           batch_size=batch_size)
+        stats = pruner.run(remove=self.commit, commit=self.commit)
+        maybe_commit(self)
+
+        togglers = dict((t['id'], t) for t in self.togglers)
+        for (rule, value), count in stats.items():
+            if rule == changelog_prune.RULE_TOGGLE:
+                desc = ', '.join(
+                    text_type(self.clconst.ChangeType(t))
+                    for t in togglers[value]['triggers'])
+            else:
+                desc = text_type(self.clconst.ChangeType(value))
+            logger.info("Entries %s due to %s (%s): %d",
+                        'removed' if self.commit else 'matching',
+                        rule, desc, count)
+        logger.info("Entries removed due to age: %s",
+                    sum(count for (rule, _), count in stats.items()
+                        if rule == changelog_prune.RULE_AGE))
+        logger.info("Entries removed due to being toggled: %s",
+                    sum(count for (rule, _), count in stats.items()
+                        if rule == changelog_prune.RULE_TOGGLE))
+        logger.info("Spent %s", date_utils.now() - start)
+
     def parse_config(self):
         logger.info("Default age: %s seconds", self.default_age)
         logger.info("Minimum age: %s seconds", self.minimum_age)
@@ -279,9 +279,12 @@ class CleanChangeLog(object):
         logger.info("Active toggler rules: %s", togglable_stats[True])
         logger.info("Inactive toggler rules: %s", togglable_stats[False])
 
-    def run(self):
+    def run(self, use_sql=False, batch_size=10000):
         self.parse_config()
-        self.process_log()
+        if use_sql:
+            self.prune_log(batch_size)
+        else:
+            self.process_log()
 
 
 class CleanPasswords(object):
@@ -345,6 +348,18 @@ def main(args=None):
                         action='store_true',
                         dest='clean_changelog',
                         help='Clean changelog entries')
+    parser.add_argument('--sql',
+                        default=False,
+                        action='store_true',
+                        dest='use_sql',
+                        help=('Clean changelog entries with set-based '
+                              'queries, in batches'))
+    parser.add_argument('--batch-size',
+                        dest='batch_size',
+                        type=int,
+                        default=10000,
+                        metavar='<n>',
+                        help='Changelog entries per batch (with --sql)')
 
     add_commit_args(parser)
     Cerebrum.logutils.options.install_subparser(parser)
@@ -360,7 +375,8 @@ def main(args=None):
             commit=args.commit).run()
 
     if args.clean_changelog:
-        CleanChangeLog(commit=args.commit).run()
+        CleanChangeLog(commit=args.commit).run(use_sql=args.use_sql,
+                                               batch_size=args.batch_size)
 
     logger.info("Done %s", parser.prog)
 
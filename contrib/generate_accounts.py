@@ -103,7 +103,8 @@ class AccountGenerator(object):
                  posix_promote=True,
                  posix_dfg=None,
                  home_disks=None,
-                 home_auto=None):
+                 home_auto=None,
+                 uname_snapshot=None):
         """
         :type db: Cerebrum.database.Database
         :type creator: Cerebrum.Account.Account
@@ -136,6 +137,10 @@ class AccountGenerator(object):
 
         :param bool home_auto:
             Automatically find disk for homedirs from affiliations.
+
+        :type uname_snapshot: Cerebrum.utils.username.UsernameSnapshot
+        :param uname_snapshot:
+            Taken usernames, to use when suggesting new usernames.
         """
         self.db = db
         self.creator = creator
@@ -151,7 +156,7 @@ class AccountGenerator(object):
         else:
             self.disks = home_disks or ()
 
-        self.account_policy = AccountPolicy(db)
+        self.account_policy = AccountPolicy(db, uname_snapshot=uname_snapshot)
 
     def __call__(self, person, affiliations):
         """
@@ -493,6 +498,18 @@ def make_parser():
         help="Set homedir automatically using the OU Disk Mapping module",
     )
 
+    parser.add_argument(
+        '--preload-usernames',
+        action='store_true',
+        default=False,
+        help=textwrap.dedent(
+            """
+            Load all taken usernames up front, and use them when suggesting
+            usernames for new accounts.
+            """
+        ).strip(),
+    )
+
     argutils.add_commit_args(parser)
     Cerebrum.logutils.options.install_subparser(parser)
     return parser
@@ -590,6 +607,12 @@ def main(inargs=None):
     logger.info("creator: %s (%d)",
                 creator.account_name, creator.entity_id)
 
+    if args.preload_usernames:
+        uname_snapshot = Factory.get('Account')(db).load_uname_snapshot()
+        logger.info("preloaded %d taken usernames", len(uname_snapshot))
+    else:
+        uname_snapshot = None
+
     account_generator = AccountGenerator(
         db=db,
         creator=creator,
@@ -599,7 +622,8 @@ def main(inargs=None):
         posix_promote=args.with_posix,
         posix_dfg=posix_dfg,
         home_disks=home_disks,
-        home_auto=args.home_auto)
+        home_auto=args.home_auto,
+        uname_snapshot=uname_snapshot)
 
     process(account_generator, affiliations, ignore_affs, source_systems)
 
@@ -73,6 +73,14 @@ def main(inargs=None):
         default=True,
         help='Do not use the email module for email addrs',
     )
+    parser.add_argument(
+        '--processes',
+        dest='processes',
+        type=int,
+        default=None,
+        help='Build person entries in %(metavar)s worker processes',
+        metavar='<n>',
+    )
     Cerebrum.logutils.options.install_subparser(parser)
     args = parser.parse_args(inargs)
 
@@ -108,6 +116,7 @@ def main(inargs=None):
         outfile=person_output,
         alias_outfile=ou_output,
         use_mail_module=args.use_mail_module,
+        processes=args.processes,
     )
 
     logger.info('OrgLDIF written to %s', repr(default_output))
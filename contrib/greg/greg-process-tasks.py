@@ -26,6 +26,7 @@ import Cerebrum.logutils
 import Cerebrum.logutils.options
 import Cerebrum.Errors
 from Cerebrum.modules.greg.client import get_client
+from Cerebrum.modules.greg.datasource import normalize_id
 from Cerebrum.modules.greg.importer import get_import_class
 from Cerebrum.modules.greg.tasks import GregImportTasks
 from Cerebrum.modules.import_utils import syncs
@@ -35,6 +36,18 @@ from Cerebrum.utils.argutils import add_commit_args
 logger = logging.getLogger(__name__)
 
 
+def get_greg_ids(tasks):
+    """ Get unique, valid greg ids from tasks. """
+    greg_ids = set()
+    for task in tasks:
+        try:
+            greg_ids.add(normalize_id(task.key))
+        except ValueError:
+            # will fail (and be reported) when processed
+            continue
+    return greg_ids
+
+
 def main(inargs=None):
     parser = argparse.ArgumentParser(
         description='Process the greg-person import task queues',
@@ -56,6 +69,14 @@ def main(inargs=None):
         help='Limit number of tasks to %(metavar)s (required in dryrun)',
         metavar='<n>',
     )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=50,
+        help='Prefetch guest data in chunks of %(metavar)s tasks, '
+             '0 to disable (default: %(default)s)',
+        metavar='<n>',
+    )
 
     db_args = parser.add_argument_group('Database')
     add_commit_args(db_args)
@@ -73,14 +94,25 @@ def main(inargs=None):
     dryrun = not args.commit
     client = get_client(args.config)
     import_class = get_import_class()
-    queue_handler = GregImportTasks(client=client, import_class=import_class)
+    queue_handler = GregImportTasks(client=client, import_class=import_class,
+                                    sync_cache=syncs.SyncCache())
 
     # The QueueProcessor gets db and does commit/rollback according to dryrun
     proc = QueueProcessor(queue_handler, limit=args.limit, dryrun=dryrun)
 
     tasks = proc.select_tasks()
-    for task in tasks:
-        proc.process_task(task)
+    chunk_size = args.prefetch or 1
+    for offset in range(0, len(tasks), chunk_size):
+        chunk = tasks[offset:offset + chunk_size]
+        if args.prefetch:
+            # fetch guest data concurrently, ahead of the import, and current
+            # person data from cerebrum in bulk
+            greg_ids = get_greg_ids(chunk)
+            client.prefetch_persons(greg_ids)
+            queue_handler.prefetch(proc.conn, greg_ids)
+            proc.conn.rollback()
+        for task in chunk:
+            proc.process_task(task)
 
     # Check for tasks that we've given up on (i.e. over the
     # GregImportTasks.max_attempts threshold)
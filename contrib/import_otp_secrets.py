@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Import personal otp secrets from a file.
+
+Each line in the input file should contain a person identifier and a base32
+otp secret, separated by whitespace.  Empty lines and lines starting with '#'
+are ignored.
+
+Payloads are prepared for all otp types in ``cereconf.OTP_POLICY``.  Secrets
+that are already set for a person are skipped, so the same file can be
+imported again without re-encrypting everything.
+
+See :mod:`Cerebrum.modules.otp` for details.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import io
+import logging
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum import Errors
+from Cerebrum.Utils import Factory
+from Cerebrum.modules.otp import otp_types
+from Cerebrum.modules.otp import otp_utils
+from Cerebrum.utils.argutils import add_commit_args
+
+
+logger = logging.getLogger(__name__)
+
+ID_TYPES = ('account-name', 'person-id')
+
+
+def read_secrets(filename, encoding='utf-8'):
+    """
+    Read (identifier, secret) pairs from a file.
+
+    :returns: a generator with (lineno, identifier, secret) tuples
+    """
+    with io.open(filename, 'r', encoding=encoding) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                ident, secret = line.split()
+            except ValueError:
+                logger.warning('invalid line %d in %s, skipping',
+                               lineno, filename)
+                continue
+            yield lineno, ident, secret
+
+
+def _get_person_id(db, id_type, ident):
+    """ Look up a person_id from an identifier in the input file.  """
+    if id_type == 'person-id':
+        pe = Factory.get('Person')(db)
+        pe.find(int(ident))
+        return pe.entity_id
+
+    co = Factory.get('Constants')(db)
+    ac = Factory.get('Account')(db)
+    ac.find_by_name(ident)
+    if ac.owner_type != co.entity_person:
+        raise Errors.NotFoundError('account %s is not a personal account'
+                                   % (ident,))
+    return ac.owner_id
+
+
+def collect_secrets(db, id_type, items):
+    """
+    Map identifiers to person ids, and validate secrets.
+
+    :param items:
+        (lineno, identifier, secret) tuples from py:func:`.read_secrets`
+
+    :rtype: dict
+    :returns: person_id -> secret
+    """
+    secrets = {}
+    for lineno, ident, secret in items:
+        try:
+            person_id = _get_person_id(db, id_type, ident)
+        except (Errors.NotFoundError, ValueError) as e:
+            logger.warning('no person for %s=%r (line %d): %s',
+                           id_type, ident, lineno, e)
+            continue
+        try:
+            otp_utils.validate_secret(secret)
+        except ValueError as e:
+            logger.warning('invalid secret for %s=%r (line %d): %s',
+                           id_type, ident, lineno, e)
+            continue
+        if person_id in secrets and secrets[person_id] != secret:
+            logger.warning('multiple secrets for person_id=%d (line %d),'
+                           ' using the last one', person_id, lineno)
+        secrets[person_id] = secret
+    return secrets
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'filename',
+        help='File with person identifiers and secrets',
+    )
+    parser.add_argument(
+        '--encoding',
+        default='utf-8',
+        help='Input file encoding (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--id-type',
+        choices=ID_TYPES,
+        default=ID_TYPES[0],
+        help='Person identifier type in the input file (default: %(default)s)',
+    )
+    parser.add_argument(
+        '-p', '--processes',
+        type=int,
+        default=None,
+        help='Number of worker processes to prepare payloads with',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        default=False,
+        help='Re-encrypt and write secrets that are already set',
+    )
+    add_commit_args(parser)
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    Cerebrum.logutils.autoconf('cronjob', args)
+
+    logger.info('Start %s', parser.prog)
+    db = Factory.get('Database')()
+    db.cl_init(change_program=parser.prog)
+
+    secrets = collect_secrets(
+        db, args.id_type, read_secrets(args.filename, args.encoding))
+    logger.info('found secrets for %d persons in %s',
+                len(secrets), args.filename)
+
+    updater = otp_types.PersonOtpUpdater(db, otp_types.get_policy())
+    count = updater.update_many(secrets, processes=args.processes,
+                                force=args.force)
+    logger.info('updated %d otp payloads', count)
+
+    if args.commit:
+        logger.info('Committing changes')
+        db.commit()
+    else:
+        logger.info('Rolling back changes')
+        db.rollback()
+    logger.info('Done %s', parser.prog)
+
+
+if __name__ == '__main__':
+    main()
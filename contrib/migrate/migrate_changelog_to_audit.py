@@ -176,6 +176,14 @@ class AuditRecordBuilder(auditlog.AuditRecordBuilder):
     def _get_name(self, e_id, e_type):
         return super(AuditRecordBuilder, self)._get_name(e_id, e_type)
 
+    def __call__(self, *args, **kwargs):
+        try:
+            return super(AuditRecordBuilder, self).__call__(*args, **kwargs)
+        finally:
+            # The size limited caches above are used instead of the
+            # unbounded cache of the parent class
+            self.clear_cache()
+
 
 class ChangeLogMigrator(DatabaseAccessor):
     """ Migrate change_log records into audit_log records. """
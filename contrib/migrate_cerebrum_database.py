@@ -53,11 +53,12 @@ targets = {
         'rel_0_9_18', 'rel_0_9_19', 'rel_0_9_20', 'rel_0_9_21',
         'rel_0_9_22', 'rel_0_9_23',
     ),
+    'auditlog': ('auditlog_1_1',),
     'bofhd': ('bofhd_1_1', 'bofhd_1_2', 'bofhd_1_3', 'bofhd_1_4', 'bofhd_1_5'),
     'bofhd_auth': ('bofhd_auth_1_1', 'bofhd_auth_1_2',),
     'bofhd_requests': ('bofhd_requests_1_1',),
     'changelog': ('changelog_1_2', 'changelog_1_3', 'changelog_1_4',
-                  'changelog_1_5', 'changelog_1_6'),
+                  'changelog_1_5', 'changelog_1_6', 'changelog_1_7'),
     'consent': ('consent_1_1',),
     'email': ('email_1_0', 'email_1_1', 'email_1_2', 'email_1_3', 'email_1_4',
               'email_1_5', 'email_1_6'),
@@ -73,6 +74,7 @@ targets = {
     'task_queue': ('task_queue_1_1',),
     'entity_trait': ('entity_trait_1_1',),
     'note': ('note_1_1', 'note_1_2'),
+    'otp': ('otp_1_1',),
     'job_runner': ('job_runner_1_1', 'job_runner_1_2'),
 }
 
@@ -949,6 +951,15 @@ def migrate_to_rel_0_9_23():
     db.commit()
 
 
+def migrate_to_auditlog_1_1():
+    assert_db_version("1.0", component='auditlog')
+    makedb('auditlog_1_1', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo("sqlmodule_auditlog", "1.1")
+    print("Migration to auditlog 1.1 completed successfully")
+    db.commit()
+
+
 def migrate_to_bofhd_1_1():
     print("\ndone.")
     assert_db_version("1.0", component='bofhd')
@@ -1248,6 +1259,15 @@ def migrate_to_changelog_1_6():
     db.commit()
 
 
+def migrate_to_changelog_1_7():
+    assert_db_version("1.6", component='changelog')
+    makedb('changelog_1_7', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo("sqlmodule_changelog", "1.7")
+    print("Migration to changelog 1.7 completed successfully")
+    db.commit()
+
+
 def migrate_to_consent_1_1():
     assert_db_version('1.0', component='consent')
     makedb('consent_1_1', 'pre')
@@ -1767,6 +1787,15 @@ def migrate_to_note_1_2():
     db.commit()
 
 
+def migrate_to_otp_1_1():
+    assert_db_version('1.0', component='otp')
+    makedb('otp_1_1', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo('sqlmodule_otp', '1.1')
+    print('Migration to otp 1.1 completed successfully')
+    db.commit()
+
+
 def migrate_to_stedkode_1_1():
     """Migrate from initial stedkode to the 1.1 stedkode schema."""
     assert_db_version("1.0", component="stedkode")
@@ -46,6 +46,7 @@ import re
 from Cerebrum.Utils import Factory
 from Cerebrum import Errors
 from Cerebrum.modules.Email import EmailQuota, EmailServer
+from Cerebrum.modules.email_snapshot import EmailSnapshot
 
 
 db = Factory.get('Database')()
@@ -95,6 +96,7 @@ def main():
 def process_servers(server_type, except_re):
     es = EmailServer(db)
     eq = EmailQuota(db)
+    snapshot = EmailSnapshot(db)
 
     existing_servers = {}
 
@@ -109,7 +111,8 @@ def process_servers(server_type, except_re):
             logger.debug("Skipping server named '%s'" % row['name'])
             continue
         srv = int(row['server_id'])
-        assigned[srv] = eq.get_quota_stats_by_server(srv)['total_quota'] or 0
+        stats = eq.get_quota_stats_by_server(srv, snapshot=snapshot)
+        assigned[srv] = stats['total_quota'] or 0
         logger.debug("%s has assigned quota %d" % (row['name'], assigned[srv]))
     max_weight = max(assigned.values()) * 110 / 100
 
@@ -99,11 +99,13 @@ class FsImporterUio(FsImporter):
 
     def __init__(self, gen_groups, include_delete, commit,
                  studieprogramfile, source, rules, adr_map, emnefile,
-                 rule_map):
+                 rule_map, preload=False, commit_size=1):
 
         super(FsImporterUio, self).__init__(gen_groups, include_delete, commit,
                                             studieprogramfile, source, rules,
-                                            adr_map, rule_map=rule_map)
+                                            adr_map, rule_map=rule_map,
+                                            preload=preload,
+                                            commit_size=commit_size)
         self._init_emne2sko(emnefile)
         self._new_student_filter = _get_admission_date_func(
             for_date=datetime.date.today(),
@@ -417,6 +419,17 @@ def main():
         dest='source',
         choices=['system_sap', 'system_dfo_sap'],
         default='system_sap')
+    parser.add_argument(
+        '--preload',
+        action='store_true',
+        help='preload person data, and skip unchanged persons')
+    parser.add_argument(
+        '--commit-size',
+        dest='commit_size',
+        type=int,
+        default=1,
+        metavar='<n>',
+        help='commit after every %(metavar)s persons (default: %(default)s)')
 
     Cerebrum.logutils.options.install_subparser(parser)
     args = parser.parse_args()
@@ -448,10 +461,13 @@ def main():
     fs_importer = FsImporterUio(args.gen_groups,
                                 args.include_delete, args.commit,
                                 args.studieprogramfile, args.source, rules,
-                                adr_map, args.emnefile, rule_map)
+                                adr_map, args.emnefile, rule_map,
+                                preload=args.preload,
+                                commit_size=args.commit_size)
     StudentInfo.StudentInfoParser(args.personfile,
                                   fs_importer.process_person_callback,
                                   logger)
+    fs_importer.flush()
     if args.include_delete:
         fs_importer.rem_old_aff()
     if args.commit:
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Maintain monthly partitions of the change_log and audit_log tables.
+
+See :mod:`Cerebrum.modules.log_partitions` for details.  Typical usage:
+
+Convert the audit_log to a partitioned table (once):
+
+    partition_logs.py --table audit_log --migrate --commit
+
+Create partitions for upcoming months, and drop partitions with entries older
+than two years (e.g. daily from job_runner):
+
+    partition_logs.py --table audit_log --keep-months 24 --commit
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import logging
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum.Utils import Factory
+from Cerebrum.modules import log_partitions
+from Cerebrum.utils.argutils import add_commit_args
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '-t', '--table',
+        dest='tables',
+        action='append',
+        choices=tuple(log_partitions.LOG_TABLES),
+        help='Log table to process (default: all partitioned tables)',
+    )
+    parser.add_argument(
+        '--migrate',
+        action='store_true',
+        default=False,
+        help='Convert the given tables to partitioned tables',
+    )
+    parser.add_argument(
+        '--months-ahead',
+        dest='months_ahead',
+        type=int,
+        default=3,
+        help='Create partitions for %(metavar)s future months '
+             '(default: %(default)s)',
+        metavar='<n>',
+    )
+    parser.add_argument(
+        '--keep-months',
+        dest='keep_months',
+        type=int,
+        default=None,
+        help='Drop partitions older than %(metavar)s months '
+             '(default: keep all)',
+        metavar='<n>',
+    )
+    add_commit_args(parser)
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    if args.migrate and not args.tables:
+        parser.error('--migrate requires --table')
+    if args.keep_months is not None and args.keep_months < 1:
+        parser.error('--keep-months must be a positive number')
+    Cerebrum.logutils.autoconf('cronjob', args)
+
+    logger.info('Start %s', parser.prog)
+    db = Factory.get('Database')()
+    tables = [log_partitions.LOG_TABLES[name]
+              for name in (args.tables or log_partitions.LOG_TABLES)]
+
+    for table in tables:
+        if args.migrate:
+            log_partitions.partition_table(db, table, args.months_ahead)
+        elif not log_partitions.is_partitioned(db, table.name):
+            if args.tables:
+                raise SystemExit('table %s is not partitioned' % table.name)
+            logger.debug('skipping table %s, not partitioned', table.name)
+            continue
+
+        created = log_partitions.ensure_partitions(db, table,
+                                                   args.months_ahead)
+        logger.info('created %d partitions for %s', len(created), table.name)
+        if args.keep_months is not None:
+            dropped = log_partitions.drop_partitions(db, table,
+                                                     args.keep_months)
+            logger.info('dropped %d partitions from %s',
+                        len(dropped), table.name)
+
+    if args.commit:
+        logger.info('Committing changes')
+        db.commit()
+    else:
+        logger.info('Rolling back changes')
+        db.rollback()
+    logger.info('Done %s', parser.prog)
+
+
+if __name__ == '__main__':
+    main()
@@ -86,6 +86,7 @@ import cereconf
 
 from Cerebrum import Errors
 from Cerebrum.Utils import Factory, NotSet
+from Cerebrum.org import ou_tree
 from Cerebrum.utils.argutils import add_commit_args, get_constant
 from Cerebrum.utils.funcwrap import memoize
 
@@ -156,6 +157,20 @@ def ou_id2ou_info(ou_id):
 
 
 @memoize
+def get_ou_tree(perspective):
+    """Get an indexed org tree for a given perspective.
+
+    :type perspective: Cerebrum constant
+    :param perspective:
+      Perspective to load org tree from.
+
+    :rtype: Cerebrum.org.ou_tree.OuTree
+    """
+    tree = ou_tree.load_ou_tree(database, perspective)
+    logger.debug("Loaded %r", tree)
+    return tree
+
+
 def ou_id2parent_info(ou_id, perspective):
     """Similar to L{ou_id2ou_info}, except return info for the parent.
 
@@ -171,19 +186,15 @@ def ou_id2parent_info(ou_id, perspective):
     :return:
       Just like L{ou_id2ou_info}.
     """
-    ou = Factory.get("OU")(database)
-    try:
-        ou.find(ou_id)
-        parent_id = ou.get_parent(perspective)
-        # If we are our own parent, pretend we don't have any.
-        if ou_id == parent_id:
-            return None
-        return ou_id2ou_info(parent_id)
-    except Errors.NotFoundError:
+    tree = get_ou_tree(perspective)
+    if ou_id not in tree:
+        return None
+    parent_id = tree.get_parent(ou_id)
+    if parent_id is None:
         return None
+    return ou_id2ou_info(parent_id)
 
 
-@memoize
 def ou_get_children(ou_id, perspective):
     """Check if ou_id has any subordinate OUs in perspective.
 
@@ -199,13 +210,11 @@ def ou_get_children(ou_id, perspective):
     :return:
       A sequence of children's ou_ids in the specified perspective.
     """
-    ou = Factory.get("OU")(database)
-    try:
-        ou.find(ou_id)
-        return ou.list_children(perspective, entity_id=ou_id)
-    except Errors.NotFoundError:
-        # If we can't find the OU, it does not have a parent :)
-        return False
+    tree = get_ou_tree(perspective)
+    if ou_id not in tree:
+        # If we can't find the OU, it does not have any children :)
+        return ()
+    return tree.get_children(ou_id)
 
 
 @memoize
@@ -0,0 +1,29 @@
+/*
+ * Copyright 2024 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ */
+
+/* SQL script for migrating mod_changelog from 1.6 to 1.7 */
+
+category:pre;
+CREATE INDEX change_log_subject_tstamp_idx
+  ON change_log(subject_entity, tstamp);
+
+category:pre;
+CREATE INDEX change_log_type_tstamp_idx
+  ON change_log(change_type_id, tstamp);
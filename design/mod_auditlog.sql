@@ -25,7 +25,7 @@ category:metainfo;
 name=auditlog;
 
 category:metainfo;
-version=1.0;
+version=1.1;
 
 
 category:drop;
@@ -91,3 +91,11 @@ CREATE INDEX audit_log_entity_idx ON audit_log(entity);
 
 category:main;
 CREATE INDEX audit_log_target_idx ON audit_log(target);
+
+category:main;
+CREATE INDEX audit_log_entity_timestamp_idx
+  ON audit_log(entity, timestamp);
+
+category:main;
+CREATE INDEX audit_log_type_timestamp_idx
+  ON audit_log(change_type, timestamp);
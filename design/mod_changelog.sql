@@ -25,7 +25,7 @@ category:metainfo;
 name=changelog;
 
 category:metainfo;
-version=1.6;
+version=1.7;
 
 
 category:drop;
@@ -103,6 +103,14 @@ CREATE INDEX change_log_change_by_idx ON change_log(change_by);
 category:main;
 CREATE INDEX change_log_subject_idx on change_log(subject_entity);
 
+category:main;
+CREATE INDEX change_log_subject_tstamp_idx
+  ON change_log(subject_entity, tstamp);
+
+category:main;
+CREATE INDEX change_log_type_tstamp_idx
+  ON change_log(change_type_id, tstamp);
+
 
 /*  change_handler_data
  *
@@ -0,0 +1,93 @@
+/* encoding: utf-8
+ *
+ * Copyright 2024 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ *
+ *
+ * Tables used by Cerebrum.modules.name_search
+ *
+ * Module `name_search' -- trigram index of normalized names.
+ *
+ * This module keeps a transliterated, lowercased copy of person names and
+ * entity names, with a pg_trgm GIN index for fast substring and similarity
+ * searches.
+ *
+ * The pg_trgm extension must be available.  From PostgreSQL 13, pg_trgm is
+ * a trusted extension, and can be installed by the database owner.
+ */
+category:metainfo;
+name=name_search;
+
+category:metainfo;
+version=1.0;
+
+category:drop;
+DROP TABLE name_search;
+
+
+category:main;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+
+/*  name_search
+ *
+ * entity_id
+ *     The entity that has the name
+ * name_table
+ *     The source table of the name: 'person_name' or 'entity_name'
+ * name_code
+ *     The name_variant (person_name) or value_domain (entity_name) of the
+ *     name
+ * name_norm
+ *     The normalized name
+ *
+ * Only cached person names (source system `system_cached`) and account
+ * names (value domain `account_namespace`) are included.  Rows are removed
+ * with their entity, so that the index never blocks entity deletion.
+ */
+category:main;
+CREATE TABLE name_search
+(
+  entity_id
+    NUMERIC(12,0)
+    NOT NULL
+    CONSTRAINT name_search_entity_id
+      REFERENCES entity_info(entity_id)
+      ON DELETE CASCADE,
+
+  name_table
+    CHAR VARYING(32)
+    NOT NULL
+    CONSTRAINT name_search_name_table_chk
+      CHECK (name_table IN ('person_name', 'entity_name')),
+
+  name_code
+    NUMERIC(6,0)
+    NOT NULL,
+
+  name_norm
+    TEXT
+    NOT NULL,
+
+  CONSTRAINT name_search_pk
+    PRIMARY KEY (entity_id, name_table, name_code)
+);
+
+category:main;
+CREATE INDEX name_search_norm_trgm_idx
+  ON name_search USING gin (name_norm gin_trgm_ops);
@@ -28,7 +28,7 @@ category:metainfo;
 name=otp;
 
 category:metainfo;
-version=1.0;
+version=1.1;
 
 
 /* TABLE person_otp_secret
@@ -45,6 +45,12 @@ version=1.0;
  *   format and encryption type is identified by otp_type, and its companion
  *   module in Cerebrum.modules.otp
  *
+ * secret_hash
+ *   salted hash of the otp secret that the otp_payload was prepared from
+ *
+ *   used to detect unchanged secrets in bulk updates, as encrypted payloads
+ *   differ between each encryption of the same secret
+ *
  * updated_at
  *   last change timestamp -- when the item was added/modified
  */
@@ -67,6 +73,11 @@ CREATE TABLE IF NOT EXISTS person_otp_secret
     NOT NULL
     DEFAULT '',
 
+  secret_hash
+    TEXT
+    NULL
+    DEFAULT NULL,
+
   updated_at
     TIMESTAMP WITH TIME ZONE
     NOT NULL
@@ -369,6 +369,7 @@ def check_schema_versions(db, strict=False):
         'eventlog': 'Cerebrum.modules.EventLog',
         'events': 'Cerebrum.modules.event_publisher',
         'job_runner': 'Cerebrum.modules.job_runner',
+        'name_search': 'Cerebrum.modules.name_search',
         'otp': 'Cerebrum.modules.otp',
         'note': 'Cerebrum.modules.Note',
         'password_history': 'Cerebrum.modules.pwcheck.history',
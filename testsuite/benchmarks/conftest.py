@@ -0,0 +1,203 @@
+# encoding: utf-8
+"""
+Benchmark config and fixtures.
+
+All benchmarks share a single database transaction, which is populated with
+a synthetic dataset (see :mod:`Cerebrum.testutils.synthetic`) once per
+session, and rolled back at the end of the session.
+
+The :func:`bench` fixture measures a callable, and compares the measurement
+with a baseline, if one is given.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import types
+
+import pytest
+import six
+
+import Cerebrum.logutils
+from Cerebrum.testutils import benchmark
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cerebrum-bench', 'Cerebrum benchmarks')
+    group.addoption(
+        '--bench-scale',
+        type=float,
+        default=1.0,
+        help='synthetic dataset size multiplier (default: %(default)s)',
+    )
+    group.addoption(
+        '--bench-seed',
+        type=int,
+        default=0,
+        help='synthetic dataset seed (default: %(default)s)',
+    )
+    group.addoption(
+        '--bench-rounds',
+        type=int,
+        default=3,
+        help='number of rounds for each benchmark (default: %(default)s)',
+    )
+    group.addoption(
+        '--bench-save',
+        metavar='FILE',
+        help='save results as a JSON baseline',
+    )
+    group.addoption(
+        '--bench-compare',
+        metavar='FILE',
+        help='fail benchmarks that regress from a JSON baseline',
+    )
+    group.addoption(
+        '--bench-tolerance',
+        type=float,
+        default=0.25,
+        help='allowed relative run time increase (default: %(default)s)',
+    )
+
+
+def pytest_configure(config):
+    config._bench_results = []
+    config._bench_metadata = {}
+    filename = config.getoption('--bench-compare')
+    config._bench_baseline = (benchmark.load_baseline(filename)
+                              if filename else None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    filename = config.getoption('--bench-save')
+    if filename and config._bench_results:
+        benchmark.save_baseline(filename, config._bench_results,
+                                metadata=config._bench_metadata)
+
+
+def pytest_terminal_summary(terminalreporter):
+    results = terminalreporter.config._bench_results
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    width = max(len(m.name) for m in results)
+    terminalreporter.write_line(
+        '{:<{w}s} {:>9s} {:>9s} {:>8s}'.format(
+            'name', 'min [s]', 'mean [s]', 'queries', w=width))
+    for m in results:
+        terminalreporter.write_line(
+            '{:<{w}s} {:9.4f} {:9.4f} {:8d}'.format(
+                m.name, m.min, m.mean, m.queries, w=width))
+
+
+@pytest.fixture(autouse=True, scope='session')
+def logger():
+    Cerebrum.logutils._install()
+    Cerebrum.logutils._configured = True
+    return Cerebrum.logutils._get_legacy_logger('console')
+
+
+@pytest.fixture(scope='session')
+def factory():
+    from Cerebrum.Utils import Factory
+    return Factory
+
+
+@pytest.fixture(scope='session')
+def database(factory):
+    """ A session wide database transaction, which is never committed. """
+    base = factory.get('Database')
+
+    class _DbWrapper(base):
+
+        def commit(self):
+            super(_DbWrapper, self).rollback()
+
+    db = _DbWrapper()
+    if hasattr(db, 'cl_init'):
+        db.cl_init(change_program='benchmarks')
+    yield db
+    db.rollback()
+
+
+@pytest.fixture(scope='session')
+def constant_module(database):
+    """ `Cerebrum.Constants`, patched to use the benchmark transaction. """
+    from Cerebrum import Constants
+    sql = Constants._CerebrumCode.sql
+    Constants._CerebrumCode.sql = property(lambda *args: database)
+
+    if six.PY2:
+        meta_types = (type, types.ClassType)
+    else:
+        meta_types = (type,)
+
+    code_types = [item for item in vars(Constants).values()
+                  if (isinstance(item, meta_types)
+                      and issubclass(item, Constants._CerebrumCode))]
+    for code_type in code_types:
+        code_type._cache = dict()
+    yield Constants
+
+    Constants._CerebrumCode.sql = sql
+    for code_type in code_types:
+        code_type._cache = dict()
+
+
+@pytest.fixture(scope='session')
+def const(factory, database, constant_module):
+    return factory.get('Constants')(database)
+
+
+@pytest.fixture(scope='session')
+def dataset(request, database, constant_module):
+    """ The synthetic dataset. """
+    from Cerebrum.testutils.synthetic import DatasetGenerator
+    config = request.config
+    scale = config.getoption('--bench-scale')
+    seed = config.getoption('--bench-seed')
+    dataset = DatasetGenerator(database, scale=scale, seed=seed).generate()
+    config._bench_metadata.update({
+        'scale': scale,
+        'seed': seed,
+        'counts': dataset.counts,
+    })
+    return dataset
+
+
+@pytest.fixture
+def bench(request):
+    """
+    Measure a callable.
+
+    Runs the callable a number of rounds, and returns the result of the last
+    round.  Queries are counted for all database connections:
+
+    ::
+
+        def test_foo(bench, database):
+            result = bench(foo, database)
+    """
+    config = request.config
+
+    def run(func, *args, **kwargs):
+        name = '{}::{}'.format(request.module.__name__, request.node.name)
+        measurement, result = benchmark.measure(
+            func, args=args, kwargs=kwargs,
+            rounds=config.getoption('--bench-rounds'),
+            name=name)
+        config._bench_results.append(measurement)
+
+        baseline = (config._bench_baseline or {}).get(name)
+        if baseline:
+            problems = benchmark.compare(
+                measurement, baseline,
+                tolerance=config.getoption('--bench-tolerance'))
+            if problems:
+                pytest.fail('\n'.join(problems))
+        return result
+
+    return run
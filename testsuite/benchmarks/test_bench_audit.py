@@ -0,0 +1,86 @@
+# encoding: utf-8
+"""
+Audit log benchmarks.
+
+These scenarios compare inserting audit records one at a time (one nextval()
+and one INSERT per record) with the multi-row INSERT statements of
+:func:`Cerebrum.modules.audit.auditdb.sql_insert_many`.  The last scenario
+covers the complete log_change()/write_log() path of a transaction.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+import six
+
+import cereconf
+from Cerebrum.modules.audit import auditdb
+from Cerebrum.modules.audit.record import AuditRecord
+
+
+@pytest.fixture(scope='module')
+def clconst(factory, database, constant_module):
+    return factory.get('CLConstants')(database)
+
+
+@pytest.fixture(scope='module')
+def operator_id(factory, database):
+    ac = factory.get('Account')(database)
+    ac.find_by_name(cereconf.INITIAL_ACCOUNTNAME)
+    return ac.entity_id
+
+
+@pytest.fixture(scope='module')
+def records(const, clconst, operator_id, dataset):
+    change_type = clconst.account_mod
+    return [
+        AuditRecord(
+            change_type,
+            operator_id,
+            account_id,
+            metadata={
+                'change': six.text_type(change_type),
+                'operator_type': six.text_type(const.entity_account),
+                'operator_name': cereconf.INITIAL_ACCOUNTNAME,
+                'entity_type': six.text_type(const.entity_account),
+                'entity_name': dataset.account_name[account_id],
+                'target_type': None,
+                'target_name': None,
+                'change_program': 'benchmarks',
+            },
+            params={'n': n},
+        )
+        for n, account_id in enumerate(dataset.accounts)
+    ]
+
+
+def test_insert_records(bench, database, records):
+    accessor = auditdb.AuditLogAccessor(database)
+
+    def run():
+        return [accessor.append(record) for record in records]
+
+    record_ids = bench(run)
+    assert len(record_ids) == len(records)
+
+
+def test_insert_records_many(bench, database, records):
+    accessor = auditdb.AuditLogAccessor(database)
+    count = bench(accessor.append_many, records)
+    assert count == len(records)
+
+
+def test_log_change_write_log(bench, database, clconst, dataset):
+    def run():
+        for account_id in dataset.accounts:
+            database.log_change(account_id, clconst.account_mod, None)
+        pending = len(database.records)
+        database.write_log()
+        return pending
+
+    pending = bench(run)
+    assert pending == len(dataset.accounts)
@@ -0,0 +1,34 @@
+# encoding: utf-8
+"""
+bofhd command benchmarks.
+
+These scenarios call bofhd command implementations directly, without the
+protocol and session layers.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.modules.bofhd.bofhd_ou_cmds import OuCommands
+
+
+@pytest.fixture
+def ou_commands(database, logger):
+    return OuCommands(database, logger)
+
+
+def test_ou_tree(bench, ou_commands, dataset):
+    perspective = str(int(dataset.perspective))
+
+    def ou_tree_all():
+        return [ou_commands.ou_tree(None, 'id:{:d}'.format(ou_id),
+                                    perspective, 'nb')
+                for ou_id in dataset.ous]
+
+    trees = bench(ou_tree_all)
+    assert len(trees) == len(dataset.ous)
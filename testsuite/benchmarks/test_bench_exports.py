@@ -0,0 +1,48 @@
+# encoding: utf-8
+"""
+Export benchmarks.
+
+These scenarios cover bulk lookups that are typically done by export jobs.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+
+def _email_users(dataset):
+    return [dataset.account_name[account_id]
+            for account_id in dataset.email_targets]
+
+
+def test_uname2mailaddr(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+    result = bench(ac.getdict_uname2mailaddr)
+    assert set(_email_users(dataset)) <= set(result)
+
+
+def test_uname2mailaddr_all(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+    result = bench(ac.getdict_uname2mailaddr, primary_only=False)
+    assert set(_email_users(dataset)) <= set(result)
+
+
+def test_search_accounts_by_spread(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+    rows = bench(lambda: list(ac.search(spread=dataset.account_spread)))
+    assert rows
+
+
+def test_list_traits(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+    rows = bench(lambda: list(ac.list_traits(code=dataset.account_trait)))
+    assert rows
+
+
+def test_list_affiliations(bench, factory, database, dataset):
+    pe = factory.get('Person')(database)
+    rows = bench(lambda: list(pe.list_affiliations(
+        source_system=dataset.source_system)))
+    assert len(rows) == len(dataset.persons)
@@ -0,0 +1,49 @@
+# encoding: utf-8
+"""
+Group membership benchmarks.
+
+These scenarios resolve memberships of the nested groups in the synthetic
+dataset.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.group.memberships import GroupMemberships
+from Cerebrum.modules.no.uio.exchange import group_flattener
+
+
+@pytest.fixture
+def top_groups(dataset):
+    return dataset.group_levels[0]
+
+
+def test_search_members_direct(bench, factory, database, dataset):
+    gr = factory.get('Group')(database)
+    rows = bench(lambda: list(gr.search_members(group_id=dataset.groups)))
+    assert rows
+
+
+def test_search_members_indirect(bench, factory, database, top_groups):
+    gr = factory.get('Group')(database)
+    rows = bench(lambda: list(gr.search_members(group_id=top_groups,
+                                                indirect_members=True)))
+    assert rows
+
+
+def test_memberships_get_groups(bench, database, dataset):
+    memberships = GroupMemberships(database)
+    accounts = dataset.accounts[:100]
+    groups = bench(lambda: list(memberships.get_groups(accounts)))
+    assert groups
+
+
+def test_exchange_flattened_members(bench, database, const, top_groups):
+    members = bench(group_flattener.get_members_by_group,
+                    database, const, top_groups)
+    assert set(members) == set(top_groups)
@@ -0,0 +1,55 @@
+# encoding: utf-8
+"""
+Import benchmarks.
+
+These scenarios sync unchanged source data for all persons, which is the
+common case for a daily import.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.modules.import_utils import syncs
+
+
+@pytest.fixture(scope='module')
+def phone_numbers(factory, database, const, dataset):
+    numbers = dict((person_id, '2285{:04d}'.format(pos))
+                   for pos, person_id in enumerate(dataset.persons))
+    # populate, so that the benchmarks only verify existing values
+    sync = syncs.ContactInfoSync(database, dataset.source_system)
+    pe = factory.get('Person')(database)
+    for person_id, number in numbers.items():
+        pe.clear()
+        pe.find(person_id)
+        sync(pe, [(const.contact_phone, number)])
+    return numbers
+
+
+def _sync_all(factory, database, const, sync, numbers, cache=None):
+    pe = factory.get('Person')(database)
+    if cache is not None:
+        cache.prefetch([sync], numbers)
+    changes = 0
+    for person_id, number in numbers.items():
+        pe.clear()
+        pe.find(person_id)
+        changes += sum(len(c) for c in sync(pe,
+                                            [(const.contact_phone, number)]))
+    return changes
+
+
+@pytest.mark.parametrize('prefetch', (False, True),
+                         ids=('no-cache', 'cache'))
+def test_contact_info_sync(bench, factory, database, const, dataset,
+                           phone_numbers, prefetch):
+    cache = syncs.SyncCache() if prefetch else None
+    sync = syncs.ContactInfoSync(database, dataset.source_system, cache=cache)
+    changes = bench(_sync_all, factory, database, const, sync, phone_numbers,
+                    cache=cache)
+    assert changes == 0
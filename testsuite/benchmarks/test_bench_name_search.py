@@ -0,0 +1,80 @@
+# encoding: utf-8
+"""
+Name search benchmarks.
+
+These scenarios compare wildcard name searches with and without the trigram
+index from :mod:`Cerebrum.modules.name_search`.  The benchmarks are skipped
+if the mod_name_search schema isn't installed.
+
+Each person in the synthetic dataset has three cached names, so
+``--bench-scale 700`` gives about 1M indexed person names.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.modules.name_search import name_search_db
+from Cerebrum.modules.name_search.mixins import (
+    AccountNameSearchMixin,
+    PersonNameSearchMixin,
+)
+
+
+@pytest.fixture(scope='module')
+def name_index(database, const, dataset):
+    if not database.query_1("SELECT to_regclass('name_search') IS NOT NULL"):
+        pytest.skip('mod_name_search is not installed')
+    return name_search_db.rebuild(database, const.system_cached,
+                                  const.account_namespace)
+
+
+@pytest.fixture(params=[False, True], ids=['like', 'trigram'])
+def trigram(request, name_index, monkeypatch):
+    import cereconf
+    monkeypatch.setattr(cereconf, 'NAME_SEARCH_TRIGRAM', request.param,
+                        raising=False)
+    return request.param
+
+
+@pytest.fixture
+def person(factory, database):
+    class _Person(PersonNameSearchMixin, factory.get('Person')):
+        pass
+    return _Person(database)
+
+
+@pytest.fixture
+def account(factory, database):
+    class _Account(AccountNameSearchMixin, factory.get('Account')):
+        pass
+    return _Account(database)
+
+
+def test_person_find_name(bench, database, const, dataset, person, trigram):
+    rows = bench(lambda: list(person.search_person_names(
+        name='*nordmann*',
+        name_variant=const.name_full,
+        source_system=const.system_cached,
+        exact_match=False,
+        case_sensitive=False)))
+    expected = set(p for p, name in dataset.person_name.items()
+                   if 'nordmann' in name.lower())
+    assert expected <= set(row['person_id'] for row in rows)
+
+
+def test_account_search_name(bench, account, trigram):
+    rows = bench(lambda: list(account.search(name='*0012*')))
+    assert rows
+    assert all('0012' in row['name'] for row in rows)
+
+
+def test_search_names_ranked(bench, database, name_index):
+    rows = bench(lambda: list(name_search_db.search_names(
+        database, 'Nordman', name_table='person_name', fuzzy=True,
+        limit=20)))
+    assert len(rows) <= 20
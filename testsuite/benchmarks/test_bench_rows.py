@@ -0,0 +1,111 @@
+# encoding: utf-8
+"""
+Row type micro benchmarks.
+
+These scenarios compare the row types from
+:mod:`Cerebrum.database.row_factory` without a database, by wrapping
+pre-built value tuples (i.e. what the driver gives us) in row objects.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import sys
+
+import pytest
+
+from Cerebrum.database import tuple_row
+from Cerebrum.extlib import records
+
+try:
+    # PY3: db_row is not importable
+    from Cerebrum.extlib import db_row
+except ImportError:
+    db_row = None
+
+
+FIELDS = tuple(str(f) for f in ('entity_id', 'entity_type', 'entity_name',
+                                'value_domain', 'description'))
+NUM_ROWS = 100000
+
+
+def _make_db_row(fields):
+    row_class = db_row.make_row_class(fields)
+    return row_class, lambda row: sys.getsizeof(row) + sys.getsizeof(
+        row.fields)
+
+
+def _make_records(fields):
+    return (lambda values: records.Record(fields, values),
+            lambda row: sys.getsizeof(row) + sys.getsizeof(row._values))
+
+
+def _make_tuple_row(fields):
+    return tuple_row.make_row_class(fields), sys.getsizeof
+
+
+ROW_TYPES = {
+    'records': _make_records,
+    'tuple': _make_tuple_row,
+}
+if db_row is not None:
+    ROW_TYPES['db_row'] = _make_db_row
+
+
+@pytest.fixture(scope='module')
+def data():
+    return [(i, 7, 'name-{:d}'.format(i), 3, None) for i in range(NUM_ROWS)]
+
+
+@pytest.fixture(params=sorted(ROW_TYPES))
+def row_type(request):
+    return request.param
+
+
+@pytest.fixture
+def row_class(row_type):
+    row_class, _ = ROW_TYPES[row_type](FIELDS)
+    return row_class
+
+
+@pytest.fixture
+def rows(row_class, data):
+    return [row_class(values) for values in data]
+
+
+def test_construct(bench, row_class, data):
+    rows = bench(lambda: [row_class(values) for values in data])
+    assert len(rows) == NUM_ROWS
+
+
+def test_access_by_name(bench, rows):
+    def access():
+        return sum(row['entity_id'] for row in rows)
+
+    assert bench(access) == sum(range(NUM_ROWS))
+
+
+def test_access_by_index(bench, rows):
+    def access():
+        return sum(row[0] for row in rows)
+
+    assert bench(access) == sum(range(NUM_ROWS))
+
+
+def test_to_dict(bench, rows):
+    result = bench(lambda: [dict(row) for row in rows])
+    assert result[1]['entity_name'] == 'name-1'
+
+
+def test_row_size(request, row_type, rows):
+    _, get_size = ROW_TYPES[row_type](FIELDS)
+    size = sum(get_size(row) for row in rows) / len(rows)
+    sizes = request.config._bench_metadata.setdefault('row_size', {})
+    sizes[row_type] = size
+    print('{}: {:.1f} bytes/row'.format(row_type, size))
+    if row_type != 'tuple':
+        tuple_size = sys.getsizeof(tuple_row.make_row_class(FIELDS)(
+            rows[0]))
+        assert tuple_size < size
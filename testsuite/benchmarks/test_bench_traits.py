@@ -0,0 +1,58 @@
+# encoding: utf-8
+"""
+Trait benchmarks.
+
+These scenarios cover the typical nightly loop, where a trait is looked up
+for each account, with and without a trait snapshot.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from Cerebrum.modules.trait import snapshot
+
+
+def _numvals(ac, dataset):
+    result = {}
+    for account_id in dataset.accounts:
+        ac.clear()
+        ac.find(account_id)
+        trait = ac.get_trait(dataset.account_trait)
+        if trait:
+            result[account_id] = trait['numval']
+    return result
+
+
+def test_get_trait_loop(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+    result = bench(_numvals, ac, dataset)
+    assert result
+
+
+def test_get_trait_loop_cached(bench, factory, database, dataset):
+    ac = factory.get('Account')(database)
+
+    def run():
+        with snapshot.trait_cache(database, codes=(dataset.account_trait,)):
+            return _numvals(ac, dataset)
+
+    result = bench(run)
+    assert result == _numvals(ac, dataset)
+
+
+def test_snapshot_lookup(bench, database, dataset):
+    def run():
+        snap = snapshot.TraitSnapshot(database,
+                                      codes=(dataset.account_trait,))
+        result = {}
+        for account_id in dataset.accounts:
+            value = snap.get(dataset.account_trait, account_id)
+            if value:
+                result[account_id] = value.numval
+        return result
+
+    result = bench(run)
+    assert result
@@ -166,6 +166,23 @@ def test_find_by_name_not_found(account_object):
         assert account_object.find_by_name(account_name)
 
 
+def test_get_valid_new_unames(account_object, np_accounts):
+    taken = [a['account_name'] for a in np_accounts]
+    free = ['n' * 40 + str(n) for n in range(10)]
+    unames = free[:5] + taken + free[5:]
+    assert account_object.get_valid_new_unames(unames) == free
+    assert all(account_object.is_valid_new_uname(n) for n in free)
+
+
+def test_uname_snapshot(account_object, np_accounts):
+    snapshot = account_object.load_uname_snapshot()
+    taken = [a['account_name'] for a in np_accounts]
+    assert all(name in snapshot for name in taken)
+    account_object.uname_snapshot = snapshot
+    assert account_object.get_valid_new_unames(taken + ['n' * 40]) == [
+        'n' * 40]
+
+
 def test_is_expired(account_object, np_accounts):
     """ Account.is_expired() for expired and non-expired accounts. """
     account_ids = _set_of_ids(np_accounts)
@@ -273,6 +290,23 @@ def test_search_name_wildcard(account_object, np_accounts, account_ds):
     assert _set_of_ids(result) == _set_of_ids(np_accounts)
 
 
+
+def test_search_paginated(account_object, np_accounts, account_ds):
+    """ Account.search() with after and limit. """
+    search_expr = account_ds.name_prefix + '%'
+    account_ids = sorted(_set_of_ids(np_accounts))
+    assert len(account_ids) >= 2
+
+    first = [dict(r) for r in account_object.search(name=search_expr,
+                                                    expire_start=None,
+                                                    limit=1)]
+    assert [r['account_id'] for r in first] == account_ids[:1]
+
+    rest = [dict(r) for r in account_object.search(name=search_expr,
+                                                   expire_start=None,
+                                                   after=account_ids[0])]
+    assert [r['account_id'] for r in rest] == account_ids[1:]
+
 def test_equality(database, np_accounts):
     """ Account __eq__ comparison. """
     assert len(np_accounts) >= 2
@@ -9,8 +9,11 @@ from __future__ import (
     unicode_literals,
 )
 
+import sys
+
 import pytest
 
+import Cerebrum.extlib
 from Cerebrum.database import row_factory
 
 
@@ -134,3 +137,67 @@ def test_list_rows_items(cursor, fields):
     sequence = row_factory.list_rows(cursor, fields)
     for i in range(4):
         assert dict(sequence[i]) == ROW_DICTS[i]
+
+
+def test_get_row_type_default():
+    assert row_factory.get_row_type() == row_factory.DEFAULT_ROW_TYPE
+
+
+def test_get_row_type_invalid():
+    with pytest.raises(ValueError):
+        row_factory.get_row_type('foo')
+
+
+def test_iter_rows_tuple(cursor, fields):
+    iterator = row_factory.iter_rows(cursor, fields,
+                                     row_type=row_factory.ROW_TYPE_TUPLE)
+    for i in range(4):
+        row = next(iterator)
+        assert row == ROW_TUPLES[i]
+        assert dict(row) == ROW_DICTS[i]
+    with pytest.raises(StopIteration):
+        next(iterator)
+
+
+def test_list_rows_tuple(cursor, fields):
+    sequence = row_factory.list_rows(cursor, fields,
+                                     row_type=row_factory.ROW_TYPE_TUPLE)
+    assert [dict(row) for row in sequence] == ROW_DICTS
+    assert sequence[0]['text'] == "foo"
+
+
+def test_database_row_type(database, table):
+    database.row_type = row_factory.ROW_TYPE_TUPLE
+    rows = database.query(
+        """
+        SELECT int, text FROM [:table schema=cerebrum name=row_test]
+        ORDER BY int ASC
+        """)
+    assert all(isinstance(row, tuple) for row in rows)
+    assert [dict(row) for row in rows] == ROW_DICTS
+
+
+@pytest.fixture
+def records_default(monkeypatch):
+    """ Emulate CEREBRUM_RECORDS=1, where db_row isn't imported. """
+    monkeypatch.setattr(row_factory, 'DEFAULT_ROW_TYPE',
+                        row_factory.ROW_TYPE_RECORDS)
+    monkeypatch.setattr(row_factory, 'make_row_class',
+                        row_factory._make_db_row_class)
+
+
+def test_list_rows_db_row_on_demand(records_default, cursor, fields):
+    pytest.importorskip('Cerebrum.extlib.db_row')
+    sequence = row_factory.list_rows(cursor, fields,
+                                     row_type=row_factory.ROW_TYPE_DB_ROW)
+    assert [dict(row) for row in sequence] == ROW_DICTS
+
+
+def test_list_rows_db_row_unavailable(records_default, monkeypatch, cursor,
+                                      fields):
+    # a None entry in sys.modules makes the import fail
+    monkeypatch.delattr(Cerebrum.extlib, 'db_row', raising=False)
+    monkeypatch.setitem(sys.modules, 'Cerebrum.extlib.db_row', None)
+    with pytest.raises(ValueError):
+        row_factory.list_rows(cursor, fields,
+                              row_type=row_factory.ROW_TYPE_DB_ROW)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`Cerebrum.database.tuple_row`
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.database import tuple_row
+
+
+FIELDS = (str('entity_id'), str('entity_name'), str('count'))
+
+
+@pytest.fixture
+def row_class():
+    return tuple_row.make_row_class(FIELDS)
+
+
+@pytest.fixture
+def row(row_class):
+    return row_class((1, 'foo', 3))
+
+
+def test_row_class_cached(row_class):
+    assert tuple_row.make_row_class(list(FIELDS)) is row_class
+    assert tuple_row.make_row_class(FIELDS[:2]) is not row_class
+
+
+def test_row_is_tuple(row):
+    assert isinstance(row, tuple)
+    assert row == (1, 'foo', 3)
+    assert tuple(row) == (1, 'foo', 3)
+    assert len(row) == 3
+    assert 'foo' in row
+
+
+def test_getitem_name(row):
+    assert row['entity_id'] == 1
+    assert row[str('entity_name')] == 'foo'
+
+
+def test_getitem_index(row):
+    assert row[0] == 1
+    assert row[-1] == 3
+
+
+def test_getitem_slice(row):
+    assert row[1:] == ('foo', 3)
+    assert row[:-1] == (1, 'foo')
+
+
+def test_getitem_missing(row):
+    with pytest.raises(KeyError):
+        row['missing']
+    with pytest.raises(IndexError):
+        row[3]
+
+
+def test_getattr(row):
+    assert row.entity_name == 'foo'
+    with pytest.raises(AttributeError):
+        row.missing
+
+
+def test_method_column(row):
+    # columns that shadow tuple methods are still available as items
+    assert row['count'] == 3
+    assert row.count(3) == 1
+
+
+def test_dict(row):
+    expected = {'entity_id': 1, 'entity_name': 'foo', 'count': 3}
+    assert dict(row) == expected
+    assert row.dict() == expected
+
+
+def test_mapping_methods(row):
+    assert row.keys() == FIELDS
+    assert row.values() == (1, 'foo', 3)
+    assert row.items() == list(zip(FIELDS, (1, 'foo', 3)))
+    assert row.get('entity_id') == 1
+    assert row.get('missing', 'x') == 'x'
+    assert row.has_key('count')
+    assert not row.has_key('missing')
+
+
+def test_repeated_field():
+    row = tuple_row.make_row_class(('a', 'a'))((1, 2))
+    assert row['a'] == 1
+    assert row[1] == 2
+
+
+def test_repr(row):
+    assert repr(row) == "row(entity_id=1, entity_name={!r}, count=3)".format(
+        'foo')
@@ -499,3 +499,41 @@ def test_search_members_expired(gr, groups):
                         else len(expired))
     assert len(result) == len(groups) - 1 - expected_results
     assert not set(x['member_id'] for x in result).intersection(expired)
+
+
+def test_search_paginated(gr, groups):
+    """ Group.search() with after and limit. """
+    if len(groups) < 3:
+        pytest.skip('Test needs at least three groups')
+    group_ids = sorted(g['entity_id'] for g in groups)
+
+    first = list(gr.search(group_id=group_ids, filter_expired=False,
+                           limit=2))
+    assert [r['group_id'] for r in first] == group_ids[:2]
+
+    rest = list(gr.search(group_id=group_ids, filter_expired=False,
+                          after=first[-1]['group_id']))
+    assert [r['group_id'] for r in rest] == group_ids[2:]
+
+
+def test_search_members_paginated(gr, groups):
+    """ Group.search_members() with after and limit. """
+    if len(groups) < 4:
+        pytest.skip('Test needs at least four groups')
+    group_id = groups[0]['entity_id']
+    member_ids = sorted(g['entity_id'] for g in groups[1:])
+    for member_id in member_ids:
+        modify_add_member(gr)(group_id, member_id)
+
+    seen = []
+    after = None
+    while True:
+        page = list(gr.search_members(group_id=group_id,
+                                      member_filter_expired=False,
+                                      after=after, limit=2))
+        assert len(page) <= 2
+        seen.extend(r['member_id'] for r in page)
+        if len(page) < 2:
+            break
+        after = (page[-1]['group_id'], page[-1]['member_id'])
+    assert seen == member_ids
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for listing the members of a large group.
+
+Compares fetching all members of a synthetic 100k member group in one query
+with fetching them in pages (keyset pagination), and with fetching a single
+page.  Run with:
+
+    CEREBRUM_BENCHMARK=1 pytest -s test_group_members_benchmark.py
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import time
+
+import pytest
+
+from Cerebrum.testutils import datasource
+
+NUM_MEMBERS = 100000
+PAGE_SIZE = 1000
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CEREBRUM_BENCHMARK'),
+                                reason='CEREBRUM_BENCHMARK not set')
+
+
+@pytest.fixture
+def database(database):
+    database.cl_init(change_program='test_group_members_benchmark')
+    return database
+
+
+@pytest.fixture
+def const(database, factory):
+    return factory.get('Constants')(database)
+
+
+@pytest.fixture
+def gr(database, factory):
+    return factory.get('Group')(database)
+
+
+@pytest.fixture
+def large_group(database, const, gr, initial_account):
+    """ A group with NUM_MEMBERS synthetic person members. """
+    entry = next(iter(datasource.BasicGroupSource()(limit=1)))
+    gr.populate(
+        creator_id=initial_account.entity_id,
+        visibility=int(const.group_visibility_all),
+        name=entry['group_name'],
+        description=entry['description'],
+        group_type=int(const.group_type_unknown),
+    )
+    gr.write_db()
+
+    # Bypass the entity api (and change log) -- we only need the rows
+    database.execute(
+        """
+          INSERT INTO [:table schema=cerebrum name=entity_info]
+            (entity_id, entity_type)
+          SELECT [:sequence schema=cerebrum name=entity_id_seq op=next],
+                 :entity_type
+          FROM generate_series(1, :num)
+        """,
+        {'entity_type': int(const.entity_person), 'num': NUM_MEMBERS})
+    database.execute(
+        """
+          INSERT INTO [:table schema=cerebrum name=group_member]
+            (group_id, member_type, member_id)
+          SELECT :group_id, entity_type, entity_id
+          FROM [:table schema=cerebrum name=entity_info]
+          WHERE entity_type = :entity_type AND
+                entity_id > :group_id
+        """,
+        {'group_id': gr.entity_id, 'entity_type': int(const.entity_person)})
+    database.execute("ANALYZE [:table schema=cerebrum name=group_member]")
+    return gr
+
+
+def _timed(func):
+    start = time.time()
+    result = func()
+    return result, time.time() - start
+
+
+def _list_all(gr):
+    return list(gr.search_members(group_id=gr.entity_id,
+                                  include_member_entity_name=True))
+
+
+def _list_paged(gr):
+    result = []
+    after = None
+    while True:
+        page = list(gr.search_members(group_id=gr.entity_id,
+                                      include_member_entity_name=True,
+                                      after=after,
+                                      limit=PAGE_SIZE))
+        result.extend(page)
+        if len(page) < PAGE_SIZE:
+            return result
+        after = (page[-1]['group_id'], page[-1]['member_id'])
+
+
+def _first_page(gr):
+    return list(gr.search_members(group_id=gr.entity_id,
+                                  include_member_entity_name=True,
+                                  limit=PAGE_SIZE))
+
+
+def test_benchmark_search_members(large_group):
+    full, full_time = _timed(lambda: _list_all(large_group))
+    paged, paged_time = _timed(lambda: _list_paged(large_group))
+    page, page_time = _timed(lambda: _first_page(large_group))
+
+    print()
+    print('members:     {:d}'.format(len(full)))
+    print('full list:   {:.3f}s'.format(full_time))
+    print('all pages:   {:.3f}s ({:d} rows per page)'.format(paged_time,
+                                                             PAGE_SIZE))
+    print('single page: {:.3f}s'.format(page_time))
+
+    assert len(full) >= NUM_MEMBERS
+    assert len(paged) == len(full)
+    assert (set(r['member_id'] for r in paged) ==
+            set(r['member_id'] for r in full))
+    assert len(page) == PAGE_SIZE
+    # a single page should be a lot cheaper than the complete listing
+    assert page_time < full_time
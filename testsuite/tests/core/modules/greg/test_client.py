@@ -15,6 +15,7 @@ import pytest
 
 from Cerebrum.modules.greg import client
 from Cerebrum.testutils import file_utils
+from Cerebrum.testutils.http_server import FakeHttpServer
 
 
 #
@@ -155,3 +156,89 @@ def test_get_client_from_file(config_file):
 def test_get_client_from_invalid_value():
     with pytest.raises(ValueError):
         client.get_client(None)
+
+
+#
+# GregClient requests, using a fake Greg API
+#
+
+
+API_HEADERS = {'X-Greg-Response-For': 'test'}
+
+
+@pytest.fixture
+def server():
+    with FakeHttpServer(delay=0.02, headers=API_HEADERS) as server:
+        yield server
+
+
+@pytest.fixture
+def cache_dir():
+    with file_utils.tempdir_ctx(prefix="test-greg-cache") as path:
+        yield path
+
+
+def _add_persons(server, count, page_size=None):
+    persons = [{'id': str(greg_id)} for greg_id in range(1, count + 1)]
+    for person in persons:
+        server.add_json('/greg/v1/persons/' + person['id'], person,
+                        etag='"{}"'.format(person['id']))
+    page_size = page_size or count
+    pages = [persons[i:i + page_size] for i in range(0, count, page_size)]
+    for num, results in enumerate(pages, 1):
+        query = {'cursor': str(num)} if num > 1 else None
+        if num < len(pages):
+            next_page = server.url + '/greg/v1/persons?cursor={:d}'.format(
+                num + 1)
+        else:
+            next_page = None
+        server.add_json('/greg/v1/persons', query=query,
+                        data={'results': results, 'next': next_page})
+    return persons
+
+
+def test_list_persons(server):
+    persons = _add_persons(server, 10, page_size=3)
+    greg = client.GregClient(server.url + '/greg')
+    assert list(greg.list_persons()) == persons
+    assert server.count('/greg/v1/persons', query={'cursor': '4'}) == 1
+
+
+def test_list_persons_error(server):
+    _add_persons(server, 10, page_size=3)
+    del server.documents['/greg/v1/persons?cursor=3']
+    greg = client.GregClient(server.url + '/greg')
+    with pytest.raises(Exception):
+        list(greg.list_persons())
+
+
+def test_get_person_missing(server):
+    greg = client.GregClient(server.url + '/greg')
+    assert greg.get_person('1') is None
+
+
+def test_get_persons(server):
+    persons = _add_persons(server, 20)
+    greg = client.GregClient(server.url + '/greg', workers=4)
+    greg_ids = [p['id'] for p in persons] + ['404']
+    results = list(greg.get_persons(greg_ids))
+    assert results == [(p['id'], p) for p in persons] + [('404', None)]
+    assert server.max_active == 4
+
+
+def test_prefetch_persons(server):
+    persons = _add_persons(server, 5)
+    greg = client.GregClient(server.url + '/greg')
+    assert greg.prefetch_persons(['1', '2', '404']) == 2
+    assert greg.get_person('1') == persons[0]
+    assert greg.get_person('1') == persons[0]
+    assert server.count('/greg/v1/persons/1') == 2
+
+
+def test_get_person_cached(server, cache_dir):
+    persons = _add_persons(server, 2)
+    greg = client.GregClient(server.url + '/greg', cache_dir=cache_dir)
+    assert greg.get_person('1') == persons[0]
+    assert greg.get_person('1') == persons[0]
+    assert server.count('/greg/v1/persons/1', status=200) == 1
+    assert server.count('/greg/v1/persons/1', status=304) == 1
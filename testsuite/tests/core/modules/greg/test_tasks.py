@@ -68,6 +68,36 @@ def test_handle_task():
     assert handled == ["123"]
 
 
+def test_prefetch_reuses_person_id_map():
+    mock_client = MockObj()
+    mock_db = MockObj()
+    person_id_map = {"1": 11, "2": 12, "3": 13}
+    map_calls = []
+    prefetched = []
+
+    def get_person_id_map():
+        map_calls.append(True)
+        return dict(person_id_map)
+
+    def find_person_ids(greg_ids, person_id_map):
+        return dict((greg_id, person_id_map[greg_id])
+                    for greg_id in greg_ids
+                    if greg_id in person_id_map)
+
+    def import_factory(db, client=None, sync_cache=None):
+        return MockObj(get_person_id_map=get_person_id_map,
+                       find_person_ids=find_person_ids,
+                       prefetch=lambda ids: prefetched.append(sorted(ids)))
+
+    sync_cache = MockObj(clear=lambda: None)
+    handler = tasks.GregImportTasks(mock_client, import_factory,
+                                    sync_cache=sync_cache)
+    handler.prefetch(mock_db, ["1", "2"])
+    handler.prefetch(mock_db, ["3", "4"])
+    assert len(map_calls) == 1
+    assert prefetched == [[11, 12], [13]]
+
+
 #
 # get_tasks tests
 #
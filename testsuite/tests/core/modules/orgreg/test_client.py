@@ -19,6 +19,7 @@ import pytest
 
 from Cerebrum.modules.orgreg import client
 from Cerebrum.testutils import file_utils
+from Cerebrum.testutils.http_server import FakeHttpServer
 
 
 #
@@ -153,3 +154,53 @@ def test_get_client_from_file(config_file):
 def test_get_client_from_invalid_value():
     with pytest.raises(ValueError):
         client.get_client(None)
+
+
+#
+# OrgregClient requests, using a fake Orgreg API
+#
+
+
+API_HEADERS = {'X-OrgReg-Response-For': 'test'}
+
+
+@pytest.fixture
+def server():
+    with FakeHttpServer(delay=0.02, headers=API_HEADERS) as server:
+        yield server
+
+
+@pytest.fixture
+def cache_dir():
+    with file_utils.tempdir_ctx(prefix="test-orgreg-cache") as path:
+        yield path
+
+
+def _add_org_units(server, count):
+    org_units = [{'ouId': ou_id} for ou_id in range(1, count + 1)]
+    server.add_json('/orgreg/v3/ou', org_units, etag='"all"')
+    for ou in org_units:
+        server.add_json('/orgreg/v3/ou/{:d}'.format(ou['ouId']), ou,
+                        etag='"{:d}"'.format(ou['ouId']))
+    return org_units
+
+
+def test_get_org_units(server):
+    org_units = _add_org_units(server, 12)
+    orgreg = client.OrgregClient(server.url + '/orgreg', workers=3)
+    results = list(orgreg.get_org_units(ou['ouId'] for ou in org_units))
+    assert results == [(ou['ouId'], ou) for ou in org_units]
+    assert server.max_active == 3
+
+
+def test_list_org_units_cached(server, cache_dir):
+    org_units = _add_org_units(server, 3)
+    orgreg = client.OrgregClient(server.url + '/orgreg',
+                                 cache_dir=cache_dir)
+    assert orgreg.list_org_units() == org_units
+    # a new client re-uses the cache
+    orgreg = client.OrgregClient(server.url + '/orgreg',
+                                 cache_dir=cache_dir)
+    assert orgreg.list_org_units() == org_units
+    assert server.count('/orgreg/v3/ou', status=200) == 1
+    assert server.count('/orgreg/v3/ou', status=304) == 1
@@ -0,0 +1,238 @@
+# encoding: utf-8
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Unit tests for *Cerebrum.org.ou_tree*
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.org import ou_tree
+
+
+PERSPECTIVE = 3
+
+#
+# Test tree:
+#
+#        A(1)       H(8)
+#       /    \
+#     B(2)   C(3)
+#     /  \     \
+#   D(4) E(5)  F(6)
+#               |
+#              G(7)
+#
+# ... and two org units in a cycle (9 <-> 10)
+#
+PARENTS = {
+    1: None,
+    2: 1,
+    3: 1,
+    4: 2,
+    5: 2,
+    6: 3,
+    7: 6,
+    8: None,
+    9: 10,
+    10: 9,
+}
+
+
+@pytest.fixture
+def tree():
+    return ou_tree.OuTree(PERSPECTIVE, PARENTS)
+
+
+def test_len(tree):
+    assert len(tree) == 8
+
+
+def test_contains(tree):
+    assert 7 in tree
+    assert 9 not in tree
+    assert 11 not in tree
+
+
+def test_iter_preorder(tree):
+    assert list(tree) == [1, 2, 4, 5, 3, 6, 7, 8]
+
+
+def test_roots(tree):
+    assert tree.roots == (1, 8)
+
+
+def test_get_parent(tree):
+    assert tree.get_parent(7) == 6
+    assert tree.get_parent(1) is None
+
+
+def test_get_parent_missing(tree):
+    with pytest.raises(LookupError):
+        tree.get_parent(9)
+
+
+def test_get_children(tree):
+    assert tree.get_children(2) == (4, 5)
+    assert tree.get_children(7) == ()
+
+
+def test_get_depth(tree):
+    assert tree.get_depth(1) == 0
+    assert tree.get_depth(7) == 3
+
+
+def test_get_path(tree):
+    assert tree.get_path(7) == (7, 6, 3, 1)
+    assert tree.get_path(8) == (8,)
+
+
+def test_get_ancestors(tree):
+    assert tree.get_ancestors(5) == (2, 1)
+
+
+def test_get_root(tree):
+    assert tree.get_root(7) == 1
+
+
+@pytest.mark.parametrize(
+    'ancestor, ou_id, expect',
+    [
+        (1, 7, True),
+        (3, 7, True),
+        (2, 7, False),
+        (7, 1, False),
+        (1, 8, False),
+        (1, 1, False),
+        (1, 9, False),
+    ],
+)
+def test_is_ancestor(tree, ancestor, ou_id, expect):
+    assert tree.is_ancestor(ancestor, ou_id) == expect
+
+
+def test_is_ancestor_include_self(tree):
+    assert tree.is_ancestor(1, 1, include_self=True)
+
+
+def test_is_descendant(tree):
+    assert tree.is_descendant(7, 3)
+    assert not tree.is_descendant(3, 7)
+
+
+def test_get_descendants(tree):
+    assert tree.get_descendants(1) == (2, 4, 5, 3, 6, 7)
+    assert tree.get_descendants(3, include_self=True) == (3, 6, 7)
+    assert tree.get_descendants(4) == ()
+
+
+def test_descendants_match_ancestors(tree):
+    for ou_id in tree:
+        descendants = set(tree.get_descendants(ou_id))
+        for other in tree:
+            assert tree.is_ancestor(ou_id, other) == (other in descendants)
+            if other in descendants:
+                assert ou_id in tree.get_ancestors(other)
+
+
+def test_deep_tree():
+    depth = 5000
+    parents = {1: None}
+    parents.update((i, i - 1) for i in range(2, depth + 1))
+    tree = ou_tree.OuTree(PERSPECTIVE, parents)
+    assert tree.get_depth(depth) == depth - 1
+    assert tree.is_ancestor(1, depth)
+    assert len(tree.get_descendants(1)) == depth - 1
+
+
+#
+# Cache tests
+#
+
+
+class _MockDb(object):
+    """ A mock database with a changelog and an ou_structure. """
+
+    def __init__(self, parents, change_id):
+        self.parents = parents
+        self.change_id = change_id
+        self.queries = 0
+
+    def get_log_events(self, types=None, return_last_only=False):
+        if self.change_id is None:
+            return []
+        return [{'change_id': self.change_id}]
+
+    def query(self, stmt, binds):
+        self.queries += 1
+        return [{'ou_id': k, 'parent_id': v}
+                for k, v in self.parents.items()]
+
+
+def test_load_no_cache():
+    db = _MockDb(PARENTS, 1)
+    tree = ou_tree.load_ou_tree(db, PERSPECTIVE)
+    assert db.queries == 1
+    assert tree.get_path(7) == (7, 6, 3, 1)
+
+
+def test_load_cache(tmpdir):
+    filename = str(tmpdir.join('ou-tree.json'))
+    db = _MockDb(PARENTS, 1)
+    ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    tree = ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    assert db.queries == 1
+    assert list(tree) == [1, 2, 4, 5, 3, 6, 7, 8]
+
+
+def test_load_cache_invalidated(tmpdir):
+    filename = str(tmpdir.join('ou-tree.json'))
+    db = _MockDb(PARENTS, 1)
+    ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+
+    # move ou 7 to be a child of 8
+    db.parents = dict(PARENTS)
+    db.parents[7] = 8
+    db.change_id = 2
+    tree = ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    assert db.queries == 2
+    assert tree.get_path(7) == (7, 8)
+
+
+def test_load_cache_other_perspective(tmpdir):
+    filename = str(tmpdir.join('ou-tree.json'))
+    db = _MockDb(PARENTS, 1)
+    ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    ou_tree.load_ou_tree(db, PERSPECTIVE + 1, cache_file=filename)
+    assert db.queries == 2
+
+
+def test_load_cache_without_changelog(tmpdir):
+    filename = str(tmpdir.join('ou-tree.json'))
+    db = _MockDb(PARENTS, None)
+    ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    ou_tree.load_ou_tree(db, PERSPECTIVE, cache_file=filename)
+    assert db.queries == 2
+    assert not tmpdir.join('ou-tree.json').exists()
@@ -0,0 +1,167 @@
+# encoding: utf-8
+#
+# Copyright 2024 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Unit tests for *Cerebrum.QuarantineHandler*
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum import QuarantineHandler as qh_module
+from Cerebrum.QuarantineHandler import (
+    NO_QUARANTINE,
+    QuarantineDecision,
+    QuarantineHandler,
+)
+
+
+Q_NOLOGIN = 1
+Q_SYSTEM = 2
+Q_SKIP = 3
+Q_UNKNOWN = 4
+SPREAD_AD = 10
+
+
+# Pre-compiled rules, equivalent to:
+#
+#   QUARANTINE_RULES = {
+#       'nologin': {'lock': 1, 'shell': 'nologin-shell', 'sort_num': 10},
+#       'system': [
+#           {'lock': 1, 'shell': 'nologin-shell2', 'sort_num': 2},
+#           {'spread': 'AD_account', 'shell': 'ad-shell', 'sort_num': 3},
+#       ],
+#       'skip': {'skip': 1, 'sort_num': 1},
+#   }
+RULES = {
+    Q_NOLOGIN: {
+        '*': {'lock': 1, 'shell': 'nologin-shell', 'sort_num': 10},
+    },
+    Q_SYSTEM: {
+        '*': {'lock': 1, 'shell': 'nologin-shell2', 'sort_num': 2},
+        SPREAD_AD: {'shell': 'ad-shell', 'sort_num': 3},
+    },
+    Q_SKIP: {
+        '*': {'skip': 1, 'sort_num': 1},
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def _rules(monkeypatch):
+    monkeypatch.setattr(QuarantineHandler, 'qc2rules', RULES)
+    monkeypatch.setattr(QuarantineHandler, '_explicit_sort', True)
+    monkeypatch.setattr(QuarantineHandler, '_decisions', {})
+
+
+@pytest.mark.parametrize(
+    'quarantines, spreads, expect',
+    [
+        ([], None, NO_QUARANTINE),
+        ([Q_UNKNOWN], None, NO_QUARANTINE),
+        ([Q_NOLOGIN], None, (True, False, 'nologin-shell')),
+        ([Q_SYSTEM], None, (True, False, 'nologin-shell2')),
+        ([Q_SYSTEM], [SPREAD_AD], (False, False, 'ad-shell')),
+        ([Q_SYSTEM, Q_NOLOGIN], [SPREAD_AD], (True, False, 'ad-shell')),
+        ([Q_NOLOGIN, Q_SYSTEM], None, (True, False, 'nologin-shell2')),
+        ([Q_SKIP], None, (False, True, None)),
+        ([Q_SKIP, Q_NOLOGIN], None, (True, True, 'nologin-shell')),
+    ],
+)
+def test_decision(quarantines, spreads, expect):
+    qh = QuarantineHandler(None, quarantines, spreads=spreads)
+    decision = qh.get_decision()
+    assert decision == QuarantineDecision(*expect)
+    assert qh.is_locked() == decision.locked
+    assert qh.should_skip() == decision.skip
+    assert qh.get_shell() == decision.shell
+
+
+def test_decision_is_memoized():
+    qh = QuarantineHandler(None, [Q_SYSTEM, Q_NOLOGIN])
+    first = qh.get_decision()
+    other = QuarantineHandler(None, [Q_NOLOGIN, Q_SYSTEM, Q_NOLOGIN])
+    assert other.get_decision() is first
+    assert len(QuarantineHandler._decisions) == 1
+
+
+def test_decision_depends_on_spread():
+    plain = QuarantineHandler(None, [Q_SYSTEM]).get_decision()
+    ad = QuarantineHandler(None, [Q_SYSTEM], [SPREAD_AD]).get_decision()
+    assert plain != ad
+    assert len(QuarantineHandler._decisions) == 2
+
+
+def test_reuse_handler():
+    """ some exports re-use a handler and update its quarantines. """
+    qh = QuarantineHandler(None, None)
+    assert not qh.is_locked()
+    qh.quarantines = [Q_NOLOGIN]
+    assert qh.is_locked()
+    qh.quarantines = [Q_SKIP]
+    assert not qh.is_locked()
+    assert qh.should_skip()
+
+
+class _MockQuarantines(object):
+
+    rows = [
+        {'entity_id': 1, 'quarantine_type': Q_NOLOGIN},
+        {'entity_id': 2, 'quarantine_type': Q_SKIP},
+        {'entity_id': 3, 'quarantine_type': Q_SYSTEM},
+        {'entity_id': 3, 'quarantine_type': Q_SKIP},
+        {'entity_id': 4, 'quarantine_type': Q_UNKNOWN},
+    ]
+
+    def __init__(self, db):
+        pass
+
+    def list_entity_quarantines(self, **kwargs):
+        return list(self.rows)
+
+
+@pytest.fixture
+def mock_eq(monkeypatch):
+    monkeypatch.setattr(qh_module.Entity, 'EntityQuarantine',
+                        _MockQuarantines)
+
+
+def test_get_quarantine_decisions(mock_eq):
+    decisions = QuarantineHandler.get_quarantine_decisions(None)
+    assert decisions == {
+        1: QuarantineDecision(True, False, 'nologin-shell'),
+        2: QuarantineDecision(False, True, None),
+        3: QuarantineDecision(True, True, 'nologin-shell2'),
+        4: NO_QUARANTINE,
+    }
+
+
+def test_get_quarantine_decisions_spread(mock_eq):
+    decisions = QuarantineHandler.get_quarantine_decisions(
+        None, rule_spreads=[SPREAD_AD])
+    assert decisions[3] == QuarantineDecision(False, True, 'ad-shell')
+
+
+def test_get_locked_entities(mock_eq):
+    assert QuarantineHandler.get_locked_entities(None) == set((1, 3))
@@ -0,0 +1,104 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.testutils.benchmark` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import itertools
+
+import pytest
+
+from Cerebrum.testutils import benchmark
+
+
+class _Counter(object):
+    """ A query counter that counts one query per run. """
+
+    runs = 0
+
+    def __init__(self, db):
+        self.count = 0
+
+    def __enter__(self):
+        _Counter.runs += 1
+        self.count = _Counter.runs
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def _timer(times=itertools.count()):
+    # each call is one second later than the previous call
+    return next(times)
+
+
+def _measure(func, **kwargs):
+    _Counter.runs = 0
+    return benchmark.measure(func, timer=_timer, counter_cls=_Counter,
+                             **kwargs)
+
+
+def test_measure():
+    result, value = _measure(lambda x: x * 2, args=(3,), rounds=3,
+                             name='double')
+    assert value == 6
+    assert result.name == 'double'
+    assert result.rounds == 3
+    assert result.min == result.max == result.mean == 1
+    # highest count from a single round
+    assert result.queries == 3
+
+
+def test_measure_default_name():
+    def foo():
+        pass
+
+    result, _ = _measure(foo, rounds=1)
+    assert result.name == 'foo'
+
+
+def test_measure_invalid_rounds():
+    with pytest.raises(ValueError):
+        _measure(lambda: None, rounds=0)
+
+
+def _make(name='foo', min_time=1.0, queries=10):
+    return benchmark.Measurement(name=name, rounds=3, min=min_time,
+                                 mean=min_time, max=min_time,
+                                 queries=queries)
+
+
+def test_compare_ok():
+    assert benchmark.compare(_make(min_time=1.2), _make(),
+                             tolerance=0.25) == []
+
+
+def test_compare_slow():
+    problems = benchmark.compare(_make(min_time=1.3), _make(),
+                                 tolerance=0.25)
+    assert len(problems) == 1
+    assert 'baseline is 1.000s' in problems[0]
+
+
+def test_compare_queries():
+    problems = benchmark.compare(_make(queries=11), _make())
+    assert len(problems) == 1
+    assert '11 queries' in problems[0]
+
+
+def test_baseline(tmpdir):
+    filename = str(tmpdir.join('baseline.json'))
+    measurements = [_make('foo'), _make('bar', queries=3)]
+    benchmark.save_baseline(filename, measurements, metadata={'scale': 2})
+    baseline = benchmark.load_baseline(filename)
+    assert baseline == {'foo': measurements[0], 'bar': measurements[1]}
+
+
+def test_baseline_version(tmpdir):
+    filename = tmpdir.join('baseline.json')
+    filename.write('{"version": 0, "benchmarks": {}}')
+    with pytest.raises(ValueError):
+        benchmark.load_baseline(str(filename))
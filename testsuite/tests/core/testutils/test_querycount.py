@@ -0,0 +1,78 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.testutils.querycount` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.testutils.querycount import QueryCounter
+
+
+class _Cursor(object):
+
+    def __init__(self, db):
+        self._db = db
+        self.executed = []
+
+    def execute(self, operation, parameters=()):
+        self.executed.append(operation)
+
+
+class _SubCursor(_Cursor):
+    pass
+
+
+def test_count():
+    cursor = _Cursor('db')
+    with QueryCounter(cursor_cls=_Cursor) as counter:
+        cursor.execute('foo')
+        cursor.execute('bar')
+        cursor.execute('foo')
+    assert counter.count == 3
+    assert counter.most_common(1) == [('foo', 2)]
+    # statements are still executed
+    assert cursor.executed == ['foo', 'bar', 'foo']
+
+
+def test_stop():
+    cursor = _Cursor('db')
+    with QueryCounter(cursor_cls=_Cursor) as counter:
+        cursor.execute('foo')
+    cursor.execute('bar')
+    assert counter.statements == ['foo']
+    assert 'execute' in vars(_Cursor)
+    assert cursor.executed == ['foo', 'bar']
+
+
+def test_inherited_execute():
+    cursor = _SubCursor('db')
+    with QueryCounter(cursor_cls=_SubCursor) as counter:
+        cursor.execute('foo')
+    assert counter.count == 1
+    assert 'execute' not in vars(_SubCursor)
+
+
+def test_filter_db():
+    with QueryCounter(db='a', cursor_cls=_Cursor) as counter:
+        _Cursor('a').execute('foo')
+        _Cursor('b').execute('bar')
+    assert counter.statements == ['foo']
+
+
+def test_reset():
+    with QueryCounter(cursor_cls=_Cursor) as counter:
+        _Cursor('db').execute('foo')
+        counter.reset()
+        _Cursor('db').execute('bar')
+    assert counter.statements == ['bar']
+
+
+def test_start_twice():
+    counter = QueryCounter(cursor_cls=_Cursor)
+    with counter:
+        with pytest.raises(RuntimeError):
+            counter.start()
@@ -0,0 +1,208 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.utils.http_fetch` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import os
+import threading
+import time
+
+import pytest
+
+from Cerebrum.testutils import file_utils
+from Cerebrum.testutils.http_server import FakeHttpServer
+from Cerebrum.utils import http_fetch
+
+
+@pytest.fixture
+def server():
+    with FakeHttpServer(delay=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def cache_dir():
+    with file_utils.tempdir_ctx(prefix='test-http-fetch-') as path:
+        yield path
+
+
+#
+# iter_concurrent tests
+#
+
+
+def test_iter_concurrent_order():
+    def func(value):
+        # make later items complete first
+        time.sleep(0.001 * (20 - value))
+        return value * 2
+
+    result = list(http_fetch.iter_concurrent(func, range(20), workers=4))
+    assert result == [value * 2 for value in range(20)]
+
+
+def test_iter_concurrent_inline():
+    threads = set()
+
+    def func(value):
+        threads.add(threading.current_thread())
+        return value
+
+    result = list(http_fetch.iter_concurrent(func, range(5), workers=0))
+    assert result == list(range(5))
+    assert threads == set((threading.current_thread(),))
+
+
+def test_iter_concurrent_error():
+    def func(value):
+        if value == 3:
+            raise ValueError('bad value')
+        return value
+
+    results = http_fetch.iter_concurrent(func, range(10), workers=2)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_iter_concurrent_bounded():
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def func(value):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return value
+
+    list(http_fetch.iter_concurrent(func, range(20), workers=3))
+    assert active[1] == 3
+
+
+#
+# prefetch_iter tests
+#
+
+
+def test_prefetch_iter():
+    assert list(http_fetch.prefetch_iter(iter(range(10)), size=2)) == list(
+        range(10))
+
+
+def test_prefetch_iter_ahead():
+    produced = []
+
+    def produce():
+        for value in range(5):
+            produced.append(value)
+            yield value
+
+    items = http_fetch.prefetch_iter(produce(), size=2)
+    time.sleep(0.1)
+    # buffer is full (2), and a third item waits to be put in the buffer
+    assert produced == [0, 1, 2]
+    assert list(items) == list(range(5))
+
+
+def test_prefetch_iter_error():
+    def produce():
+        yield 1
+        raise ValueError('bad page')
+
+    items = http_fetch.prefetch_iter(produce())
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)
+
+
+#
+# HttpCache tests
+#
+
+
+def test_session_pool_size():
+    session = http_fetch.get_session(8)
+    adapter = session.get_adapter('http://localhost')
+    assert adapter._pool_maxsize == 8
+
+
+def test_cache_etag(server, cache_dir):
+    server.add_json('/foo', {'foo': 'bar'}, etag='"1"')
+    cache = http_fetch.HttpCache(cache_dir)
+    session = http_fetch.get_session()
+    url = server.url + '/foo'
+
+    first = cache.request(session, url)
+    second = cache.request(session, url)
+
+    assert first.json() == second.json() == {'foo': 'bar'}
+    assert second.status_code == 200
+    assert second.headers['ETag'] == '"1"'
+    assert server.count('/foo', status=200) == 1
+    assert server.count('/foo', status=304) == 1
+    assert cache.stats['hit'] == 1
+
+
+def test_cache_last_modified(server, cache_dir):
+    modified = 'Mon, 01 Jan 2024 00:00:00 GMT'
+    server.add_json('/foo', [1, 2, 3], query={'page': '2'},
+                    last_modified=modified)
+    cache = http_fetch.HttpCache(cache_dir)
+    session = http_fetch.get_session()
+    url = server.url + '/foo'
+
+    cache.request(session, url, params={'page': '2'})
+    response = cache.request(session, url, params={'page': '2'})
+
+    assert response.json() == [1, 2, 3]
+    assert server.count('/foo', query={'page': '2'}, status=304) == 1
+
+
+def test_cache_changed(server, cache_dir):
+    server.add_json('/foo', {'version': 1}, etag='"1"')
+    cache = http_fetch.HttpCache(cache_dir)
+    session = http_fetch.get_session()
+    url = server.url + '/foo'
+
+    cache.request(session, url)
+    server.add_json('/foo', {'version': 2}, etag='"2"')
+    assert cache.request(session, url).json() == {'version': 2}
+    assert cache.request(session, url).json() == {'version': 2}
+    assert server.count('/foo', status=200) == 2
+    assert server.count('/foo', status=304) == 1
+
+
+def test_cache_no_validator(server, cache_dir):
+    server.add_json('/foo', {'foo': 'bar'})
+    cache = http_fetch.HttpCache(cache_dir)
+    session = http_fetch.get_session()
+
+    cache.request(session, server.url + '/foo')
+    cache.request(session, server.url + '/foo')
+    assert server.count('/foo', status=200) == 2
+    assert os.listdir(cache_dir) == []
+
+
+def test_concurrent_speedup(server):
+    for value in range(20):
+        server.add_json('/obj/{:d}'.format(value), {'id': value})
+    session = http_fetch.get_session(5)
+
+    def fetch(value):
+        url = server.url + '/obj/{:d}'.format(value)
+        return session.get(url).json()['id']
+
+    start = time.time()
+    result = list(http_fetch.iter_concurrent(fetch, range(20), workers=5))
+    elapsed = time.time() - start
+
+    assert result == list(range(20))
+    assert server.max_active == 5
+    # 20 requests * 0.05s delay / 5 workers = 0.2s (vs. 1s in sequence)
+    assert elapsed < 0.6
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for mod:`Cerebrum.utils.importtime`
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import io
+import os
+import sys
+
+import pytest
+
+from Cerebrum.utils import importtime
+
+
+MODULES = {
+    'imptime_a6e1': 'import imptime_b6e1\n',
+    'imptime_b6e1': 'import json\nvalue = 1\n',
+}
+
+
+@pytest.fixture
+def module_dir(tmpdir, monkeypatch):
+    """ A directory with two importable modules, a imports b. """
+    for name, source in MODULES.items():
+        filename = os.path.join(str(tmpdir), name + '.py')
+        with io.open(filename, 'w', encoding='ascii') as f:
+            f.write(source)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    yield str(tmpdir)
+    for name in MODULES:
+        sys.modules.pop(name, None)
+
+
+class _Timer(object):
+    """ A timer that ticks one second every time it's read. """
+
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        self.value += 1
+        return self.value
+
+
+def test_profile_imports(module_dir):
+    with importtime.ImportProfiler(timer=_Timer()) as profiler:
+        __import__('imptime_a6e1')
+
+    by_name = dict((r.name, r) for r in profiler.results)
+    assert set(by_name) == set(('imptime_a6e1', 'imptime_b6e1'))
+    a = by_name['imptime_a6e1']
+    b = by_name['imptime_b6e1']
+    assert a.depth == 0
+    assert b.depth == 1
+    assert a.cumulative > b.cumulative
+    assert a.self == a.cumulative - b.cumulative
+    assert profiler.total == a.cumulative
+
+
+def test_profile_cached_import(module_dir):
+    __import__('imptime_b6e1')
+    with importtime.ImportProfiler() as profiler:
+        __import__('imptime_b6e1')
+    assert profiler.results == []
+
+
+def test_profiler_restores_import():
+    import six
+    original = six.moves.builtins.__import__
+    with importtime.ImportProfiler():
+        assert six.moves.builtins.__import__ is not original
+    assert six.moves.builtins.__import__ is original
+
+
+def test_format_report():
+    results = [
+        importtime.ImportTime('foo', 0.5, 0.1, 0),
+        importtime.ImportTime('bar', 0.4, 0.4, 1),
+    ]
+    lines = importtime.format_report(results, sort='self').splitlines()
+    assert len(lines) == 3
+    assert lines[1].split() == ['400000', '400000', 'bar']
+    assert lines[2].split() == ['100000', '500000', 'foo']
+
+
+def test_format_report_limit():
+    results = [
+        importtime.ImportTime('foo', 0.5, 0.1, 0),
+        importtime.ImportTime('bar', 0.4, 0.4, 1),
+    ]
+    lines = importtime.format_report(results, limit=1).splitlines()
+    assert lines[1].split()[-1] == 'foo'
+    assert len(lines) == 2
+
+
+def test_format_report_invalid_sort():
+    with pytest.raises(ValueError):
+        importtime.format_report([], sort='foo')
+
+
+def test_main(module_dir, capsys):
+    importtime._main(['imptime_a6e1'])
+    out, _ = capsys.readouterr()
+    assert 'imptime_a6e1' in out
+    assert 'imptime_b6e1' in out
+    assert '2 modules' in out
@@ -271,3 +271,59 @@ def test_make_class_invalid_spec_order(test_module):
 
     msg = six.text_type(exc_info.value)
     assert "should appear earlier" in msg
+
+
+#
+# module_exists tests
+#
+
+
+def test_module_exists():
+    assert modutils.module_exists('json')
+
+
+def test_module_exists_submodule():
+    assert modutils.module_exists('Cerebrum.utils.module')
+
+
+def test_module_exists_missing():
+    assert not modutils.module_exists('no_such_module_6f9a1c')
+
+
+#
+# lazy_import tests
+#
+
+
+def test_lazy_module_not_loaded():
+    lazy = modutils.LazyModule('json')
+    assert not lazy.is_loaded
+    assert lazy.__name__ == 'json'
+
+
+def test_lazy_module_load(test_module):
+    lazy = modutils.LazyModule(__name__)
+    assert lazy.noop is noop
+    assert lazy.is_loaded
+
+
+def test_lazy_module_missing_attr():
+    lazy = modutils.LazyModule('json')
+    with pytest.raises(AttributeError):
+        lazy.no_such_attr
+
+
+def test_lazy_module_missing_module():
+    lazy = modutils.LazyModule('no_such_module_6f9a1c')
+    with pytest.raises(ImportError):
+        lazy.foo
+
+
+def test_lazy_import_imported(test_module):
+    assert modutils.lazy_import(__name__) is test_module
+
+
+def test_lazy_import_new():
+    lazy = modutils.lazy_import('no_such_module_6f9a1c')
+    assert isinstance(lazy, modutils.LazyModule)
+    assert 'no_such_module_6f9a1c' not in sys.modules
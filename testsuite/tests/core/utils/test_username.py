@@ -96,3 +96,46 @@ def test_suggest_usernames_validate():
     )
     assert candidates
     assert all(c[-1].isdigit() for c in candidates)
+
+
+def test_suggest_usernames_validate_many():
+    taken = set(("foobar", "fbar", "foob"))
+    batches = []
+
+    def validate_many(unames):
+        batches.append(list(unames))
+        return [u for u in unames if u not in taken]
+
+    candidates = username.suggest_usernames("Foo", "Bar",
+                                            validate_many=validate_many,
+                                            batch_size=10)
+    expected = username.suggest_usernames(
+        "Foo", "Bar",
+        validate_func=(lambda s: s not in taken),
+    )
+    assert candidates == expected
+    assert not taken & set(candidates)
+    assert all(len(batch) >= 10 for batch in batches[:-1])
+
+
+def test_suggest_usernames_validate_lazy():
+    checked = []
+
+    def validate_func(uname):
+        checked.append(uname)
+        return True
+
+    candidates = username.suggest_usernames("Geir-Ove Johnsen", "Hansen",
+                                            validate_func=validate_func)
+    # the numbered usernames are never needed, and never checked
+    assert not any(c[-1].isdigit() for c in checked)
+    assert set(checked) == set(candidates)
+
+
+def test_snapshot():
+    snapshot = username.UsernameSnapshot(["foo", "bar"])
+    snapshot.add("baz")
+    assert len(snapshot) == 3
+    assert "baz" in snapshot
+    assert snapshot.filter_free(["quux", "foo", "baz", "abc"]) == [
+        "quux", "abc"]
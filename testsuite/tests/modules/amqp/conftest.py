@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Test fixtures for :mod:`Cerebrum.modules.amqp` tests.
+
+The :class:`FakeChannel` acts as an in-process broker channel: it delivers
+messages to consumers, and keeps track of which messages are unacked,
+acked, and requeued.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+
+import pika
+import pytest
+
+
+class FakeIoLoop(object):
+    """ An ioloop where timers are fired manually. """
+
+    def __init__(self):
+        self.timers = {}
+        self._next = 0
+
+    def call_later(self, delay, callback):
+        self._next += 1
+        self.timers[self._next] = (delay, callback)
+        return self._next
+
+    def remove_timeout(self, handle):
+        self.timers.pop(handle, None)
+
+    def fire(self):
+        """ Run all pending timers. """
+        timers = list(self.timers.values())
+        self.timers.clear()
+        for _, callback in timers:
+            callback()
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.ioloop = FakeIoLoop()
+
+
+class FakeChannel(object):
+    """ A channel that records consumers, qos and acks. """
+
+    def __init__(self, channel_number=1):
+        self.channel_number = channel_number
+        self.connection = FakeConnection()
+        self.consumers = collections.OrderedDict()
+        self.qos = None
+        self.unacked = collections.OrderedDict()
+        self.acked = []
+        self.requeued = []
+        self.rejected = []
+        self.ack_calls = []
+        self._tag = 0
+
+    def __int__(self):
+        return self.channel_number
+
+    @property
+    def consumer_tags(self):
+        return list(self.consumers)
+
+    def basic_qos(self, prefetch_size=0, prefetch_count=0, callback=None):
+        self.qos = (prefetch_count, prefetch_size)
+        if callback:
+            callback(None)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False,
+                      consumer_tag=None):
+        consumer_tag = consumer_tag or 'ctag-{:d}'.format(len(self.consumers))
+        self.consumers[consumer_tag] = on_message_callback
+        return consumer_tag
+
+    def deliver(self, body, consumer_tag=None, redelivered=False):
+        """ Deliver a message to a consumer. """
+        if consumer_tag is None:
+            consumer_tag = next(iter(self.consumers))
+        self._tag += 1
+        method = pika.spec.Basic.Deliver(consumer_tag=consumer_tag,
+                                         delivery_tag=self._tag,
+                                         redelivered=redelivered,
+                                         routing_key='test')
+        props = pika.BasicProperties(app_id='test')
+        self.unacked[self._tag] = body
+        self.consumers[consumer_tag](self, method, props, body)
+        return self._tag
+
+    def _settle(self, delivery_tag, multiple):
+        if delivery_tag not in self.unacked:
+            raise RuntimeError('unknown delivery tag: %r' % (delivery_tag,))
+        if multiple:
+            tags = [t for t in self.unacked if t <= delivery_tag]
+        else:
+            tags = [delivery_tag]
+        return [(t, self.unacked.pop(t)) for t in tags]
+
+    def basic_ack(self, delivery_tag=0, multiple=False):
+        self.ack_calls.append((delivery_tag, multiple))
+        self.acked.extend(body for _, body in
+                          self._settle(delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag=0, multiple=False, requeue=True):
+        for _, body in self._settle(delivery_tag, multiple):
+            if requeue:
+                self.requeued.append(body)
+            else:
+                self.rejected.append(body)
+
+
+@pytest.fixture
+def channel():
+    return FakeChannel()
+
+
+@pytest.fixture
+def other_channel():
+    return FakeChannel(2)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for qos and batch handling in :mod:`Cerebrum.modules.amqp`.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from Cerebrum.modules.amqp import config
+from Cerebrum.modules.amqp.consumer import ChannelListeners, ChannelSetup
+from Cerebrum.modules.amqp.handlers import AbstractBatchConsumerHandler
+
+
+class _BatchHandler(AbstractBatchConsumerHandler):
+    """ Collects handled message bodies, fails on b'bad'. """
+
+    def __init__(self, fail_batch=False, **kwargs):
+        super(_BatchHandler, self).__init__(**kwargs)
+        self.fail_batch = fail_batch
+        self.batches = []
+        self.handled = []
+
+    def handle_batch(self, events):
+        self.batches.append([e.body for e in events])
+        if self.fail_batch and any(e.body == b'bad' for e in events):
+            raise RuntimeError('bad batch')
+        return super(_BatchHandler, self).handle_batch(events)
+
+    def handle(self, event):
+        if event.body == b'bad':
+            raise ValueError('bad message')
+        self.handled.append(event.body)
+
+
+def _consume(channel, handler, queues=('q',)):
+    listeners = ChannelListeners()
+    for queue in queues:
+        listeners.set_listener(queue, handler)
+    listeners(channel)
+
+
+#
+# qos
+#
+
+
+def test_setup_qos(channel):
+    setup = ChannelSetup(flags=ChannelSetup.Flags.QOS, prefetch_count=50)
+    setup(channel)
+    assert channel.qos == (50, 0)
+
+
+def test_setup_no_qos(channel):
+    setup = ChannelSetup()
+    setup(channel)
+    assert channel.qos is None
+
+
+def test_config_qos():
+    conf = config.ConsumerConfig()
+    conf.load_dict({'prefetch_count': 20, 'batch_size': 10})
+    conf.validate()
+    assert conf.prefetch_count == 20
+    assert conf.prefetch_size is None
+    assert conf.batch_size == 10
+
+
+#
+# batches
+#
+
+
+def test_batch_by_size(channel):
+    handler = _BatchHandler(batch_size=3)
+    _consume(channel, handler)
+    for body in (b'a', b'b', b'c', b'd'):
+        channel.deliver(body)
+
+    assert handler.batches == [[b'a', b'b', b'c']]
+    assert channel.acked == [b'a', b'b', b'c']
+    # one ack for the entire batch
+    assert channel.ack_calls == [(3, True)]
+    assert list(channel.unacked.values()) == [b'd']
+
+
+def test_batch_by_timeout(channel):
+    handler = _BatchHandler(batch_size=10, batch_timeout=0.5)
+    _consume(channel, handler)
+    channel.deliver(b'a')
+    channel.deliver(b'b')
+    assert handler.batches == []
+    assert len(channel.connection.ioloop.timers) == 1
+
+    channel.connection.ioloop.fire()
+    assert handler.batches == [[b'a', b'b']]
+    assert channel.acked == [b'a', b'b']
+    assert not channel.unacked
+
+
+def test_batch_timer_cancelled(channel):
+    handler = _BatchHandler(batch_size=2)
+    _consume(channel, handler)
+    channel.deliver(b'a')
+    channel.deliver(b'b')
+    assert not channel.connection.ioloop.timers
+    assert handler.batches == [[b'a', b'b']]
+
+
+def test_poisoned_message(channel):
+    handler = _BatchHandler(batch_size=3)
+    _consume(channel, handler)
+    for body in (b'a', b'bad', b'c'):
+        channel.deliver(body)
+
+    assert handler.handled == [b'a', b'c']
+    assert channel.requeued == [b'bad']
+    assert channel.acked == [b'a', b'c']
+    assert not channel.unacked
+
+
+def test_poisoned_message_redelivered(channel):
+    handler = _BatchHandler(batch_size=2)
+    _consume(channel, handler)
+    channel.deliver(b'bad', redelivered=True)
+    channel.deliver(b'a')
+
+    assert channel.rejected == [b'bad']
+    assert channel.requeued == []
+    assert channel.acked == [b'a']
+
+
+def test_failed_batch_retried(channel):
+    handler = _BatchHandler(batch_size=3, fail_batch=True)
+    _consume(channel, handler)
+    for body in (b'a', b'bad', b'c'):
+        channel.deliver(body)
+
+    # the batch failed, and each message was retried by itself
+    assert handler.batches == [[b'a', b'bad', b'c']]
+    assert handler.handled == [b'a', b'c']
+    assert channel.requeued == [b'bad']
+    assert channel.acked == [b'a', b'c']
+
+
+def test_shared_channel(channel):
+    handler = _BatchHandler(batch_size=2)
+    other = []
+    _consume(channel, handler)
+    listeners = ChannelListeners()
+    listeners.set_listener('other', lambda *args: other.append(args[3]))
+    listeners(channel)
+    first, second = channel.consumer_tags
+
+    channel.deliver(b'x', consumer_tag=second)
+    channel.deliver(b'a', consumer_tag=first)
+    channel.deliver(b'b', consumer_tag=first)
+
+    # no multiple ack - that would include the other consumer's message
+    assert channel.acked == [b'a', b'b']
+    assert channel.ack_calls == [(2, False), (3, False)]
+    assert list(channel.unacked.values()) == [b'x']
+
+
+def test_new_channel_drops_batch(channel, other_channel):
+    handler = _BatchHandler(batch_size=2)
+    _consume(channel, handler)
+    channel.deliver(b'a')
+
+    new_channel = other_channel
+    _consume(new_channel, handler)
+    new_channel.deliver(b'b')
+    new_channel.deliver(b'c')
+
+    assert handler.batches == [[b'b', b'c']]
+    assert not channel.connection.ioloop.timers
+    assert new_channel.acked == [b'b', b'c']
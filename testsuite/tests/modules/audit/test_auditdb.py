@@ -12,6 +12,7 @@ import pytest
 import six
 
 from Cerebrum.modules.audit import auditdb
+from Cerebrum.modules.audit.record import AuditRecord
 from Cerebrum.utils import date as date_utils
 
 
@@ -75,6 +76,23 @@ def test_insert(record_id):
     assert record_id > 0
 
 
+def test_insert_many(database, clconst, operator_id, group):
+    records = [
+        AuditRecord(clconst.group_mod, operator_id, group.entity_id,
+                    params={'n': n})
+        for n in range(5)
+    ]
+    assert auditdb.sql_insert_many(database, records, batch_size=2) == 5
+    results = list(auditdb.sql_search(database,
+                                      entities=int(group.entity_id),
+                                      change_types=clconst.group_mod,
+                                      fetchall=True))
+    assert len(results) == 5
+    # record ids are allocated in order
+    by_id = sorted(results, key=lambda r: r['record_id'])
+    assert [r['params']['n'] for r in by_id] == list(range(5))
+
+
 #
 # test get
 #
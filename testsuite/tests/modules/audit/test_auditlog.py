@@ -80,6 +80,41 @@ def test_builder_build_meta(builder, group, initial_account):
     }
 
 
+def test_builder_resolve_entities(builder, group, initial_account):
+    queries = []
+    query = builder.query
+
+    def counting_query(*args, **kwargs):
+        queries.append(args)
+        return query(*args, **kwargs)
+
+    builder.query = counting_query
+    for _ in range(3):
+        builder(group.entity_id, builder.clconst.group_add,
+                initial_account.entity_id, {}, initial_account.entity_id,
+                __name__)
+    # operator, subject and target are all looked up in one query
+    assert len(queries) == 1
+    assert builder._get_type(group.entity_id) == six.text_type(
+        builder.const.entity_group)
+    assert builder._get_name(group.entity_id, builder.const.entity_group) == (
+        group.group_name)
+
+
+def test_builder_resolve_missing(builder):
+    builder.resolve_entities([-1])
+    assert builder._get_type(-1) is None
+    assert builder._get_name(-1, None) is None
+
+
+def test_builder_volatile_change(builder, group, initial_account):
+    builder.resolve_entities([group.entity_id])
+    group.update_entity_name(builder.const.group_namespace, 'new-group-name')
+    record = builder(group.entity_id, builder.clconst.entity_name_mod, None,
+                     {}, initial_account.entity_id, __name__)
+    assert record.metadata['entity_name'] == 'new-group-name'
+
+
 def test_build_params_account_create(builder, initial_account):
     params = {
         'np_type': int(builder.const.account_program),
@@ -161,9 +196,11 @@ def test_auditlog_write_log(database, log, clconst, group, initial_account):
     )
     assert len(log.records) == 1
 
-    # Check that the queue is cleared after writing
+    # Check that the queue and cache is cleared after writing
+    builder = log.record_builder
     log.write_log()
     assert len(log.records) == 0
+    assert log.record_builder is not builder
 
     # Check that the record is written
     results = auditdb.sql_search(database,
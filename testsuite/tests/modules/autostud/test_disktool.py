@@ -0,0 +1,135 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.no.uio.AutoStud.DiskTool` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import random
+
+import pytest
+
+try:
+    from Cerebrum.modules.no.uio.AutoStud.DiskTool import (
+        CerebrumDisk,
+        DiskDef,
+        DiskPool,
+        DiskSorters,
+        DiskTool,
+    )
+except (ImportError, AssertionError):
+    # AutoStud needs a UiO-like configuration (e.g. PosixGroup)
+    pytest.skip('AutoStud is not available', allow_module_level=True)
+
+
+class _DiskTool(DiskTool):
+    """ DiskTool with the given disks, rather than disks from the db. """
+
+    def __init__(self, disks):
+        self._cerebrum_disks = dict((cd.disk_id, cd) for cd in disks)
+
+
+class _ListDiskDef(DiskSorters):
+    """ The previous, list based DiskDef lookup. """
+
+    def __init__(self, disks, max):
+        self._disks = disks
+        self.max = max
+        self._disk_name_order = list(self._disks)
+        self._disk_name_order.sort(key=self._disk_sort_by_name_key)
+        self._disk_count_order = list(self._disks)
+        self._resort_disk_count()
+
+    def _resort_disk_count(self):
+        self._disk_count_order.sort(key=self._disk_sort_by_count_key)
+
+    def get_cerebrum_disk(self, orderby):
+        if orderby == 'name':
+            order = self._disk_name_order
+        else:
+            self._resort_disk_count()
+            order = self._disk_count_order
+        return self.post_filter_search_res(order, orderby, max=self.max)
+
+
+def _make_disks(rnd, prefixes, count):
+    disks = []
+    for disk_id in rnd.sample(range(1, 10 * count), count):
+        path = '{}{}'.format(rnd.choice(prefixes), rnd.randint(1, 30))
+        disks.append(CerebrumDisk(disk_id, path,
+                                           rnd.choice((0, 0, 1, 2, 5))))
+    return disks
+
+
+def _disk_id(cd):
+    return None if cd is None else cd.disk_id
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_disk_def_same_as_list(seed):
+    rnd = random.Random(seed)
+    prefixes = ('/uio/a/', '/uio/b/')
+    tool = _DiskTool(_make_disks(rnd, prefixes, rnd.randint(1, 40)))
+    ddefs = [
+        DiskDef(tool, prefix=prefix, spreads=[],
+                         max=rnd.choice((-1, 3, 6)), orderby='count')
+        for prefix in prefixes]
+    refs = [_ListDiskDef(ddef._disks, ddef.max) for ddef in ddefs]
+    disk_ids = list(tool._cerebrum_disks)
+
+    for _ in range(500):
+        action = rnd.random()
+        if action < 0.4:
+            old = rnd.choice(disk_ids + [None])
+            new = rnd.choice(disk_ids + [None])
+            tool.notify_used_disk(old=old, new=new)
+        else:
+            orderby = 'count' if action < 0.8 else 'name'
+            for ddef, ref in zip(ddefs, refs):
+                expected = ref.get_cerebrum_disk(orderby)
+                result = ddef.get_cerebrum_disk(_orderby=orderby)
+                assert _disk_id(result) == _disk_id(expected)
+
+
+def test_prefer_non_empty():
+    disks = [CerebrumDisk(1, '/uio/a/1', 0),
+             CerebrumDisk(2, '/uio/a/2', 3)]
+    tool = _DiskTool(disks)
+    ddef = DiskDef(tool, prefix='/uio/a/', spreads=[], max=4,
+                            orderby='count')
+    assert ddef.get_cerebrum_disk().disk_id == 2
+    tool.notify_used_disk(new=2)
+    assert ddef.get_cerebrum_disk().disk_id == 1
+    tool.notify_used_disk(new=1)
+    assert ddef.get_cerebrum_disk().disk_id == 1
+
+
+def test_name_order_full():
+    disks = [CerebrumDisk(1, '/uio/a/10', 0),
+             CerebrumDisk(2, '/uio/a/9', 1)]
+    tool = _DiskTool(disks)
+    ddef = DiskDef(tool, prefix='/uio/a/', spreads=[], max=2)
+    assert ddef.get_cerebrum_disk().disk_id == 2
+    tool.notify_used_disk(new=2)
+    assert ddef.get_cerebrum_disk().disk_id == 1
+    tool.notify_used_disk(new=1)
+    tool.notify_used_disk(new=1)
+    assert ddef.get_cerebrum_disk() is None
+    tool.notify_used_disk(old=2)
+    assert ddef.get_cerebrum_disk().disk_id == 2
+
+
+def test_disk_pool_count():
+    disks = [CerebrumDisk(1, '/uio/a/1', 4),
+             CerebrumDisk(2, '/uio/b/1', 2)]
+    tool = _DiskTool(disks)
+    pool = DiskPool(tool, 'pool', orderby='count')
+    for prefix in ('/uio/a/', '/uio/b/'):
+        pool.add_disk_def(DiskDef(tool, prefix=prefix, spreads=[],
+                                           max=-1))
+    pool.post_process()
+    assert pool.get_cerebrum_disk().disk_id == 2
+    tool.notify_used_disk(old=1, new=2)
+    tool.notify_used_disk(old=1, new=2)
+    assert pool.get_cerebrum_disk().disk_id == 1
@@ -14,6 +14,7 @@ import six
 
 from Cerebrum.modules.consent import Consent
 from Cerebrum.modules.consent import ConsentConstants
+from Cerebrum.modules.consent import consent_export
 
 
 @pytest.fixture
@@ -121,3 +122,46 @@ def test_mixin_remove_consent(database, entity, consent_foo):
     assert entity.get_consent_status(consent_foo) is not None
     entity.write_db()
     assert entity.get_consent_status(consent_foo) is None
+
+
+def test_select_consent_map(database, entity, consent_foo, consent_bar):
+    Consent.sql_insert_consent(database, entity.entity_id, consent_foo)
+    Consent.sql_insert_consent(database, entity.entity_id, consent_bar)
+
+    results = Consent.sql_select_consent_map(database,
+                                             entity_type=entity.entity_type)
+    assert set(results) == set((entity.entity_id,))
+    consents = results[entity.entity_id]
+    assert set(consents) == set((int(consent_foo), int(consent_bar)))
+    consent_type, set_at = consents[int(consent_foo)]
+    assert consent_type == int(consent_foo.consent_type)
+    assert set_at
+
+
+def test_select_consent_map_set_at(database, entity, consent_foo):
+    Consent.sql_insert_consent(database, entity.entity_id, consent_foo)
+    set_at = Consent.sql_select_consents(
+        database, entity_id=entity.entity_id)[0]['set_at']
+
+    assert Consent.sql_select_consent_map(database,
+                                          entity_id=entity.entity_id,
+                                          set_before=set_at) == {}
+    assert Consent.sql_select_consent_map(database,
+                                          entity_id=entity.entity_id,
+                                          set_after=set_at) == {}
+
+
+def test_consent_cache(database, entity, consent_foo, consent_bar):
+    Consent.sql_insert_consent(database, entity.entity_id, consent_foo)
+    cache = consent_export.ConsentCache(database,
+                                        entity_type=entity.entity_type)
+    cache.update_all()
+    assert cache.has_consent(entity.entity_id, consent_foo)
+    assert not cache.has_consent(entity.entity_id, consent_bar)
+    assert cache.get_consents(0) == {}
+
+
+def test_consent_cache_lookup(database, entity, consent_foo):
+    Consent.sql_insert_consent(database, entity.entity_id, consent_foo)
+    cache = consent_export.ConsentCache(database, consent_code=consent_foo)
+    assert cache.has_consent(entity.entity_id, consent_foo)
@@ -0,0 +1,343 @@
+# encoding: utf-8
+"""
+Tests for :mod:`Cerebrum.modules.no.uio.exchange.group_flattener`
+
+The set based flattener is compared to a reference implementation, which
+looks up every member as an entity object, like the flattener used to do.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+
+import pytest
+import six
+
+import cereconf
+from Cerebrum import Errors
+from Cerebrum.testutils import datasource
+from Cerebrum.modules.no.uio.exchange import group_flattener
+
+
+#
+# Reference implementation
+#
+
+
+def _ref_get_entity_name(db, entity_id):
+    try:
+        ent = group_flattener.get_entity(db, entity_id)
+        namespace = ent.const.ValueDomain(
+            cereconf.ENTITY_TYPE_NAMESPACE.get(
+                six.text_type(ent.const.EntityType(ent.entity_type)), None))
+        return ent.get_name(namespace)
+    except (AttributeError, TypeError, Errors.NotFoundError):
+        return None
+
+
+def _ref_get_primary_account(person):
+    return group_flattener.get_entity(person._db,
+                                      person.get_primary_account())
+
+
+def _ref_get_children(db, ent):
+    children = set()
+    for row in ent.search_members(group_id=ent.entity_id,
+                                  indirect_members=True):
+        if row['member_type'] == ent.const.entity_person:
+            account = _ref_get_primary_account(
+                group_flattener.get_entity(db, row['member_id']))
+            child = ((account.entity_id, account.account_name) if account
+                     else (None, None))
+        else:
+            child = (row['member_id'],
+                     _ref_get_entity_name(db, row['member_id']))
+        if child[0] and child[1]:
+            children.add(child)
+    return children
+
+
+def _ref_for_exchange(db, x, group_spread=None, account_spread=None):
+    e = group_flattener.get_entity(db, x[0])
+    if e.entity_type == e.const.entity_group:
+        return e.has_spread(group_spread)
+    elif e.entity_type == e.const.entity_account:
+        return e.has_spread(account_spread)
+    return False
+
+
+def _ref_get_candidates(db, co, member):
+    if member.entity_type == co.entity_group:
+        return _ref_get_children(db, member)
+    elif member.entity_type == co.entity_person:
+        account = _ref_get_primary_account(member)
+        return [(account.entity_id, account.account_name)] if account else []
+    elif member.entity_type == co.entity_account:
+        return [(member.entity_id, member.account_name)]
+    return []
+
+
+def _ref_add_operations(db, co, member, dest, group_spread, account_spread):
+    dests = group_flattener.get_destination_groups(dest, group_spread)
+    return (
+        set(x for x in dests
+            if _ref_for_exchange(db, x, group_spread=group_spread)),
+        set(x for x in _ref_get_candidates(db, co, member)
+            if _ref_for_exchange(db, x, account_spread=account_spread)),
+    )
+
+
+def _ref_remove_operations(db, co, member, dest, group_spread,
+                           account_spread):
+    to_rem = _ref_get_candidates(db, co, member)
+    if member.entity_type == co.entity_group:
+        to_rem = [x for x in to_rem
+                  if _ref_for_exchange(db, x, account_spread=account_spread)]
+    result = {}
+    for gid, gname in group_flattener.get_destination_groups(dest,
+                                                             group_spread):
+        if not _ref_for_exchange(db, (gid, gname), group_spread=group_spread):
+            continue
+        children = _ref_get_children(db, group_flattener.get_entity(db, gid))
+        result[(gid, gname)] = set(x for x in to_rem if x not in children)
+    return result
+
+
+#
+# Fixtures
+#
+
+
+@pytest.fixture
+def database(database):
+    database.cl_init(change_program='test_group_flattener')
+    return database
+
+
+@pytest.fixture
+def group_spread(constant_module, constant_creator, const):
+    return constant_creator(constant_module._SpreadCode, 'c86f0b6e6f1d',
+                            entity_type=const.entity_group,
+                            description='exchange group spread')
+
+
+@pytest.fixture
+def account_spread(constant_module, constant_creator, const):
+    return constant_creator(constant_module._SpreadCode, '2bd4c9a1d77e',
+                            entity_type=const.entity_account,
+                            description='exchange account spread')
+
+
+@pytest.fixture
+def affiliation(constant_module, constant_creator):
+    return constant_creator(constant_module._PersonAffiliationCode,
+                            'aff-5e0a2c66')
+
+
+@pytest.fixture
+def aff_status(constant_module, constant_creator, affiliation):
+    return constant_creator(constant_module._PersonAffStatusCode,
+                            affiliation, 'status-5e0a2c66')
+
+
+@pytest.fixture
+def source_system(constant_module, constant_creator):
+    return constant_creator(constant_module._AuthoritativeSystemCode,
+                            'sys-5e0a2c66')
+
+
+@pytest.fixture
+def ou(database, factory):
+    ou = factory.get('OU')(database)
+    ou.populate()
+    ou.write_db()
+    return ou
+
+
+@pytest.fixture
+def create_group(database, factory, const, initial_account):
+    group_ds = datasource.BasicGroupSource()
+
+    def _create(*spreads):
+        group_dict = next(group_ds(limit=1))
+        group = factory.get('Group')(database)
+        group.populate(
+            creator_id=initial_account.entity_id,
+            visibility=int(const.group_visibility_all),
+            name=group_dict['group_name'],
+            description=group_dict['description'],
+            group_type=int(const.group_type_manual),
+        )
+        group.write_db()
+        for spread in spreads:
+            group.add_spread(spread)
+        return group
+
+    return _create
+
+
+@pytest.fixture
+def create_account(database, factory, const, initial_account,
+                   initial_group):
+    account_ds = datasource.BasicAccountSource()
+
+    def _create(spread=None, owner=None, expire_date=None):
+        account_dict = next(account_ds(limit=1))
+        owner = owner or initial_group
+        account = factory.get('Account')(database)
+        account.populate(
+            account_dict['account_name'],
+            owner.entity_type,
+            owner.entity_id,
+            (None if owner.entity_type == const.entity_person
+             else const.account_program),
+            initial_account.entity_id,
+            expire_date,
+        )
+        account.write_db()
+        if spread is not None:
+            account.add_spread(spread)
+        return account
+
+    return _create
+
+
+@pytest.fixture
+def person(database, factory, const, ou, aff_status, source_system):
+    person_dict = next(datasource.BasicPersonSource()(limit=1))
+    person = factory.get('Person')(database)
+    person.populate(person_dict['birth_date'], const.gender_unknown)
+    person.write_db()
+    person.add_affiliation(ou.entity_id, aff_status.affiliation,
+                           source_system, aff_status)
+    return person
+
+
+class _Topology(object):
+    pass
+
+
+@pytest.fixture
+def topology(create_group, create_account, person, ou, aff_status,
+             group_spread, account_spread):
+    """
+    A small nested group structure:
+
+    ::
+
+        parent (spread)     other (no spread)
+             \\               /
+              dest (spread) ---- direct
+                |
+              member
+              /   |   \\
+        acc_a  expired  nested
+                        /  |   \\
+                  acc_b  acc_c  person -> primary, secondary
+    """
+    t = _Topology()
+    t.parent = create_group(group_spread)
+    t.other = create_group()
+    t.dest = create_group(group_spread)
+    t.member = create_group()
+    t.nested = create_group()
+
+    t.acc_a = create_account(account_spread)
+    t.acc_b = create_account(account_spread)
+    t.acc_c = create_account()
+    t.expired = create_account(account_spread,
+                               expire_date=datetime.date(2000, 1, 1))
+    t.direct = t.acc_b
+
+    t.person = person
+    t.primary = create_account(account_spread, owner=person)
+    t.primary.set_account_type(ou.entity_id, aff_status.affiliation, 10)
+    t.secondary = create_account(account_spread, owner=person)
+    t.secondary.set_account_type(ou.entity_id, aff_status.affiliation, 20)
+
+    t.parent.add_member(t.dest.entity_id)
+    t.other.add_member(t.dest.entity_id)
+    t.dest.add_member(t.direct.entity_id)
+    t.dest.add_member(t.member.entity_id)
+    for entity in (t.acc_a, t.expired, t.nested):
+        t.member.add_member(entity.entity_id)
+    for entity in (t.acc_b, t.acc_c, t.person):
+        t.nested.add_member(entity.entity_id)
+    return t
+
+
+#
+# Tests
+#
+
+
+def test_get_children(database, topology):
+    children = group_flattener.get_children(database, topology.dest)
+    assert children == _ref_get_children(database, topology.dest)
+    assert (topology.primary.entity_id,
+            topology.primary.account_name) in children
+    assert (topology.expired.entity_id,
+            topology.expired.account_name) not in children
+
+
+def test_get_primary_accounts(database, const, topology):
+    person_id = topology.person.entity_id
+    assert group_flattener.get_primary_accounts(
+        database, const, [person_id]) == {
+            person_id: (topology.primary.entity_id,
+                        topology.primary.account_name)}
+
+
+@pytest.mark.parametrize('member_attr', ['member', 'person', 'acc_a'])
+def test_add_operations(database, const, topology, group_spread,
+                        account_spread, member_attr):
+    member = getattr(topology, member_attr)
+    dests, candidates = group_flattener.add_operations(
+        database, const, member, topology.dest,
+        group_spread, account_spread)
+    assert (set(dests), set(candidates)) == _ref_add_operations(
+        database, const, member, topology.dest,
+        group_spread, account_spread)
+    assert (topology.other.entity_id,
+            topology.other.group_name) not in dests
+
+
+def test_add_operations_no_dest(database, const, topology, account_spread):
+    dests, candidates = group_flattener.add_operations(
+        database, const, topology.member, None, None, account_spread)
+    assert dests == []
+    assert set(candidates) == set(
+        (a.entity_id, a.account_name)
+        for a in (topology.acc_a, topology.acc_b, topology.primary))
+
+
+@pytest.mark.parametrize('member_attr', ['member', 'person', 'acc_a'])
+def test_remove_operations(database, const, topology, group_spread,
+                           account_spread, member_attr):
+    member = getattr(topology, member_attr)
+    container = (topology.dest if member_attr == 'member'
+                 else topology.member if member_attr == 'acc_a'
+                 else topology.nested)
+    container.remove_member(member.entity_id)
+
+    removals = group_flattener.remove_operations(
+        database, const, member, topology.dest,
+        group_spread, account_spread)
+    assert dict((k, set(v)) for k, v in removals.items()) == (
+        _ref_remove_operations(database, const, member, topology.dest,
+                               group_spread, account_spread))
+
+
+def test_remove_operations_keeps_direct(database, const, topology,
+                                        group_spread, account_spread):
+    topology.dest.remove_member(topology.member.entity_id)
+    removals = group_flattener.remove_operations(
+        database, const, topology.member, topology.dest,
+        group_spread, account_spread)
+    dest = (topology.dest.entity_id, topology.dest.group_name)
+    assert set(removals[dest]) == set(
+        (a.entity_id, a.account_name)
+        for a in (topology.acc_a, topology.primary))
@@ -0,0 +1,150 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.fs.person_cache` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+
+import pytest
+
+from Cerebrum import Errors
+from Cerebrum.modules.fs import person_cache
+
+
+SOURCE = 1
+ID_FNR = 10
+ID_STUDNR = 11
+NAME_FIRST = 20
+NAME_LAST = 21
+CONTACT_MOBILE = 30
+ADDR_POST = 40
+AFF_STUDENT = 50
+STATUS_AKTIV = 51
+STATUS_EVU = 52
+OU_ID = 60
+
+PERSON_ID = 1000
+FNR = '01017012345'
+STUDNR = '123456'
+
+
+@pytest.fixture
+def cache():
+    c = person_cache.FsPersonCache(
+        None, SOURCE,
+        id_types=(ID_FNR, ID_STUDNR),
+        name_variants=(NAME_FIRST, NAME_LAST),
+        contact_type=CONTACT_MOBILE)
+    # populate cache manually, as if loaded from the database
+    c._id_index[(ID_FNR, FNR)].add(PERSON_ID)
+    c._id_index[(ID_STUDNR, STUDNR)].add(PERSON_ID)
+    c._id_index[(ID_STUDNR, '999999')].add(PERSON_ID + 1)
+    state = c._get_state(PERSON_ID)
+    state.update({
+        'birth_date': datetime.date(1970, 1, 1),
+        'gender': 2,
+        'names': {NAME_FIRST: 'Ola', NAME_LAST: 'Nordmann'},
+        'external_ids': {ID_FNR: FNR, ID_STUDNR: STUDNR},
+        'addresses': {
+            ADDR_POST: ('Gate 1', None, '0123', 'Oslo', None),
+        },
+        'affiliations': {(OU_ID, AFF_STUDENT): STATUS_AKTIV},
+        'cellphones': set(('+4791234567',)),
+    })
+    return c
+
+
+@pytest.fixture
+def new_state():
+    return {
+        'birth_date': datetime.date(1970, 1, 1),
+        'gender': 2,
+        'names': {NAME_FIRST: 'Ola', NAME_LAST: 'Nordmann'},
+        'external_ids': {ID_FNR: FNR, ID_STUDNR: STUDNR},
+        'addresses': {
+            ADDR_POST: person_cache.format_address({
+                'address_text': 'Gate 1',
+                'postal_number': '0123',
+                'city': 'Oslo',
+            }),
+        },
+        'affiliations': {(OU_ID, AFF_STUDENT): STATUS_AKTIV},
+        'cellphone': '+4791234567',
+    }
+
+
+def test_find_person_id(cache):
+    assert cache.find_person_id((ID_FNR, FNR)) == PERSON_ID
+    assert cache.find_person_id((ID_FNR, FNR),
+                                (ID_STUDNR, STUDNR)) == PERSON_ID
+
+
+def test_find_person_id_missing(cache):
+    assert cache.find_person_id((ID_FNR, '31129912345')) is None
+
+
+def test_find_person_id_conflict(cache):
+    with pytest.raises(Errors.TooManyRowsError):
+        cache.find_person_id((ID_FNR, FNR), (ID_STUDNR, '999999'))
+
+
+def test_add_person_ids_commit(cache):
+    cache.add_person_ids(2000, (ID_FNR, '02027012345'))
+    cache.commit()
+    cache.rollback()
+    assert cache.find_person_id((ID_FNR, '02027012345')) == 2000
+
+
+def test_add_person_ids_rollback(cache):
+    cache.add_person_ids(2000, (ID_FNR, '02027012345'))
+    cache.add_person_ids(PERSON_ID, (ID_FNR, FNR))
+    cache.rollback()
+    assert cache.find_person_id((ID_FNR, '02027012345')) is None
+    assert cache.find_person_id((ID_FNR, FNR)) == PERSON_ID
+
+
+def test_unchanged(cache, new_state):
+    assert cache.is_unchanged(PERSON_ID, new_state)
+
+
+def test_unchanged_no_cellphone(cache, new_state):
+    new_state['cellphone'] = None
+    assert cache.is_unchanged(PERSON_ID, new_state)
+
+
+def test_unchanged_subset_of_ids(cache, new_state):
+    del new_state['external_ids'][ID_STUDNR]
+    assert cache.is_unchanged(PERSON_ID, new_state)
+
+
+def test_unknown_person(cache, new_state):
+    assert not cache.is_unchanged(PERSON_ID + 1, new_state)
+
+
+@pytest.mark.parametrize(
+    'key, value',
+    [
+        ('birth_date', datetime.date(1970, 1, 2)),
+        ('birth_date', None),
+        ('gender', 1),
+        ('names', {NAME_FIRST: 'Kari', NAME_LAST: 'Nordmann'}),
+        ('names', {NAME_FIRST: None, NAME_LAST: 'Nordmann'}),
+        ('external_ids', {ID_FNR: FNR, ID_STUDNR: '654321'}),
+        ('addresses', {}),
+        ('addresses', {ADDR_POST: ('Gate 2', None, '0123', 'Oslo', None)}),
+        ('affiliations', {(OU_ID, AFF_STUDENT): STATUS_EVU}),
+        ('affiliations', {}),
+        ('cellphone', '+4798765432'),
+    ],
+)
+def test_changed(cache, new_state, key, value):
+    new_state[key] = value
+    assert not cache.is_unchanged(PERSON_ID, new_state)
+
+
+def test_invalidate(cache, new_state):
+    cache.invalidate(PERSON_ID)
+    assert not cache.is_unchanged(PERSON_ID, new_state)
@@ -0,0 +1,70 @@
+# encoding: utf-8
+"""
+Tests for :class:`Cerebrum.modules.import_utils.syncs.SyncCache`
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from Cerebrum.modules.import_utils import syncs
+
+
+class _MockSync(object):
+    """ A sync-like object with values for entity ids 1-9. """
+
+    name = 'mock'
+
+    def __init__(self, cache_key):
+        self.cache_key = cache_key
+        self.queries = []
+
+    def fetch_current_many(self, entity_ids):
+        self.queries.append(tuple(entity_ids))
+        for entity_id in entity_ids:
+            if entity_id < 10:
+                yield entity_id, ('key', entity_id)
+                yield entity_id, ('other', entity_id)
+
+
+def test_prefetch_chunks():
+    sync = _MockSync('a')
+    cache = syncs.SyncCache(chunk_size=2)
+    cache.prefetch([sync], [3, 1, 2, 1])
+    assert sync.queries == [(1, 2), (3,)]
+    assert len(cache) == 3
+
+
+def test_pop():
+    sync = _MockSync('a')
+    cache = syncs.SyncCache()
+    cache.prefetch([sync], [1, 10])
+    assert cache.pop(sync, 1) == [('key', 1), ('other', 1)]
+    assert cache.pop(sync, 1) is None
+
+
+def test_pop_empty():
+    sync = _MockSync('a')
+    cache = syncs.SyncCache()
+    cache.prefetch([sync], [10])
+    # prefetched, but without any values
+    assert cache.pop(sync, 10) == []
+
+
+def test_pop_not_prefetched():
+    sync = _MockSync('a')
+    cache = syncs.SyncCache()
+    cache.prefetch([sync], [1])
+    assert cache.pop(sync, 2) is None
+    assert cache.pop(_MockSync('b'), 1) is None
+
+
+def test_clear():
+    sync = _MockSync('a')
+    cache = syncs.SyncCache()
+    cache.prefetch([sync], [1, 2])
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.pop(sync, 1) is None
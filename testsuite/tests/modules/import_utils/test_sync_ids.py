@@ -205,3 +205,43 @@ def test_sync_duplicate(database, id_types, person):
         sync(person, new)
     error_msg = six.text_type(exc_info.value)
     assert error_msg.startswith("duplicate ")
+
+
+def test_sync_prefetched(database, id_types, person_creator):
+    """ check that sync gives the same result with prefetched values. """
+    persons = [p for p, _ in person_creator(3)]
+    for person in persons:
+        id_types.set(person, id_types.a, "initial-a")
+    id_types.set(persons[1], id_types.b, "initial-b")
+
+    cache = syncs.SyncCache(chunk_size=2)
+    sync = syncs.ExternalIdSync(database, id_types.source, cache=cache)
+    cache.prefetch([sync], [p.entity_id for p in persons])
+    assert len(cache) == 3
+
+    new = [(ID_TYPE_A, "initial-a"), (ID_TYPE_C, "updated-c")]
+    for person in persons:
+        sync(person, new)
+
+    assert len(cache) == 0
+    for person in persons:
+        assert id_types.get(person, id_types.a) == "initial-a"
+        assert id_types.get(person, id_types.b) is None
+        assert id_types.get(person, id_types.c) == "updated-c"
+
+
+def test_sync_prefetched_once(database, id_types, person):
+    """ check that prefetched values are only used once. """
+    id_types.set(person, id_types.a, "initial-a")
+    cache = syncs.SyncCache()
+    sync = syncs.ExternalIdSync(database, id_types.source, cache=cache)
+    cache.prefetch([sync], [person.entity_id])
+
+    added, _, _ = sync(person, [(ID_TYPE_B, "updated-b")])
+    assert added == set((id_types.b,))
+
+    # second sync must see the changes from the first sync
+    added, updated, removed = sync(person, [(ID_TYPE_B, "updated-b")])
+    assert not added
+    assert not updated
+    assert not removed
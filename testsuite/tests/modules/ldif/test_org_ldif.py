@@ -0,0 +1,193 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.OrgLDIF` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import io
+
+import pytest
+
+from Cerebrum.database import Cursor
+from Cerebrum.modules import OrgLDIF
+from Cerebrum.modules.no.uio import OrgLDIF as UioOrgLDIF
+
+
+PERSON_DN = 'ou=people,dc=example,dc=org'
+ALIAS_DN = 'ou=aliases,dc=example,dc=org'
+
+
+class _Constants(object):
+    """ Constants stub without any constants. """
+
+    def fetch_constants(self, wanted_class, prefix_match=""):
+        return []
+
+
+class _OrgLdif(OrgLDIF.OrgLDIF):
+    """ OrgLDIF with person data, but without a database. """
+
+    def __init__(self, persons):
+        self.const = _Constants()
+        self.person_dn = PERSON_DN
+        self.person_parent_dn = self.org_dn = 'dc=example,dc=org'
+        self.alias_default_parent_dn = ALIAS_DN
+        self.aliases = True
+        self.used_DNs = {}
+        self.acc_quarantines = self.acc_locked_quarantines = {}
+        self.addr_info = {}
+        self.account_mail = {1: 'user1@example.org'}
+        self.person_cache = persons
+
+    def init_person_dump(self, use_mail_module):
+        pass
+
+    def make_person_entry(self, row, person_id):
+        name = row['name']
+        if not name:
+            return None, None, None
+        dn = 'uid=%s,%s' % (name, PERSON_DN)
+        entry = {
+            'objectClass': ['top', 'person'],
+            'cn': (name.title(),),
+            'sn': (name,),
+        }
+        return dn, entry, (None,) if person_id % 2 else ()
+
+
+@pytest.fixture
+def persons():
+    persons = {}
+    for person_id in range(1, 2000):
+        # some duplicate dns, and some persons without a dn
+        name = 'user%d' % (person_id % 1500) if person_id % 7 else None
+        persons[person_id] = {'name': name}
+    return persons
+
+
+def _generate(ldif, processes=None):
+    outfile = io.StringIO()
+    alias_outfile = io.StringIO()
+    ldif.generate_person(outfile, alias_outfile, False, processes=processes)
+    return outfile.getvalue(), alias_outfile.getvalue()
+
+
+def test_generate_person(persons):
+    entries, aliases = _generate(_OrgLdif(persons))
+    assert entries.count('dn: uid=user1,') == 1
+    assert 'dn: uid=user1,%s' % ALIAS_DN in aliases
+    assert 'dn: uid=user2,' not in aliases
+
+
+def test_generate_person_parallel(persons):
+    expect = _generate(_OrgLdif(persons))
+    ldif = _OrgLdif(persons)
+    assert _generate(ldif, processes=3) == expect
+    assert len(ldif.used_DNs) == expect[0].count('dn: ')
+
+
+class _DbOrgLdif(_OrgLdif):
+    """ OrgLDIF that (wrongly) uses the database to build entries. """
+
+    def make_person_entry(self, row, person_id):
+        # a bare cursor, as we don't have a database connection here
+        Cursor.__new__(Cursor).execute('SELECT 1')
+
+
+def test_generate_person_parallel_no_db(persons):
+    with pytest.raises(RuntimeError) as exc_info:
+        _generate(_DbOrgLdif(persons), processes=2)
+    assert 'worker process' in str(exc_info.value)
+
+
+#
+# UiO OrgLDIF with worker processes
+#
+
+class _StubOrgLdif(OrgLDIF.OrgLDIF):
+    """ OrgLDIF base person entries from person_cache rows. """
+
+    def make_person_entry(self, row, person_id):
+        dn = 'uid=%s,%s' % (row['name'], PERSON_DN)
+        entry = {
+            'objectClass': ['top', 'person', 'eduPerson'],
+            'cn': (row['name'],),
+        }
+        return dn, entry, ()
+
+
+class _PersonConfig(object):
+
+    def get(self, key, default=None, inherit=False):
+        if key == 'eduPersonPrimaryAffiliation_selector':
+            return {'ANSATT': {'tekadm': (60, 'staff')}}
+        return default
+
+
+class _Config(object):
+    person = _PersonConfig()
+
+
+class _UioOrgLdif(UioOrgLDIF.UioOrgLdif, _StubOrgLdif):
+    """ UioOrgLdif with cached person data. """
+
+    def __init__(self, db, const, persons, affiliations, quarantines):
+        self.db = db
+        self.const = const
+        self.config = _Config()
+        self.person_dn = PERSON_DN
+        self.person_parent_dn = self.org_dn = 'dc=example,dc=org'
+        self.alias_default_parent_dn = ALIAS_DN
+        self.aliases = False
+        self.used_DNs = {}
+        self.acc_quarantines = {}
+        self.acc_locked_quarantines = quarantines
+        self.addr_info = {}
+        self.account_mail = {}
+        self.contact_mail = {}
+        self.account_primary_mail = {}
+        self.person_cache = persons
+        self.affiliations = affiliations
+        self.aff_cache = {}
+        self.status_cache = {}
+        self.primary_aff_traits = {}
+        self.ou2DN = {}
+        self.dummy_ou_dn = 'ou=dummy,dc=example,dc=org'
+        self.ou_id2ou_uniq_id = {1: '000000'}
+        self.homeOrg = 'example.org'
+        self.entitlements_file = None
+        self._person2urnlist = {}
+        self._person2group = {}
+
+    def init_person_dump(self, use_mail_module):
+        pass
+
+    def get_contacts(self, *args, **kwargs):
+        return {}
+
+
+def test_generate_person_parallel_uio(database, factory):
+    const = factory.get('Constants')(database)
+    aff = int(const.affiliation_ansatt)
+    status = int(const.affiliation_status_ansatt_tekadm)
+    persons = {}
+    affiliations = {}
+    quarantines = {}
+    for person_id in range(1, 200):
+        persons[person_id] = {'name': 'user%d' % person_id,
+                              'account_id': person_id + 1000}
+        affiliations[person_id] = [(aff, status, 1)]
+        if person_id % 3 == 0:
+            quarantines[person_id + 1000] = [
+                int(const.quarantine_generell)]
+
+    def _uio_ldif():
+        return _UioOrgLdif(database, const, persons, affiliations,
+                           quarantines)
+
+    # run the workers first, so that nothing is cached by a serial run
+    result = _generate(_uio_ldif(), processes=2)
+    assert result == _generate(_uio_ldif())
+    assert result[0].count('uioPersonScopedAffiliation: primary:') == 199
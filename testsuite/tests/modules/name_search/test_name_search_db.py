@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+""" Tests for :mod:`Cerebrum.modules.name_search.name_search_db` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import re
+
+import pytest
+
+from Cerebrum.modules.name_search import name_search_db
+
+
+@pytest.mark.parametrize(
+    'name, expected',
+    [
+        ('Ola Nordmann', 'ola nordmann'),
+        ('  Kari   Nordmann ', 'kari nordmann'),
+        ('Ærlig Østby-Hansen', 'aerlig ostby-hansen'),
+        ('Ståle Ødegård', 'staale odegaard'),
+        ('Ólafur Þór', 'olafur thor'),
+    ],
+)
+def test_normalize_name(name, expected):
+    assert name_search_db.normalize_name(name) == expected
+
+
+@pytest.mark.parametrize(
+    'pattern, expected',
+    [
+        ('%nordm%', '%nordm%'),
+        ('%Østby%', '%ostby%'),
+        ('ola%nordmann', 'ola%nordmann'),
+        ('%Ola  Nord%', '%ola nord%'),
+        ('%小明%', '%xiao ming%'),
+        ('%Ole %', '%ole%'),
+        ('Ole %Nord%', 'ole%nord%'),
+    ],
+)
+def test_normalize_pattern(pattern, expected):
+    assert name_search_db.normalize_pattern(pattern) == expected
+
+
+@pytest.mark.parametrize('pattern', ['%ab%', '%', 'o%l%a', 'ol_', 'a\\%b'])
+def test_normalize_pattern_unusable(pattern):
+    assert name_search_db.normalize_pattern(pattern) is None
+
+
+def test_get_prefilter():
+    binds = {}
+    conds = name_search_db.get_prefilter('pn.person_id', 'person_name',
+                                         '%Nordm%', binds, name_code=3)
+    assert len(conds) == 1
+    assert conds[0].strip().startswith('pn.person_id IN (')
+    assert binds['name_search_table'] == 'person_name'
+    assert binds['name_search_pattern'] == '%nordm%'
+    assert 3 in binds.values()
+
+
+def test_get_prefilter_unusable():
+    binds = {}
+    assert name_search_db.get_prefilter('pn.person_id', 'person_name',
+                                        '%ab%', binds) == []
+    assert binds == {}
+
+
+def test_set_name_invalid_table():
+    with pytest.raises(ValueError):
+        name_search_db.set_name(None, 1, 'entity_foo', 2, 'foo')
+
+
+def _like(pattern, value):
+    regex = '^' + '.*'.join(re.escape(p) for p in pattern.split('%')) + '$'
+    return re.match(regex, value, re.DOTALL | re.IGNORECASE) is not None
+
+
+@pytest.mark.parametrize(
+    'name, pattern',
+    [
+        ('李小明', '%小明%'),
+        ('Ole ', '%Ole %'),
+        ('Ole  Nordmann', '%Ole  Nord%'),
+        ('Ærlig Østby', 'Ærlig%Øst%'),
+        ('Kari Nordmann', '%ari N%'),
+        ('Ståle', '%Stå%'),
+    ],
+)
+def test_normalize_pattern_superset(name, pattern):
+    assert _like(pattern, name)
+    norm_pattern = name_search_db.normalize_pattern(pattern)
+    assert _like(norm_pattern, name_search_db.normalize_name(name))
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the name_search table.
+
+These tests require the mod_name_search schema.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.modules.name_search import name_search_db
+from Cerebrum.modules.name_search.mixins import (
+    AccountNameSearchMixin,
+    PersonNameSearchMixin,
+)
+from Cerebrum.testutils import datasource
+
+
+@pytest.fixture(autouse=True)
+def _patch_cereconf(cereconf):
+    cereconf.SYSTEM_LOOKUP_ORDER = ('system_manual',)
+    cereconf.NAME_SEARCH_TRIGRAM = False
+
+
+def _list_indexed(database, entity_id):
+    return set(
+        (row['name_table'], int(row['name_code']), row['name_norm'])
+        for row in database.query(
+            """
+              SELECT name_table, name_code, name_norm
+              FROM [:table schema=cerebrum name=name_search]
+              WHERE entity_id = :entity_id
+            """,
+            {'entity_id': int(entity_id)}))
+
+
+@pytest.fixture
+def group(database, factory, const, initial_account):
+    group_dict = next(datasource.BasicGroupSource()(limit=1))
+    group = factory.get('Group')(database)
+    group.populate(
+        creator_id=initial_account.entity_id,
+        visibility=int(const.group_visibility_all),
+        name=group_dict['group_name'],
+        description=group_dict['description'],
+        group_type=int(const.group_type_manual),
+    )
+    group.write_db()
+    return group
+
+
+def test_rebuild_skips_group_names(database, const, group):
+    name_search_db.rebuild(database, const.system_cached,
+                           const.account_namespace)
+    assert not _list_indexed(database, group.entity_id)
+
+
+def test_delete_group_after_rebuild(database, factory, const, group):
+    group_id = group.entity_id
+    # index a non-account name, as older versions of rebuild() did
+    name_search_db.set_name(database, group_id, 'entity_name',
+                            const.group_namespace, 'foo')
+    name_search_db.rebuild(database, const.system_cached,
+                           const.account_namespace,
+                           name_tables=('person_name',))
+    group.delete()
+    assert not _list_indexed(database, group_id)
+
+
+def test_rebuild_account_names(database, const, initial_account):
+    counts = name_search_db.rebuild(database, const.system_cached,
+                                    const.account_namespace)
+    assert counts['entity_name'] >= 1
+    assert _list_indexed(database, initial_account.entity_id) == set((
+        ('entity_name', int(const.account_namespace),
+         name_search_db.normalize_name(initial_account.account_name)),
+    ))
+
+
+#
+# mixin tests
+#
+
+PERSON_NAMES = (
+    ('Ola', 'Nordmann'),
+    ('Kari', 'Nordmann-Østby'),
+    ('Ole ', 'Olsen'),
+    ('小明', '李'),
+    ('Ståle', 'Ødegård'),
+)
+
+
+@pytest.fixture
+def person_cls(factory):
+    class _Person(PersonNameSearchMixin, factory.get('Person')):
+        pass
+    return _Person
+
+
+@pytest.fixture
+def account_cls(factory):
+    class _Account(AccountNameSearchMixin, factory.get('Account')):
+        pass
+    return _Account
+
+
+def _set_names(person, const, first, last):
+    person.affect_names(const.system_manual, const.name_first,
+                        const.name_last)
+    person.populate_name(const.name_first, first)
+    person.populate_name(const.name_last, last)
+    person.write_db()
+
+
+@pytest.fixture
+def create_person(database, const, person_cls):
+    person_ds = datasource.BasicPersonSource()
+
+    def _create(first, last):
+        person_dict = next(person_ds(limit=1))
+        person = person_cls(database)
+        person.populate(person_dict['birth_date'], const.gender_unknown)
+        person.write_db()
+        _set_names(person, const, first, last)
+        return person
+
+    return _create
+
+
+@pytest.fixture
+def persons(create_person):
+    return [create_person(first, last) for first, last in PERSON_NAMES]
+
+
+@pytest.fixture
+def create_account(database, const, account_cls, initial_account,
+                   initial_group):
+    account_ds = datasource.BasicAccountSource()
+
+    def _create():
+        account_dict = next(account_ds(limit=1))
+        account = account_cls(database)
+        account.populate(
+            account_dict['account_name'],
+            initial_group.entity_type,
+            initial_group.entity_id,
+            const.account_program,
+            initial_account.entity_id,
+            None,
+        )
+        account.write_db()
+        return account
+
+    return _create
+
+
+def _expected_names(person, const):
+    return set(
+        ('person_name', int(row['name_variant']),
+         name_search_db.normalize_name(row['name']))
+        for row in person.search_person_names(
+            person_id=person.entity_id,
+            source_system=const.system_cached))
+
+
+def test_person_mixin_set_names(database, const, create_person):
+    person = create_person('Ola', 'Nordmann')
+    indexed = _list_indexed(database, person.entity_id)
+    assert indexed == _expected_names(person, const)
+    assert ('person_name', int(const.name_full), 'ola nordmann') in indexed
+
+
+def test_person_mixin_update_names(database, const, create_person):
+    person = create_person('Ola', 'Nordmann')
+    _set_names(person, const, 'Ola', 'Østby')
+    indexed = _list_indexed(database, person.entity_id)
+    assert indexed == _expected_names(person, const)
+    assert ('person_name', int(const.name_full), 'ola ostby') in indexed
+
+
+def test_person_mixin_delete(database, create_person):
+    person = create_person('Ola', 'Nordmann')
+    person_id = person.entity_id
+    person.delete()
+    assert not _list_indexed(database, person_id)
+
+
+def test_account_mixin(database, const, create_account):
+    account = create_account()
+    account_id = account.entity_id
+    namespace = int(const.account_namespace)
+    assert _list_indexed(database, account_id) == set((
+        ('entity_name', namespace, account.account_name),
+    ))
+
+    account.account_name = account.account_name + 'x'
+    account.write_db()
+    assert _list_indexed(database, account_id) == set((
+        ('entity_name', namespace, account.account_name),
+    ))
+
+    account.delete()
+    assert not _list_indexed(database, account_id)
+
+
+#
+# search tests
+#
+
+@pytest.mark.parametrize(
+    'pattern',
+    [
+        '*nordm*',
+        '*Nordmann-Øst*',
+        '*Ole *',
+        '*小明*',
+        '*Ødegå*',
+        '*ola n*',
+    ],
+)
+def test_search_person_names(database, const, cereconf, person_cls, persons,
+                             pattern):
+    person = person_cls(database)
+
+    def _search():
+        return set(
+            (row['person_id'], row['name_variant'], row['name'])
+            for row in person.search_person_names(
+                name=pattern,
+                source_system=const.system_cached,
+                exact_match=False,
+                case_sensitive=False))
+
+    cereconf.NAME_SEARCH_TRIGRAM = False
+    expected = _search()
+    assert expected
+
+    cereconf.NAME_SEARCH_TRIGRAM = True
+    assert _search() == expected
+
+
+def test_search_account_names(database, cereconf, account_cls,
+                              create_account):
+    accounts = [create_account() for _ in range(3)]
+    account = account_cls(database)
+    pattern = '*' + accounts[0].account_name[1:-1] + '*'
+
+    def _search():
+        return set(row['account_id'] for row in account.search(name=pattern))
+
+    cereconf.NAME_SEARCH_TRIGRAM = False
+    expected = _search()
+    assert accounts[0].entity_id in expected
+
+    cereconf.NAME_SEARCH_TRIGRAM = True
+    assert _search() == expected
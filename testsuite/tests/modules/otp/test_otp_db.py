@@ -73,6 +73,28 @@ def test_set_otp_update(database, person):
     assert row['otp_payload'] == otp_payload
 
 
+def test_set_otp_secret_hash(database, person):
+    row = otp_db.sql_set(database, person.entity_id, "foo", "bar",
+                         secret_hash="sha256$00$01")
+    assert row['secret_hash'] == "sha256$00$01"
+
+
+def test_set_otp_update_clears_secret_hash(database, person):
+    otp_db.sql_set(database, person.entity_id, "foo", "bar",
+                   secret_hash="sha256$00$01")
+    row = otp_db.sql_set(database, person.entity_id, "foo", "baz")
+    assert row['otp_payload'] == "baz"
+    assert row['secret_hash'] is None
+
+
+def test_set_otp_update_secret_hash(database, person):
+    otp_db.sql_set(database, person.entity_id, "foo", "bar")
+    row = otp_db.sql_set(database, person.entity_id, "foo", "bar",
+                         secret_hash="sha256$00$01")
+    assert row['otp_payload'] == "bar"
+    assert row['secret_hash'] == "sha256$00$01"
+
+
 def test_set_otp_update_noop(database, person):
     otp_type = "foo"
     otp_data = "bar"
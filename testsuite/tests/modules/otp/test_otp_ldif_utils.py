@@ -120,3 +120,30 @@ def test_otp_cache_miss(database, otp_data):
     cache = otp_ldif_utils.OtpCache(database, otp_type)
     with pytest.raises(LookupError):
         cache.get_payload(0)
+
+
+#
+# OtpPayloadCache tests
+#
+
+def test_otp_payload_cache_hit(database, otp_data):
+    cache = otp_ldif_utils.OtpPayloadCache(database, OTP_TYPES)
+    cache.update_all()
+    assert len(cache) == len(otp_data)
+    for person_id, otp_type, otp_value in otp_data:
+        assert cache.get_payload(person_id, otp_type) == otp_value
+
+
+def test_otp_payload_cache_default_type(database, otp_data):
+    person_id = otp_data[0][0]
+    cache = otp_ldif_utils.OtpPayloadCache(database, OTP_TYPES[1])
+    cache.update_all()
+    expect = "{}-{}".format(person_id, OTP_TYPES[1][-1])
+    assert cache.get_payload(person_id) == expect
+
+
+def test_otp_payload_cache_miss(database, otp_data):
+    cache = otp_ldif_utils.OtpPayloadCache(database, OTP_TYPES)
+    cache.update_all()
+    with pytest.raises(LookupError):
+        cache.get_payload(0)
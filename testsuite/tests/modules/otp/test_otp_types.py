@@ -9,7 +9,11 @@ from __future__ import (
 
 import pytest
 
+from Cerebrum import Person
+from Cerebrum.modules.otp import otp_db
 from Cerebrum.modules.otp import otp_types
+from Cerebrum.modules.otp import otp_utils
+from Cerebrum.testutils import datasource
 
 SHARED_SECRET = "HPV3FP52AS3QUF2Q"
 
@@ -72,6 +76,134 @@ def test_otp_policy_call(otp_policy):
     assert secrets['test-feide']
 
 
+ITEMS = [
+    ('test-plain', SHARED_SECRET),
+    ('test-radius', SHARED_SECRET),
+    ('test-feide', "AAAABBBBCCCCDDDD"),
+]
+
+
+def test_otp_policy_prepare_many(otp_policy):
+    payloads = otp_policy.prepare_many(ITEMS)
+    assert len(payloads) == len(ITEMS)
+    assert payloads[0] == SHARED_SECRET
+    assert len(payloads[1].split(".")) == 5
+    assert len(payloads[2].split(".")) == 5
+
+
+def test_otp_policy_prepare_many_processes(otp_policy):
+    items = [(otp_type, "{:016d}".format(i))
+             for i in range(10)
+             for otp_type in ('test-plain', 'test-feide')]
+    payloads = otp_policy.prepare_many(items, processes=2, chunksize=5)
+    assert len(payloads) == len(items)
+    for (otp_type, secret), payload in zip(items, payloads):
+        if otp_type == 'test-plain':
+            assert payload == secret
+        else:
+            assert len(payload.split(".")) == 5
+
+
 def test_get_policy():
     policy = otp_types.get_policy()
     assert policy.otp_types == (otp_types.OtpTypePlaintext.otp_type,)
+
+
+#
+# PersonOtpUpdater tests
+#
+
+
+@pytest.fixture
+def persons(database, const):
+    person_ds = datasource.BasicPersonSource()
+    persons = []
+    for person_dict in person_ds(limit=3):
+        person = Person.Person(database)
+        person.populate(person_dict['birth_date'], const.gender_unknown,
+                        person_dict.get('description'))
+        person.write_db()
+        persons.append(person.entity_id)
+    return persons
+
+
+@pytest.fixture
+def updater(database, otp_policy):
+    return otp_types.PersonOtpUpdater(database, otp_policy)
+
+
+def _get_rows(database, person_ids):
+    return dict(((row['person_id'], row['otp_type']), dict(row))
+                for row in otp_db.sql_search(database, person_id=person_ids))
+
+
+def test_updater_update_sets_hash(database, updater, persons):
+    person_id = persons[0]
+    updater.update(person_id, SHARED_SECRET)
+    rows = _get_rows(database, [person_id])
+    assert len(rows) == 3
+    for row in rows.values():
+        assert otp_utils.check_secret_hash(row['secret_hash'], SHARED_SECRET)
+
+
+def test_updater_update_many(database, updater, persons):
+    secrets = dict((person_id, "{:016d}".format(person_id))
+                   for person_id in persons)
+    count = updater.update_many(secrets)
+    assert count == 3 * len(persons)
+
+    rows = _get_rows(database, persons)
+    assert len(rows) == 3 * len(persons)
+    for (person_id, otp_type), row in rows.items():
+        if otp_type == 'test-plain':
+            assert row['otp_payload'] == secrets[person_id]
+        assert otp_utils.check_secret_hash(row['secret_hash'],
+                                           secrets[person_id])
+
+
+def test_updater_update_many_skips_unchanged(database, updater, persons):
+    secrets = dict((person_id, "{:016d}".format(person_id))
+                   for person_id in persons)
+    updater.update_many(secrets)
+    before = _get_rows(database, persons)
+
+    # change secret for one person only
+    changed = persons[0]
+    secrets[changed] = SHARED_SECRET
+    count = updater.update_many(secrets)
+    assert count == 3
+
+    after = _get_rows(database, persons)
+    for key, row in after.items():
+        if key[0] == changed:
+            assert row['otp_payload'] != before[key]['otp_payload']
+            assert otp_utils.check_secret_hash(row['secret_hash'],
+                                               SHARED_SECRET)
+        else:
+            # randomized jwe payloads are not re-encrypted
+            assert row == before[key]
+
+
+def test_updater_update_many_force(database, updater, persons):
+    secrets = dict((person_id, SHARED_SECRET) for person_id in persons)
+    updater.update_many(secrets)
+    assert updater.update_many(secrets) == 0
+    assert updater.update_many(secrets, force=True) == 3 * len(persons)
+
+
+def test_updater_update_many_missing_hash(database, updater, persons):
+    person_id = persons[0]
+    # payload set without a secret hash, e.g. before mod_otp 1.1
+    otp_db.sql_set(database, person_id, 'test-plain', SHARED_SECRET)
+    assert updater.update_many({person_id: SHARED_SECRET}) == 3
+    row = otp_db.sql_get(database, person_id, 'test-plain')
+    assert otp_utils.check_secret_hash(row['secret_hash'], SHARED_SECRET)
+
+
+def test_updater_update_many_clear_obsolete(database, updater, persons):
+    person_id = persons[0]
+    otp_db.sql_set(database, person_id, 'test-obsolete', 'foo')
+    updater.update_many({person_id: SHARED_SECRET})
+    rows = _get_rows(database, [person_id])
+    assert set(otp_type for _, otp_type in rows) == set(
+        ('test-plain', 'test-radius', 'test-feide'))
@@ -98,3 +98,47 @@ def test_format_otp_uri_custom():
 
     assert ("secret=" + secret) in uri
     assert _check_uri_label_and_issuer(uri, label, issuer)
+
+
+#
+# test hash_secret, check_secret_hash
+#
+
+
+SECRET = "HPV3FP52AS3QUF2Q"
+
+
+def test_hash_secret():
+    secret_hash = otp_utils.hash_secret(SECRET)
+    algorithm, salt, digest = secret_hash.split('$')
+    assert algorithm == 'sha256'
+    assert len(salt) == 2 * otp_utils.SECRET_HASH_SALT_SIZE
+    assert SECRET not in secret_hash
+
+
+def test_hash_secret_salted():
+    assert otp_utils.hash_secret(SECRET) != otp_utils.hash_secret(SECRET)
+
+
+def test_hash_secret_with_salt():
+    salt = "00ff" * 4
+    assert (otp_utils.hash_secret(SECRET, salt=salt)
+            == otp_utils.hash_secret(SECRET, salt=salt))
+
+
+def test_check_secret_hash():
+    secret_hash = otp_utils.hash_secret(SECRET)
+    assert otp_utils.check_secret_hash(secret_hash, SECRET)
+
+
+def test_check_secret_hash_mismatch():
+    secret_hash = otp_utils.hash_secret(SECRET)
+    assert not otp_utils.check_secret_hash(secret_hash, "AAAABBBBCCCCDDDD")
+
+
+@pytest.mark.parametrize(
+    "secret_hash",
+    [None, "", "foo", "md5$00$00", "sha256$xyz$00"],
+)
+def test_check_secret_hash_invalid(secret_hash):
+    assert not otp_utils.check_secret_hash(secret_hash, SECRET)
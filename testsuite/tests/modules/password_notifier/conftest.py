@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Test fixtures for :mod:`Cerebrum.modules.password_notifier` tests.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import email
+import threading
+
+import pytest
+from six.moves import socketserver
+
+
+class SmtpSink(object):
+    """ Collects messages received by the SMTP sink server. """
+
+    def __init__(self, max_per_connection=None):
+        self.max_per_connection = max_per_connection
+        self.connections = 0
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            self.connections += 1
+
+    def add(self, data):
+        msg = email.message_from_string(data.decode('utf-8'))
+        with self._lock:
+            self.messages.append(msg)
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """ A minimal SMTP server session that accepts everything. """
+
+    def _reply(self, code, text):
+        self.wfile.write('{:d} {}\r\n'.format(code, text).encode('ascii'))
+
+    def handle(self):
+        sink = self.server.sink
+        sink.connect()
+        self._reply(220, 'sink ready')
+        data = None
+        count = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if data is not None:
+                if line.rstrip(b'\r\n') == b'.':
+                    sink.add(b''.join(data))
+                    data = None
+                    count += 1
+                    self._reply(250, 'ok')
+                    if (sink.max_per_connection
+                            and count >= sink.max_per_connection):
+                        break
+                else:
+                    data.append(line[1:] if line.startswith(b'..') else line)
+                continue
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self._reply(250, 'sink')
+            elif command == b'DATA':
+                data = []
+                self._reply(354, 'go ahead')
+            elif command == b'QUIT':
+                self._reply(221, 'bye')
+                break
+            else:
+                self._reply(250, 'ok')
+
+
+class _SmtpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+@pytest.fixture
+def smtp_sink_factory():
+    """ Start local SMTP sink servers.
+
+    Returns a function that starts a server, and returns a (host, port, sink)
+    tuple.
+    """
+    servers = []
+
+    def start(max_per_connection=None):
+        server = _SmtpServer(('127.0.0.1', 0), _SmtpHandler)
+        server.sink = SmtpSink(max_per_connection=max_per_connection)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        host, port = server.server_address
+        return host, port, server.sink
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def smtp_sink(smtp_sink_factory):
+    """ A local SMTP sink server. """
+    return smtp_sink_factory()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+""" Tests for mod:`Cerebrum.modules.password_notifier.delivery` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import threading
+
+import pytest
+
+from Cerebrum.modules.password_notifier import delivery
+from Cerebrum.utils import email as email_utils
+
+
+@pytest.fixture(autouse=True)
+def _patch_email_settings(cereconf):
+    cereconf.EMAIL_DISABLED = False
+
+
+class _Transport(object):
+
+    instances = []
+
+    def __init__(self):
+        self.delivered = []
+        self.closed = False
+        self.instances.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def transports():
+    _Transport.instances = []
+    return _Transport.instances
+
+
+def _deliver(message, transport):
+    if message == 'error':
+        raise ValueError('cannot deliver')
+    transport.delivered.append(message)
+    return message != 'fail'
+
+
+@pytest.mark.parametrize('workers', [0, 1, 3])
+def test_pool_delivers(transports, workers):
+    messages = ['msg-{:d}'.format(n) for n in range(20)] + ['fail', 'error']
+    results = []
+    with delivery.DeliveryPool(_Transport, _deliver, workers=workers,
+                               queue_size=2) as pool:
+        for n, message in enumerate(messages):
+            pool.submit(n, message)
+            results.extend(pool.completed())
+    results.extend(pool.completed())
+
+    assert pool.pending == 0
+    assert sorted(results) == [(n, n < 20) for n in range(len(messages))]
+    assert len(transports) == max(1, workers)
+    assert all(t.closed for t in transports)
+    assert sum(len(t.delivered) for t in transports) == 21
+
+
+def test_pool_wait(transports):
+    event = threading.Event()
+
+    def deliver(message, transport):
+        event.wait()
+        return True
+
+    with delivery.DeliveryPool(_Transport, deliver, workers=2) as pool:
+        pool.submit(1, 'foo')
+        pool.submit(2, 'bar')
+        assert pool.completed() == []
+        event.set()
+        assert sorted(pool.wait()) == [(1, True), (2, True)]
+        assert pool.pending == 0
+
+
+def test_pool_closed(transports):
+    pool = delivery.DeliveryPool(_Transport, _deliver, workers=0)
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.submit(1, 'foo')
+
+
+def _make_message(n):
+    return email_utils.make_message('user{:d}@example.org'.format(n),
+                                    'noreply@example.org',
+                                    'Message {:d}'.format(n),
+                                    'Hello, user {:d}\n'.format(n))
+
+
+def _send(message, session):
+    msg, to_addrs = message
+    session.send_message(msg, to_addrs=to_addrs)
+    return True
+
+
+def test_smtp_session_reconnect(smtp_sink_factory):
+    host, port, sink = smtp_sink_factory(max_per_connection=2)
+    with email_utils.SMTPSession(host, port) as session:
+        for n in range(5):
+            _send(_make_message(n), session)
+    assert len(sink.messages) == 5
+    assert sink.connections == 3
+
+
+def test_smtp_throughput(smtp_sink):
+    """ Re-use one smtp connection per worker. """
+    host, port, sink = smtp_sink
+    workers = 4
+    count = 200
+
+    with delivery.DeliveryPool(
+            lambda: email_utils.SMTPSession(host, port),
+            _send, workers=workers) as pool:
+        for n in range(count):
+            pool.submit(n, _make_message(n))
+    results = pool.completed()
+
+    assert len(results) == count
+    assert all(delivered for _, delivered in results)
+    assert sink.connections == workers
+    assert (sorted(msg['Subject'] for msg in sink.messages)
+            == sorted('Message {:d}'.format(n) for n in range(count)))
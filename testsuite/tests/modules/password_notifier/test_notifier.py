@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+""" Tests for mod:`Cerebrum.modules.password_notifier.notifier` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+
+import pytest
+
+import Cerebrum.Account
+import Cerebrum.OU
+from Cerebrum import Errors
+from Cerebrum.modules import Email
+from Cerebrum.modules.no.nmh.Account import AccountNmhEmailMixin
+from Cerebrum.modules.password_notifier import notifier
+from Cerebrum.modules.password_notifier.config import PasswordNotifierConfig
+from Cerebrum.modules.trait import constants as trait_constants
+from Cerebrum.testutils import datasource
+
+
+TRAIT = 'pw-notify-5c1e0b7a'
+EXCEPT_TRAIT = 'pw-except-5c1e0b7a'
+MAIL_DOMAIN = 'notifier-5c1e0b7a.example.org'
+
+
+class _Notifier(notifier.PasswordNotifier):
+    """ Notifier for a fixed set of old accounts, with fake deliveries. """
+
+    def __init__(self, *args, **kwargs):
+        super(_Notifier, self).__init__(*args, **kwargs)
+        self.old_ids = set()
+        self.fail = set()
+        self.delivered = []
+
+    def get_old_account_ids(self):
+        return set(self.old_ids)
+
+    def get_notification(self, account):
+        return account.account_name
+
+    def deliver_notification(self, message, transport):
+        self.delivered.append(message)
+        return message not in self.fail
+
+
+#
+# Fixtures
+#
+
+
+@pytest.fixture(autouse=True)
+def _clear_trait_code_cache():
+    trait_constants._EntityTraitCode._cache = {}
+
+
+@pytest.fixture
+def trait(constant_module, constant_creator):
+    return constant_creator(trait_constants._EntityTraitCode, TRAIT,
+                            constant_module.CoreConstants.entity_account)
+
+
+@pytest.fixture
+def except_trait(constant_module, constant_creator):
+    return constant_creator(trait_constants._EntityTraitCode, EXCEPT_TRAIT,
+                            constant_module.CoreConstants.entity_account)
+
+
+@pytest.fixture
+def notifier_cls(trait, except_trait):
+    def _make(**settings):
+        config = {
+            'trait': TRAIT,
+            'follow_trait': TRAIT,
+            'except_trait': EXCEPT_TRAIT,
+            'delivery_workers': 2,
+            'commit_batch_size': 0,
+            'affiliation_mappings': [{
+                'affiliation': 'ANSATT',
+                'max_password_age': 100,
+                'warn_before_expiration_days': [7],
+            }],
+        }
+        config.update(settings)
+        return type(str('_TestNotifier'), (_Notifier,),
+                    {'config': PasswordNotifierConfig(config)})
+    return _make
+
+
+@pytest.fixture
+def commits(database, monkeypatch):
+    """ Count commits, and keep the test transaction intact. """
+    commits = []
+    monkeypatch.setattr(database, 'commit', lambda: commits.append(True))
+    return commits
+
+
+@pytest.fixture
+def ou(database):
+    ou = Cerebrum.OU.OU(database)
+    ou.populate()
+    ou.write_db()
+    return ou
+
+
+@pytest.fixture
+def create_accounts(database, factory, const, initial_account):
+    person_ds = datasource.BasicPersonSource()
+    account_ds = datasource.BasicAccountSource()
+
+    def _create(limit):
+        accounts = []
+        for person_dict, account_dict in zip(person_ds(limit=limit),
+                                             account_ds(limit=limit)):
+            person = factory.get('Person')(database)
+            person.populate(person_dict['birth_date'], const.gender_unknown)
+            person.write_db()
+            account = factory.get('Account')(database)
+            account.populate(
+                account_dict['account_name'],
+                const.entity_person,
+                person.entity_id,
+                None,
+                initial_account.entity_id,
+                None,
+            )
+            account.write_db()
+            accounts.append(account)
+        return accounts
+
+    return _create
+
+
+def _find_account(database, factory, account_id):
+    account = factory.get('Account')(database)
+    account.find(account_id)
+    return account
+
+
+def _set_trait(account, code, numval=None, date=None):
+    account.populate_trait(code=code, date=date, numval=numval)
+    account.write_db()
+
+
+def _set_primary_address(database, const, account, local_part):
+    ed = Email.EmailDomain(database)
+    try:
+        ed.find_by_domain(MAIL_DOMAIN)
+    except Errors.NotFoundError:
+        ed.clear()
+        ed.populate(MAIL_DOMAIN, 'test domain')
+        ed.write_db()
+    et = Email.EmailTarget(database)
+    et.populate(const.email_target_account, account.entity_id,
+                const.entity_account)
+    et.write_db()
+    ea = Email.EmailAddress(database)
+    ea.populate(local_part, ed.entity_id, et.entity_id)
+    ea.write_db()
+    epat = Email.EmailPrimaryAddressTarget(database)
+    epat.populate(ea.entity_id, parent=et)
+    epat.write_db()
+
+
+def _get_numvals(database, factory, code):
+    account = factory.get('Account')(database)
+    return dict((int(row['entity_id']), row['numval'])
+                for row in account.list_traits(code=code))
+
+
+#
+# Tests
+#
+
+
+class _EmailAccount(Email.AccountEmailMixin):
+    pass
+
+
+class _NmhEmailAccount(AccountNmhEmailMixin, Email.AccountEmailMixin):
+    pass
+
+
+def test_default_primary_mailaddress():
+    assert notifier._has_default_primary_mailaddress(_EmailAccount)
+
+
+def test_overridden_primary_mailaddress():
+    assert not notifier._has_default_primary_mailaddress(_NmhEmailAccount)
+
+
+def test_no_primary_mailaddress():
+    account_cls = Cerebrum.Account.Account
+    assert not notifier._has_default_primary_mailaddress(account_cls)
+
+
+def _rows(rows):
+    return sorted((dict(row) for row in rows), key=repr)
+
+
+def _lookups(pn, account):
+    """ Everything that the notifier looks up for a given account. """
+    return (
+        pn.except_user(account),
+        pn.get_num_notifications(account),
+        pn.get_notification_time(account),
+        pn.get_deadline(account),
+        pn._get_reminder_delays(account),
+        pn.remind_ok(account),
+        pn.get_account_email_addr(account),
+        _rows(pn._list_contact_info(account.entity_id)),
+        _rows(pn._list_contact_info(account.owner_id)),
+    )
+
+
+def test_prefetch_matches_lookups(database, factory, const, notifier_cls,
+                                  ou, trait, except_trait, create_accounts):
+    accounts = create_accounts(5)
+    account_ids = [a.entity_id for a in accounts]
+    an_hour_ago = datetime.datetime.now() - datetime.timedelta(hours=1)
+    a_month_ago = datetime.datetime.now() - datetime.timedelta(days=30)
+
+    # notified, with contact info on the account and an affiliation
+    _set_trait(accounts[0], trait, numval=1, date=a_month_ago)
+    accounts[0].add_contact_info(const.system_manual, const.contact_email,
+                                 'first@example.org')
+    person = factory.get('Person')(database)
+    person.find(accounts[0].owner_id)
+    person.add_affiliation(ou.entity_id, const.affiliation_ansatt,
+                           const.system_manual,
+                           const.affiliation_status_ansatt_tekadm)
+
+    # excepted, with contact info on the owner
+    _set_trait(accounts[1], except_trait)
+    person.clear()
+    person.find(accounts[1].owner_id)
+    person.add_contact_info(const.system_manual, const.contact_email,
+                            'second@example.org')
+
+    # notified recently, with a primary email address
+    _set_trait(accounts[2], trait, numval=2, date=an_hour_ago)
+    _set_primary_address(database, const, accounts[2], 'third')
+
+    # accounts[3] and accounts[4] have nothing
+
+    pn = notifier_cls()(db=database)
+    expected = dict(
+        (account_id,
+         _lookups(pn, _find_account(database, factory, account_id)))
+        for account_id in account_ids)
+
+    pn.prefetch(account_ids)
+    assert pn.cache.primary_addrs is not None
+    for account_id in account_ids:
+        assert account_id in pn.cache
+        account = _find_account(database, factory, account_id)
+        assert _lookups(pn, account) == expected[account_id]
+
+    assert expected[accounts[1].entity_id][0]
+    assert expected[accounts[0].entity_id][6] == 'first@example.org'
+    assert expected[accounts[1].entity_id][6] == 'second@example.org'
+    assert expected[accounts[2].entity_id][6] == 'third@' + MAIL_DOMAIN
+    assert expected[accounts[3].entity_id][6] is None
+
+
+def test_process_max_new_notifications(database, factory, trait, commits,
+                                       notifier_cls, create_accounts):
+    accounts = create_accounts(8)
+    pn = notifier_cls(max_new_notifications=3)(db=database)
+    pn.old_ids = set(a.entity_id for a in accounts)
+    pn.fail = set(a.account_name for a in accounts[:2])
+
+    pn.process_accounts()
+
+    numvals = _get_numvals(database, factory, trait)
+    # failed notifications don't count towards the limit ...
+    assert sorted(numvals.values()).count(1) == 3
+    # ... but are recorded with numval=0
+    assert all(numvals[a.entity_id] == 0
+               for a in accounts[:2]
+               if a.entity_id in numvals)
+    assert not pn._pending_accounts
+
+
+def test_process_commit_batches(database, factory, trait, commits,
+                                notifier_cls, create_accounts):
+    accounts = create_accounts(5)
+    for account in accounts:
+        _set_trait(account, trait, numval=1)
+    pn = notifier_cls(commit_batch_size=2)(db=database)
+
+    # no old passwords, all traits are removed
+    pn.process_accounts()
+
+    assert not _get_numvals(database, factory, trait)
+    # two batches of two accounts, and a final commit
+    assert len(commits) == 3
+
+
+def test_process_notify_commit_batches(database, factory, trait, commits,
+                                       notifier_cls, create_accounts):
+    accounts = create_accounts(5)
+    pn = notifier_cls(commit_batch_size=2)(db=database)
+    pn.old_ids = set(a.entity_id for a in accounts)
+
+    pn.process_accounts()
+
+    assert sorted(pn.delivered) == sorted(a.account_name for a in accounts)
+    numvals = _get_numvals(database, factory, trait)
+    assert numvals == dict((a.entity_id, 1) for a in accounts)
+    assert len(commits) == 3
+
+
+def test_process_dryrun(database, factory, trait, commits, notifier_cls,
+                        create_accounts):
+    accounts = create_accounts(3)
+    for account in accounts:
+        _set_trait(account, trait, numval=1)
+    pn = notifier_cls(commit_batch_size=1)(db=database, dryrun=True)
+
+    pn.process_accounts()
+
+    assert not commits
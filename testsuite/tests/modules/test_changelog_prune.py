@@ -0,0 +1,289 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.changelog_prune` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+import random
+
+import pytest
+
+from Cerebrum.modules import changelog_prune
+from Cerebrum.utils import date as date_utils
+from Cerebrum.utils import json
+
+
+DAY = 24 * 60 * 60
+
+NOW = date_utils.apply_timezone(datetime.datetime(2024, 6, 1, 12, 0))
+
+SPREAD_ADD = 1
+SPREAD_DEL = 2
+GROUP_ADD = 3
+GROUP_REM = 4
+TOKEN = 5
+UNKNOWN = 6
+
+
+def _make_rules(spread_add, spread_del, group_add, group_rem, token):
+    spread_toggler = {
+        'id': 0,
+        'columns': ('subject_entity',),
+        'change_params': ('spread',),
+        'triggers': (spread_add, spread_del),
+    }
+    member_toggler = {
+        'id': 1,
+        'columns': ('subject_entity', 'dest_entity'),
+        'triggers': (group_add, group_rem),
+    }
+    return changelog_prune.PruneRules(
+        trigger_map={
+            spread_add: spread_toggler,
+            spread_del: spread_toggler,
+            group_add: member_toggler,
+            group_rem: member_toggler,
+            token: None,
+        },
+        max_ages={
+            spread_add: -1,
+            spread_del: -1,
+            token: 30 * DAY,
+        },
+        default_age=180 * DAY,
+        minimum_age=7 * DAY,
+        forever=-1,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _json_no_db(monkeypatch):
+    # json.loads needs db and constants to decode cerebrum objects, which
+    # we don't have in change_params here
+    monkeypatch.setattr(json, '_cache_db', object())
+    monkeypatch.setattr(json, '_cache_const', object())
+
+
+@pytest.fixture
+def rules():
+    return _make_rules(SPREAD_ADD, SPREAD_DEL, GROUP_ADD, GROUP_REM, TOKEN)
+
+
+def _event(change_id, change_type, days_ago, subject=None, dest=None,
+           params=None):
+    return {
+        'change_id': change_id,
+        'change_type_id': change_type,
+        'tstamp': NOW - datetime.timedelta(days=days_ago),
+        'subject_entity': subject,
+        'dest_entity': dest,
+        'change_params': json.dumps(params) if params else None,
+    }
+
+
+def _removed(events, rules):
+    return [(rule, change_id) for rule, change_id, _
+            in changelog_prune.find_removable_events(events, rules, NOW)
+            if rule]
+
+
+def test_unknown_type(rules):
+    events = [_event(1, UNKNOWN, 400, 10)]
+    result = list(changelog_prune.find_removable_events(events, rules, NOW))
+    assert result == [(None, None, events[0])]
+
+
+def test_age(rules):
+    events = [
+        _event(1, TOKEN, 40, 10),
+        _event(2, TOKEN, 20, 10),
+        _event(3, GROUP_ADD, 200, 10, 20),
+    ]
+    assert _removed(events, rules) == [('age', 1), ('age', 3)]
+
+
+def test_age_forever(rules):
+    events = [_event(1, SPREAD_ADD, 400, 10, params={'spread': 1})]
+    assert _removed(events, rules) == []
+
+
+def test_toggle(rules):
+    events = [
+        _event(1, GROUP_ADD, 30, 10, 20),
+        _event(2, GROUP_ADD, 30, 10, 21),
+        _event(3, GROUP_REM, 20, 10, 20),
+        _event(4, GROUP_ADD, 10, 10, 20),
+    ]
+    assert _removed(events, rules) == [('toggle', 1), ('toggle', 3)]
+
+
+def test_toggle_params(rules):
+    events = [
+        _event(1, SPREAD_ADD, 30, 10, params={'spread': 1}),
+        _event(2, SPREAD_ADD, 30, 10, params={'spread': 2}),
+        _event(3, SPREAD_DEL, 20, 10, params={'spread': 1}),
+    ]
+    assert _removed(events, rules) == [('toggle', 1)]
+
+
+def test_toggle_minimum_age(rules):
+    events = [
+        _event(1, GROUP_ADD, 30, 10, 20),
+        _event(2, GROUP_REM, 1, 10, 20),
+    ]
+    assert _removed(events, rules) == []
+
+
+#
+# Compare SqlPruner with find_removable_events
+#
+
+
+def _generate_events(count, seed=1):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        change_type = rnd.choice(('spread', 'group', 'token'))
+        subject = rnd.randint(1, 20)
+        days_ago = rnd.randint(0, 300)
+        if change_type == 'spread':
+            yield (rnd.choice(('spread_add', 'spread_del')), days_ago,
+                   subject, None, {'spread': rnd.randint(1, 3)})
+        elif change_type == 'group':
+            yield (rnd.choice(('group_add', 'group_rem')), days_ago,
+                   subject, rnd.randint(1, 5), None)
+        else:
+            yield ('account_password_token', days_ago, subject, None, None)
+
+
+@pytest.fixture
+def db_rules(clconst):
+    return _make_rules(
+        int(clconst.spread_add),
+        int(clconst.spread_del),
+        int(clconst.group_add),
+        int(clconst.group_rem),
+        int(clconst.account_password_token),
+    )
+
+
+@pytest.fixture
+def changelog(database, clconst):
+    # Events are inserted in change_id order, but with random timestamps
+    for change_type, days_ago, subject, dest, params in _generate_events(500):
+        database.execute(
+            """
+              INSERT INTO [:table schema=cerebrum name=change_log]
+                (tstamp, change_id, subject_entity, change_type_id,
+                 dest_entity, change_params)
+              VALUES
+                (:tstamp,
+                 [:sequence schema=cerebrum name=change_log_seq op=next],
+                 :subject, :change_type, :dest, :params)
+            """,
+            {
+                'tstamp': NOW - datetime.timedelta(days=days_ago),
+                'subject': subject,
+                'change_type': int(getattr(clconst, change_type)),
+                'dest': dest,
+                'params': json.dumps(params) if params else None,
+            })
+    return database
+
+
+def _python_result(db, rules):
+    stats = {}
+    change_ids = set()
+    for rule, change_id, _ in changelog_prune.find_removable_events(
+            db.get_log_events(), rules, NOW):
+        if rule:
+            stats[rule] = stats.get(rule, 0) + 1
+            change_ids.add(change_id)
+    return stats, change_ids
+
+
+def _all_change_ids(db):
+    return set(int(row['change_id']) for row in db.get_log_events())
+
+
+def test_sql_count(changelog, db_rules):
+    expected, _ = _python_result(changelog, db_rules)
+    pruner = changelog_prune.SqlPruner(changelog, db_rules, NOW,
+                                       batch_size=7)
+    stats = {}
+    for (rule, _), count in pruner.run(remove=False).items():
+        stats[rule] = stats.get(rule, 0) + count
+    assert stats == expected
+
+
+def test_sql_remove(changelog, db_rules):
+    _, expected = _python_result(changelog, db_rules)
+    before = _all_change_ids(changelog)
+    pruner = changelog_prune.SqlPruner(changelog, db_rules, NOW,
+                                       batch_size=7)
+    pruner.run(remove=True)
+    assert before - _all_change_ids(changelog) == expected
+
+
+class _DeleteRecorder(object):
+    """ Records the change_ids of each DELETE statement, and commits. """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.deletes = []
+        self.commits = 0
+
+    def execute(self, stmt, binds):
+        if 'DELETE' in stmt:
+            self.deletes.append(sorted(binds.values()))
+        if self.db is not None:
+            return self.db.execute(stmt, binds)
+
+    def commit(self):
+        self.commits += 1
+
+    def __getattr__(self, attr):
+        return getattr(self.db, attr)
+
+
+def test_remove_batches(rules):
+    db = _DeleteRecorder()
+    pruner = changelog_prune.SqlPruner(db, rules, NOW, batch_size=5)
+    pruner._remove(range(1, 13), commit=True)
+    assert db.deletes == [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12]]
+    assert db.commits == 3
+
+
+def test_sql_remove_hot_subject(database, db_rules, clconst):
+    # A single group membership, toggled more times than batch_size
+    for days_ago in range(100, 70, -1):
+        database.execute(
+            """
+              INSERT INTO [:table schema=cerebrum name=change_log]
+                (tstamp, change_id, subject_entity, change_type_id,
+                 dest_entity)
+              VALUES
+                (:tstamp,
+                 [:sequence schema=cerebrum name=change_log_seq op=next],
+                 :subject, :change_type, :dest)
+            """,
+            {
+                'tstamp': NOW - datetime.timedelta(days=days_ago),
+                'subject': 1,
+                'change_type': int(clconst.group_add),
+                'dest': 2,
+            })
+    _, expected = _python_result(database, db_rules)
+    assert len(expected) >= 29
+
+    recorder = _DeleteRecorder(database)
+    pruner = changelog_prune.SqlPruner(recorder, db_rules, NOW,
+                                       batch_size=7)
+    pruner.run(remove=True, commit=True)
+
+    assert recorder.deletes
+    assert all(len(ids) <= 7 for ids in recorder.deletes)
+    assert recorder.commits == len(recorder.deletes)
+    assert set(i for ids in recorder.deletes for i in ids) == expected
@@ -0,0 +1,189 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.email_snapshot` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import collections
+
+import pytest
+
+from Cerebrum.modules import email_snapshot
+
+
+TARGET_ACCOUNT = 1
+TARGET_DELETED = 2
+TARGET_FORWARD = 3
+
+
+FakeConst = collections.namedtuple(
+    'FakeConst',
+    ('account_namespace', 'email_target_account', 'email_target_deleted'))
+
+
+TABLES = {
+    'email_domain': [
+        {'domain_id': 10, 'domain': 'example.org'},
+        {'domain_id': 11, 'domain': 'example.com'},
+    ],
+    'email_target': [
+        # account foo, two addresses
+        {'target_id': 100, 'target_type': TARGET_ACCOUNT,
+         'target_entity_type': 5, 'target_entity_id': 1,
+         'alias_value': None, 'using_uid': 1, 'server_id': 50},
+        # account bar (expired)
+        {'target_id': 101, 'target_type': TARGET_ACCOUNT,
+         'target_entity_type': 5, 'target_entity_id': 2,
+         'alias_value': None, 'using_uid': 2, 'server_id': 50},
+        # account baz (deleted target)
+        {'target_id': 102, 'target_type': TARGET_DELETED,
+         'target_entity_type': 5, 'target_entity_id': 3,
+         'alias_value': None, 'using_uid': None, 'server_id': 51},
+        # forward target, not owned by an account
+        {'target_id': 103, 'target_type': TARGET_FORWARD,
+         'target_entity_type': None, 'target_entity_id': None,
+         'alias_value': None, 'using_uid': None, 'server_id': None},
+    ],
+    'email_address': [
+        {'address_id': 200, 'local_part': 'foo', 'domain_id': 10,
+         'target_id': 100},
+        {'address_id': 201, 'local_part': 'f.oo', 'domain_id': 11,
+         'target_id': 100},
+        {'address_id': 202, 'local_part': 'bar', 'domain_id': 10,
+         'target_id': 101},
+        {'address_id': 203, 'local_part': 'baz', 'domain_id': 10,
+         'target_id': 102},
+        {'address_id': 204, 'local_part': 'fwd', 'domain_id': 11,
+         'target_id': 103},
+    ],
+    'email_primary_address': [
+        {'target_id': 100, 'address_id': 201},
+        {'target_id': 101, 'address_id': 202},
+        {'target_id': 102, 'address_id': 203},
+    ],
+    'email_forward': [
+        {'target_id': 103, 'forward_to': 'a@example.net', 'enable': 'T'},
+        {'target_id': 103, 'forward_to': 'b@example.net', 'enable': 'F'},
+    ],
+    'email_quota': [
+        {'target_id': 100, 'quota_soft': 80, 'quota_hard': 100},
+        {'target_id': 101, 'quota_soft': 150, 'quota_hard': 200},
+        {'target_id': 102, 'quota_soft': 10, 'quota_hard': 20},
+    ],
+    'account_info': [
+        {'account_id': 1, 'entity_name': 'foo', 'is_expired': False},
+        {'account_id': 2, 'entity_name': 'bar', 'is_expired': True},
+        {'account_id': 3, 'entity_name': 'baz', 'is_expired': False},
+    ],
+}
+
+
+class _FakeDb(object):
+    """ Gives the rows of the first table in each query. """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []
+
+    def query(self, stmt, binds=None, fetchall=True):
+        table = stmt.split('name=', 1)[1].split(']', 1)[0]
+        self.queries.append(table)
+        return list(self.tables[table])
+
+
+@pytest.fixture
+def db():
+    return _FakeDb(TABLES)
+
+
+@pytest.fixture
+def snapshot(db):
+    snapshot = email_snapshot.EmailSnapshot(db)
+    snapshot.const = FakeConst(
+        account_namespace=7,
+        email_target_account=TARGET_ACCOUNT,
+        email_target_deleted=TARGET_DELETED,
+    )
+    return snapshot
+
+
+def test_lazy_load(db, snapshot):
+    assert db.queries == []
+    assert snapshot.get_primary_address(100) == 'f.oo@example.com'
+    assert sorted(db.queries) == ['email_address', 'email_domain',
+                                  'email_primary_address']
+    snapshot.get_primary_address(101)
+    assert len(db.queries) == 3
+
+
+def test_tables(snapshot):
+    assert snapshot.domains[10] == 'example.org'
+    assert snapshot.targets[100].entity_id == 1
+    assert snapshot.targets[103].entity_id is None
+    assert snapshot.addresses[200] == ('foo', 10, 100)
+    assert snapshot.quotas[100].quota_hard == 100
+    assert snapshot.accounts[2].is_expired
+
+
+def test_forwards(snapshot):
+    assert snapshot.forwards[103] == [('a@example.net', True),
+                                      ('b@example.net', False)]
+    assert 100 not in snapshot.forwards
+
+
+def test_target_addresses(snapshot):
+    assert sorted(snapshot.get_target_addresses(100)) == [
+        'f.oo@example.com', 'foo@example.org']
+    assert snapshot.get_target_addresses(999) == []
+
+
+def test_domain_addresses(snapshot):
+    assert sorted(snapshot.get_domain_addresses(11)) == [
+        'f.oo@example.com', 'fwd@example.com']
+
+
+def test_entity_targets(snapshot):
+    assert snapshot.entity_targets[1] == [100]
+    assert None not in snapshot.entity_targets
+
+
+def test_primary_missing(snapshot):
+    assert snapshot.get_primary_address(103) is None
+
+
+def test_uname2mailaddr(snapshot):
+    assert snapshot.get_uname2mailaddr() == {'foo': 'f.oo@example.com'}
+
+
+def test_uname2mailaddr_all(snapshot):
+    result = snapshot.get_uname2mailaddr(filter_expired=False,
+                                         primary_only=False,
+                                         filter_deleted=False)
+    assert result == {
+        'foo': set(('foo@example.org', 'f.oo@example.com')),
+        'bar': set(('bar@example.org',)),
+        'baz': set(('baz@example.org',)),
+    }
+
+
+def test_quota_stats(snapshot):
+    stats = snapshot.get_quota_stats()
+    assert stats[50] == {
+        'total_quota': 300,
+        'min_quota': 100,
+        'max_quota': 200,
+        'total_accounts': 2,
+    }
+    # only account targets are counted
+    assert 51 not in stats
+
+
+def test_quota_stats_no_targets(snapshot):
+    assert snapshot.get_quota_stats_by_server(51) == {
+        'total_quota': None,
+        'min_quota': None,
+        'max_quota': None,
+        'total_accounts': 0,
+    }
@@ -0,0 +1,63 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.log_partitions` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import datetime
+
+import pytest
+
+from Cerebrum.modules import log_partitions
+
+
+@pytest.mark.parametrize(
+    'month, count, expect',
+    [
+        (datetime.date(2024, 1, 1), 0, datetime.date(2024, 1, 1)),
+        (datetime.date(2024, 1, 1), 1, datetime.date(2024, 2, 1)),
+        (datetime.date(2024, 11, 1), 2, datetime.date(2025, 1, 1)),
+        (datetime.date(2024, 1, 1), -1, datetime.date(2023, 12, 1)),
+        (datetime.date(2024, 3, 1), -27, datetime.date(2021, 12, 1)),
+    ],
+)
+def test_add_months(month, count, expect):
+    assert log_partitions.add_months(month, count) == expect
+
+
+def test_get_month():
+    value = datetime.datetime(2024, 2, 29, 23, 59)
+    assert log_partitions.get_month(value) == datetime.date(2024, 2, 1)
+
+
+def test_iter_months():
+    months = list(log_partitions.iter_months(datetime.date(2023, 11, 15),
+                                             datetime.date(2024, 2, 1)))
+    assert months == [
+        datetime.date(2023, 11, 1),
+        datetime.date(2023, 12, 1),
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 2, 1),
+    ]
+
+
+def test_partition_name():
+    month = datetime.date(2024, 3, 1)
+    name = log_partitions.get_partition_name('change_log', month)
+    assert name == 'change_log_p202403'
+    assert log_partitions.parse_partition_name('change_log', name) == month
+
+
+@pytest.mark.parametrize(
+    'name',
+    ['change_log_default', 'audit_log_p202403', 'change_log_p2024031'],
+)
+def test_parse_partition_name_other(name):
+    assert log_partitions.parse_partition_name('change_log', name) is None
+
+
+def test_primary_keys_include_column():
+    for table in log_partitions.LOG_TABLES.values():
+        assert table.column in table.primary_key[1]
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+""" Tests for :mod:`Cerebrum.modules.trait.snapshot` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import pytest
+
+from Cerebrum.modules.EntityTrait import EntityTrait
+from Cerebrum.modules.trait import snapshot
+from Cerebrum.modules.trait import trait_db
+
+
+# Fixtures
+#
+# Note: person traits `trait_{a,b,c,d}` are defined in `conftest`
+
+
+@pytest.fixture
+def person_cls(person_cls):
+    # Ensure that `person_creator` gives persons with the EntityTrait mixin
+    if EntityTrait in person_cls.mro():
+        return person_cls
+
+    class TraitPerson(person_cls, EntityTrait):
+        pass
+
+    return TraitPerson
+
+
+@pytest.fixture
+def persons(person_creator):
+    return [person for person, _ in person_creator(3)]
+
+
+@pytest.fixture
+def traits(database, persons, trait_a, trait_b):
+    """ trait_a for all persons, trait_b for the first person. """
+    for n, person in enumerate(persons):
+        trait_db.set_trait(database, person.entity_id, person.entity_type,
+                           trait_a, numval=n, strval='a-%d' % n)
+    trait_db.set_trait(database, persons[0].entity_id,
+                       persons[0].entity_type, trait_b,
+                       target_id=persons[1].entity_id)
+    return persons
+
+
+#
+# TraitSnapshot tests
+#
+
+
+def test_snapshot_by_code(database, traits, trait_a):
+    snap = snapshot.TraitSnapshot(database, codes=(trait_a,))
+    values = snap.by_code(trait_a)
+    assert values == dict(
+        (p.entity_id, snapshot.TraitValue(None, None, n, 'a-%d' % n))
+        for n, p in enumerate(traits))
+
+
+def test_snapshot_get(database, traits, trait_a, trait_b):
+    snap = snapshot.TraitSnapshot(database, codes=(trait_a, trait_b))
+    first, second = traits[0].entity_id, traits[1].entity_id
+    assert snap.get(trait_a, second).numval == 1
+    assert snap.get(trait_b, first).target_id == second
+    assert snap.get(trait_b, second) is None
+    assert snap.get(trait_b, second, default=0) == 0
+
+
+def test_snapshot_get_missing_code(database, traits, trait_a, trait_b):
+    snap = snapshot.TraitSnapshot(database, codes=(trait_a,))
+    assert not snap.covers(trait_b)
+    with pytest.raises(KeyError):
+        snap.get(trait_b, traits[0].entity_id)
+
+
+def test_snapshot_all_codes(database, traits, trait_a, trait_b):
+    snap = snapshot.TraitSnapshot(database)
+    assert snap.covers(trait_b)
+    result = snap.get_entity_traits(traits[0].entity_id)
+    assert set(result) == set((int(trait_a), int(trait_b)))
+
+
+def test_snapshot_empty_codes(database, traits, trait_a):
+    snap = snapshot.TraitSnapshot(database, codes=())
+    assert snap.traits == {}
+
+
+def test_snapshot_is_a_snapshot(database, traits, trait_a):
+    person = traits[0]
+    snap = snapshot.TraitSnapshot(database, codes=(trait_a,))
+    snap.load()
+    trait_db.set_trait(database, person.entity_id, person.entity_type,
+                       trait_a, numval=17)
+    # not using the cache, so the snapshot doesn't know about the change
+    assert snap.get(trait_a, person.entity_id).numval == 0
+
+
+def test_snapshot_invalidate(database, traits, trait_a):
+    person = traits[0]
+    snap = snapshot.TraitSnapshot(database, codes=(trait_a,))
+    snap.load()
+    trait_db.clear_trait(database, person.entity_id, trait_a)
+    snap.invalidate(person.entity_id)
+    assert snap.get(trait_a, person.entity_id) is None
+    assert person.entity_id not in snap.by_code(trait_a)
+
+
+#
+# trait_cache tests
+#
+
+
+def test_cache_trait_db_invalidates(database, traits, trait_a):
+    person = traits[1]
+    with snapshot.trait_cache(database, codes=(trait_a,)) as cache:
+        assert snapshot.get_cache(database) is cache
+        assert cache.get(trait_a, person.entity_id).numval == 1
+        trait_db.set_trait(database, person.entity_id, person.entity_type,
+                           trait_a, numval=17)
+        assert cache.get(trait_a, person.entity_id).numval == 17
+    assert snapshot.get_cache(database) is None
+
+
+def test_cache_nested(database):
+    with snapshot.trait_cache(database):
+        with pytest.raises(RuntimeError):
+            with snapshot.trait_cache(database):
+                pass
+
+
+def test_cache_get_trait(database, person_cls, traits, trait_a):
+    person = person_cls(database)
+    person.find(traits[2].entity_id)
+    expected = person.get_trait(trait_a)
+    with snapshot.trait_cache(database, codes=(trait_a,)):
+        person.clear()
+        person.find(traits[2].entity_id)
+        assert person.get_trait(trait_a) == expected
+
+
+def test_cache_get_traits(database, person_cls, traits, trait_a, trait_b):
+    person = person_cls(database)
+    person.find(traits[0].entity_id)
+    expected = dict(person.get_traits())
+    with snapshot.trait_cache(database):
+        person.clear()
+        person.find(traits[0].entity_id)
+        assert person.get_traits() == expected
+
+
+def test_cache_populate_invalidates(database, person_cls, traits, trait_a):
+    person = person_cls(database)
+    with snapshot.trait_cache(database, codes=(trait_a,)):
+        person.find(traits[0].entity_id)
+        person.populate_trait(trait_a, numval=17)
+        person.write_db()
+
+        person.clear()
+        person.find(traits[0].entity_id)
+        assert person.get_trait(trait_a)['numval'] == 17
+
+
+def test_cache_delete_invalidates(database, person_cls, traits, trait_a):
+    person = person_cls(database)
+    with snapshot.trait_cache(database, codes=(trait_a,)):
+        person.find(traits[0].entity_id)
+        person.delete_trait(trait_a)
+
+        person.clear()
+        person.find(traits[0].entity_id)
+        assert person.get_trait(trait_a) is None
@@ -0,0 +1,61 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.virthome.LDIFHelper` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from Cerebrum.modules.virthome.LDIFHelper import collect_memberships
+
+
+GROUP_DNS = {
+    1: 'cn=foo,ou=groups',
+    2: 'cn=bar,ou=groups',
+    3: 'cn=baz,ou=groups',
+}
+
+USER_DNS = {
+    10: 'uid=a,ou=users',
+    11: 'uid=b,ou=users',
+    12: 'uid=c,ou=users',
+}
+
+
+def test_collect_memberships():
+    memberships = [(1, 10), (1, 12), (2, 10), (2, 11)]
+    group_members, member_of = collect_memberships(memberships,
+                                                   GROUP_DNS, USER_DNS)
+    assert group_members == {
+        1: ('uid=a,ou=users', 'uid=c,ou=users'),
+        2: ('uid=a,ou=users', 'uid=b,ou=users'),
+    }
+    assert member_of == {
+        10: ['cn=foo,ou=groups', 'cn=bar,ou=groups'],
+        11: ['cn=bar,ou=groups'],
+        12: ['cn=foo,ou=groups'],
+    }
+
+
+def test_collect_memberships_not_exported():
+    # group 4 and user 13 are not exported
+    memberships = [(4, 10), (1, 13), (3, 12)]
+    group_members, member_of = collect_memberships(memberships,
+                                                   GROUP_DNS, USER_DNS)
+    assert group_members == {3: ('uid=c,ou=users',)}
+    assert member_of == {12: ['cn=baz,ou=groups']}
+
+
+def test_collect_memberships_empty():
+    assert collect_memberships(iter(()), GROUP_DNS, USER_DNS) == ({}, {})
+
+
+def test_collect_memberships_shared_dns():
+    memberships = [(1, 10), (2, 10), (3, 10)]
+    group_members, member_of = collect_memberships(memberships,
+                                                   GROUP_DNS, USER_DNS)
+    for members in group_members.values():
+        assert members[0] is USER_DNS[10]
+    for group_id, group_dn in zip((1, 2, 3), member_of[10]):
+        assert group_dn is GROUP_DNS[group_id]
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for collecting memberships in the virthome LDIF export.
+
+Compares building group members and uioMemberOf values from one membership
+stream with the previous approach, which fetched members for each group
+separately, and formatted a new DN string for every membership.  Uses a
+synthetic, in-memory virthome dataset.  Run with:
+
+    CEREBRUM_BENCHMARK=1 pytest -s test_ldif_helper_benchmark.py
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import random
+import time
+
+import pytest
+
+from Cerebrum.modules.virthome.LDIFHelper import collect_memberships
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+NUM_USERS = 50000
+NUM_GROUPS = 5000
+NUM_MEMBERSHIPS = 250000
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CEREBRUM_BENCHMARK'),
+                                reason='CEREBRUM_BENCHMARK not set')
+
+
+def _uname2dn(uname):
+    return ",".join(("uid=" + uname, "ou=users,dc=virthome"))
+
+
+def _gname2dn(gname):
+    return ",".join(("cn=" + gname, "ou=groups,dc=virthome"))
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    """ A deterministic set of users, groups and memberships. """
+    rnd = random.Random(4711)
+    users = dict((100000 + i, 'user{:d}@webid.example.org'.format(i))
+                 for i in range(NUM_USERS))
+    groups = dict((10000 + i, 'group{:d}'.format(i))
+                  for i in range(NUM_GROUPS))
+    user_ids = sorted(users)
+    group_ids = sorted(groups)
+    memberships = set()
+    while len(memberships) < NUM_MEMBERSHIPS:
+        memberships.add((rnd.choice(group_ids), rnd.choice(user_ids)))
+    memberships = list(memberships)
+    rnd.shuffle(memberships)
+    return users, groups, memberships
+
+
+def _per_group(users, groups, memberships):
+    """ The old approach: one member lookup per group. """
+    by_group = {}
+    for group_id, account_id in memberships:
+        by_group.setdefault(group_id, []).append(account_id)
+
+    member_of = {}
+    for group_id, account_id in memberships:
+        member_of.setdefault(account_id, []).append(
+            _gname2dn(groups[group_id]))
+
+    group_members = {}
+    for group_id in groups:
+        members = tuple(_uname2dn(users[account_id])
+                        for account_id in by_group.get(group_id, ())
+                        if account_id in users)
+        if members:
+            group_members[group_id] = members
+    return group_members, member_of
+
+
+def _single_pass(users, groups, memberships):
+    """ The new approach: one ordered membership stream. """
+    group_dns = dict((k, _gname2dn(v)) for k, v in groups.items())
+    user_dns = dict((k, _uname2dn(v)) for k, v in users.items())
+    return collect_memberships(iter(memberships), group_dns, user_dns)
+
+
+def _measure(func, *args):
+    if tracemalloc:
+        tracemalloc.start()
+    start = time.time()
+    result = func(*args)
+    duration = time.time() - start
+    peak = None
+    if tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, duration, peak
+
+
+def _format(duration, peak):
+    rate = NUM_MEMBERSHIPS / duration if duration else float('inf')
+    text = '{:.3f}s ({:.0f} memberships/s)'.format(duration, rate)
+    if peak is not None:
+        text += ', peak {:.1f} MiB'.format(peak / 1024 / 1024)
+    return text
+
+
+def test_benchmark_memberships(dataset):
+    users, groups, memberships = dataset
+    old, old_time, old_peak = _measure(_per_group, users, groups,
+                                       memberships)
+    new, new_time, new_peak = _measure(_single_pass, users, groups,
+                                       memberships)
+
+    print()
+    print('memberships: {:d}'.format(len(memberships)))
+    # the per group approach also needs one member query per group
+    print('per group:   {:d} queries, '.format(len(groups) + 1) +
+          _format(old_time, old_peak))
+    print('single pass: 1 query, ' + _format(new_time, new_peak))
+
+    old_members, old_member_of = old
+    new_members, new_member_of = new
+    assert (dict((k, sorted(v)) for k, v in old_members.items()) ==
+            dict((k, sorted(v)) for k, v in new_members.items()))
+    assert (dict((k, sorted(v)) for k, v in old_member_of.items()) ==
+            dict((k, sorted(v)) for k, v in new_member_of.items()))
+    if old_peak is not None:
+        # shared DN strings should use less memory than one copy per
+        # membership
+        assert new_peak < old_peak
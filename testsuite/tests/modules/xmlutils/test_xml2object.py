@@ -0,0 +1,113 @@
+# encoding: utf-8
+""" Tests for mod:`Cerebrum.modules.xmlutils.xml2object` """
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+import io
+
+import pytest
+
+from Cerebrum.modules.xmlutils import xml2object
+
+
+XML = """<?xml version="1.0" encoding="utf-8"?>
+<data>
+  <header created="2024-01-01"/>
+  <people>
+    <person id="1"><name>Foo</name></person>
+    <person id="2"><name>Bar</name></person>
+    <junk><person id="3"><name>Baz</name></person></junk>
+    <person id="bad"><name>Error</name></person>
+    <person id="4"><name>Quux</name></person>
+  </people>
+</data>
+"""
+
+
+@pytest.fixture
+def xml_file(tmpdir):
+    filename = str(tmpdir.join('data.xml'))
+    with io.open(filename, 'w', encoding='utf-8') as f:
+        f.write(XML)
+    return filename
+
+
+PEOPLE = 5000
+
+
+@pytest.fixture
+def large_xml_file(tmpdir):
+    filename = str(tmpdir.join('large.xml'))
+    with io.open(filename, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<data><people>\n')
+        for i in range(PEOPLE):
+            f.write('<person id="%d"><name>n%d</name></person>\n' % (i, i))
+        f.write('</people></data>\n')
+    return filename
+
+
+class _Person2Dict(xml2object.XMLEntity2Object):
+
+    def next_object(self, element):
+        return {
+            'id': int(element.get('id')),
+            'name': element.find('name').text,
+        }
+
+
+class _DataGetter(xml2object.XMLDataGetter):
+
+    def iter_person(self):
+        return self._make_iterator('person', _Person2Dict)
+
+
+def test_entity_iterator(xml_file):
+    ids = [e.get('id') for e in
+           xml2object.XMLEntityIterator(xml_file, 'person')]
+    assert ids == ['1', '2', '3', 'bad', '4']
+
+
+def test_entity_iterator_releases_elements(large_xml_file):
+    it = xml2object.XMLEntityIterator(large_xml_file, 'person')
+    max_size = 0
+    for count, element in enumerate(it, 1):
+        assert element.find('name') is not None
+        # only the current element, and whatever the parser has read ahead,
+        # should be attached to the tree
+        root, people = it._open
+        assert len(root) == 1
+        assert element in list(people)
+        assert list(people)[0] is element
+        max_size = max(max_size, len(people))
+    assert count == PEOPLE
+    # the read-ahead is limited by the parser buffer, not the file size
+    assert max_size < PEOPLE // 5
+
+
+def test_entity_iterator_nested(xml_file):
+    tags = [e.tag for e in xml2object.XMLEntityIterator(xml_file, 'name')]
+    assert tags == ['name'] * 5
+
+
+@pytest.mark.parametrize('fetchall', (True, False))
+def test_data_getter(xml_file, fetchall):
+    getter = _DataGetter(xml_file, None, fetchall=fetchall)
+    assert [p['id'] for p in getter.iter_person()] == [1, 2, 3, 4]
+
+
+def test_data_getter_parallel(large_xml_file):
+    getter = _DataGetter(large_xml_file, None, fetchall=False, processes=2)
+    it = getter.iter_person()
+    assert isinstance(it, xml2object.ParallelEntity2Object)
+    it.chunksize = 7
+    people = list(it)
+    assert people == [{'id': i, 'name': 'n%d' % i} for i in range(PEOPLE)]
+
+
+def test_data_getter_parallel_errors(xml_file):
+    getter = _DataGetter(xml_file, None, fetchall=False, processes=2)
+    assert [p['id'] for p in getter.iter_person()] == [1, 2, 3, 4]
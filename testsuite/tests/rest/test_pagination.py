@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Tests for api.pagination """
+
+from __future__ import unicode_literals
+
+import pytest
+
+from Cerebrum.rest.api import pagination
+
+
+def test_cursor_roundtrip():
+    cursor = pagination.encode_cursor((3, 14))
+    assert pagination.decode_cursor(cursor) == (3, 14)
+    assert pagination.Cursor(size=2)(cursor) == (3, 14)
+
+
+@pytest.mark.parametrize(
+    'token',
+    ['', 'x', '!!!', 'W10', 'WyJhIl0', 'e30', 'W3RydWVd'],
+)
+def test_cursor_invalid(token):
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(token)
+
+
+def test_cursor_size():
+    with pytest.raises(ValueError):
+        pagination.Cursor(size=2)(pagination.encode_cursor((1,)))
+
+
+def test_paginate_last_page():
+    rows = [{'id': 1}, {'id': 2}]
+    page, cursor = pagination.paginate(rows, 2, lambda r: (r['id'],))
+    assert page == rows
+    assert cursor is None
+
+
+def test_paginate_next_page():
+    rows = [{'id': 1}, {'id': 2}, {'id': 3}]
+    page, cursor = pagination.paginate(rows, 2, lambda r: (r['id'],))
+    assert page == rows[:2]
+    assert pagination.decode_cursor(cursor) == (2,)
+
+
+def test_iter_pages():
+    calls = []
+
+    def search(after=None, limit=None):
+        calls.append(after)
+        start = after[0] if after else 0
+        return [{'id': i} for i in range(start + 1, 8)][:limit]
+
+    rows = list(pagination.iter_pages(search, lambda r: (r['id'],),
+                                      chunk_size=3))
+    assert [r['id'] for r in rows] == list(range(1, 8))
+    assert calls == [None, (3,), (6,)]